@@ -4,6 +4,20 @@ from .core.config import Config
 from .core.db import db
 from .core.mail import mail
 from .core.logger import setup_logging
+from .core.session_store import init_session_store
+from .core.assets import init_assets
+from .core.imagens_login import init_imagens_login
+from .core.versionamento import init_versionamento
+from .core.serializacao import init_serializacao
+from .core.cache_respostas import init_cache_respostas
+from .core.compressao import init_compressao
+from .core.replica import configurar_replica, init_replica
+from .services.ativos_service import init_projecao_ativos
+from .services.referencias_service import init_cache_referencias
+from .services.auditoria_service import init_busca_auditoria
+from .services.inventario_agente_service import init_ingestao_agentes
+from .services.snapshot_inventario_service import init_snapshot_inventario
+from .services.dashboard_tempo_real_service import init_dashboard_tempo_real
 
 def register_blueprints(app: Flask):
     from .api.auth import bp as auth_bp
@@ -14,6 +28,7 @@ def register_blueprints(app: Flask):
     from .api.dashboard import bp as dashboard_bp
     from .api.setores import bp as setores_bp
     from .api.health import bp as health_bp
+    from .api.agentes import bp as agentes_bp
     app.register_blueprint(auth_bp, url_prefix="/auth")
     app.register_blueprint(ativos_bp, url_prefix="/api/ativos")
     app.register_blueprint(colaboradores_bp, url_prefix="/api/colaboradores")
@@ -22,6 +37,7 @@ def register_blueprints(app: Flask):
     app.register_blueprint(dashboard_bp, url_prefix="/api/dashboard")
     app.register_blueprint(setores_bp, url_prefix="/api/setores")
     app.register_blueprint(health_bp, url_prefix="/api")
+    app.register_blueprint(agentes_bp, url_prefix="/api/agentes")
 
 def create_app(config_class=Config):
     app = Flask(__name__, template_folder="templates", static_folder="static")
@@ -31,10 +47,28 @@ def create_app(config_class=Config):
     # Logging
     setup_logging(level=app.config["LOG_LEVEL"], log_file=app.config["LOG_FILE"])
 
+    configurar_replica(app)
     db.init_app(app)
     mail.init_app(app)
+    init_session_store(app)
+    init_serializacao(app)
+    init_compressao(app)
+    init_versionamento(app)
+    init_replica(app)
+    init_cache_respostas(app)
+    init_projecao_ativos(app)
+    init_cache_referencias(app)
+    init_busca_auditoria(app)
+    init_ingestao_agentes(app)
+    init_snapshot_inventario(app)
+    init_dashboard_tempo_real(app)
 
     register_blueprints(app)
+    init_assets(app)
+    init_imagens_login(app)
+
+    from .cli import register_commands
+    register_commands(app)
     
     # Inicializar parâmetros padrão do sistema
     with app.app_context():
@@ -58,7 +92,8 @@ def create_app(config_class=Config):
     # Middleware de proteção - exige autenticação para páginas web, mas não para APIs
     @app.before_request
     def protect_views():
-        from datetime import datetime, timedelta
+        from datetime import timedelta
+        from .core.session_store import tempo_inativo
         
         # Rotas que não precisam de autenticação
         public_paths = ["/auth/login", "/auth/random-login-image", "/login", "/static", "/api"]
@@ -75,24 +110,20 @@ def create_app(config_class=Config):
             
         # Verificar timeout por inatividade (apenas para páginas web, não APIs)
         if not request.path.startswith("/api"):
-            last_activity = session.get("last_activity")
-            if last_activity:
-                try:
-                    last_activity_time = datetime.fromisoformat(last_activity)
-                    current_time = datetime.now()
-                    inactive_time = current_time - last_activity_time
-                    
-                    # 1 hora de timeout por inatividade
-                    if inactive_time >= timedelta(hours=1):
-                        app.logger.info(f"Sessão expirada por inatividade para usuário {user.get('username')} - {inactive_time}")
-                        session.clear()
-                        return redirect("/login")
-                        
-                except (ValueError, TypeError):
-                    # Se houver erro no timestamp, limpar sessão
-                    app.logger.warning(f"Timestamp inválido na sessão para usuário {user.get('username')}")
+            try:
+                inactive_time = tempo_inativo(session)
+                
+                # 1 hora de timeout por inatividade
+                if inactive_time is not None and inactive_time >= timedelta(hours=1):
+                    app.logger.info(f"Sessão expirada por inatividade para usuário {user.get('username')} - {inactive_time}")
                     session.clear()
                     return redirect("/login")
+                    
+            except (ValueError, TypeError):
+                # Se houver erro no timestamp, limpar sessão
+                app.logger.warning(f"Timestamp inválido na sessão para usuário {user.get('username')}")
+                session.clear()
+                return redirect("/login")
 
 
     @app.get("/login")
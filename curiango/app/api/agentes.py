@@ -0,0 +1,68 @@
+from flask import Blueprint, request, jsonify, current_app
+from ..core.auth import admin_required
+from ..services.inventario_agente_service import ErroRelatorio, normalizar_relatorio, obter_ingestao
+import hmac
+import logging
+
+bp = Blueprint("agentes", __name__)
+logger = logging.getLogger("app")
+
+MAX_RELATORIOS_POR_REQUISICAO = 1000
+
+
+def _token_valido():
+    """Agentes se autenticam com o token compartilhado AGENT_TOKEN (header X-Agent-Token ou Bearer)"""
+    esperado = current_app.config.get("AGENT_TOKEN") or ""
+    recebido = request.headers.get("X-Agent-Token") or ""
+    autorizacao = request.headers.get("Authorization", "")
+    if not recebido and autorizacao.startswith("Bearer "):
+        recebido = autorizacao[len("Bearer "):]
+    return bool(esperado) and hmac.compare_digest(recebido.encode(), esperado.encode())
+
+
+@bp.post("/inventario")
+def receber_inventario():
+    """
+    Check-in do agente: um relatório {"patrimonio" ou "serie", "hostname",
+    "so_versao", "processador", "memoria", "hd"} ou {"relatorios": [...]}.
+    Responde 200 quando nada mudou e 202 quando há relatório a gravar (em lote).
+    """
+    if not current_app.config.get("AGENT_TOKEN"):
+        return jsonify(error="Ingestão de agentes não configurada"), 503
+    if not _token_valido():
+        logger.warning(f"Relatório de agente com token inválido de {request.remote_addr}")
+        return jsonify(error="Unauthorized", message="Token de agente inválido"), 401
+    ingestao = obter_ingestao()
+    if ingestao is None:
+        return jsonify(error="Ingestão de agentes indisponível", detail="Tabela inventario_agente não encontrada"), 503
+
+    data = request.get_json(silent=True)
+    relatorios = data.get("relatorios") if isinstance(data, dict) and "relatorios" in data else [data]
+    if not isinstance(relatorios, list) or not relatorios:
+        return jsonify(error="Informe um relatório ou a lista 'relatorios'"), 400
+    if len(relatorios) > MAX_RELATORIOS_POR_REQUISICAO:
+        return jsonify(error="Carga muito grande", detail=f"Máximo de {MAX_RELATORIOS_POR_REQUISICAO} relatórios por requisição"), 413
+
+    ip_address = (request.environ.get('HTTP_X_FORWARDED_FOR', request.environ.get('REMOTE_ADDR')) or "")[:45] or None
+    resultados = []
+    for dados in relatorios:
+        try:
+            resultados.append({"status": ingestao.receber(normalizar_relatorio(dados, ip_address))})
+        except ErroRelatorio as e:
+            resultados.append({"status": "erro", "mensagem": str(e)})
+
+    pendentes = sum(1 for r in resultados if r["status"] == "pendente")
+    erros = sum(1 for r in resultados if r["status"] == "erro")
+    if erros == len(resultados):
+        return jsonify(error="Relatório inválido", resultados=resultados), 400
+    return jsonify({"resultados": resultados, "pendentes": pendentes, "erros": erros}), 202 if pendentes else 200
+
+
+@bp.get("/inventario/estatisticas")
+@admin_required
+def estatisticas_inventario():
+    """Contadores da ingestão neste worker"""
+    ingestao = obter_ingestao()
+    if ingestao is None:
+        return jsonify(error="Ingestão de agentes indisponível"), 503
+    return jsonify(ingestao.situacao())
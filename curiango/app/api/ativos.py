@@ -1,14 +1,23 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, abort, current_app
 from ..core.db import db
+from ..core.replica import leitura_replica
 from ..core.auth import api_auth_required, admin_required
-from ..models.dominio import Ativo, Manutencao, Computador, Smartphone, ChipSim, Marca, Operadora, Colaborador, UnidadeNegocio, HistoricoAlocacao, LogAuditoria, NotaAtivo
+from ..core.http_cache import conditional_get
+from ..models.dominio import Ativo, Manutencao, Computador, Smartphone, ChipSim, Colaborador, HistoricoAlocacao, NotaAtivo
 from ..services.transferencia_service import transferir_ativo, remover_alocacao
 from ..services.auditoria_service import log_audit, obter_descricao_ativo
+from ..services.ativos_service import fonte_projecao, consultar_projecao, obter_projecao
+from ..services.historico_service import historico_ativo, ler_cursor
+from ..services.custodia_service import MAX_CONSULTAS, ErroConsulta, consultas_da_requisicao, custodia, janela
+from ..services.sincronizacao_ativos_service import sincronizar_ativos
+from ..services.referencias_service import registro_referencia
 from ..core.auth import get_username, get_user_full_name
 from ..schemas.ativos import TransferenciaSchema, ManutencaoCreateSchema
 from datetime import datetime
+from werkzeug.exceptions import HTTPException
 import logging
 from ..core.timezone_utils import to_local_isoformat
+from ..core.serializacao import compilar_serializador
 
 bp = Blueprint("ativos", __name__)
 logger = logging.getLogger("app")
@@ -23,175 +32,102 @@ def parse_date_or_none(s):
             continue
     return None
 
+def _nome_ou_id(nome, registro_id):
+    if not registro_id:
+        return None
+    return nome or f"ID #{registro_id}"
+
+def _valor(valor):
+    return float(valor) if valor else 0.0
+
+# Campos comuns a listagem e detalhe: (chave, coluna da projeção[, conversor])
+_CAMPOS_BASE = (
+    ("id", "ativo_id"),
+    ("tipo", "tipo"),
+    ("condicao", "condicao"),
+    ("usuario_atual_id", "usuario_atual_id"),
+    ("usuario_atual_nome", ("usuario_atual_nome", "usuario_atual_id"), _nome_ou_id),
+    ("unidade_negocio_id", "unidade_negocio_id"),
+    ("unidade_negocio_nome", ("unidade_negocio_nome", "unidade_negocio_id"), _nome_ou_id),
+    ("valor", "valor", _valor),
+)
+
+# Campos específicos por tipo exibidos nas abas do estoque
+_CAMPOS_LISTAGEM = {
+    "smartphone": (
+        ("modelo", "modelo"),
+        ("marca_nome", "marca_nome"),
+        ("imei_slot", "imei_slot"),
+        ("acessorios", "acessorios"),
+    ),
+    "notebook": (
+        ("modelo", "modelo"),
+        ("marca_nome", "marca_nome"),
+        ("patrimonio", "patrimonio"),
+        ("processador", "processador"),
+        ("memoria", "memoria"),
+        ("acessorios", "acessorios"),
+        ("so", "so_versao"),
+    ),
+    "desktop": (
+        ("modelo", "modelo"),
+        ("fabricante", "marca_nome"),
+        ("marca_nome", "marca_nome"),
+        ("processador", "processador"),
+        ("cpu", "processador"),  # alias
+        ("memoria", "memoria"),
+        ("hd", "hd"),
+        ("disco", "hd"),  # alias
+        ("serie", "serie"),
+        ("so_versao", "so_versao"),
+        ("patrimonio", "patrimonio"),
+        ("acessorios", "acessorios"),
+        ("tipo_computador", "tipo_computador"),
+    ),
+    "chip_sim": (
+        ("numero", "numero"),
+        ("operadora_nome", "operadora_nome"),
+        ("tipo", "tipo_chip"),  # a aba de chips exibe o tipo do chip (voz/dados)
+    ),
+}
+
+def _dados_base(p):
+    """Campos comuns a listagem e detalhe, a partir de uma linha da projeção"""
+    return compilar_serializador(_CAMPOS_BASE)(p)
+
+def _serializadores_listagem(colunas):
+    """Serializador por tipo (base + campos do subtipo) para linhas com as colunas informadas"""
+    return {tipo: compilar_serializador(_CAMPOS_BASE + campos, colunas) for tipo, campos in _CAMPOS_LISTAGEM.items()}
+
 @bp.get("")
+@leitura_replica
 def listar_ativos():
     tipo = request.args.get("tipo")
     q = request.args.get("q", "").strip()
     status = request.args.get("status", "").strip()
-    
-    # Query base simples
-    query = db.session.query(Ativo)
 
-    # Joins conforme o tipo
-    if tipo == 'smartphone':
-        query = query.outerjoin(Smartphone, Ativo.id == Smartphone.ativo_id)
-        query = query.outerjoin(Marca, Smartphone.marca_id == Marca.id)
-    elif tipo == 'notebook':
-        query = query.outerjoin(Computador, Ativo.id == Computador.ativo_id)
-        query = query.outerjoin(Marca, Computador.marca_id == Marca.id)
-    elif tipo == 'chip_sim':
-        query = query.outerjoin(ChipSim, Ativo.id == ChipSim.ativo_id)
-        query = query.outerjoin(Operadora, ChipSim.operadora_id == Operadora.id)
-    
-    # Filtro por tipo
+    # Leitura de tabela única na projeção (subtipo, marca/operadora, usuário e unidade já resolvidos)
+    p = fonte_projecao().c
+    criterios = []
     if tipo:
-        query = query.filter(Ativo.tipo == tipo)
-    
-    # Filtro por status/condição
+        criterios.append(p.tipo == tipo)
     if status:
-        query = query.filter(Ativo.condicao == status)
-    
-    # Busca textual
+        criterios.append(p.condicao == status)
     if q:
-        if tipo == 'smartphone':
-            query = query.filter(db.or_(
-                Smartphone.modelo.ilike(f'%{q}%'),
-                Marca.nome.ilike(f'%{q}%'),
-                Smartphone.imei_slot1.ilike(f'%{q}%')
-            ))
-        elif tipo == 'notebook':
-            query = query.filter(db.or_(
-                Computador.modelo.ilike(f'%{q}%'),
-                Marca.nome.ilike(f'%{q}%'),
-                Computador.patrimonio.ilike(f'%{q}%'),
-                Computador.serie.ilike(f'%{q}%')
-            ))
-        elif tipo == 'chip_sim':
-            query = query.filter(db.or_(
-                ChipSim.numero.ilike(f'%{q}%'),
-                Operadora.nome.ilike(f'%{q}%')
-            ))
-    
+        # busca contém modelo, marca, IMEI, patrimônio, série, processador, número e operadora
+        criterios.append(p.busca.like(f"%{q.lower()}%"))
+
     # Limita resultados por performance
-    ativos = query.limit(500).all()
-    
-    resultado = []
-    
-    for ativo in ativos:
-        # Buscar colaborador separadamente se necessário
-        usuario_atual_nome = None
-        if ativo.usuario_atual_id:
-            colaborador = db.session.query(Colaborador).filter_by(id=ativo.usuario_atual_id).first()
-            usuario_atual_nome = colaborador.nome if colaborador else f"ID #{ativo.usuario_atual_id}"
-        
-        # Buscar unidade de negócio
-        unidade_negocio_nome = None
-        if ativo.unidade_negocio_id:
-            unidade = db.session.query(UnidadeNegocio).filter_by(id=ativo.unidade_negocio_id).first()
-            unidade_negocio_nome = unidade.nome if unidade else f"ID #{ativo.unidade_negocio_id}"
-        
-        # Dados base
-        item = {
-            "id": ativo.id,
-            "tipo": ativo.tipo,
-            "condicao": ativo.condicao,
-            "usuario_atual_id": ativo.usuario_atual_id,
-            "usuario_atual_nome": usuario_atual_nome,
-            "unidade_negocio_id": ativo.unidade_negocio_id,
-            "unidade_negocio_nome": unidade_negocio_nome,
-            "valor": float(ativo.valor) if ativo.valor else 0.0
-        }
-        
-        # Dados específicos por tipo
-        if ativo.tipo == "smartphone":
-            smartphone = db.session.query(Smartphone).filter_by(ativo_id=ativo.id).first()
-            if smartphone:
-                marca = db.session.query(Marca).filter_by(id=smartphone.marca_id).first()
-                item.update({
-                    "modelo": smartphone.modelo,
-                    "marca_nome": marca.nome if marca else None,
-                    "imei_slot": smartphone.imei_slot,
-                    "acessorios": smartphone.acessorios
-                })
-        elif ativo.tipo == "notebook":
-            computador = db.session.query(Computador).filter_by(ativo_id=ativo.id).first()
-            if computador:
-                marca = db.session.query(Marca).filter_by(id=computador.marca_id).first()
-                item.update({
-                    "modelo": computador.modelo,
-                    "marca_nome": marca.nome if marca else None,
-                    "patrimonio": computador.patrimonio,
-                    "processador": computador.processador,
-                    "memoria": computador.memoria,
-                    "acessorios": computador.acessorios,
-                    "so": computador.so_versao
-                })
-        elif ativo.tipo == "chip_sim":
-            chip = db.session.query(ChipSim).filter_by(ativo_id=ativo.id).first()
-            if chip:
-                operadora = db.session.query(Operadora).filter_by(id=chip.operadora_id).first()
-                item.update({
-                    "numero": chip.numero,
-                    "operadora_nome": operadora.nome if operadora else None,
-                    "tipo": chip.tipo
-                })
+    linhas = consultar_projecao(*criterios, limit=500)
+
+    colunas = tuple(p.keys())
+    serializadores = _serializadores_listagem(colunas)
+    base = compilar_serializador(_CAMPOS_BASE, colunas)
+    resultado = [
+        serializadores.get(linha.tipo, base)(linha) if linha.subtipo_id else base(linha)
+        for linha in linhas
+    ]
 
-        elif ativo.tipo in ["notebook", "desktop"]:
-            computador = db.session.query(Computador).filter_by(ativo_id=ativo.id).first()
-            if computador:
-                marca = db.session.query(Marca).filter_by(id=computador.marca_id).first()
-                item.update({
-                    "modelo": computador.modelo,
-                    "fabricante": marca.nome if marca else None,
-                    "marca_nome": marca.nome if marca else None,
-                    "processador": computador.processador,
-                    "cpu": computador.processador,  # alias
-                    "memoria": computador.memoria,
-                    "hd": computador.hd,
-                    "disco": computador.hd,  # alias
-                    "serie": computador.serie,
-                    "so_versao": computador.so_versao,
-                    "patrimonio": computador.patrimonio,
-                    # "monitor": computador.monitor,  # Campo não existe no banco
-                    "acessorios": computador.acessorios,
-                    "tipo_computador": computador.tipo_computador
-                })
-                
-                # Filtro de busca para computadores
-                if q:
-                    busca_lower = q.lower()
-                    if not any([
-                        busca_lower in (computador.modelo or "").lower(),
-                        busca_lower in (marca.nome if marca else "").lower(),
-                        busca_lower in (computador.processador or "").lower(),
-                        busca_lower in (computador.serie or "").lower(),
-                        busca_lower in (computador.patrimonio or "").lower()
-                    ]):
-                        continue
-        
-        elif ativo.tipo == "chip_sim":
-            chip = db.session.query(ChipSim).filter_by(ativo_id=ativo.id).first()
-            if chip:
-                operadora = db.session.query(Operadora).filter_by(id=chip.operadora_id).first()
-                item.update({
-                    "numero": chip.numero,
-                    "operadora_id": chip.operadora_id,
-                    "operadora": operadora.nome if operadora else None,
-                    "operadora_nome": operadora.nome if operadora else None,
-                    # "condicao_chip": chip.condicao  # Campo não existe - usa condição do ativo pai
-                })
-                
-                # Filtro de busca para chips
-                if q:
-                    busca_lower = q.lower()
-                    if not any([
-                        busca_lower in (chip.numero or "").lower(),
-                        busca_lower in (operadora.nome if operadora else "").lower()
-                    ]):
-                        continue
-        
-        resultado.append(item)
-    
     return jsonify(resultado)
 
 @bp.post("")
@@ -313,77 +249,96 @@ def criar_ativo():
         logger.exception("Erro ao criar ativo")
         return jsonify(error="Erro ao criar ativo", detail=str(e)), 500
 
+@bp.post("/sync")
+@admin_required
+def sincronizar():
+    """
+    Sincronização em lote com sistemas externos (MDM, compras):
+    {"origem": "mdm", "simular": false, "ativos": [{"tipo": "notebook", "patrimonio": ..., ...}]}.
+    Cada ativo é localizado pela chave natural (patrimonio, imei ou numero);
+    só os campos enviados e alterados são gravados.
+    """
+    data = request.get_json(silent=True) or {}
+    itens = data.get("ativos")
+    if not isinstance(itens, list) or not itens:
+        return jsonify(error="Informe a lista 'ativos'"), 400
+    limite = current_app.config.get("ASSET_SYNC_MAX_ITEMS", 20000)
+    if len(itens) > limite:
+        return jsonify(error="Carga muito grande", detail=f"Máximo de {limite} ativos por requisição"), 413
+    simular = bool(data.get("simular"))
+    origem = str(data.get("origem") or "api")[:50]
+
+    try:
+        resultado = sincronizar_ativos(itens, simular=simular)
+    except Exception as e:
+        db.session.rollback()
+        logger.exception("Erro na sincronização de ativos")
+        return jsonify(error="Erro na sincronização de ativos", detail=str(e)), 500
+
+    contagem = resultado["contagem"]
+    if not simular and (contagem["criado"] or contagem["atualizado"]):
+        log_audit(
+            acao="UPDATE",
+            tabela="ativos",
+            registro_id=None,
+            descricao=f"Sincronização de ativos ({origem}): {contagem['criado']} criados, {contagem['atualizado']} atualizados",
+            dados_novos={"origem": origem, **contagem}
+        )
+    logger.info(f"Sincronização de ativos ({origem}{', simulada' if simular else ''}): {contagem}")
+    return jsonify({
+        "criados": contagem["criado"],
+        "atualizados": contagem["atualizado"],
+        "inalterados": contagem["inalterado"],
+        "erros": contagem["erro"],
+        "simulado": resultado["simulado"],
+        "itens": resultado["itens"],
+        "estatisticas": resultado["estatisticas"],
+    })
+
 @bp.get("/<int:ativo_id>")
+@conditional_get("ativos", "smartphones", "computadores", "chips_sim", "marcas", "operadoras", "colaboradores", "unidades_negocio")
 def obter_ativo(ativo_id):
-    a = Ativo.query.get_or_404(ativo_id)
-    
-    # Buscar colaborador separadamente se necessário
-    usuario_atual_nome = None
-    if a.usuario_atual_id:
-        colaborador = db.session.query(Colaborador).filter_by(id=a.usuario_atual_id).first()
-        usuario_atual_nome = colaborador.nome if colaborador else f"ID #{a.usuario_atual_id}"
-    
-    # Buscar unidade de negócio
-    unidade_negocio_nome = None
-    if a.unidade_negocio_id:
-        unidade = db.session.query(UnidadeNegocio).filter_by(id=a.unidade_negocio_id).first()
-        unidade_negocio_nome = unidade.nome if unidade else f"ID #{a.unidade_negocio_id}"
-    
-    # Dados base
-    resultado = {
-        "id": a.id,
-        "tipo": a.tipo,
-        "condicao": a.condicao,
-        "usuario_atual_id": a.usuario_atual_id,
-        "usuario_atual_nome": usuario_atual_nome,
-        "unidade_negocio_id": a.unidade_negocio_id,
-        "unidade_negocio_nome": unidade_negocio_nome,
-        "valor": float(a.valor) if a.valor else 0.0
-    }
-    
+    linha = obter_projecao(ativo_id)
+    if not linha:
+        abort(404)
+
+    resultado = _dados_base(linha)
+
     # Adiciona dados específicos
-    if a.tipo == "smartphone":
-        smartphone = db.session.query(Smartphone).filter_by(ativo_id=a.id).first()
-        if smartphone:
-            marca = db.session.query(Marca).filter_by(id=smartphone.marca_id).first()
+    if linha.subtipo_id:
+        if linha.tipo == "smartphone":
             resultado.update({
-                "modelo": getattr(smartphone, 'modelo', None),
-                "fabricante": marca.nome if marca else None,
-                "imei_slot": getattr(smartphone, 'imei_slot', None),
-                "serie": getattr(smartphone, 'serie', None),  # Campo não existe no banco
-                "acessorios": getattr(smartphone, 'acessorios', None)
+                "modelo": linha.modelo,
+                "fabricante": linha.marca_nome,
+                "imei_slot": linha.imei_slot,
+                "serie": None,  # Campo não existe no banco
+                "acessorios": linha.acessorios
             })
-    
-    elif a.tipo in ["notebook", "desktop"]:
-        computador = db.session.query(Computador).filter_by(ativo_id=a.id).first()
-        if computador:
-            marca = db.session.query(Marca).filter_by(id=computador.marca_id).first()
+
+        elif linha.tipo in ["notebook", "desktop"]:
             resultado.update({
-                "modelo": getattr(computador, 'modelo', None),
-                "fabricante": marca.nome if marca else None,
-                "processador": getattr(computador, 'processador', None),
-                "memoria": getattr(computador, 'memoria', None),
-                "hd": getattr(computador, 'hd', None),
-                "serie": getattr(computador, 'serie', None),
-                "so_versao": getattr(computador, 'so_versao', None),
-                "patrimonio": getattr(computador, 'patrimonio', None),
-                "monitor": getattr(computador, 'monitor', None),  # Campo pode não existir
-                "acessorios": getattr(computador, 'acessorios', None),
-                "tipo_computador": getattr(computador, 'tipo_computador', None)
+                "modelo": linha.modelo,
+                "fabricante": linha.marca_nome,
+                "processador": linha.processador,
+                "memoria": linha.memoria,
+                "hd": linha.hd,
+                "serie": linha.serie,
+                "so_versao": linha.so_versao,
+                "patrimonio": linha.patrimonio,
+                "monitor": None,  # Campo não existe no banco
+                "acessorios": linha.acessorios,
+                "tipo_computador": linha.tipo_computador
             })
-    
-    elif a.tipo == "chip_sim":
-        chip = db.session.query(ChipSim).filter_by(ativo_id=a.id).first()
-        if chip:
-            operadora = db.session.query(Operadora).filter_by(id=chip.operadora_id).first()
+
+        elif linha.tipo == "chip_sim":
             resultado.update({
-                "numero": getattr(chip, 'numero', None),
-                "operadora_id": getattr(chip, 'operadora_id', None),
-                "operadora": operadora.nome if operadora else None,
-                "condicao_chip": getattr(chip, 'condicao', None),  # Campo pode não existir
-                "tipo_chip": getattr(chip, 'tipo', None)
+                "numero": linha.numero,
+                "operadora_id": linha.operadora_id,
+                "operadora": linha.operadora_nome,
+                "condicao_chip": None,  # Campo não existe - usa condição do ativo pai
+                "tipo_chip": linha.tipo_chip
             })
-    
+
     return jsonify(resultado)
 
 # Função removida - duplicata
@@ -659,198 +614,93 @@ def gerar_termo_pdf_endpoint(ativo_id):
 
 @bp.get("/<int:ativo_id>/historico")
 def obter_historico(ativo_id):
-    """Obtém histórico completo do ativo incluindo alocações, devoluções e manutenções"""
+    """
+    Obtém histórico completo do ativo incluindo alocações, devoluções e manutenções
+    Paginação opcional: limit e before (o "cursor" do último evento da página anterior)
+    """
     try:
         # Verificar se o ativo existe
-        ativo = Ativo.query.get_or_404(ativo_id)
-        
-        historico_completo = []
-        
-        # 1. Buscar histórico de alocações/devoluções
-        historicos_alocacao = db.session.query(HistoricoAlocacao).filter_by(ativo_id=ativo_id).order_by(HistoricoAlocacao.data_inicio.desc()).all()
-        
-        for hist in historicos_alocacao:
-            # Buscar colaborador separadamente para evitar problemas de relacionamento
-            colaborador = db.session.query(Colaborador).filter_by(id=hist.colaborador_id).first()
-            colaborador_nome = colaborador.nome if colaborador else "Usuário não encontrado"
-            
-            # Evento de alocação - usar timestamp da auditoria (correto)
-            if hist.data_inicio:
-                # Buscar timestamp de alocação na auditoria
-                log_alocacao = db.session.query(LogAuditoria).filter(
-                    LogAuditoria.tabela == 'ativos',
-                    LogAuditoria.registro_id == ativo_id,
-                    LogAuditoria.acao == 'TRANSFER',
-                    LogAuditoria.descricao.like(f'%alocado para {colaborador_nome}%')
-                ).order_by(LogAuditoria.created_at.desc()).first()
-                
-                data_alocacao = to_local_isoformat(log_alocacao.created_at) if log_alocacao else to_local_isoformat(hist.created_at)
-                
-                historico_completo.append({
-                    "data": data_alocacao,
-                    "tipo": "alocacao",
-                    "descricao": f"Ativo alocado para {colaborador_nome}",
-                    "usuario_nome": colaborador_nome,
-                    "observacao": hist.motivo_transferencia or ""
-                })
-            
-            # Evento de devolução - usar timestamp da auditoria (correto)
-            if hist.data_fim:
-                # Buscar timestamp de devolução na auditoria
-                log_devolucao = db.session.query(LogAuditoria).filter(
-                    LogAuditoria.tabela == 'ativos',
-                    LogAuditoria.registro_id == ativo_id,
-                    LogAuditoria.acao == 'REMOVE_ALLOCATION',
-                    LogAuditoria.descricao.like(f'%devolvido por {colaborador_nome}%')
-                ).order_by(LogAuditoria.created_at.desc()).first()
-                
-                data_devolucao = to_local_isoformat(log_devolucao.created_at) if log_devolucao else to_local_isoformat(hist.created_at)
-                
-                historico_completo.append({
-                    "data": data_devolucao,
-                    "tipo": "devolucao", 
-                    "descricao": f"Ativo devolvido por {colaborador_nome}",
-                    "usuario_nome": colaborador_nome,
-                    "observacao": hist.motivo_transferencia or ""
-                })
-        
-        # 2. Buscar histórico de manutenções
-        manutencoes = db.session.query(Manutencao).filter_by(ativo_id=ativo_id).order_by(Manutencao.created_at.desc()).all()
-        
-        for manut in manutencoes:
-            # Buscar usuário que criou a manutenção na auditoria
-            log_auditoria = db.session.query(LogAuditoria).filter(
-                LogAuditoria.tabela == 'manutencoes',
-                LogAuditoria.registro_id == manut.id,
-                LogAuditoria.acao == 'CREATE'
-            ).first()
-            
-            usuario_criacao = log_auditoria.usuario if log_auditoria else "Sistema"
-            
-            # Evento da manutenção
-            historico_completo.append({
-                "data": to_local_isoformat(manut.created_at),
-                "tipo": "manutencao",
-                "descricao": f"Manutenção {manut.tipo}: {manut.descricao}",
-                "usuario_nome": usuario_criacao,
-                "observacao": manut.observacoes
-            })
-            
-        
-        # 3. Ordenar todo o histórico por data (mais recente primeiro)
-        historico_completo.sort(key=lambda x: x["data"], reverse=True)
-        
-        return jsonify(historico_completo)
+        Ativo.query.get_or_404(ativo_id)
+
+        limite = request.args.get("limit", type=int)
+        antes = None
+        if request.args.get("before"):
+            try:
+                antes = ler_cursor(request.args["before"])
+            except ValueError:
+                return jsonify({"error": "before inválido (use o cursor de um evento)"}), 400
+
+        return jsonify(historico_ativo(ativo_id, limite=limite, antes=antes))
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.exception(f"Erro ao buscar histórico do ativo {ativo_id}")
         return jsonify({"error": "Erro ao buscar histórico", "detail": str(e)}), 500
 
+@bp.get("/<int:ativo_id>/custodia")
+def custodia_ativo(ativo_id):
+    """Quem estava com o ativo em ?data= (AAAA-MM-DD para o dia inteiro, ou data/hora ISO)"""
+    try:
+        Ativo.query.get_or_404(ativo_id)
+        return jsonify(custodia("ativo", [(ativo_id, janela(request.args.get("data")))])[0])
+    except ErroConsulta as e:
+        return jsonify({"error": str(e)}), 400
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception(f"Erro ao consultar custódia do ativo {ativo_id}")
+        return jsonify({"error": "Erro ao consultar custódia", "detail": str(e)}), 500
+
+@bp.post("/custodia")
+def custodia_ativos_lote():
+    """
+    Custódia de vários ativos: {"data", "ativo_ids": [...]} ou
+    {"consultas": [{"ativo_id", "data"}, ...]} (até MAX_CONSULTAS)
+    """
+    try:
+        consultas = consultas_da_requisicao(request.get_json(silent=True), "ativo", MAX_CONSULTAS)
+        return jsonify({"resultados": custodia("ativo", consultas)})
+    except ErroConsulta as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.exception("Erro ao consultar custódia de ativos em lote")
+        return jsonify({"error": "Erro ao consultar custódia", "detail": str(e)}), 500
+
+def _ou_vazio(valor):
+    return valor or ""
+
+def _valor_br(valor):
+    return f"{float(valor or 0):.2f}".replace('.', ',')
+
+def _data_hora_br(dt):
+    if not dt:
+        return ""
+    return f"{dt.day:02d}/{dt.month:02d}/{dt.year:04d} {dt.hour:02d}:{dt.minute:02d}:{dt.second:02d}"
+
+# Campos do subtipo ficam vazios quando não se aplicam ao tipo do ativo
+_CAMPOS_EXPORTACAO = (
+    ("id", "ativo_id"),
+    ("tipo", "tipo"),
+    ("condicao", "condicao", _ou_vazio),
+    ("valor", "valor", _valor_br),
+    ("usuario_atual", "usuario_atual_nome", _ou_vazio),
+    ("unidade_negocio_id", "unidade_negocio_id", _ou_vazio),
+    ("unidade_negocio_nome", "unidade_negocio_nome", _ou_vazio),
+    ("created_at", "created_at", _data_hora_br),
+) + tuple((coluna, coluna, _ou_vazio) for coluna in (
+    "marca_id", "marca_nome", "modelo", "patrimonio", "serie", "so_versao", "processador", "memoria",
+    "hd", "acessorios", "imei_slot", "operadora_id", "operadora_nome", "numero", "tipo_chip",
+))
+
 @bp.get("/export")
+@leitura_replica
 def exportar_ativos():
     """Exporta todos os ativos para CSV com dados completos de cadastro"""
     try:
-        # Buscar todos os ativos com informações relacionadas
-        ativos = db.session.query(Ativo).all()
-        
-        ativos_data = []
-        for ativo in ativos:
-            # Buscar colaborador atual
-            colaborador_atual = ""
-            if ativo.usuario_atual_id:
-                colaborador = db.session.query(Colaborador).filter_by(id=ativo.usuario_atual_id).first()
-                if colaborador:
-                    colaborador_atual = colaborador.nome
-            
-            # Buscar unidade
-            unidade_nome = ""
-            if ativo.unidade_negocio_id:
-                unidade_obj = db.session.query(UnidadeNegocio).filter_by(id=ativo.unidade_negocio_id).first()
-                if unidade_obj:
-                    unidade_nome = unidade_obj.nome
-            
-            # Dados base do ativo
-            ativo_dict = {
-                "id": ativo.id,
-                "tipo": ativo.tipo,
-                "condicao": ativo.condicao or "",
-                "valor": f"{float(ativo.valor or 0):.2f}".replace('.', ','),
-                "usuario_atual": colaborador_atual,
-                "unidade_negocio_id": ativo.unidade_negocio_id or "",
-                "unidade_negocio_nome": unidade_nome,
-                "created_at": ativo.created_at.strftime('%d/%m/%Y %H:%M:%S') if ativo.created_at else "",
-                # Campos específicos que serão preenchidos conforme o tipo
-                "marca_id": "",
-                "marca_nome": "",
-                "modelo": "",
-                "patrimonio": "",
-                "serie": "",
-                "so_versao": "",
-                "processador": "",
-                "memoria": "",
-                "hd": "",
-                "acessorios": "",
-                "imei_slot": "",
-                "operadora_id": "",
-                "operadora_nome": "",
-                "numero": "",
-                "tipo_chip": ""
-            }
-            
-            # Preencher dados específicos por tipo
-            if ativo.tipo == "smartphone":
-                smartphone = db.session.query(Smartphone).filter_by(ativo_id=ativo.id).first()
-                if smartphone:
-                    ativo_dict.update({
-                        "marca_id": smartphone.marca_id or "",
-                        "modelo": smartphone.modelo or "",
-                        "imei_slot": smartphone.imei_slot or "",
-                        "acessorios": smartphone.acessorios or ""
-                    })
-                    
-                    # Buscar nome da marca
-                    if smartphone.marca_id:
-                        marca_obj = db.session.query(Marca).filter_by(id=smartphone.marca_id).first()
-                        if marca_obj:
-                            ativo_dict["marca_nome"] = marca_obj.nome
-                            
-            elif ativo.tipo in ["notebook", "desktop"]:
-                computador = db.session.query(Computador).filter_by(ativo_id=ativo.id).first()
-                if computador:
-                    ativo_dict.update({
-                        "marca_id": computador.marca_id or "",
-                        "modelo": computador.modelo or "",
-                        "patrimonio": computador.patrimonio or "",
-                        "serie": computador.serie or "",
-                        "so_versao": computador.so_versao or "",
-                        "processador": computador.processador or "",
-                        "memoria": computador.memoria or "",
-                        "hd": computador.hd or "",
-                        "acessorios": computador.acessorios or ""
-                    })
-                    
-                    # Buscar nome da marca
-                    if computador.marca_id:
-                        marca_obj = db.session.query(Marca).filter_by(id=computador.marca_id).first()
-                        if marca_obj:
-                            ativo_dict["marca_nome"] = marca_obj.nome
-                            
-            elif ativo.tipo == "chip_sim":
-                chip = db.session.query(ChipSim).filter_by(ativo_id=ativo.id).first()
-                if chip:
-                    ativo_dict.update({
-                        "operadora_id": chip.operadora_id or "",
-                        "numero": chip.numero or "",
-                        "tipo_chip": chip.tipo or ""
-                    })
-                    
-                    # Buscar nome da operadora
-                    if chip.operadora_id:
-                        op_obj = db.session.query(Operadora).filter_by(id=chip.operadora_id).first()
-                        if op_obj:
-                            ativo_dict["operadora_nome"] = op_obj.nome
-            
-            ativos_data.append(ativo_dict)
+        linhas = consultar_projecao()
+        serializar = compilar_serializador(_CAMPOS_EXPORTACAO, tuple(fonte_projecao().c.keys()))
+        ativos_data = [serializar(p) for p in linhas]
         
         return jsonify({
             "ativos": ativos_data,
@@ -1051,8 +901,7 @@ def importar_ativos():
                 if unidade_negocio_id:
                     try:
                         unidade_negocio_id = int(unidade_negocio_id)
-                        unidade = UnidadeNegocio.query.get(unidade_negocio_id)
-                        if not unidade:
+                        if not registro_referencia("unidades_negocio", unidade_negocio_id):
                             erros.append(f"Linha {linha_num}: Unidade de negócio ID {unidade_negocio_id} não encontrada")
                             continue
                     except ValueError:
@@ -1078,7 +927,7 @@ def importar_ativos():
                     if marca_id:
                         try:
                             marca_id = int(marca_id)
-                            if not Marca.query.get(marca_id):
+                            if not registro_referencia("marcas", marca_id):
                                 erros.append(f"Linha {linha_num}: Marca ID {marca_id} não encontrada")
                                 continue
                         except ValueError:
@@ -1101,7 +950,7 @@ def importar_ativos():
                     if marca_id:
                         try:
                             marca_id = int(marca_id)
-                            if not Marca.query.get(marca_id):
+                            if not registro_referencia("marcas", marca_id):
                                 erros.append(f"Linha {linha_num}: Marca ID {marca_id} não encontrada")
                                 continue
                         except ValueError:
@@ -1130,7 +979,7 @@ def importar_ativos():
                     if operadora_id:
                         try:
                             operadora_id = int(operadora_id)
-                            if not Operadora.query.get(operadora_id):
+                            if not registro_referencia("operadoras", operadora_id):
                                 erros.append(f"Linha {linha_num}: Operadora ID {operadora_id} não encontrada")
                                 continue
                         except ValueError:
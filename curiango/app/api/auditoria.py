@@ -1,46 +1,66 @@
-from flask import Blueprint, request, jsonify
-from ..core.auth import api_auth_required
-from ..services.auditoria_service import buscar_logs_auditoria, converter_log_para_dict
+from flask import Blueprint, Response, current_app, jsonify, request, send_file, stream_with_context, url_for
+from ..core.auth import api_auth_required, get_username, is_user_admin
+from ..services.auditoria_service import (buscar_logs_auditoria, codificar_cursor, contar_logs_auditoria,
+                                          converter_log_para_dict, decodificar_cursor)
+from ..services.exportacao_auditoria_service import (FORMATOS, caminho_arquivo, gerar_exportacao, iniciar_job,
+                                                     iterar_logs, mimetype, nome_arquivo, obter_job)
 from ..core.db import db
+from ..core.replica import leitura_replica
 from ..models.dominio import LogAuditoria
 import logging
 
 bp = Blueprint("auditoria", __name__)
 logger = logging.getLogger("app")
 
+def _filtros_da_requisicao():
+    """Filtros de busca comuns à listagem e à exportação (vazios são removidos)"""
+    filtros = {
+        "acao": request.args.get("acao", "").strip(),
+        "usuario": request.args.get("usuario", "").strip(),
+        "tabela": request.args.get("tabela", "").strip(),
+        "registro_id": request.args.get("registro_id", type=int),
+        "data_inicio": request.args.get("data_inicio", "").strip(),
+        "data_fim": request.args.get("data_fim", "").strip(),
+        "termo_busca": request.args.get("q", "").strip()
+    }
+    return {k: v for k, v in filtros.items() if v}
+
 @bp.get("")
+@leitura_replica
 def listar_auditoria():
     """
     Lista logs de auditoria com filtros opcionais
-    Suporta filtros: acao, usuario, tabela, data_inicio, data_fim, termo_busca, limite, offset
+    Suporta filtros: acao, usuario (prefixo), tabela, registro_id, data_inicio, data_fim, q
+    Paginação: limite + cursor (proximo_cursor da página anterior) ou offset
     """
     try:
-        # Obter parâmetros de filtro
-        filtros = {
-            "acao": request.args.get("acao", "").strip(),
-            "usuario": request.args.get("usuario", "").strip(),
-            "tabela": request.args.get("tabela", "").strip(),
-            "data_inicio": request.args.get("data_inicio", "").strip(),
-            "data_fim": request.args.get("data_fim", "").strip(),
-            "termo_busca": request.args.get("q", "").strip(),
+        filtros = _filtros_da_requisicao()
+        filtros.update({k: v for k, v in {
             "limite": min(int(request.args.get("limite", 100)), 500),
-            "offset": int(request.args.get("offset", 0))
-        }
-        
-        # Remover filtros vazios
-        filtros = {k: v for k, v in filtros.items() if v}
+            "offset": int(request.args.get("offset", 0)),
+            "cursor": request.args.get("cursor", "").strip()
+        }.items() if v})
+
+        if filtros.get("cursor"):
+            try:
+                decodificar_cursor(filtros["cursor"])
+            except ValueError:
+                return jsonify({"error": "cursor inválido"}), 400
         
         logger.debug(f"Buscando logs de auditoria com filtros: {filtros}")
         
         # Buscar logs
         logs = buscar_logs_auditoria(filtros)
+        total, total_aproximado = contar_logs_auditoria(filtros)
         
         # Converter para dicionários
         data = [converter_log_para_dict(log) for log in logs]
         
         return jsonify({
             "logs": data,
-            "total": len(data),
+            "total": total,
+            "total_aproximado": total_aproximado,
+            "proximo_cursor": codificar_cursor(logs[-1]) if len(logs) == filtros.get("limite") else None,
             "filtros": filtros
         })
         
@@ -65,6 +85,76 @@ def obter_log_auditoria(log_id):
         logger.exception(f"Erro ao buscar log {log_id}")
         return jsonify({"error": "Erro interno do servidor", "detail": str(e)}), 500
 
+@bp.get("/export")
+@leitura_replica
+@api_auth_required
+def exportar_auditoria():
+    """
+    Exporta os logs filtrados (mesmos filtros da listagem) em CSV ou NDJSON.
+    Até AUDIT_EXPORT_SYNC_LIMIT logs a resposta é gerada em streaming; acima
+    disso (ou com async=1) cria um job e responde 202 com a URL de acompanhamento.
+    """
+    formato = request.args.get("formato", "csv").lower()
+    if formato not in FORMATOS:
+        return jsonify({"error": "formato inválido", "formatos": sorted(FORMATOS)}), 400
+    compactar = request.args.get("gzip", "").lower() in ("1", "true")
+    assincrono = request.args.get("async", "").lower() in ("1", "true")
+
+    try:
+        filtros = _filtros_da_requisicao()
+        if not assincrono:
+            total, aproximado = contar_logs_auditoria(filtros)
+            assincrono = aproximado or total > current_app.config.get("AUDIT_EXPORT_SYNC_LIMIT", 50000)
+
+        if assincrono:
+            estado = iniciar_job(filtros, formato, compactar, get_username())
+            resposta = jsonify(_job_json(estado))
+            resposta.status_code = 202
+            resposta.headers["Location"] = url_for("auditoria.status_exportacao", job_id=estado["id"])
+            return resposta
+
+        corpo = stream_with_context(gerar_exportacao(iterar_logs(filtros), formato, compactar))
+        return Response(corpo, mimetype=mimetype(formato, compactar), headers={
+            "Content-Disposition": f'attachment; filename="{nome_arquivo(formato, compactar)}"'
+        })
+
+    except Exception as e:
+        logger.exception("Erro ao exportar logs de auditoria")
+        return jsonify({"error": "Erro ao exportar logs de auditoria", "detail": str(e)}), 500
+
+def _job_json(estado):
+    dados = {k: estado[k] for k in ("id", "status", "formato", "gzip", "total", "processados", "erro", "criado_em", "concluido_em")}
+    dados["progresso"] = round(100 * estado["processados"] / estado["total"], 1) if estado["total"] else None
+    dados["status_url"] = url_for("auditoria.status_exportacao", job_id=estado["id"])
+    if estado["status"] == "concluido":
+        dados["download_url"] = url_for("auditoria.baixar_exportacao", job_id=estado["id"])
+    return dados
+
+def _obter_job_do_usuario(job_id):
+    estado = obter_job(job_id)
+    if not estado or (estado["usuario"] != get_username() and not is_user_admin()):
+        return None
+    return estado
+
+@bp.get("/export/<job_id>")
+@api_auth_required
+def status_exportacao(job_id):
+    estado = _obter_job_do_usuario(job_id)
+    if not estado:
+        return jsonify({"error": "Exportação não encontrada"}), 404
+    return jsonify(_job_json(estado))
+
+@bp.get("/export/<job_id>/download")
+@api_auth_required
+def baixar_exportacao(job_id):
+    estado = _obter_job_do_usuario(job_id)
+    if not estado:
+        return jsonify({"error": "Exportação não encontrada"}), 404
+    if estado["status"] != "concluido":
+        return jsonify({"error": "Exportação ainda não concluída", "status": estado["status"]}), 409
+    return send_file(caminho_arquivo(estado), mimetype=mimetype(estado["formato"], estado["gzip"]),
+                     as_attachment=True, download_name=estado["nome_download"])
+
 @bp.get("/health")
 def auditoria_health():
     return jsonify({"status": "ok"})
\ No newline at end of file
@@ -1,10 +1,9 @@
-from flask import Blueprint, request, jsonify, session, url_for
-from ..core.ldap_auth import authenticate_user, is_authorized
+from flask import Blueprint, request, jsonify, session
+from ..core.ldap_auth import authenticate_user, is_authorized, resolver_papeis
 from ..services.auditoria_service import log_audit
+from ..core.session_store import marcar_atividade, regenerar_sessao, tempo_inativo
 from datetime import datetime, timedelta
 import logging
-import os
-import random
 
 bp = Blueprint("auth", __name__)
 logger = logging.getLogger("app")
@@ -27,14 +26,15 @@ def login():
         logger.warning(f"Acesso negado. Usuário {username} não pertence aos grupos permitidos. Grupos: {groups}")
         return jsonify({"status": "forbidden", "message": "Usuário sem permissão de acesso."}), 403
 
+    regenerar_sessao(session)
     session.permanent = True
     session["user"] = {
         "username": auth["username"],
         "full_name": auth["full_name"],
         "groups": groups,
+        "roles": sorted(resolver_papeis(groups)),
     }
-    session["last_activity"] = datetime.now().isoformat()
-    session["login_time"] = datetime.now().isoformat()
+    session["login_time"] = marcar_atividade(session).isoformat()
     
     # Log de auditoria para login
     log_audit(
@@ -48,7 +48,7 @@ def login():
 
 @bp.post("/logout")
 def logout():
-    user = session.pop("user", None)
+    user = session.get("user")
     
     # Log de auditoria para logout
     if user:
@@ -58,13 +58,15 @@ def logout():
             dados_antigos={"username": user.get("username"), "full_name": user.get("full_name")}
         )
     
+    # Sessão vazia: o store apaga a entrada e o cookie
+    session.clear()
     logger.info(f"Logout de {user.get('username') if user else 'usuário anônimo'}")
     return jsonify({"status": "success"})
 
 @bp.get("/me")
 def get_current_user_info():
     """Retorna informações do usuário atual"""
-    from ..core.auth import api_auth_required, get_current_user, get_user_full_name, get_username
+    from ..core.auth import api_auth_required, get_current_user, get_user_full_name, get_username, get_user_roles
     
     # Verificar autenticação
     user = get_current_user()
@@ -75,7 +77,8 @@ def get_current_user_info():
         "username": get_username(),
         "full_name": get_user_full_name(),
         "authenticated": True,
-        "groups": user.get("groups", [])
+        "groups": user.get("groups", []),
+        "roles": sorted(get_user_roles())
     })
 
 @bp.post("/activity")
@@ -84,7 +87,7 @@ def update_activity():
     if not session.get("user"):
         return jsonify({"error": "Não autenticado"}), 401
     
-    session["last_activity"] = datetime.now().isoformat()
+    marcar_atividade(session)
     return jsonify({"status": "success", "timestamp": session["last_activity"]})
 
 @bp.get("/session-status")
@@ -100,12 +103,11 @@ def get_session_status():
         return jsonify({"authenticated": False, "expired": True}), 401
     
     try:
-        last_activity_time = datetime.fromisoformat(last_activity)
-        login_datetime = datetime.fromisoformat(login_time) if login_time else last_activity_time
         current_time = datetime.now()
         
         # Calcular tempo desde última atividade
-        inactive_time = current_time - last_activity_time
+        inactive_time = tempo_inativo(session)
+        login_datetime = datetime.fromisoformat(login_time) if login_time else current_time - inactive_time
         total_session_time = current_time - login_datetime
         
         # 1 hora de timeout por inatividade
@@ -140,31 +142,28 @@ def get_session_status():
 
 @bp.get("/random-login-image")
 def get_random_login_image():
-    """Retorna uma imagem aleatória da pasta login para a tela de login"""
+    """Retorna uma imagem aleatória do catálogo de login (sem acesso a disco por request)"""
     try:
-        # Caminho para a pasta de imagens de login
         from flask import current_app
-        login_images_path = os.path.join(current_app.static_folder, 'img', 'login')
+        from ..core.imagens_login import get_catalogo
         
-        # Verificar se a pasta existe
-        if not os.path.exists(login_images_path):
+        catalogo = get_catalogo(current_app)
+        if catalogo is None:
             return jsonify({"error": "Pasta de imagens não encontrada"}), 404
         
-        # Listar todas as imagens na pasta
-        image_extensions = ('.png', '.jpg', '.jpeg', '.gif', '.webp')
-        images = [f for f in os.listdir(login_images_path) 
-                 if f.lower().endswith(image_extensions)]
-        
-        if not images:
+        # Largura do viewport (px físicos) para escolher a variante responsiva
+        largura = request.args.get("w", type=int)
+        sorteio = catalogo.sortear(largura)
+        if not sorteio:
             return jsonify({"error": "Nenhuma imagem encontrada"}), 404
         
-        # Selecionar uma imagem aleatória
-        random_image = random.choice(images)
-        image_url = url_for('static', filename=f'img/login/{random_image}')
-        
+        imagem = sorteio["imagem"]
         return jsonify({
-            "image": image_url,
-            "filename": random_image
+            "image": sorteio["escolhida"]["url"],
+            "filename": sorteio["filename"],
+            "width": sorteio["escolhida"]["width"],
+            "height": sorteio["escolhida"]["height"],
+            "srcset": ", ".join(f"{v['url']} {v['width']}w" for v in imagem["variants"])
         })
         
     except Exception as e:
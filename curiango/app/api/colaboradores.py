@@ -1,49 +1,58 @@
 from flask import Blueprint, request, jsonify, session
 from ..core.db import db
+from ..core.replica import leitura_replica
 from ..core.auth import api_auth_required, admin_required
-from ..models.dominio import Colaborador, UnidadeNegocio, Ativo, Smartphone, Computador, ChipSim, Marca, Operadora, Setor
+from ..models.dominio import Colaborador, Ativo
+from ..services.ativos_service import fonte_projecao, consultar_projecao
+from ..services.custodia_service import MAX_CONSULTAS, ErroConsulta, consultas_da_requisicao, custodia, janela
+from ..services.descricao_service import formatar_descricao
+from ..services.importacao_colaboradores_service import MODOS as MODOS_IMPORTACAO, importar_colaboradores_csv
+from ..services.referencias_service import registro_referencia, registros_referencia
 import logging
 
 bp = Blueprint("colaboradores", __name__)
 logger = logging.getLogger("app")
 
-def obter_ativos_alocados(colaborador_id):
-    """Retorna lista de ativos alocados ao colaborador"""
-    ativos = Ativo.query.filter_by(usuario_atual_id=colaborador_id).all()
-    resultado = []
-    
-    for ativo in ativos:
+def _setor_info(setor):
+    """Resumo do setor exibido junto ao colaborador (a partir do cache de referências)"""
+    if not setor:
+        return None
+    return {
+        "id": setor["id"],
+        "nome": setor["nome"],
+        "email_responsavel": setor["email_responsavel"]
+    }
+
+
+def obter_ativos_alocados_em_lote(colaborador_ids):
+    """
+    Retorna {colaborador_id: [ativos alocados]} para vários colaboradores com
+    uma única consulta à projeção de ativos.
+    """
+    colaborador_ids = list(colaborador_ids)
+    resultado = {cid: [] for cid in colaborador_ids}
+    if not colaborador_ids:
+        return resultado
+
+    p = fonte_projecao().c
+    for linha in consultar_projecao(p.usuario_atual_id.in_(colaborador_ids)):
         item = {
-            "id": ativo.id,
-            "tipo": ativo.tipo,
-            "condicao": ativo.condicao,
-            "descricao": f"Ativo #{ativo.id}"
+            "id": linha.ativo_id,
+            "tipo": linha.tipo,
+            "condicao": linha.condicao,
+            "descricao": formatar_descricao(linha, linha.ativo_id, "curta")
         }
-        
-        # Adiciona detalhes específicos por tipo
-        if ativo.tipo == "smartphone":
-            smartphone = Smartphone.query.filter_by(ativo_id=ativo.id).first()
-            if smartphone:
-                marca = Marca.query.get(smartphone.marca_id) if smartphone.marca_id else None
-                item["descricao"] = f"Smartphone {marca.nome if marca else ''} {smartphone.modelo or ''}"
-                
-        elif ativo.tipo in ["notebook", "desktop"]:
-            computador = Computador.query.filter_by(ativo_id=ativo.id).first()
-            if computador:
-                marca = Marca.query.get(computador.marca_id) if computador.marca_id else None
-                item["descricao"] = f"{ativo.tipo.title()} {marca.nome if marca else ''} {computador.modelo or ''}"
-                item["patrimonio"] = computador.patrimonio
-                
-        elif ativo.tipo == "chip_sim":
-            chip = ChipSim.query.filter_by(ativo_id=ativo.id).first()
-            if chip:
-                operadora = Operadora.query.get(chip.operadora_id) if chip.operadora_id else None
-                item["descricao"] = f"Chip {operadora.nome if operadora else ''} - {chip.numero or ''}"
-                
-        resultado.append(item)
-    
+        if linha.subtipo_id and linha.tipo in ["notebook", "desktop"]:
+            item["patrimonio"] = linha.patrimonio
+        resultado[linha.usuario_atual_id].append(item)
+
     return resultado
 
+
+def obter_ativos_alocados(colaborador_id):
+    """Retorna lista de ativos alocados ao colaborador"""
+    return obter_ativos_alocados_em_lote([colaborador_id])[colaborador_id]
+
 # Opcional: proteger por sessão
 def require_login(func):
     def wrapper(*args, **kwargs):
@@ -54,6 +63,7 @@ def require_login(func):
     return wrapper
 
 @bp.get("")
+@leitura_replica
 def listar_colaboradores():
     q = Colaborador.query
     nome = (request.args.get("nome") or "").strip()
@@ -80,20 +90,16 @@ def listar_colaboradores():
     offset = int(request.args.get("offset", 0))
     itens = q.order_by(Colaborador.nome.asc()).offset(offset).limit(limit).all()
 
+    # Setores e ativos da página inteira em lote (evita N+1 por colaborador)
+    setores = registros_referencia("setores", [c.setor_id for c in itens])
+    ativos_por_colaborador = obter_ativos_alocados_em_lote([c.id for c in itens])
+
     def to_json(c: Colaborador):
-        ativos_alocados = obter_ativos_alocados(c.id)
-        
+        ativos_alocados = ativos_por_colaborador.get(c.id, [])
+
         # Buscar informações do setor
-        setor_info = None
-        if c.setor_id:
-            setor = Setor.query.get(c.setor_id)
-            if setor:
-                setor_info = {
-                    "id": setor.id,
-                    "nome": setor.nome,
-                    "email_responsavel": setor.email_responsavel
-                }
-        
+        setor_info = _setor_info(setores.get(c.setor_id))
+
         return {
             "id": c.id,
             "nome": c.nome,
@@ -119,8 +125,8 @@ def criar_colaborador():
     # Validar setor_id se fornecido
     setor_id = data.get("setor_id")
     if setor_id:
-        setor = Setor.query.get(setor_id)
-        if not setor or not setor.ativo:
+        setor = registro_referencia("setores", setor_id)
+        if not setor or not setor["ativo"]:
             return jsonify({"error": "Setor inválido ou inativo"}), 400
     
     c = Colaborador(
@@ -142,15 +148,7 @@ def criar_colaborador():
         return jsonify({"error": "falha ao criar colaborador"}), 500
     logger.info(f"Colaborador criado id={c.id} nome={c.nome}")
     # Buscar informações do setor para retorno
-    setor_info = None
-    if c.setor_id:
-        setor = Setor.query.get(c.setor_id)
-        if setor:
-            setor_info = {
-                "id": setor.id,
-                "nome": setor.nome,
-                "email_responsavel": setor.email_responsavel
-            }
+    setor_info = _setor_info(registro_referencia("setores", c.setor_id))
     
     return jsonify({
         "id": c.id, 
@@ -170,15 +168,7 @@ def obter_colaborador(colab_id):
     ativos_alocados = obter_ativos_alocados(c.id)
     
     # Buscar informações do setor
-    setor_info = None
-    if c.setor_id:
-        setor = Setor.query.get(c.setor_id)
-        if setor:
-            setor_info = {
-                "id": setor.id,
-                "nome": setor.nome,
-                "email_responsavel": setor.email_responsavel
-            }
+    setor_info = _setor_info(registro_referencia("setores", c.setor_id))
     
     return jsonify({
         "id": c.id, "nome": c.nome, "matricula": c.matricula, "cpf": c.cpf,
@@ -188,6 +178,33 @@ def obter_colaborador(colab_id):
         "total_ativos": len(ativos_alocados)
     })
 
+@bp.get("/<int:colab_id>/custodia")
+def custodia_colaborador(colab_id):
+    """Ativos que estavam com o colaborador em ?data= (AAAA-MM-DD para o dia inteiro, ou data/hora ISO)"""
+    Colaborador.query.get_or_404(colab_id)
+    try:
+        return jsonify(custodia("colaborador", [(colab_id, janela(request.args.get("data")))])[0])
+    except ErroConsulta as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.exception(f"Erro ao consultar custódia do colaborador {colab_id}")
+        return jsonify({"error": "Erro ao consultar custódia", "detail": str(e)}), 500
+
+@bp.post("/custodia")
+def custodia_colaboradores_lote():
+    """
+    Custódia de vários colaboradores: {"data", "colaborador_ids": [...]} ou
+    {"consultas": [{"colaborador_id", "data"}, ...]} (até MAX_CONSULTAS)
+    """
+    try:
+        consultas = consultas_da_requisicao(request.get_json(silent=True), "colaborador", MAX_CONSULTAS)
+        return jsonify({"resultados": custodia("colaborador", consultas)})
+    except ErroConsulta as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.exception("Erro ao consultar custódia de colaboradores em lote")
+        return jsonify({"error": "Erro ao consultar custódia", "detail": str(e)}), 500
+
 @bp.put("/<int:colab_id>")
 def atualizar_colaborador(colab_id):
     c = Colaborador.query.get_or_404(colab_id)
@@ -213,7 +230,7 @@ def atualizar_colaborador(colab_id):
     if "unidade_negocio_id" in data:
         uid = data.get("unidade_negocio_id")
         if uid is not None and hasattr(c, 'unidade_negocio_id'):
-            if not UnidadeNegocio.query.get(uid):
+            if not registro_referencia("unidades_negocio", uid):
                 return jsonify({"error": "unidade_negocio_id inválido"}), 400
             c.unidade_negocio_id = uid
 
@@ -221,8 +238,8 @@ def atualizar_colaborador(colab_id):
     if "setor_id" in data:
         setor_id = data.get("setor_id")
         if setor_id:
-            setor = Setor.query.get(setor_id)
-            if not setor or not setor.ativo:
+            setor = registro_referencia("setores", setor_id)
+            if not setor or not setor["ativo"]:
                 return jsonify({"error": "Setor inválido ou inativo"}), 400
         c.setor_id = setor_id
 
@@ -235,15 +252,7 @@ def atualizar_colaborador(colab_id):
 
     logger.info(f"Colaborador atualizado id={c.id} nome={c.nome}")
     # Buscar informações do setor para retorno
-    setor_info = None
-    if c.setor_id:
-        setor = Setor.query.get(c.setor_id)
-        if setor:
-            setor_info = {
-                "id": setor.id,
-                "nome": setor.nome,
-                "email_responsavel": setor.email_responsavel
-            }
+    setor_info = _setor_info(registro_referencia("setores", c.setor_id))
     
     return jsonify({
         "id": c.id, "nome": c.nome, "matricula": c.matricula, "cpf": c.cpf,
@@ -307,17 +316,16 @@ def excluir_colaborador(colab_id):
         return jsonify({"error": "Falha ao excluir colaborador", "detail": str(e)}), 500
 
 @bp.get("/export")
+@leitura_replica
 def exportar_colaboradores():
     """Endpoint para exportar colaboradores em CSV"""
     colaboradores = Colaborador.query.all()
+    setores = registros_referencia("setores", [c.setor_id for c in colaboradores])
     
     resultado = []
     for colaborador in colaboradores:
-        # Buscar setor
-        setor_nome = ""
-        if colaborador.setor_id:
-            setor = Setor.query.get(colaborador.setor_id)
-            setor_nome = setor.nome if setor else ""
+        setor = setores.get(colaborador.setor_id)
+        setor_nome = setor["nome"] if setor else ""
         
         item = {
             "id": colaborador.id,
@@ -340,7 +348,11 @@ def exportar_colaboradores():
 
 @bp.post("/import")
 def importar_colaboradores():
-    """Endpoint para importar colaboradores via CSV"""
+    """
+    Endpoint para importar colaboradores via CSV. Campo opcional modo:
+    "atualizar" (padrão) atualiza colaboradores já cadastrados com a mesma
+    matrícula/CPF/email; "inserir" rejeita essas linhas.
+    """
     if 'file' not in request.files:
         return jsonify({"error": "Arquivo não fornecido"}), 400
     
@@ -350,155 +362,32 @@ def importar_colaboradores():
     
     if not file.filename.lower().endswith('.csv'):
         return jsonify({"error": "Arquivo deve ser CSV"}), 400
+
+    modo = (request.form.get('modo') or 'atualizar').strip().lower()
+    if modo not in MODOS_IMPORTACAO:
+        return jsonify({"error": f"Modo inválido: {modo}"}), 400
     
     try:
-        import csv
-        import io
-        
-        # Ler conteúdo do arquivo
         content = file.read().decode('utf-8-sig')  # utf-8-sig remove BOM se existir
-        csv_reader = csv.DictReader(io.StringIO(content))
-        
-        sucessos = 0
-        erros = []
-        
-        for linha_num, linha in enumerate(csv_reader, start=2):  # Começar do 2 por causa do cabeçalho
-            try:
-                # Limpar caracteres invisíveis de todos os campos
-                linha_limpa = {}
-                for key, value in linha.items():
-                    if value:
-                        # Remove Zero Width Space (\u200b) e outros caracteres invisíveis
-                        value_clean = value.replace('\u200b', '').replace('\ufeff', '').strip()
-                        linha_limpa[key] = value_clean
-                    else:
-                        linha_limpa[key] = value
-                
-                # Campos obrigatórios
-                nome = linha_limpa.get('nome', '').strip()
-                email = linha_limpa.get('email', '').strip()
-                
-                # Validar tamanho dos campos
-                if len(nome) > 150:
-                    erros.append(f"Linha {linha_num}: Nome muito longo (máximo 150 caracteres)")
-                    continue
-                
-                if len(email) > 150:
-                    erros.append(f"Linha {linha_num}: Email muito longo (máximo 150 caracteres)")
-                    continue
-                
-                if not nome:
-                    erros.append(f"Linha {linha_num}: Nome é obrigatório")
-                    continue
-                
-                if not email:
-                    erros.append(f"Linha {linha_num}: Email é obrigatório")
-                    continue
-                
-                # Verificar se já existe colaborador com mesmo email
-                colaborador_existente = Colaborador.query.filter_by(email=email).first()
-                if colaborador_existente:
-                    erros.append(f"Linha {linha_num}: Email {email} já existe")
-                    continue
-                
-                # Verificar se já existe colaborador com mesmo CPF (se fornecido)
-                cpf = linha_limpa.get('cpf', '').strip() or None
-                if cpf:
-                    # Validar tamanho do CPF
-                    if len(cpf) > 14:
-                        erros.append(f"Linha {linha_num}: CPF muito longo (máximo 14 caracteres)")
-                        continue
-                    
-                    # Permitir múltiplos registros com CPF 000.000.000.00 (considerado como "não informado")
-                    if cpf != '000.000.000.00':
-                        colaborador_cpf_existente = Colaborador.query.filter_by(cpf=cpf).first()
-                        if colaborador_cpf_existente:
-                            erros.append(f"Linha {linha_num}: CPF {cpf} já existe")
-                            continue
-                
-                # Validar setor se fornecido
-                setor_id = linha_limpa.get('setor_id', '').strip()
-                if setor_id:
-                    try:
-                        setor_id = int(setor_id)
-                        setor = Setor.query.get(setor_id)
-                        if not setor or not setor.ativo:
-                            erros.append(f"Linha {linha_num}: Setor ID {setor_id} inválido ou inativo")
-                            continue
-                    except ValueError:
-                        erros.append(f"Linha {linha_num}: Setor ID deve ser numérico")
-                        continue
-                else:
-                    setor_id = None
-                
-                # Validar status
-                status = linha_limpa.get('status', 'ativo').strip().lower()
-                if status not in ['ativo', 'desligado']:
-                    status = 'ativo'
-                
-                # Validar tamanhos de outros campos
-                matricula = linha_limpa.get('matricula', '').strip() or None
-                if matricula and len(matricula) > 50:
-                    erros.append(f"Linha {linha_num}: Matrícula muito longa (máximo 50 caracteres)")
-                    continue
-                
-                # Verificar matrícula duplicada (exceto valores genéricos como "1", "0")
-                if matricula and matricula not in ['0', '1']:
-                    colaborador_matricula_existente = Colaborador.query.filter_by(matricula=matricula).first()
-                    if colaborador_matricula_existente:
-                        erros.append(f"Linha {linha_num}: Matrícula {matricula} já existe")
-                        continue
-                
-                cargo = linha_limpa.get('cargo', '').strip() or None
-                if cargo and len(cargo) > 100:
-                    erros.append(f"Linha {linha_num}: Cargo muito longo (máximo 100 caracteres)")
-                    continue
-                
-                # Criar colaborador
-                # Tratar CPF 000.000.000.00 como NULL para evitar problemas com UNIQUE constraint
-                cpf_final = None if cpf == '000.000.000.00' else cpf
-                
-                # Tratar matrículas genéricas como NULL para evitar duplicação
-                matricula_final = None if matricula in ['0', '1'] else matricula
-                
-                colaborador = Colaborador(
-                    nome=nome,
-                    email=email,
-                    matricula=matricula_final,
-                    cpf=cpf_final,
-                    cargo=cargo,
-                    setor_id=setor_id,
-                    status=status
-                )
-                
-                db.session.add(colaborador)
-                sucessos += 1
-                
-            except Exception as e:
-                erros.append(f"Linha {linha_num}: Erro ao processar - {str(e)}")
-        
-        if sucessos > 0:
-            try:
-                db.session.commit()
-            except Exception as e:
-                db.session.rollback()
-                logger.error(f"Erro ao fazer commit da importação: {e}")
-                return jsonify({"error": f"Erro ao salvar dados: {str(e)}"}), 500
-        else:
-            db.session.rollback()
-        
-        resultado = {
-            "sucessos": sucessos,
-            "erros": len(erros),
-            "detalhes_erros": erros[:10]  # Limitar a 10 erros para não sobrecarregar
-        }
-        
-        if len(erros) > 10:
-            resultado["mais_erros"] = f"... e mais {len(erros) - 10} erros"
-        
-        return jsonify(resultado)
-        
+        relatorio = importar_colaboradores_csv(content, modo)
     except Exception as e:
         db.session.rollback()
         logger.error(f"Erro na importação de colaboradores: {e}")
-        return jsonify({"error": f"Erro ao processar arquivo: {str(e)}"}), 500
\ No newline at end of file
+        return jsonify({"error": f"Erro ao processar arquivo: {str(e)}"}), 500
+
+    contagem = relatorio["contagem"]
+    erros = [f"Linha {item['linha']}: {item['mensagem']}" for item in relatorio["linhas"] if item["status"] == "erro"]
+    resultado = {
+        "sucessos": contagem["criado"] + contagem["atualizado"],
+        "criados": contagem["criado"],
+        "atualizados": contagem["atualizado"],
+        "inalterados": contagem["inalterado"],
+        "erros": len(erros),
+        "detalhes_erros": erros[:10],  # Resumo; o relatório completo vem em "linhas"
+        "linhas": relatorio["linhas"],
+        "estatisticas": relatorio["estatisticas"],
+    }
+    if len(erros) > 10:
+        resultado["mais_erros"] = f"... e mais {len(erros) - 10} erros"
+    
+    return jsonify(resultado)
@@ -1,23 +1,32 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, Response, current_app, jsonify, request
 from sqlalchemy import text, func
-from ..core.db import db
-from ..core.auth import api_auth_required
-from ..models.dominio import LogAuditoria, Colaborador, Ativo, Manutencao, HistoricoAlocacao, Marca, Operadora
-from ..core.timezone_utils import to_local_isoformat
+from ..core.db import db, engine_leitura
+from ..core.replica import leitura_replica
+from ..core.auth import api_auth_required, admin_required
+from ..core.cache_respostas import cache_resposta
+from ..models.dominio import LogAuditoria, Colaborador, Ativo, Manutencao, Marca, Operadora
+from ..core.timezone_utils import now_local, to_local_isoformat
+from ..services.depreciacao_service import METODOS, valor_contabil
+from ..services.snapshot_inventario_service import AGRUPAMENTOS, GRANULARIDADES, alocacoes_por_mes, snapshot_ativo, tendencia
+from ..services.dashboard_tempo_real_service import obter_transmissor
 from datetime import datetime, timedelta
 import logging
+import queue
+import time
 
 bp = Blueprint("dashboard", __name__)
 logger = logging.getLogger("app")
 
 @bp.get("/resumo")
+@leitura_replica
+@cache_resposta("ativos")
 def resumo():
     try:
         total = em_uso = em_estoque = em_manutencao = inativos = 0
         por_categoria = {}
         status = {"em_uso": 0, "em_estoque": 0, "inativos": 0, "em_manutencao": 0}
 
-        with db.engine.connect() as conn:
+        with engine_leitura().connect() as conn:
             # usa a view se disponível
             cat_rows = conn.execute(text("SELECT tipo, total, em_uso, em_estoque, inativos, em_manutencao FROM vw_dashboard_contadores"))
             for r in cat_rows:
@@ -47,6 +56,8 @@ def resumo():
         return jsonify({"error": "Falha ao obter resumo"}), 500
 
 @bp.get("/graficos")
+@leitura_replica
+@cache_resposta("ativos")
 def graficos_dashboard():
     """Dados para gráficos do dashboard"""
     try:
@@ -67,6 +78,8 @@ def graficos_dashboard():
         return jsonify({"error": "Falha ao carregar gráficos"}), 500
 
 @bp.get("/categorias-detalhadas")
+@leitura_replica
+@cache_resposta("ativos")
 def categorias_detalhadas():
     """Dados detalhados por categoria para tabela"""
     try:
@@ -126,6 +139,8 @@ def categorias_detalhadas():
         return jsonify({"error": "Falha ao carregar categorias"}), 500
 
 @bp.get("/usuarios-resumo")
+@leitura_replica
+@cache_resposta("colaboradores")
 def usuarios_resumo():
     """Resumo de usuários ativos, inativos e total"""
     try:
@@ -153,6 +168,8 @@ def usuarios_resumo():
         return jsonify({"error": "Falha ao carregar resumo de usuários"}), 500
 
 @bp.get("/status-por-tipo/<tipo>")
+@leitura_replica
+@cache_resposta("ativos")
 def status_por_tipo(tipo):
     """Dados de status para um tipo específico de ativo"""
     try:
@@ -210,6 +227,8 @@ def status_por_tipo(tipo):
         return jsonify({"error": "Falha ao carregar dados"}), 500
 
 @bp.get("/estatisticas")
+@leitura_replica
+@cache_resposta("ativos", "log_auditoria", "historico_alocacoes", "snapshot_inventario_dia", "parametros_sistema")
 def estatisticas_avancadas():
     """Estatísticas avançadas para cards do dashboard"""
     try:
@@ -227,6 +246,13 @@ def estatisticas_avancadas():
         valor_total = db.session.query(
             func.coalesce(func.sum(Ativo.valor), 0)
         ).scalar() or 0.0
+
+        # Valor contábil (depreciação linear, em cache por dia)
+        try:
+            valor_contabil_total = valor_contabil("linear")["total"]["valor_contabil"]
+        except Exception as e:
+            logger.warning(f"Valor contábil indisponível: {e}")
+            valor_contabil_total = None
         
         # Últimas atividades (auditoria)
         ultimas_atividades = db.session.query(LogAuditoria).order_by(
@@ -242,27 +268,125 @@ def estatisticas_avancadas():
             "usuario": log.usuario or "Sistema"
         } for log in ultimas_atividades]
         
-        # Alocações por mês (últimos 12 meses)
+        # Alocações por mês (últimos 12 meses), dos fechamentos diários quando disponíveis
         doze_meses_atras = datetime.now() - timedelta(days=365)
-        alocacoes_mensais = db.session.query(
-            func.date_format(HistoricoAlocacao.data_inicio, '%Y-%m').label('mes'),
-            func.count(HistoricoAlocacao.id).label('total')
-        ).filter(
-            HistoricoAlocacao.data_inicio >= doze_meses_atras
-        ).group_by(
-            func.date_format(HistoricoAlocacao.data_inicio, '%Y-%m')
-        ).order_by('mes').all()
-        
-        alocacoes_data = [{"mes": row.mes, "total": row.total} for row in alocacoes_mensais]
+        alocacoes_data = alocacoes_por_mes(doze_meses_atras)
         
         return jsonify({
             "usuarios_ativos": usuarios_ativos,
             "manutencoes_abertas": manutencoes_abertas,
             "valor_total_patrimonio": float(valor_total),
+            "valor_contabil_patrimonio": valor_contabil_total,
             "ultimas_atividades": atividades_data,
             "alocacoes_mensais": alocacoes_data
         })
         
     except Exception as e:
         logger.error(f"Erro ao carregar estatísticas avançadas: {e}")
-        return jsonify({"error": "Falha ao carregar estatísticas"}), 500
\ No newline at end of file
+        return jsonify({"error": "Falha ao carregar estatísticas"}), 500
+
+
+@bp.get("/depreciacao")
+@leitura_replica
+def depreciacao():
+    """
+    Valor contábil da carteira por tipo, unidade de negócio e setor.
+    ?metodo=linear|saldo_decrescente  ?detalhes=1 inclui cada ativo.
+    """
+    metodo = request.args.get("metodo", "linear")
+    if metodo not in METODOS:
+        return jsonify({"error": "Método inválido", "detail": f"Use um de: {', '.join(METODOS)}"}), 400
+    detalhar = request.args.get("detalhes", "").lower() in ("1", "true", "sim")
+    try:
+        return jsonify(valor_contabil(metodo, detalhar=detalhar))
+    except Exception as e:
+        logger.error(f"Erro ao calcular depreciação: {e}")
+        return jsonify({"error": "Falha ao calcular depreciação", "detail": str(e)}), 500
+
+
+@bp.get("/tendencias")
+@leitura_replica
+def tendencias():
+    """
+    Evolução do estoque a partir dos fechamentos diários.
+    ?agrupamento=tipo|condicao|unidade|setor (padrão: total)
+    ?granularidade=dia|semana|mes (padrão: mes)  ?inicio=AAAA-MM-DD&fim=AAAA-MM-DD (padrão: últimos 12 meses)
+    """
+    if not snapshot_ativo():
+        return jsonify({"error": "Tendências indisponíveis", "detail": "Tabela snapshot_inventario_diario não encontrada"}), 503
+    agrupamento = request.args.get("agrupamento") or None
+    granularidade = request.args.get("granularidade", "mes")
+    if agrupamento is not None and agrupamento not in AGRUPAMENTOS:
+        return jsonify({"error": "Agrupamento inválido", "detail": f"Use um de: {', '.join(AGRUPAMENTOS)}"}), 400
+    if granularidade not in GRANULARIDADES:
+        return jsonify({"error": "Granularidade inválida", "detail": f"Use um de: {', '.join(GRANULARIDADES)}"}), 400
+    try:
+        fim = datetime.strptime(request.args["fim"], "%Y-%m-%d").date() if request.args.get("fim") else now_local().date()
+        inicio = datetime.strptime(request.args["inicio"], "%Y-%m-%d").date() if request.args.get("inicio") else fim - timedelta(days=365)
+    except ValueError:
+        return jsonify({"error": "Data inválida", "detail": "Use o formato AAAA-MM-DD"}), 400
+    if inicio > fim or (fim - inicio).days > 366 * 5:
+        return jsonify({"error": "Período inválido", "detail": "inicio deve ser anterior a fim, em até 5 anos"}), 400
+    try:
+        return jsonify(tendencia(inicio, fim, agrupamento, granularidade))
+    except Exception as e:
+        logger.error(f"Erro ao carregar tendências do estoque: {e}")
+        return jsonify({"error": "Falha ao carregar tendências", "detail": str(e)}), 500
+
+
+@bp.get("/stream")
+def stream():
+    """
+    Server-Sent Events: "estado" (contadores e últimas atividades) ao conectar,
+    depois "delta" só com os contadores alterados e "atividade" com as novas
+    entradas da auditoria.
+    """
+    transmissor = obter_transmissor()
+    try:
+        conexao = transmissor.conectar()
+    except Exception as e:
+        logger.error(f"Erro ao iniciar o dashboard em tempo real: {e}")
+        return jsonify({"error": "Falha ao iniciar o dashboard em tempo real", "detail": str(e)}), 500
+    if conexao is None:
+        return jsonify({"error": "Limite de conexões em tempo real atingido", "detail": "Use os endpoints do dashboard"}), 503
+
+    fila, estado = conexao
+    heartbeat = current_app.config.get("DASHBOARD_SSE_HEARTBEAT", 15)
+    encerrar_em = time.monotonic() + current_app.config.get("DASHBOARD_SSE_MAX_DURATION", 1800)
+
+    def eventos():
+        try:
+            yield f"retry: 5000\n{estado}"
+            while time.monotonic() < encerrar_em:
+                try:
+                    evento = fila.get(timeout=heartbeat)
+                except queue.Empty:
+                    yield ": ping\n\n"
+                    continue
+                if evento is None:  # descartado por lentidão: o navegador reconecta e recebe o estado
+                    return
+                yield evento
+        finally:
+            transmissor.desconectar(fila)
+
+    resposta = Response(eventos(), mimetype="text/event-stream")
+    resposta.headers["Cache-Control"] = "no-cache"
+    resposta.headers["X-Accel-Buffering"] = "no"  # sem buffer no proxy reverso
+    return resposta
+
+
+@bp.get("/stream/estatisticas")
+@admin_required
+def estatisticas_stream():
+    """Conexões e recálculos do dashboard em tempo real neste worker"""
+    return jsonify(obter_transmissor().situacao())
+
+
+@bp.get("/cache")
+@admin_required
+def estatisticas_cache():
+    """Acertos, respostas vencidas servidas, recálculos e esperas por chave do cache do dashboard neste worker"""
+    cache = current_app.extensions.get("cache_respostas")
+    if cache is None:
+        return jsonify({"error": "Cache do dashboard desativado"}), 503
+    return jsonify(cache.situacao())
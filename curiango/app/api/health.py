@@ -1,5 +1,6 @@
 from flask import Blueprint, jsonify
 from ..core.db import db
+from ..core.replica import obter_roteador
 from datetime import datetime
 import logging
 
@@ -15,12 +16,18 @@ def health_check():
         with db.engine.connect() as conn:
             conn.execute(text("SELECT 1"))
         
-        return jsonify({
+        dados = {
             "status": "healthy",
             "timestamp": datetime.now().isoformat(),
             "database": "connected",
             "service": "curiango-controle-ativos"
-        }), 200
+        }
+        # Réplica fora do ar não torna o sistema indisponível (as leituras voltam ao primário)
+        roteador = obter_roteador()
+        if roteador is not None:
+            roteador.disponivel()
+            dados["replica"] = roteador.situacao()
+        return jsonify(dados), 200
         
     except Exception as e:
         logger.error(f"Health check failed: {e}")
@@ -1,6 +1,8 @@
 from flask import Blueprint, request, jsonify, session
 from ..core.db import db
 from ..core.auth import api_auth_required
+from ..core.http_cache import conditional_get
+from ..services.referencias_service import invalidar_referencia
 from ..models.dominio import Marca, Operadora, UnidadeNegocio
 from ..services.parametros_service import listar_parametros, atualizar_parametro, obter_parametro
 import logging
@@ -19,6 +21,7 @@ def require_login(func):
 
 # ------------- Marcas -------------
 @bp.get("/marcas")
+@conditional_get("marcas")
 def listar_marcas():
     q = Marca.query
     termo = (request.args.get("q") or "").strip()
@@ -43,10 +46,12 @@ def criar_marca():
         db.session.rollback()
         logger.error(f"Erro ao criar marca: {e}")
         return jsonify({"error": "falha ao criar marca"}), 500
+    invalidar_referencia("marcas")
     logger.info(f"Marca criada id={m.id} nome={m.nome}")
     return jsonify({"id": m.id, "nome": m.nome}), 201
 
 @bp.get("/marcas/<int:marca_id>")
+@conditional_get("marcas")
 def obter_marca(marca_id):
     m = Marca.query.get_or_404(marca_id)
     return jsonify({"id": m.id, "nome": m.nome})
@@ -65,6 +70,7 @@ def atualizar_marca(marca_id):
         db.session.rollback()
         logger.error(f"Erro ao atualizar marca id={marca_id}: {e}")
         return jsonify({"error": "falha ao atualizar marca"}), 500
+    invalidar_referencia("marcas")
     logger.info(f"Marca atualizada id={m.id} nome={m.nome}")
     return jsonify({"id": m.id, "nome": m.nome})
 
@@ -78,11 +84,13 @@ def excluir_marca(marca_id):
         db.session.rollback()
         logger.error(f"Erro ao excluir marca id={marca_id}: {e}")
         return jsonify({"error": "falha ao excluir marca"}), 500
+    invalidar_referencia("marcas")
     logger.info(f"Marca excluída id={marca_id}")
     return jsonify({"ok": True}), 200
 
 # ------------- Operadoras -------------
 @bp.get("/operadoras")
+@conditional_get("operadoras")
 def listar_operadoras():
     q = Operadora.query
     termo = (request.args.get("q") or "").strip()
@@ -107,10 +115,12 @@ def criar_operadora():
         db.session.rollback()
         logger.error(f"Erro ao criar operadora: {e}")
         return jsonify({"error": "falha ao criar operadora"}), 500
+    invalidar_referencia("operadoras")
     logger.info(f"Operadora criada id={o.id} nome={o.nome}")
     return jsonify({"id": o.id, "nome": o.nome}), 201
 
 @bp.get("/operadoras/<int:operadora_id>")
+@conditional_get("operadoras")
 def obter_operadora(operadora_id):
     o = Operadora.query.get_or_404(operadora_id)
     return jsonify({"id": o.id, "nome": o.nome})
@@ -129,6 +139,7 @@ def atualizar_operadora(operadora_id):
         db.session.rollback()
         logger.error(f"Erro ao atualizar operadora id={operadora_id}: {e}")
         return jsonify({"error": "falha ao atualizar operadora"}), 500
+    invalidar_referencia("operadoras")
     logger.info(f"Operadora atualizada id={o.id} nome={o.nome}")
     return jsonify({"id": o.id, "nome": o.nome})
 
@@ -142,11 +153,13 @@ def excluir_operadora(operadora_id):
         db.session.rollback()
         logger.error(f"Erro ao excluir operadora id={operadora_id}: {e}")
         return jsonify({"error": "falha ao excluir operadora"}), 500
+    invalidar_referencia("operadoras")
     logger.info(f"Operadora excluída id={operadora_id}")
     return jsonify({"ok": True}), 200
 
 # ------------- Unidades de Negócio -------------
 @bp.get("/unidades")
+@conditional_get("unidades_negocio")
 def listar_unidades():
     q = UnidadeNegocio.query
     termo = (request.args.get("q") or "").strip()
@@ -171,10 +184,12 @@ def criar_unidade():
         db.session.rollback()
         logger.error(f"Erro ao criar unidade: {e}")
         return jsonify({"error": "falha ao criar unidade"}), 500
+    invalidar_referencia("unidades_negocio")
     logger.info(f"Unidade criada id={u.id} nome={u.nome}")
     return jsonify({"id": u.id, "nome": u.nome}), 201
 
 @bp.get("/unidades/<int:unidade_id>")
+@conditional_get("unidades_negocio")
 def obter_unidade(unidade_id):
     u = UnidadeNegocio.query.get_or_404(unidade_id)
     return jsonify({"id": u.id, "nome": u.nome})
@@ -193,6 +208,7 @@ def atualizar_unidade(unidade_id):
         db.session.rollback()
         logger.error(f"Erro ao atualizar unidade id={unidade_id}: {e}")
         return jsonify({"error": "falha ao atualizar unidade"}), 500
+    invalidar_referencia("unidades_negocio")
     logger.info(f"Unidade atualizada id={u.id} nome={u.nome}")
     return jsonify({"id": u.id, "nome": u.nome})
 
@@ -206,6 +222,7 @@ def excluir_unidade(unidade_id):
         db.session.rollback()
         logger.error(f"Erro ao excluir unidade id={unidade_id}: {e}")
         return jsonify({"error": "falha ao excluir unidade"}), 500
+    invalidar_referencia("unidades_negocio")
     logger.info(f"Unidade excluída id={unidade_id}")
     return jsonify({"ok": True}), 200
 
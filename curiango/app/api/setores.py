@@ -1,7 +1,10 @@
 from flask import Blueprint, request, jsonify
 from ..core.db import db
+from ..core.replica import leitura_replica
 from ..core.auth import api_auth_required
-from ..models.dominio import Setor
+from ..core.http_cache import conditional_get
+from ..services.referencias_service import invalidar_referencia
+from ..models.dominio import Setor, Colaborador, Ativo
 from ..services.auditoria_service import log_audit
 from sqlalchemy.exc import IntegrityError
 import logging
@@ -9,40 +12,76 @@ import logging
 bp = Blueprint("setores", __name__)
 logger = logging.getLogger("app")
 
+def consulta_resumo_setores():
+    """
+    Agregado por setor em uma única consulta (LEFT JOIN ... GROUP BY):
+    colaboradores ativos, ativos alocados e valor total desses ativos.
+    Cada ativo pertence a um só colaborador, então SUM/COUNT não duplicam.
+    """
+    return db.session.query(
+        Setor,
+        db.func.count(db.distinct(db.case((Colaborador.status == 'ativo', Colaborador.id)))).label("colaboradores_count"),
+        db.func.count(Ativo.id).label("ativos_count"),
+        db.func.coalesce(db.func.sum(Ativo.valor), 0).label("valor_total"),
+    )\
+        .outerjoin(Colaborador, Colaborador.setor_id == Setor.id)\
+        .outerjoin(Ativo, Ativo.usuario_atual_id == Colaborador.id)\
+        .group_by(Setor.id)
+
+def _setor_json(setor, colaboradores_count, ativos_count, valor_total):
+    return {
+        "id": setor.id,
+        "nome": setor.nome,
+        "email_responsavel": setor.email_responsavel,
+        "ativo": setor.ativo,
+        "colaboradores_count": colaboradores_count,
+        "ativos_count": ativos_count,
+        "valor_total": float(valor_total or 0),
+        "created_at": setor.created_at.isoformat() if setor.created_at else None
+    }
+
 @bp.get("")
+@leitura_replica
+@conditional_get("setores", "colaboradores", "ativos")
 def listar_setores():
-    """Lista todos os setores ativos"""
+    """Lista todos os setores ativos com totais de colaboradores e ativos"""
     try:
-        # Query base ordenada por nome
-        setores = db.session.query(Setor)\
+        linhas = consulta_resumo_setores()\
             .filter(Setor.ativo == True)\
             .order_by(Setor.nome)\
             .all()
-        
-        resultado = []
-        for setor in setores:
-            # Contar quantos colaboradores estão no setor
-            from ..models.dominio import Colaborador
-            colaboradores_count = db.session.query(Colaborador)\
-                .filter(Colaborador.setor_id == setor.id)\
-                .filter(Colaborador.status == 'ativo')\
-                .count()
-            
-            resultado.append({
-                "id": setor.id,
-                "nome": setor.nome,
-                "email_responsavel": setor.email_responsavel,
-                "ativo": setor.ativo,
-                "colaboradores_count": colaboradores_count,
-                "created_at": setor.created_at.isoformat() if setor.created_at else None
-            })
-        
-        return jsonify(resultado)
+
+        return jsonify([_setor_json(*linha) for linha in linhas])
         
     except Exception as e:
         logger.exception("Erro ao listar setores")
         return jsonify({"error": "Erro ao listar setores", "detail": str(e)}), 500
 
+@bp.get("/resumo")
+@leitura_replica
+@conditional_get("setores", "colaboradores", "ativos")
+def resumo_setores():
+    """Visão geral de todos os setores (inclusive inativos) com totais gerais"""
+    try:
+        linhas = consulta_resumo_setores()\
+            .order_by(Setor.ativo.desc(), Setor.nome)\
+            .all()
+
+        setores = [_setor_json(*linha) for linha in linhas]
+        return jsonify({
+            "setores": setores,
+            "totais": {
+                "setores": len(setores),
+                "colaboradores": sum(s["colaboradores_count"] for s in setores),
+                "ativos": sum(s["ativos_count"] for s in setores),
+                "valor_total": round(sum(s["valor_total"] for s in setores), 2)
+            }
+        })
+
+    except Exception as e:
+        logger.exception("Erro ao gerar resumo de setores")
+        return jsonify({"error": "Erro ao gerar resumo de setores", "detail": str(e)}), 500
+
 @bp.post("")
 def criar_setor():
     """Cria um novo setor"""
@@ -92,6 +131,7 @@ def criar_setor():
             }
         )
         
+        invalidar_referencia("setores")
         logger.info(f"Setor criado: {nome} (ID: {setor.id})")
         
         return jsonify({
@@ -110,27 +150,18 @@ def criar_setor():
         return jsonify({"error": "Erro ao criar setor", "detail": str(e)}), 500
 
 @bp.get("/<int:setor_id>")
+@conditional_get("setores", "colaboradores", "ativos")
 def obter_setor(setor_id):
     """Obtém dados de um setor específico"""
     try:
-        setor = Setor.query.get_or_404(setor_id)
-        
-        # Contar colaboradores
-        from ..models.dominio import Colaborador
-        colaboradores_count = db.session.query(Colaborador)\
-            .filter(Colaborador.setor_id == setor.id)\
-            .filter(Colaborador.status == 'ativo')\
-            .count()
-        
-        return jsonify({
-            "id": setor.id,
-            "nome": setor.nome,
-            "email_responsavel": setor.email_responsavel,
-            "ativo": setor.ativo,
-            "colaboradores_count": colaboradores_count,
-            "created_at": setor.created_at.isoformat() if setor.created_at else None,
-            "updated_at": setor.updated_at.isoformat() if setor.updated_at else None
-        })
+        linha = consulta_resumo_setores().filter(Setor.id == setor_id).first()
+        if not linha:
+            return jsonify({"error": "Setor não encontrado"}), 404
+
+        setor = linha[0]
+        resultado = _setor_json(*linha)
+        resultado["updated_at"] = setor.updated_at.isoformat() if setor.updated_at else None
+        return jsonify(resultado)
         
     except Exception as e:
         logger.exception(f"Erro ao obter setor {setor_id}")
@@ -191,6 +222,7 @@ def atualizar_setor(setor_id):
             dados_novos=dados_novos
         )
         
+        invalidar_referencia("setores")
         logger.info(f"Setor atualizado: {setor.nome} (ID: {setor.id})")
         
         return jsonify({
@@ -212,14 +244,10 @@ def atualizar_setor(setor_id):
 def excluir_setor(setor_id):
     """Exclui (inativa) um setor"""
     try:
-        setor = Setor.query.get_or_404(setor_id)
-        
-        # Verificar se há colaboradores vinculados
-        from ..models.dominio import Colaborador
-        colaboradores_vinculados = db.session.query(Colaborador)\
-            .filter(Colaborador.setor_id == setor.id)\
-            .filter(Colaborador.status == 'ativo')\
-            .count()
+        linha = consulta_resumo_setores().filter(Setor.id == setor_id).first()
+        if not linha:
+            return jsonify({"error": "Setor não encontrado"}), 404
+        setor, colaboradores_vinculados = linha[0], linha.colaboradores_count
         
         if colaboradores_vinculados > 0:
             return jsonify({
@@ -246,6 +274,7 @@ def excluir_setor(setor_id):
             dados_novos={"ativo": False}
         )
         
+        invalidar_referencia("setores")
         logger.info(f"Setor inativado: {setor.nome} (ID: {setor.id})")
         
         return jsonify({"message": "Setor inativado com sucesso"}), 200
@@ -261,7 +290,6 @@ def listar_colaboradores_setor(setor_id):
     try:
         setor = Setor.query.get_or_404(setor_id)
         
-        from ..models.dominio import Colaborador
         colaboradores = db.session.query(Colaborador)\
             .filter(Colaborador.setor_id == setor.id)\
             .filter(Colaborador.status == 'ativo')\
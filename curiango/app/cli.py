@@ -0,0 +1,58 @@
+import click
+import logging
+
+logger = logging.getLogger("app")
+
+def register_commands(app):
+    """Registra comandos de manutenção no CLI do Flask (flask --app manage <comando>)"""
+
+    @app.cli.command("build-assets")
+    def build_assets_command():
+        """Gera static/dist com arquivos versionados, pré-comprimidos e variantes WebP"""
+        from .core.assets import build_assets
+        stats = build_assets(app.static_folder)
+        click.echo(
+            f"{stats['arquivos']} arquivos ({stats['bytes_originais'] / 1024:.0f} KB) | "
+            f"gzip: {stats['bytes_gzip'] / 1024:.0f} KB | brotli: {stats['bytes_brotli'] / 1024:.0f} KB | "
+            f"variantes WebP: {stats['variantes']}"
+        )
+
+    @app.cli.command("rebuild-projecao-ativos")
+    def rebuild_projecao_ativos_command():
+        """Reconstrói a tabela ativos_projecao a partir das tabelas de origem (correção de divergências)"""
+        from .services.ativos_service import reconstruir_projecao
+        total = reconstruir_projecao()
+        logger.info(f"Projeção de ativos reconstruída: {total} linhas")
+        click.echo(f"ativos_projecao reconstruída: {total} ativos")
+
+    @app.cli.command("arquivar-auditoria")
+    @click.option("--simular", is_flag=True, help="Apenas conta o que seria arquivado, sem gravar nem remover")
+    def arquivar_auditoria_command(simular):
+        """Cria as próximas partições de log_auditoria e arquiva/remove logs fora da retenção"""
+        from .services.arquivamento_service import arquivar_logs, manter_particoes
+        if not simular:
+            criadas = manter_particoes()
+            if criadas:
+                click.echo(f"Partições criadas: {', '.join(criadas)}")
+        resumo = arquivar_logs(simular=simular)
+        prefixo = "[simulação] " if simular else ""
+        click.echo(
+            f"{prefixo}{resumo['arquivados']} logs arquivados em {len(resumo['arquivos'])} arquivo(s); "
+            f"{resumo['removidos']} removidos por DELETE; "
+            f"partições removidas: {', '.join(resumo['particoes_removidas']) or '-'}"
+        )
+
+    @app.cli.command("snapshot-inventario")
+    @click.option("--data", "dia", type=click.DateTime(formats=["%Y-%m-%d"]), default=None,
+                  help="Dia a fechar (AAAA-MM-DD): só o anterior é aceito (padrão)")
+    def snapshot_inventario_command(dia):
+        """Grava o fechamento diário do estoque (agendar logo após a meia-noite)"""
+        from .services.snapshot_inventario_service import gerar_snapshot
+        try:
+            resumo = gerar_snapshot(dia.date() if dia else None)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        click.echo(
+            f"Fechamento de {resumo['data']}: {resumo['grupos']} grupos, {resumo['quantidade']} ativos, "
+            f"{resumo['alocacoes']} alocações no dia ({resumo['substituidas']} linhas anteriores substituídas)"
+        )
@@ -0,0 +1,206 @@
+"""
+Pipeline de arquivos estáticos: gera cópias com hash no nome em static/dist,
+variantes pré-comprimidas (gzip/brotli) e versões WebP redimensionadas das
+imagens de login. Em runtime, url_for('static', ...) passa a apontar para a
+cópia com hash, servida com Cache-Control imutável.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import shutil
+
+from flask import request, send_from_directory
+
+logger = logging.getLogger("app")
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+try:
+    from PIL import Image
+    PILLOW_AVAILABLE = True
+except ImportError:
+    PILLOW_AVAILABLE = False
+
+DIST_DIR = "dist"
+MANIFEST_NAME = "manifest.json"
+FONTES = ("css", "js", "img")
+EXTENSOES_COMPRIMIVEIS = (".js", ".css", ".svg", ".json", ".html")
+LARGURAS_LOGIN = (640, 1280, 1920)
+CACHE_IMUTAVEL = "public, max-age=31536000, immutable"
+
+
+def _hash_arquivo(caminho):
+    h = hashlib.md5()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(65536), b""):
+            h.update(bloco)
+    return h.hexdigest()[:12]
+
+
+def _nome_com_hash(rel_path, digest, sufixo="", ext=None):
+    base, ext_original = os.path.splitext(rel_path)
+    return f"{base}{sufixo}.{digest}{ext or ext_original}"
+
+
+def _pre_comprimir(destino):
+    with open(destino, "rb") as f:
+        conteudo = f.read()
+    with gzip.open(destino + ".gz", "wb", compresslevel=9) as f:
+        f.write(conteudo)
+    if BROTLI_AVAILABLE:
+        with open(destino + ".br", "wb") as f:
+            f.write(brotli.compress(conteudo, quality=11))
+
+
+def _gerar_variantes_login(origem, rel_path, dist_root):
+    """Gera WebP redimensionados de uma imagem de login; retorna lista de variantes"""
+    variantes = []
+    with Image.open(origem) as img:
+        largura_original, altura_original = img.size
+        for largura in LARGURAS_LOGIN:
+            if largura > largura_original:
+                continue
+            altura = round(altura_original * largura / largura_original)
+            redimensionada = img.resize((largura, altura), Image.LANCZOS)
+            tmp = os.path.join(dist_root, ".tmp-variante.webp")
+            redimensionada.save(tmp, "WEBP", quality=80, method=6)
+            destino_rel = _nome_com_hash(rel_path, _hash_arquivo(tmp), sufixo=f"-{largura}w", ext=".webp")
+            destino = os.path.join(dist_root, destino_rel)
+            os.makedirs(os.path.dirname(destino), exist_ok=True)
+            os.replace(tmp, destino)
+            variantes.append({"width": largura, "height": altura, "path": f"{DIST_DIR}/{destino_rel}"})
+    return variantes
+
+
+def build_assets(static_folder):
+    """
+    Gera static/dist e o manifesto. Retorna estatísticas (bytes originais x gerados).
+    """
+    dist_root = os.path.join(static_folder, DIST_DIR)
+    if os.path.isdir(dist_root):
+        shutil.rmtree(dist_root)
+    os.makedirs(dist_root)
+
+    manifest = {"files": {}, "variants": {}}
+    stats = {"arquivos": 0, "bytes_originais": 0, "bytes_gzip": 0, "bytes_brotli": 0, "variantes": 0}
+
+    for fonte in FONTES:
+        for raiz, _, arquivos in os.walk(os.path.join(static_folder, fonte)):
+            for nome in sorted(arquivos):
+                origem = os.path.join(raiz, nome)
+                rel_path = os.path.relpath(origem, static_folder).replace(os.sep, "/")
+                destino_rel = _nome_com_hash(rel_path, _hash_arquivo(origem))
+                destino = os.path.join(dist_root, destino_rel)
+                os.makedirs(os.path.dirname(destino), exist_ok=True)
+                try:
+                    os.link(origem, destino)  # evita duplicar bytes em disco quando possível
+                except OSError:
+                    shutil.copy2(origem, destino)
+                manifest["files"][rel_path] = f"{DIST_DIR}/{destino_rel}"
+                stats["arquivos"] += 1
+                stats["bytes_originais"] += os.path.getsize(origem)
+
+                if nome.lower().endswith(EXTENSOES_COMPRIMIVEIS):
+                    _pre_comprimir(destino)
+                    stats["bytes_gzip"] += os.path.getsize(destino + ".gz")
+                    if BROTLI_AVAILABLE:
+                        stats["bytes_brotli"] += os.path.getsize(destino + ".br")
+
+                if rel_path.startswith("img/login/") and PILLOW_AVAILABLE:
+                    try:
+                        variantes = _gerar_variantes_login(origem, rel_path, dist_root)
+                    except OSError as e:
+                        logger.warning(f"Falha ao gerar variantes de {rel_path}: {e}")
+                        continue
+                    if variantes:
+                        manifest["variants"][rel_path] = variantes
+                        stats["variantes"] += len(variantes)
+
+    if not BROTLI_AVAILABLE:
+        logger.warning("brotli não disponível - gerando apenas variantes gzip")
+    if not PILLOW_AVAILABLE:
+        logger.warning("Pillow não disponível - variantes WebP das imagens de login não geradas")
+
+    with open(os.path.join(dist_root, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1, sort_keys=True)
+
+    return stats
+
+
+def load_manifest(static_folder):
+    caminho = os.path.join(static_folder, DIST_DIR, MANIFEST_NAME)
+    if not os.path.exists(caminho):
+        return None
+    with open(caminho, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def asset_variants(app, rel_path):
+    """Retorna as variantes responsivas geradas para um arquivo estático (ou lista vazia)"""
+    manifest = app.extensions.get("assets_manifest") or {}
+    return manifest.get("variants", {}).get(rel_path, [])
+
+
+def _encoding_aceito(disponiveis):
+    aceitos = request.accept_encodings
+    for encoding, ext in (("br", ".br"), ("gzip", ".gz")):
+        if ext in disponiveis and aceitos[encoding]:
+            return encoding, ext
+    return None, None
+
+
+def init_assets(app):
+    """Ativa o manifesto (se existir) para reescrever URLs e servir dist/ com cache longo"""
+    if not app.config.get("ASSETS_ENABLED", True):
+        return
+
+    manifest = load_manifest(app.static_folder)
+    if not manifest:
+        logger.info("Manifesto de assets não encontrado - servindo arquivos estáticos originais")
+        return
+
+    app.extensions["assets_manifest"] = manifest
+    arquivos = manifest.get("files", {})
+
+    # Índice de variantes pré-comprimidas existentes, montado uma vez
+    precomprimidos = {}
+    for destino in arquivos.values():
+        if destino.endswith(EXTENSOES_COMPRIMIVEIS):
+            absoluto = os.path.join(app.static_folder, destino)
+            precomprimidos[destino] = {ext for ext in (".br", ".gz") if os.path.exists(absoluto + ext)}
+
+    @app.url_defaults
+    def reescrever_url_estatica(endpoint, values):
+        if endpoint == "static":
+            filename = values.get("filename")
+            if filename in arquivos:
+                values["filename"] = arquivos[filename]
+
+    static_original = app.view_functions["static"]
+
+    def static_com_cache(filename):
+        if not filename.startswith(DIST_DIR + "/"):
+            return static_original(filename=filename)
+
+        encoding, ext = _encoding_aceito(precomprimidos.get(filename, ()))
+        if encoding:
+            response = send_from_directory(app.static_folder, filename + ext)
+            response.headers["Content-Encoding"] = encoding
+            response.mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        else:
+            response = static_original(filename=filename)
+
+        if filename in precomprimidos:
+            response.vary.add("Accept-Encoding")
+        response.headers["Cache-Control"] = CACHE_IMUTAVEL
+        return response
+
+    app.view_functions["static"] = static_com_cache
+    logger.info(f"Assets com hash habilitados ({len(arquivos)} arquivos)")
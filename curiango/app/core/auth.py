@@ -1,6 +1,6 @@
 # -*- coding: utf-8 -*-
 from functools import wraps
-from flask import session, jsonify, request
+from flask import session, jsonify, request, g
 import logging
 
 logger = logging.getLogger("app")
@@ -74,13 +74,67 @@ def get_user_groups():
     user = session.get("user", {})
     return user.get("groups", [])
 
+def get_user_roles():
+    """
+    Retorna os papeis do usuario atual como frozenset.
+    Os papeis sao resolvidos no login e memorizados por request em g.
+    """
+    if "user_roles" in g:
+        return g.user_roles
+    user = session.get("user") or {}
+    roles = user.get("roles")
+    if roles is None and user:
+        # Sessoes anteriores ao armazenamento de papeis: resolve uma vez e grava
+        from .ldap_auth import resolver_papeis
+        from .session_store import regenerar_sessao
+        roles = sorted(resolver_papeis(user.get("groups", [])))
+        user["roles"] = roles
+        regenerar_sessao(session)
+        session["user"] = user
+    g.user_roles = frozenset(roles or ())
+    return g.user_roles
+
+def has_role(*roles):
+    """
+    Verifica se o usuario atual possui ao menos um dos papeis informados.
+    """
+    return not get_user_roles().isdisjoint(roles)
+
 def is_user_admin():
     """
     Verifica se o usuario atual tem privilegios administrativos.
     """
-    from .ldap_auth import is_admin
-    user_groups = get_user_groups()
-    return is_admin(user_groups)
+    from .ldap_auth import PAPEL_ADMIN
+    return has_role(PAPEL_ADMIN)
+
+def roles_required(*roles):
+    """
+    Decorador que exige ao menos um dos papeis informados para acessar uma rota.
+    """
+    exigidos = frozenset(roles)
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            user = session.get("user")
+            if not user:
+                logger.warning(f"Acesso negado a rota {request.endpoint} - usuario nao autenticado")
+                return jsonify({
+                    "error": "Unauthorized",
+                    "message": "Authentication required",
+                    "code": "AUTH_REQUIRED"
+                }), 401
+
+            if get_user_roles().isdisjoint(exigidos):
+                logger.warning(f"Acesso negado a rota {request.endpoint} - usuario {get_username()} sem papel {sorted(exigidos)}")
+                return jsonify({
+                    "error": "Forbidden",
+                    "message": f"Required role: {', '.join(sorted(exigidos))}",
+                    "code": "ROLE_REQUIRED"
+                }), 403
+
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
 
 def admin_required(f):
     """
@@ -0,0 +1,244 @@
+"""
+Cache de respostas em memória (por worker) para endpoints de leitura caros.
+
+- Dentro do TTL a resposta guardada é devolvida sem executar a view.
+- Vencido o TTL (ou invalidada), a resposta antiga continua sendo servida por
+  até max_stale segundos enquanto uma thread revalida: se as versões das
+  tabelas da view (versoes_tabela) não mudaram, só renova o prazo; senão,
+  executa a view de novo. Ninguém espera pelo recálculo.
+- Sem resposta utilizável, uma única requisição executa a view e as
+  concorrentes para a mesma chave esperam por ela (single-flight).
+- Commits neste worker invalidam na hora as respostas que dependem das
+  tabelas gravadas (versionamento.ao_confirmar); escritas de outros workers
+  aparecem no máximo um TTL depois, pela comparação de versões.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, make_response, request
+
+from .db import db
+from .versionamento import ao_confirmar, obter_versoes, versionamento_ativo
+
+logger = logging.getLogger("app")
+
+_METRICAS = ("hits", "stale", "misses", "coalescidas", "recalculos", "revalidadas", "erros")
+
+
+class _Entrada:
+    __slots__ = ("corpo", "status", "cabecalhos", "tabelas", "marca", "fresca_ate", "utilizavel_ate")
+
+
+class CacheRespostas:
+    """Respostas por endpoint + argumentos, compartilhadas pelas threads do worker"""
+
+    def __init__(self, app, ttl=15, max_stale=300, max_itens=256, espera=30):
+        self._app = app
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.max_itens = max_itens
+        self.espera = espera
+        self._lock = threading.Lock()
+        self._entradas = OrderedDict()  # chave -> _Entrada
+        self._em_andamento = {}  # chave -> threading.Event do cálculo em curso
+        # Gerações por tabela (e de invalidar() sem tabelas), incrementadas a cada invalidação:
+        # cálculos iniciados antes de uma escrita nas suas tabelas não ficam frescos
+        self._geracoes = {}
+        self._geracao_geral = 0
+        self._metricas = {}
+
+    def _metrica(self, chave, nome, valor=1):
+        metricas = self._metricas.setdefault(chave, dict.fromkeys(_METRICAS, 0))
+        metricas[nome] += valor
+
+    def _geracao(self, tabelas):
+        """Chamar com o lock"""
+        return self._geracao_geral, tuple(self._geracoes.get(tabela, 0) for tabela in sorted(tabelas))
+
+    def _marca(self, tabelas):
+        if not tabelas or not versionamento_ativo():
+            return None
+        return tuple(versao for _, (versao, _) in sorted(obter_versoes(tabelas).items()))
+
+    def _resposta(self, entrada):
+        return current_app.response_class(entrada.corpo, status=entrada.status, headers=entrada.cabecalhos)
+
+    def obter(self, chave, tabelas, executar, contexto):
+        """
+        Resposta da chave: do cache, ou de executar() (que roda a view e
+        retorna um Response). contexto = (caminho, query string) para a
+        revalidação em segundo plano.
+        """
+        agora = time.monotonic()
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is not None and agora < entrada.fresca_ate:
+                self._entradas.move_to_end(chave)
+                self._metrica(chave, "hits")
+                return self._resposta(entrada)
+            if entrada is not None and agora < entrada.utilizavel_ate:
+                self._metrica(chave, "stale")
+                if chave not in self._em_andamento:
+                    self._em_andamento[chave] = threading.Event()
+                    threading.Thread(target=self._revalidar, args=(chave, tabelas, executar, contexto),
+                                     name="cache-respostas", daemon=True).start()
+                return self._resposta(entrada)
+            em_curso = self._em_andamento.get(chave)
+            if em_curso is None:
+                self._em_andamento[chave] = threading.Event()
+                self._metrica(chave, "misses")
+            else:
+                self._metrica(chave, "coalescidas")
+
+        if em_curso is not None:
+            em_curso.wait(self.espera)
+            with self._lock:
+                entrada = self._entradas.get(chave)
+            if entrada is not None:
+                return self._resposta(entrada)
+            # O cálculo em curso falhou (ou demorou demais): executa por conta própria
+            return executar()
+
+        try:
+            return self._calcular(chave, tabelas, executar)
+        finally:
+            self._concluir(chave)
+
+    def _calcular(self, chave, tabelas, executar):
+        with self._lock:
+            geracao = self._geracao(tabelas)
+        # Versões lidas antes da view: uma escrita durante o cálculo muda a marca e força novo cálculo
+        marca = self._marca(tabelas)
+        inicio = time.perf_counter()
+        resposta = executar()
+        with self._lock:
+            self._metrica(chave, "recalculos")
+            self._metricas[chave]["ultimo_ms"] = round((time.perf_counter() - inicio) * 1000, 1)
+        if resposta.status_code == 200 and not resposta.is_streamed:
+            entrada = _Entrada()
+            entrada.corpo = resposta.get_data()
+            entrada.status = resposta.status_code
+            entrada.cabecalhos = [(k, v) for k, v in resposta.headers.items() if k.lower() != "content-length"]
+            entrada.tabelas = frozenset(tabelas)
+            entrada.marca = marca
+            self._guardar(chave, entrada, geracao)
+        return resposta
+
+    def _guardar(self, chave, entrada, geracao):
+        agora = time.monotonic()
+        with self._lock:
+            # Invalidada durante o cálculo: fica utilizável, mas já vencida
+            entrada.fresca_ate = agora + self.ttl if geracao == self._geracao(entrada.tabelas) else 0
+            entrada.utilizavel_ate = agora + self.ttl + self.max_stale
+            self._entradas[chave] = entrada
+            self._entradas.move_to_end(chave)
+            while len(self._entradas) > self.max_itens:
+                self._entradas.popitem(last=False)
+
+    def _concluir(self, chave):
+        with self._lock:
+            evento = self._em_andamento.pop(chave, None)
+        if evento is not None:
+            evento.set()
+
+    def _revalidar(self, chave, tabelas, executar, contexto):
+        caminho, query_string = contexto
+        try:
+            # executar() lê request/current_app pelos proxies: roda num contexto equivalente ao original
+            with self._app.test_request_context(caminho, query_string=query_string):
+                try:
+                    with self._lock:
+                        entrada = self._entradas.get(chave)
+                        geracao = self._geracao(tabelas)
+                        invalidada = entrada is None or entrada.fresca_ate == 0
+                    if not invalidada and entrada.marca is not None and self._marca(tabelas) == entrada.marca:
+                        with self._lock:
+                            self._metrica(chave, "revalidadas")
+                        self._guardar(chave, entrada, geracao)
+                        return
+                    self._calcular(chave, tabelas, executar)
+                finally:
+                    db.session.remove()
+        except Exception:
+            logger.exception(f"Erro ao revalidar resposta em cache {chave}")
+            with self._lock:
+                self._metrica(chave, "erros")
+        finally:
+            self._concluir(chave)
+
+    def invalidar(self, tabelas=None):
+        """Vence as respostas que dependem das tabelas (ou todas); continuam servíveis enquanto revalidam"""
+        tabelas = set(tabelas) if tabelas else None
+        with self._lock:
+            if tabelas is None:
+                self._geracao_geral += 1
+            else:
+                for tabela in tabelas:
+                    self._geracoes[tabela] = self._geracoes.get(tabela, 0) + 1
+            for entrada in self._entradas.values():
+                if tabelas is None or entrada.tabelas & tabelas:
+                    entrada.fresca_ate = 0
+
+    def situacao(self):
+        agora = time.monotonic()
+        with self._lock:
+            return {
+                "ttl": self.ttl,
+                "max_stale": self.max_stale,
+                "chaves": {
+                    chave: {
+                        **metricas,
+                        "em_cache": chave in self._entradas,
+                        "fresca": chave in self._entradas and agora < self._entradas[chave].fresca_ate,
+                    }
+                    for chave, metricas in self._metricas.items()
+                },
+            }
+
+
+def cache_resposta(*tabelas):
+    """
+    Decorador: resposta em cache por endpoint e argumentos, com single-flight
+    e stale-while-revalidate; tabelas são as das quais a resposta depende.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            cache = current_app.extensions.get("cache_respostas")
+            if cache is None or request.method != "GET":
+                return f(*args, **kwargs)
+            partes = [request.endpoint or ""]
+            partes += [f"{k}={v}" for k, v in sorted(kwargs.items())]
+            partes += [f"{k}={v}" for k, v in sorted(request.args.items(multi=True))]
+            return cache.obter("|".join(partes), tabelas, lambda: make_response(f(*args, **kwargs)),
+                               (request.path, request.query_string))
+        return decorated_function
+    return decorator
+
+
+def invalidar_respostas(*tabelas):
+    """Vence neste worker as respostas que dependem das tabelas (todas, sem argumentos)"""
+    cache = current_app.extensions.get("cache_respostas")
+    if cache is not None:
+        cache.invalidar(tabelas or None)
+
+
+def _invalidar_gravadas(tabelas):
+    invalidar_respostas(*tabelas)
+
+
+def init_cache_respostas(app):
+    """Cria o cache se DASHBOARD_CACHE_TTL > 0; todo commit neste worker invalida as tabelas gravadas"""
+    ttl = app.config.get("DASHBOARD_CACHE_TTL", 15)
+    if ttl <= 0:
+        return
+    app.extensions["cache_respostas"] = CacheRespostas(
+        app,
+        ttl=ttl,
+        max_stale=app.config.get("DASHBOARD_CACHE_MAX_STALE", 300),
+        max_itens=app.config.get("DASHBOARD_CACHE_MAX_ITEMS", 256),
+    )
+    ao_confirmar(_invalidar_gravadas)
@@ -0,0 +1,139 @@
+"""
+Compressão das respostas dinâmicas (JSON, NDJSON, CSV, HTML) negociada pelo
+Accept-Encoding: brotli quando instalado e aceito, senão gzip.
+
+- Respostas montadas em memória só são comprimidas a partir de
+  COMPRESSION_MIN_SIZE bytes e se ficarem menores.
+- Respostas em streaming (exportações) são comprimidas bloco a bloco, com
+  flush a cada bloco: o cliente continua recebendo os dados à medida que são
+  gerados e o servidor não acumula o arquivo inteiro.
+- Não passam pela compressão: arquivos servidos do disco (estáticos, PDFs,
+  downloads de exportação), conteúdo já comprimido (gzip, imagens), respostas
+  que já têm Content-Encoding, Server-Sent Events e Cache-Control no-transform.
+"""
+import logging
+import zlib
+
+from flask import request
+
+logger = logging.getLogger("app")
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+MIMETYPES_COMPRIMIVEIS = frozenset({
+    "application/json", "application/x-ndjson", "application/javascript", "application/xml", "image/svg+xml",
+})
+MIMETYPES_IGNORADOS = frozenset({"text/event-stream"})  # cada evento precisa chegar na hora
+STATUS_IGNORADOS = frozenset({204, 206, 304})
+
+
+class _Compressor:
+    """Interface comum para gzip (zlib) e brotli, com flush por bloco para streaming"""
+
+    def __init__(self, encoding, nivel_gzip, qualidade_brotli):
+        self.encoding = encoding
+        if encoding == "br":
+            self._br = brotli.Compressor(quality=qualidade_brotli)
+        else:
+            self._zlib = zlib.compressobj(nivel_gzip, zlib.DEFLATED, 31)  # 31 = cabeçalho gzip
+
+    def bloco(self, dados):
+        """Comprime e descarrega o bloco (decodificável pelo cliente sem esperar o fim)"""
+        if self.encoding == "br":
+            return self._br.process(dados) + self._br.flush()
+        return self._zlib.compress(dados) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finalizar(self, dados=b""):
+        if self.encoding == "br":
+            return self._br.process(dados) + self._br.finish()
+        return self._zlib.compress(dados) + self._zlib.flush()
+
+
+def escolher_encoding(aceitos, brotli_disponivel=BROTLI_AVAILABLE):
+    """br ou gzip conforme a qualidade declarada no Accept-Encoding (empate: br); None sem nenhum aceito"""
+    candidatos = (("br", "gzip") if brotli_disponivel else ("gzip",))
+    melhor, qualidade = None, 0
+    for encoding in candidatos:
+        if aceitos[encoding] > qualidade:
+            melhor, qualidade = encoding, aceitos[encoding]
+    return melhor
+
+
+def _comprimivel(response):
+    if response.direct_passthrough or response.status_code < 200 or response.status_code in STATUS_IGNORADOS:
+        return False
+    if "Content-Encoding" in response.headers or response.cache_control.no_transform:
+        return False
+    mimetype = response.mimetype or ""
+    if mimetype in MIMETYPES_IGNORADOS:
+        return False
+    return mimetype.startswith("text/") or mimetype in MIMETYPES_COMPRIMIVEIS
+
+
+def _fluxo_comprimido(iteravel, compressor):
+    try:
+        for dados in iteravel:
+            if isinstance(dados, str):
+                dados = dados.encode("utf-8")
+            comprimido = compressor.bloco(dados) if dados else b""
+            if comprimido:
+                yield comprimido
+        yield compressor.finalizar()
+    finally:
+        # Fecha o gerador original (stream_with_context libera o contexto da requisição no close)
+        fechar = getattr(iteravel, "close", None)
+        if fechar is not None:
+            fechar()
+
+
+def comprimir_resposta(response, encoding, tamanho_minimo=1024, nivel_gzip=6, qualidade_brotli=4):
+    """Aplica a compressão na resposta (no próprio objeto); retorna True se comprimiu"""
+    compressor = _Compressor(encoding, nivel_gzip, qualidade_brotli)
+    if response.is_streamed:
+        response.response = _fluxo_comprimido(response.response, compressor)
+        response.headers.pop("Content-Length", None)
+    else:
+        dados = response.get_data()
+        if len(dados) < tamanho_minimo:
+            return False
+        comprimido = compressor.finalizar(dados)
+        if len(comprimido) >= len(dados):
+            return False
+        response.set_data(comprimido)
+
+    response.headers["Content-Encoding"] = encoding
+    # A representação comprimida não é idêntica byte a byte: ETag fraca (If-None-Match compara fraco)
+    etag, fraca = response.get_etag()
+    if etag and not fraca:
+        response.set_etag(etag, weak=True)
+    return True
+
+
+def init_compressao(app):
+    """Comprime as respostas no after_request se COMPRESSION_ENABLED"""
+    if not app.config.get("COMPRESSION_ENABLED", True):
+        return
+    tamanho_minimo = app.config.get("COMPRESSION_MIN_SIZE", 1024)
+    nivel_gzip = app.config.get("COMPRESSION_GZIP_LEVEL", 6)
+    qualidade_brotli = app.config.get("COMPRESSION_BROTLI_QUALITY", 4)
+
+    @app.after_request
+    def comprimir(response):
+        if not _comprimivel(response):
+            return response
+        response.vary.add("Accept-Encoding")
+        encoding = escolher_encoding(request.accept_encodings)
+        if encoding is None:
+            return response
+        try:
+            comprimir_resposta(response, encoding, tamanho_minimo, nivel_gzip, qualidade_brotli)
+        except Exception:
+            logger.exception(f"Falha ao comprimir resposta de {request.path} - enviando sem compressão")
+        return response
+
+    if not BROTLI_AVAILABLE:
+        logger.warning("brotli não disponível - respostas comprimidas apenas com gzip")
@@ -12,6 +12,58 @@ class Config:
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SQLALCHEMY_ECHO = os.getenv("SQLALCHEMY_ECHO", "false").lower() == "true"
+    # Réplica de leitura (opcional): endpoints de consulta leem dela, exceto logo após uma escrita do
+    # usuário (s), com a réplica fora do ar (nova tentativa em s) ou atrasada (s; 0 não verifica)
+    SQLALCHEMY_REPLICA_URI = os.getenv("SQLALCHEMY_REPLICA_URI", "")
+    REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", "10"))
+    REPLICA_RETRY_SECONDS = int(os.getenv("REPLICA_RETRY_SECONDS", "30"))
+    REPLICA_MAX_LAG = int(os.getenv("REPLICA_MAX_LAG", "5"))
+    REPLICA_CHECK_INTERVAL = int(os.getenv("REPLICA_CHECK_INTERVAL", "5"))
+
+    # Cache HTTP: respostas com ETag são revalidadas a cada uso (304 quando nada mudou)
+    HTTP_CACHE_CONTROL = os.getenv("HTTP_CACHE_CONTROL", "no-cache")
+    # Cache de marcas/operadoras/unidades/setores: itens por tabela e intervalo (s) de checagem de versão
+    LOOKUP_CACHE_MAX_ITEMS = int(os.getenv("LOOKUP_CACHE_MAX_ITEMS", "2000"))
+    LOOKUP_CACHE_CHECK_INTERVAL = int(os.getenv("LOOKUP_CACHE_CHECK_INTERVAL", "5"))
+    # Serializa respostas JSON com orjson quando instalado
+    JSON_FAST_ENCODER = os.getenv("JSON_FAST_ENCODER", "true").lower() == "true"
+    # Compressão das respostas (brotli/gzip conforme Accept-Encoding): tamanho mínimo (bytes) e níveis
+    COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+    COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+    COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+    COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+
+    # Retenção de auditoria (dias; 0 = manter sempre), com exceções por ação ("LOGIN:90,READ:90")
+    AUDIT_RETENTION_DAYS = int(os.getenv("AUDIT_RETENTION_DAYS", "365"))
+    AUDIT_RETENTION_BY_ACTION = os.getenv("AUDIT_RETENTION_BY_ACTION", "LOGIN:90,LOGOUT:90,READ:90")
+    AUDIT_ARCHIVE_DIR = os.getenv("AUDIT_ARCHIVE_DIR", "arquivo/auditoria")  # NDJSON.gz dos logs removidos
+    AUDIT_ARCHIVE_BATCH = int(os.getenv("AUDIT_ARCHIVE_BATCH", "5000"))
+    AUDIT_PARTITION_MONTHS_AHEAD = int(os.getenv("AUDIT_PARTITION_MONTHS_AHEAD", "3"))
+    # Total da busca de auditoria: contagem exata até o limite, em cache por filtro (TTL em s)
+    AUDIT_COUNT_LIMIT = int(os.getenv("AUDIT_COUNT_LIMIT", "100000"))
+    AUDIT_COUNT_CACHE_TTL = int(os.getenv("AUDIT_COUNT_CACHE_TTL", "30"))
+    # Exportação da auditoria: acima do limite vira job assíncrono com arquivo em AUDIT_EXPORT_DIR
+    AUDIT_EXPORT_SYNC_LIMIT = int(os.getenv("AUDIT_EXPORT_SYNC_LIMIT", "50000"))
+    AUDIT_EXPORT_DIR = os.getenv("AUDIT_EXPORT_DIR", "/tmp/curiango_exports")
+    AUDIT_EXPORT_TTL_HOURS = int(os.getenv("AUDIT_EXPORT_TTL_HOURS", "24"))
+    # Sincronização de ativos (POST /api/ativos/sync): máximo de itens por requisição
+    ASSET_SYNC_MAX_ITEMS = int(os.getenv("ASSET_SYNC_MAX_ITEMS", "20000"))
+    # Agentes de inventário (POST /api/agentes/inventario); sem token a ingestão fica desativada
+    AGENT_TOKEN = os.getenv("AGENT_TOKEN", "")
+    AGENT_BATCH_INTERVAL = int(os.getenv("AGENT_BATCH_INTERVAL", "5"))  # segundos entre gravações em lote
+    AGENT_BATCH_SIZE = int(os.getenv("AGENT_BATCH_SIZE", "500"))  # relatórios pendentes que antecipam a gravação
+    AGENT_CACHE_MAX_ITEMS = int(os.getenv("AGENT_CACHE_MAX_ITEMS", "50000"))  # impressões em memória por worker
+    # Dashboard em tempo real (GET /api/dashboard/stream): checagem de versões (s), conexões por worker,
+    # intervalo do heartbeat (s) e duração máxima de uma conexão (s) antes de o navegador reconectar
+    DASHBOARD_SSE_INTERVAL = int(os.getenv("DASHBOARD_SSE_INTERVAL", "2"))
+    DASHBOARD_SSE_MAX_CLIENTS = int(os.getenv("DASHBOARD_SSE_MAX_CLIENTS", "100"))
+    DASHBOARD_SSE_HEARTBEAT = int(os.getenv("DASHBOARD_SSE_HEARTBEAT", "15"))
+    DASHBOARD_SSE_MAX_DURATION = int(os.getenv("DASHBOARD_SSE_MAX_DURATION", "1800"))
+    # Cache das respostas do dashboard: TTL (s; 0 desativa), tempo máximo (s) servindo a resposta
+    # vencida enquanto ela é recalculada em segundo plano, e respostas guardadas por worker
+    DASHBOARD_CACHE_TTL = int(os.getenv("DASHBOARD_CACHE_TTL", "15"))
+    DASHBOARD_CACHE_MAX_STALE = int(os.getenv("DASHBOARD_CACHE_MAX_STALE", "300"))
+    DASHBOARD_CACHE_MAX_ITEMS = int(os.getenv("DASHBOARD_CACHE_MAX_ITEMS", "256"))
     
     # Configurações de Sessão
     PERMANENT_SESSION_LIFETIME = timedelta(hours=1)  # 1 hora de timeout
@@ -19,6 +71,10 @@ class Config:
     SESSION_COOKIE_SECURE = os.getenv("SESSION_COOKIE_SECURE", "false").lower() == "true"
     SESSION_COOKIE_HTTPONLY = True
     SESSION_COOKIE_SAMESITE = 'Lax'
+    # Backend da sessão: "file" (dados no servidor, cookie só com id), "memory" (dev) ou "cookie" (assinado)
+    SESSION_BACKEND = os.getenv("SESSION_BACKEND", "file")
+    SESSION_FILE_DIR = os.getenv("SESSION_FILE_DIR", "/tmp/curiango_sessions")
+    SESSION_SWEEP_INTERVAL = int(os.getenv("SESSION_SWEEP_INTERVAL", "300"))  # segundos entre varreduras de expiradas
 
     # E-mail
     MAIL_SERVER = os.getenv("MAIL_SERVER", "")
@@ -34,6 +90,17 @@ class Config:
     LDAP_BASE_DN = os.getenv("LDAP_BASE_DN")
     LDAP_ALLOWED_GROUPS = os.getenv("LDAP_ALLOWED_GROUPS", "").split(",") if os.getenv("LDAP_ALLOWED_GROUPS") else []
     LDAP_ADMIN_GROUPS = os.getenv("LDAP_ADMIN_GROUPS", "").split(",") if os.getenv("LDAP_ADMIN_GROUPS") else []
+    # Papéis adicionais por endpoint, no formato "papel:Grupo1,Grupo2;outro_papel:Grupo3"
+    LDAP_ROLE_GROUPS = {
+        papel.strip(): [g.strip() for g in grupos.split(",") if g.strip()]
+        for papel, _, grupos in (item.partition(":") for item in os.getenv("LDAP_ROLE_GROUPS", "").split(";"))
+        if papel.strip() and grupos
+    }
+
+    # Assets estáticos versionados (gerados com: flask --app manage build-assets)
+    ASSETS_ENABLED = os.getenv("ASSETS_ENABLED", "true").lower() == "true"
+    # Intervalo (s) para reler a pasta de imagens de login se ela mudar; 0 = somente na inicialização
+    LOGIN_IMAGES_RELOAD_INTERVAL = int(os.getenv("LOGIN_IMAGES_RELOAD_INTERVAL", "60"))
 
     # Logging
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
@@ -1,2 +1,61 @@
+from flask import g, has_app_context
 from flask_sqlalchemy import SQLAlchemy
-db = SQLAlchemy()
\ No newline at end of file
+from flask_sqlalchemy.session import Session
+from sqlalchemy.dialects import mysql, sqlite
+from sqlalchemy.sql.elements import TextClause
+
+BIND_REPLICA = "replica"
+CHAVE_TABELAS_ALTERADAS = "tabelas_alteradas"  # em session.info, preenchida pelo versionamento até o commit
+
+
+def _somente_leitura(clause):
+    """SELECT sem FOR UPDATE (ORM/Core ou text() iniciado por SELECT)"""
+    if isinstance(clause, TextClause):
+        return clause.text.lstrip()[:6].upper() == "SELECT"
+    return bool(getattr(clause, "is_select", False)) and getattr(clause, "_for_update_arg", None) is None
+
+
+class SessaoRoteada(Session):
+    """
+    Sessão que envia SELECTs à réplica de leitura quando a requisição foi
+    roteada para ela (g.banco_leitura, definido por core.replica). Escritas,
+    flushes e leituras após uma escrita na mesma transação ficam no primário.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and clause is not None and not self._flushing
+                and not self.info.get(CHAVE_TABELAS_ALTERADAS) and _somente_leitura(clause)):
+            replica = _engine_replica()
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _engine_replica():
+    if has_app_context() and g.get("banco_leitura") == BIND_REPLICA:
+        return db.engines.get(BIND_REPLICA)
+    return None
+
+
+def engine_leitura():
+    """Engine para leituras fora da sessão (engine.connect()): a réplica se a requisição foi roteada para ela"""
+    return _engine_replica() or db.engine
+
+
+db = SQLAlchemy(session_options={"class_": SessaoRoteada})
+
+
+def instrucao_upsert(tabela, chave, colunas):
+    """
+    INSERT que, para linhas cuja chave já existe, atualiza as colunas informadas
+    (ON DUPLICATE KEY UPDATE no MariaDB/MySQL, ON CONFLICT no SQLite). Use com
+    .values(lista) para um INSERT multi-linha. None em outros bancos.
+    """
+    dialeto = db.engine.dialect.name
+    if dialeto in ("mysql", "mariadb"):
+        stmt = mysql.insert(tabela)
+        return stmt.on_duplicate_key_update({c: stmt.inserted[c] for c in colunas})
+    if dialeto == "sqlite":
+        stmt = sqlite.insert(tabela)
+        return stmt.on_conflict_do_update(index_elements=[tabela.c[chave]], set_={c: stmt.excluded[c] for c in colunas})
+    return None
@@ -0,0 +1,75 @@
+"""
+GET condicional (ETag / Last-Modified) para endpoints de leitura.
+A ETag é derivada das versões das tabelas das quais a resposta depende,
+então um 304 é devolvido sem executar a view nem serializar nada.
+"""
+import hashlib
+import logging
+from datetime import timezone
+from functools import wraps
+
+from flask import current_app, make_response, request
+
+from .versionamento import obter_versoes, versionamento_ativo
+
+logger = logging.getLogger("app")
+
+
+def _calcular_etag(versoes, view_args):
+    partes = [request.endpoint or ""]
+    partes += [f"{k}={v}" for k, v in sorted(view_args.items())]
+    partes += [f"{k}={v}" for k, v in sorted(request.args.items(multi=True))]
+    partes += [f"{t}:{versao}" for t, (versao, _) in sorted(versoes.items())]
+    return hashlib.sha1("|".join(partes).encode("utf-8")).hexdigest()[:20]
+
+
+def _ultima_alteracao(versoes):
+    datas = [dt for _, dt in versoes.values() if dt is not None]
+    if not datas:
+        return None
+    return max(datas).replace(tzinfo=timezone.utc, microsecond=0)
+
+
+def _aplicar_cabecalhos(response, etag, ultima_alteracao):
+    response.set_etag(etag)
+    if ultima_alteracao is not None:
+        response.last_modified = ultima_alteracao
+    response.headers["Cache-Control"] = current_app.config.get("HTTP_CACHE_CONTROL", "no-cache")
+    return response
+
+
+def conditional_get(*tabelas):
+    """
+    Decorador: responde 304 quando If-None-Match/If-Modified-Since indicam que
+    nenhuma das tabelas informadas mudou desde a última resposta.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if request.method != "GET" or not versionamento_ativo():
+                return f(*args, **kwargs)
+
+            try:
+                versoes = obter_versoes(tabelas)
+            except Exception as e:
+                logger.warning(f"Falha ao obter versões para {request.endpoint}: {e}")
+                return f(*args, **kwargs)
+
+            etag = _calcular_etag(versoes, kwargs)
+            ultima_alteracao = _ultima_alteracao(versoes)
+
+            nao_modificado = False
+            if request.if_none_match:
+                nao_modificado = request.if_none_match.contains_weak(etag)
+            elif request.if_modified_since and ultima_alteracao is not None:
+                nao_modificado = ultima_alteracao <= request.if_modified_since
+
+            if nao_modificado:
+                return _aplicar_cabecalhos(current_app.response_class(status=304), etag, ultima_alteracao)
+
+            response = make_response(f(*args, **kwargs))
+            if response.status_code == 200:
+                _aplicar_cabecalhos(response, etag, ultima_alteracao)
+            return response
+        return decorated_function
+    return decorator
@@ -0,0 +1,141 @@
+"""
+Catálogo das imagens de fundo da tela de login, montado uma vez na
+inicialização (com dimensões e variantes responsivas) para que o sorteio
+por request não faça nenhum acesso ao sistema de arquivos.
+"""
+import logging
+import os
+import random
+import struct
+import threading
+import time
+from urllib.parse import quote
+
+from .assets import asset_variants
+
+logger = logging.getLogger("app")
+
+EXTENSOES_IMAGEM = ('.png', '.jpg', '.jpeg', '.gif', '.webp')
+
+try:
+    from PIL import Image
+    PILLOW_AVAILABLE = True
+except ImportError:
+    PILLOW_AVAILABLE = False
+
+
+def _dimensoes(caminho):
+    """Lê largura/altura da imagem (Pillow se disponível, senão cabeçalho PNG)"""
+    if PILLOW_AVAILABLE:
+        try:
+            with Image.open(caminho) as img:
+                return img.size
+        except OSError:
+            return None, None
+    try:
+        with open(caminho, "rb") as f:
+            cabecalho = f.read(24)
+        if cabecalho[:8] == b"\x89PNG\r\n\x1a\n" and cabecalho[12:16] == b"IHDR":
+            return struct.unpack(">II", cabecalho[16:24])
+    except OSError:
+        pass
+    return None, None
+
+
+class CatalogoImagensLogin:
+    """Índice imutável das imagens de login; recarregado só quando a pasta muda"""
+
+    def __init__(self, app, intervalo_verificacao=0):
+        self.app = app
+        self.pasta = os.path.join(app.static_folder, 'img', 'login')
+        self.intervalo_verificacao = intervalo_verificacao
+        self._imagens = ()
+        self._mtime_pasta = None
+        self._proxima_verificacao = 0
+        self._lock = threading.Lock()
+        self.recarregar()
+
+    def _url_estatica(self, rel_path):
+        return f"{self.app.static_url_path}/{quote(rel_path)}"
+
+    def recarregar(self):
+        """Relê a pasta e recalcula dimensões/variantes de todas as imagens"""
+        if not os.path.isdir(self.pasta):
+            self._imagens = ()
+            self._mtime_pasta = None
+            return
+
+        manifest = self.app.extensions.get("assets_manifest") or {}
+        arquivos_dist = manifest.get("files", {})
+
+        imagens = []
+        for nome in sorted(os.listdir(self.pasta)):
+            if not nome.lower().endswith(EXTENSOES_IMAGEM):
+                continue
+            rel_path = f"img/login/{nome}"
+            largura, altura = _dimensoes(os.path.join(self.pasta, nome))
+            variantes = tuple(sorted(
+                (
+                    {"width": v["width"], "height": v["height"], "url": self._url_estatica(v["path"])}
+                    for v in asset_variants(self.app, rel_path)
+                ),
+                key=lambda v: v["width"],
+            ))
+            imagens.append({
+                "filename": nome,
+                "url": self._url_estatica(arquivos_dist.get(rel_path, rel_path)),
+                "width": largura,
+                "height": altura,
+                "variants": variantes,
+            })
+
+        self._imagens = tuple(imagens)
+        self._mtime_pasta = os.stat(self.pasta).st_mtime
+        logger.info(f"Catálogo de imagens de login carregado: {len(self._imagens)} imagens")
+
+    def _verificar_alteracoes(self):
+        """Checa o mtime da pasta no máximo uma vez por intervalo (0 desativa)"""
+        if not self.intervalo_verificacao:
+            return
+        agora = time.monotonic()
+        if agora < self._proxima_verificacao:
+            return
+        with self._lock:
+            if agora < self._proxima_verificacao:
+                return
+            self._proxima_verificacao = agora + self.intervalo_verificacao
+            try:
+                mtime = os.stat(self.pasta).st_mtime
+            except OSError:
+                mtime = None
+            if mtime != self._mtime_pasta:
+                self.recarregar()
+
+    def sortear(self, largura_viewport=None):
+        """
+        Sorteia uma imagem e escolhe a melhor variante para a largura informada:
+        a menor variante que cubra o viewport, ou a maior disponível.
+        """
+        self._verificar_alteracoes()
+        imagens = self._imagens
+        if not imagens:
+            return None
+
+        imagem = random.choice(imagens)
+        escolhida = {"url": imagem["url"], "width": imagem["width"], "height": imagem["height"]}
+        if largura_viewport and imagem["variants"]:
+            escolhida = next(
+                (v for v in imagem["variants"] if v["width"] >= largura_viewport),
+                imagem["variants"][-1],
+            )
+        return {"filename": imagem["filename"], "imagem": imagem, "escolhida": escolhida}
+
+
+def init_imagens_login(app):
+    """Monta o catálogo na inicialização e o disponibiliza em app.extensions"""
+    intervalo = app.config.get("LOGIN_IMAGES_RELOAD_INTERVAL", 0)
+    app.extensions["imagens_login"] = CatalogoImagensLogin(app, intervalo_verificacao=intervalo)
+
+
+def get_catalogo(app):
+    return app.extensions.get("imagens_login")
@@ -5,6 +5,10 @@ from flask import current_app
 
 logger = logging.getLogger("app")
 
+# Papéis padrão derivados de LDAP_ALLOWED_GROUPS e LDAP_ADMIN_GROUPS
+PAPEL_USUARIO = "usuario"
+PAPEL_ADMIN = "admin"
+
 def authenticate_user(username, password):
     LDAP_HOST = current_app.config.get("LDAP_HOST")
     LDAP_DOMAIN = current_app.config.get("LDAP_DOMAIN")
@@ -102,4 +106,25 @@ def is_admin(groups):
     if not admin_groups:
         logger.warning("LDAP_ADMIN_GROUPS não configurado - negando privilégios administrativos")
         return False
-    return any(g in admin_groups for g in (groups or []))
\ No newline at end of file
+    return not frozenset(admin_groups).isdisjoint(groups or ())
+
+def _grupos_por_papel():
+    """Monta o mapa papel -> frozenset de grupos a partir da configuração"""
+    mapa = {
+        PAPEL_USUARIO: frozenset(current_app.config.get("LDAP_ALLOWED_GROUPS", [])),
+        PAPEL_ADMIN: frozenset(current_app.config.get("LDAP_ADMIN_GROUPS", [])),
+    }
+    for papel, grupos in (current_app.config.get("LDAP_ROLE_GROUPS") or {}).items():
+        mapa[papel] = mapa.get(papel, frozenset()) | frozenset(grupos)
+    return mapa
+
+def resolver_papeis(groups):
+    """
+    Resolve os grupos LDAP do usuário em um conjunto de papéis.
+    Executado uma única vez no login; o resultado fica na sessão.
+    """
+    grupos_usuario = frozenset(groups or ())
+    return frozenset(
+        papel for papel, grupos in _grupos_por_papel().items()
+        if grupos and not grupos.isdisjoint(grupos_usuario)
+    )
\ No newline at end of file
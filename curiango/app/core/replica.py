@@ -0,0 +1,201 @@
+"""
+Réplica de leitura opcional (SQLALCHEMY_REPLICA_URI).
+
+Endpoints GET marcados com @leitura_replica (dashboard, listagens, busca e
+exportações) enviam seus SELECTs à réplica; todo o resto usa o primário.
+A requisição fica no primário quando:
+- o usuário gravou algo há menos de REPLICA_STICKY_SECONDS (lê as próprias escritas);
+- a réplica falhou há menos de REPLICA_RETRY_SECONDS, ou está mais de
+  REPLICA_MAX_LAG segundos atrás do primário (checado a cada REPLICA_CHECK_INTERVAL).
+Se a réplica falhar durante a view (conexão/erro operacional), a view é
+executada de novo no primário.
+"""
+import logging
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, g, has_request_context, request, session
+from sqlalchemy import event, exc, text
+
+from .db import BIND_REPLICA, db
+from .versionamento import ao_confirmar
+
+logger = logging.getLogger("app")
+
+CHAVE_ULTIMA_ESCRITA = "ultima_escrita_ts"  # na sessão do usuário
+REPLICACAO_PARADA = float("inf")
+
+
+class RoteadorReplica:
+    """Disponibilidade e atraso da réplica neste worker"""
+
+    def __init__(self, app, sticky=10, max_atraso=5, intervalo=5, nova_tentativa=30):
+        self._app = app
+        self.sticky = sticky
+        self.max_atraso = max_atraso
+        self.intervalo = intervalo
+        self.nova_tentativa = nova_tentativa
+        self._lock = threading.Lock()
+        self._verificada_em = None
+        self._indisponivel_ate = 0.0
+        self._ultimo_erro = None
+        self._atraso = None
+        self._checar_atraso = True
+        self.estatisticas = {"replica": 0, "primario_escrita_recente": 0, "primario_indisponivel": 0,
+                             "fallbacks": 0, "falhas": 0}
+
+    @property
+    def engine(self):
+        return db.engines[BIND_REPLICA]
+
+    def registrar_listeners(self):
+        if not event.contains(self.engine, "handle_error", self._ao_erro):
+            event.listen(self.engine, "handle_error", self._ao_erro)
+
+    def _ao_erro(self, contexto):
+        erro = contexto.sqlalchemy_exception
+        if contexto.is_disconnect or erro is None or isinstance(erro, (exc.OperationalError, exc.InterfaceError)):
+            self.marcar_indisponivel(contexto.original_exception)
+            if has_request_context():
+                g.falha_replica = True
+
+    def marcar_indisponivel(self, erro, segundos=None):
+        with self._lock:
+            self._indisponivel_ate = time.monotonic() + (segundos or self.nova_tentativa)
+            self._ultimo_erro = str(erro)
+        self.contar("falhas")
+        logger.warning(f"Réplica de leitura indisponível - usando o primário: {erro}")
+
+    def _medir_atraso(self, conn):
+        """Seconds_Behind_Master da réplica MariaDB/MySQL; None se não for réplica ou sem permissão"""
+        if not self._checar_atraso or conn.dialect.name not in ("mysql", "mariadb"):
+            return None
+        for comando in ("SHOW REPLICA STATUS", "SHOW SLAVE STATUS"):
+            try:
+                linha = conn.exec_driver_sql(comando).mappings().first()
+            except exc.DBAPIError:
+                continue
+            if linha is None:
+                return None
+            atraso = linha.get("Seconds_Behind_Master", linha.get("Seconds_Behind_Source"))
+            return REPLICACAO_PARADA if atraso is None else float(atraso)
+        logger.warning("Sem permissão para consultar o status da replicação - atraso da réplica não verificado")
+        self._checar_atraso = False
+        return None
+
+    def disponivel(self):
+        agora = time.monotonic()
+        with self._lock:
+            if agora < self._indisponivel_ate:
+                return False
+            if self._verificada_em is not None and agora - self._verificada_em < self.intervalo:
+                return True
+            self._verificada_em = agora  # uma checagem por vez; as demais requisições seguem com o último resultado
+        try:
+            with self.engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+                atraso = self._medir_atraso(conn)
+        except Exception as e:
+            self.marcar_indisponivel(e)
+            return False
+        self._atraso = atraso
+        if self.max_atraso and atraso is not None and atraso > self.max_atraso:
+            self.marcar_indisponivel(f"atraso de replicação {atraso} s", self.intervalo)
+            return False
+        return True
+
+    def usar_replica(self):
+        """Decide o banco da requisição atual"""
+        ultima_escrita = session.get(CHAVE_ULTIMA_ESCRITA)
+        if ultima_escrita and time.time() - float(ultima_escrita) < self.sticky:
+            motivo = "primario_escrita_recente"
+        elif not self.disponivel():
+            motivo = "primario_indisponivel"
+        else:
+            motivo = "replica"
+        self.contar(motivo)
+        return motivo == "replica"
+
+    def contar(self, nome):
+        with self._lock:
+            self.estatisticas[nome] += 1
+
+    def situacao(self):
+        with self._lock:
+            return {
+                **self.estatisticas,
+                "disponivel": time.monotonic() >= self._indisponivel_ate,
+                "atraso_s": None if self._atraso == REPLICACAO_PARADA else self._atraso,
+                "replicacao_parada": self._atraso == REPLICACAO_PARADA,
+                "ultimo_erro": self._ultimo_erro,
+            }
+
+
+def obter_roteador():
+    return current_app.extensions.get("replica")
+
+
+def leitura_replica(f):
+    """
+    Decorador para views GET somente leitura: os SELECTs vão para a réplica,
+    com volta ao primário se ela falhar durante a execução. Deve ficar acima
+    de @conditional_get/@cache_resposta, para que as versões que eles leem
+    venham do mesmo banco que os dados.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        roteador = obter_roteador()
+        if roteador is None or request.method != "GET" or not roteador.usar_replica():
+            return f(*args, **kwargs)
+
+        g.banco_leitura, g.falha_replica = BIND_REPLICA, False
+        try:
+            resposta = f(*args, **kwargs)
+        except (exc.OperationalError, exc.InterfaceError):
+            if not g.get("falha_replica"):
+                raise
+            resposta = None
+        if not g.get("falha_replica"):
+            return resposta
+
+        # A view já tratou o erro (ou ele subiu): repete tudo no primário
+        db.session.rollback()
+        g.banco_leitura, g.falha_replica = None, False
+        roteador.contar("fallbacks")
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+def _registrar_escrita(tabelas):
+    """Após um commit na requisição: o restante dela e as próximas do usuário (por REPLICA_STICKY_SECONDS) leem do primário"""
+    if not has_request_context():
+        return
+    g.banco_leitura = None
+    if session.get("user"):
+        session[CHAVE_ULTIMA_ESCRITA] = time.time()
+
+
+def configurar_replica(app):
+    """Antes de db.init_app: adiciona a réplica aos binds se SQLALCHEMY_REPLICA_URI estiver definida"""
+    uri = app.config.get("SQLALCHEMY_REPLICA_URI")
+    if uri:
+        app.config["SQLALCHEMY_BINDS"] = {**(app.config.get("SQLALCHEMY_BINDS") or {}), BIND_REPLICA: uri}
+
+
+def init_replica(app):
+    """Ativa o roteamento de leituras se a réplica foi configurada"""
+    if not app.config.get("SQLALCHEMY_REPLICA_URI"):
+        return
+    roteador = RoteadorReplica(
+        app,
+        sticky=app.config.get("REPLICA_STICKY_SECONDS", 10),
+        max_atraso=app.config.get("REPLICA_MAX_LAG", 5),
+        intervalo=app.config.get("REPLICA_CHECK_INTERVAL", 5),
+        nova_tentativa=app.config.get("REPLICA_RETRY_SECONDS", 30),
+    )
+    with app.app_context():
+        roteador.registrar_listeners()
+    app.extensions["replica"] = roteador
+    ao_confirmar(_registrar_escrita)
+    logger.info("Réplica de leitura habilitada para endpoints GET de consulta")
@@ -0,0 +1,90 @@
+"""
+Serialização JSON de respostas grandes.
+
+- Provider JSON do Flask baseado em orjson (opcional, JSON_FAST_ENCODER), com a
+  mesma saída do provider padrão para Decimal, datas, UUID e dataclasses.
+- Serializadores de linha pré-compilados: para uma lista fixa de campos é gerada
+  uma única função que monta o dict direto por índice (ou atributo), sem ifs
+  nem lookups por linha.
+"""
+import logging
+from functools import lru_cache
+
+from flask.json.provider import DefaultJSONProvider
+
+logger = logging.getLogger("app")
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Mesmo contrato do DefaultJSONProvider; recorre ao json padrão no que o orjson não suporta"""
+
+    def _opcoes(self, indentar=False):
+        opcoes = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            opcoes |= orjson.OPT_SORT_KEYS
+        if indentar:
+            opcoes |= orjson.OPT_INDENT_2
+        return opcoes
+
+    def dumps(self, obj, **kwargs):
+        # Argumentos do json.dumps sem equivalente no orjson (cls, allow_nan...) usam o caminho padrão
+        if kwargs.keys() - {"indent", "separators"}:
+            return super().dumps(obj, **kwargs)
+        try:
+            return orjson.dumps(obj, default=self.default, option=self._opcoes(bool(kwargs.get("indent")))).decode()
+        except TypeError:
+            # Inteiros acima de 64 bits, tipos não suportados etc.
+            return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indentar = (self.compact is None and self._app.debug) or self.compact is False
+        try:
+            corpo = orjson.dumps(obj, default=self.default, option=self._opcoes(indentar) | orjson.OPT_APPEND_NEWLINE)
+        except TypeError:
+            return super().response(*args, **kwargs)
+        return self._app.response_class(corpo, mimetype=self.mimetype)
+
+
+def init_serializacao(app):
+    if not app.config.get("JSON_FAST_ENCODER", True):
+        return
+    if not ORJSON_AVAILABLE:
+        logger.info("orjson não disponível - usando o encoder JSON padrão")
+        return
+    app.json = OrjsonProvider(app)
+
+
+@lru_cache(maxsize=256)
+def compilar_serializador(campos, colunas=None):
+    """
+    Gera uma função linha -> dict.
+
+    campos: tupla de (chave, coluna) ou (chave, coluna, conversor); coluna pode
+    ser uma tupla de colunas, passadas juntas ao conversor.
+    colunas: nomes das colunas da linha na ordem (ex.: tuple(fonte.c.keys()))
+    para acesso por índice; None para acesso por atributo (objetos ORM).
+    """
+    indices = {nome: i for i, nome in enumerate(colunas)} if colunas is not None else None
+    ambiente = {}
+    partes = []
+    for n, (chave, coluna, *conversor) in enumerate(campos):
+        nomes = coluna if isinstance(coluna, tuple) else (coluna,)
+        valores = ", ".join(f"r.{nome}" if indices is None else f"r[{indices[nome]}]" for nome in nomes)
+        if conversor and conversor[0] is not None:
+            ambiente[f"_c{n}"] = conversor[0]
+            valores = f"_c{n}({valores})"
+        partes.append(f"{chave!r}: {valores}")
+    exec(f"def serializar(r):\n    return {{{', '.join(partes)}}}\n", ambiente)
+    return ambiente["serializar"]
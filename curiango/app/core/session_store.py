@@ -0,0 +1,247 @@
+"""
+Sessões no servidor: o cookie carrega apenas um id opaco e os dados
+(usuário, grupos LDAP, timestamps) ficam em um store local.
+"""
+import logging
+import os
+import re
+import secrets
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask.sessions import SessionInterface, SessionMixin, session_json_serializer
+from werkzeug.datastructures import CallbackDict
+
+logger = logging.getLogger("app")
+
+_SID_VALIDO = re.compile(r"^[A-Za-z0-9_-]{32,64}$")
+
+
+class ServerSideSession(CallbackDict, SessionMixin):
+    """Sessão cujo conteúdo é persistido no store, identificada por sid"""
+
+    def __init__(self, initial=None, sid=None, new=False):
+        def on_update(self):
+            self.modified = True
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.modified = False
+        self.sid_anterior = None  # removido do store ao salvar, após regenerar_sessao
+
+
+class MemorySessionStore:
+    """Store em memória do processo - apenas para desenvolvimento local"""
+
+    def __init__(self):
+        self._dados = {}
+        self._lock = threading.Lock()
+
+    def get(self, sid):
+        with self._lock:
+            item = self._dados.get(sid)
+        if not item or item[0] < time.time():
+            return None
+        return item[1]
+
+    def set(self, sid, payload, expira_em):
+        with self._lock:
+            self._dados[sid] = (expira_em, payload)
+
+    def delete(self, sid):
+        with self._lock:
+            self._dados.pop(sid, None)
+
+    def sweep(self):
+        agora = time.time()
+        with self._lock:
+            expirados = [sid for sid, (expira_em, _) in self._dados.items() if expira_em < agora]
+            for sid in expirados:
+                del self._dados[sid]
+        return len(expirados)
+
+
+class FileSessionStore:
+    """
+    Store em arquivos (um por sessão), compartilhado entre workers do mesmo host.
+    O mtime do arquivo guarda o instante de expiração, então a varredura só faz stat.
+    """
+
+    def __init__(self, diretorio):
+        self.diretorio = diretorio
+        # Os nomes dos arquivos são os sids: só o usuário do processo pode listar o diretório
+        os.makedirs(diretorio, mode=0o700, exist_ok=True)
+        os.chmod(diretorio, 0o700)
+
+    def _caminho(self, sid):
+        return os.path.join(self.diretorio, sid)
+
+    def get(self, sid):
+        caminho = self._caminho(sid)
+        try:
+            if os.stat(caminho).st_mtime < time.time():
+                return None
+            with open(caminho, "r", encoding="utf-8") as f:
+                return f.read()
+        except (FileNotFoundError, OSError):
+            return None
+
+    def set(self, sid, payload, expira_em):
+        fd, tmp = tempfile.mkstemp(dir=self.diretorio, prefix=".tmp-")  # criado com 0o600
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(payload)
+            os.utime(tmp, (expira_em, expira_em))
+            os.replace(tmp, self._caminho(sid))
+        except OSError:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def delete(self, sid):
+        try:
+            os.remove(self._caminho(sid))
+        except FileNotFoundError:
+            pass
+
+    def sweep(self):
+        agora = time.time()
+        removidos = 0
+        with os.scandir(self.diretorio) as entradas:
+            for entrada in entradas:
+                try:
+                    if entrada.is_file() and entrada.stat().st_mtime < agora:
+                        os.remove(entrada.path)
+                        removidos += 1
+                except FileNotFoundError:
+                    continue
+        return removidos
+
+
+def _novo_sid():
+    return secrets.token_urlsafe(32)
+
+
+class ServerSideSessionInterface(SessionInterface):
+    """SessionInterface do Flask que grava a sessão em um store e envia só o sid no cookie"""
+
+    serializer = session_json_serializer
+
+    def __init__(self, store, sweep_interval=300):
+        self.store = store
+        self.sweep_interval = sweep_interval
+        self._proxima_varredura = time.time() + sweep_interval
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid and _SID_VALIDO.match(sid):
+            payload = self.store.get(sid)
+            if payload is not None:
+                try:
+                    return ServerSideSession(self.serializer.loads(payload), sid=sid)
+                except (ValueError, TypeError):
+                    logger.warning("Sessão corrompida descartada")
+                    self.store.delete(sid)
+        return ServerSideSession(sid=_novo_sid(), new=True)
+
+    def save_session(self, app, session, response):
+        nome = self.get_cookie_name(app)
+        dominio = self.get_cookie_domain(app)
+        caminho = self.get_cookie_path(app)
+
+        if session.sid_anterior:
+            self.store.delete(session.sid_anterior)
+            session.sid_anterior = None
+
+        if not session:
+            if session.modified and not session.new:
+                self.store.delete(session.sid)
+                response.delete_cookie(nome, domain=dominio, path=caminho)
+            return
+
+        if session.modified or self.should_set_cookie(app, session):
+            expira_em = time.time() + app.permanent_session_lifetime.total_seconds()
+            self.store.set(session.sid, self.serializer.dumps(dict(session)), expira_em)
+
+        if self.should_set_cookie(app, session):
+            response.set_cookie(
+                nome,
+                session.sid,
+                expires=self.get_expiration_time(app, session),
+                httponly=self.get_cookie_httponly(app),
+                domain=dominio,
+                path=caminho,
+                secure=self.get_cookie_secure(app),
+                samesite=self.get_cookie_samesite(app),
+            )
+            response.vary.add("Cookie")
+
+        self._varrer_se_necessario()
+
+    def _varrer_se_necessario(self):
+        agora = time.time()
+        if agora < self._proxima_varredura:
+            return
+        self._proxima_varredura = agora + self.sweep_interval
+        try:
+            removidos = self.store.sweep()
+            if removidos:
+                logger.debug(f"Varredura de sessões: {removidos} sessões expiradas removidas")
+        except OSError as e:
+            logger.warning(f"Falha na varredura de sessões expiradas: {e}")
+
+
+def init_session_store(app):
+    """Configura o backend de sessão conforme SESSION_BACKEND (cookie, file ou memory)"""
+    backend = (app.config.get("SESSION_BACKEND") or "cookie").lower()
+    intervalo = app.config.get("SESSION_SWEEP_INTERVAL", 300)
+
+    if backend == "file":
+        store = FileSessionStore(app.config["SESSION_FILE_DIR"])
+    elif backend == "memory":
+        store = MemorySessionStore()
+    else:
+        if backend != "cookie":
+            logger.warning(f"SESSION_BACKEND '{backend}' desconhecido - usando cookie assinado")
+        return
+
+    app.session_interface = ServerSideSessionInterface(store, sweep_interval=intervalo)
+    logger.info(f"Sessões no servidor habilitadas (backend={backend})")
+
+
+def regenerar_sessao(sess):
+    """
+    Troca o sid da sessão mantendo os dados (login, mudança de papéis): um
+    sid plantado antes do login não dá acesso à sessão autenticada. O sid
+    antigo é removido do store ao salvar. Sessões em cookie assinado não
+    precisam de troca.
+    """
+    if isinstance(sess, ServerSideSession):
+        if not sess.new:
+            sess.sid_anterior = sess.sid
+        sess.sid = _novo_sid()
+        sess.modified = True
+
+
+def marcar_atividade(sess):
+    """Registra a última atividade na sessão (ISO para exibição, epoch para checagens)"""
+    agora = datetime.now()
+    sess["last_activity"] = agora.isoformat()
+    sess["last_activity_ts"] = agora.timestamp()
+    return agora
+
+
+def tempo_inativo(sess):
+    """
+    Retorna o tempo desde a última atividade, ou None se não houver registro.
+    Usa o timestamp epoch quando disponível e só recorre ao parse ISO em sessões antigas.
+    """
+    ts = sess.get("last_activity_ts")
+    if ts is not None:
+        return timedelta(seconds=time.time() - float(ts))
+    last_activity = sess.get("last_activity")
+    if not last_activity:
+        return None
+    return datetime.now() - datetime.fromisoformat(last_activity)
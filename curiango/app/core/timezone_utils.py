@@ -1,7 +1,23 @@
-from datetime import datetime, date
+from datetime import datetime, date, timedelta, timezone
+from functools import lru_cache
 import pytz
 from .config import Config
 
+_UMA_HORA = timedelta(hours=1, microseconds=-1)
+
+
+@lru_cache(maxsize=65536)
+def _fuso_da_hora(ano, mes, dia, hora):
+    """
+    Offset fixo do timezone local para uma hora UTC, ou None se houver troca de
+    horário dentro dela. Evita o localize/astimezone do pytz a cada conversão.
+    """
+    inicio = datetime(ano, mes, dia, hora, tzinfo=timezone.utc)
+    offset = inicio.astimezone(Config.TIMEZONE).utcoffset()
+    if (inicio + _UMA_HORA).astimezone(Config.TIMEZONE).utcoffset() != offset:
+        return None
+    return timezone(offset)
+
 def to_local_timezone(dt):
     """Converte datetime UTC para timezone local (GMT-3)"""
     if dt is None:
@@ -13,6 +29,9 @@ def to_local_timezone(dt):
     
     if dt.tzinfo is None:
         # Se não tem timezone info, assume UTC
+        fuso = _fuso_da_hora(dt.year, dt.month, dt.day, dt.hour)
+        if fuso is not None:
+            return (dt + fuso.utcoffset(None)).replace(tzinfo=fuso)
         dt = pytz.UTC.localize(dt)
     
     # Converte para timezone local
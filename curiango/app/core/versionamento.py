@@ -0,0 +1,143 @@
+"""
+Contador de versão por tabela (tabela versoes_tabela), incrementado após o
+commit de qualquer escrita feita pela sessão do SQLAlchemy. Serve de base
+para ETags e invalidação de caches entre workers. Caches do próprio worker
+podem ainda registrar funções chamadas após cada commit com as tabelas
+gravadas (ao_confirmar), com ou sem versoes_tabela.
+
+O incremento não entra na transação de quem escreve: a linha de cada tabela
+ficaria travada até o commit e toda escrita na mesma tabela (ex.: qualquer
+requisição auditada em log_auditoria) esperaria a anterior terminar. Ele roda
+numa conexão própria em autocommit, um UPDATE curto por tabela. Entre o commit
+e o incremento (milissegundos) uma leitura ainda pode ver a versão anterior.
+"""
+import logging
+
+from sqlalchemy import event, exc, inspect, text
+from sqlalchemy.orm import Session
+
+from .db import CHAVE_TABELAS_ALTERADAS, db
+
+logger = logging.getLogger("app")
+
+TABELA_VERSOES = "versoes_tabela"
+_TABELAS_IGNORADAS = frozenset({TABELA_VERSOES})
+
+_estado = {"ativo": False}
+_ao_confirmar = []
+
+
+def versionamento_ativo():
+    return _estado["ativo"]
+
+
+def _incrementar(tabelas):
+    """Um UPDATE (ou INSERT na primeira escrita) por tabela, cada um confirmado na hora"""
+    atualizar = text(f"UPDATE {TABELA_VERSOES} SET versao = versao + 1, updated_at = CURRENT_TIMESTAMP WHERE tabela = :t")
+    with db.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        for tabela in sorted(tabelas):
+            if connection.execute(atualizar, {"t": tabela}).rowcount:
+                continue
+            try:
+                connection.execute(
+                    text(f"INSERT INTO {TABELA_VERSOES} (tabela, versao, updated_at) VALUES (:t, 1, CURRENT_TIMESTAMP)"),
+                    {"t": tabela},
+                )
+            except exc.IntegrityError:
+                # Outro worker criou a linha ao mesmo tempo
+                connection.execute(atualizar, {"t": tabela})
+
+
+def _tabelas_alteradas(session):
+    tabelas = set()
+    for obj in session.new:
+        tabelas.add(obj.__table__.name)
+    for obj in session.deleted:
+        tabelas.add(obj.__table__.name)
+    for obj in session.dirty:
+        if session.is_modified(obj, include_collections=False):
+            tabelas.add(obj.__table__.name)
+    return tabelas - _TABELAS_IGNORADAS
+
+
+def _registrar(session, tabelas):
+    session.info.setdefault(CHAVE_TABELAS_ALTERADAS, set()).update(tabelas)
+
+
+def _after_flush(session, flush_context):
+    tabelas = _tabelas_alteradas(session)
+    if tabelas:
+        _registrar(session, tabelas)
+
+
+def _do_orm_execute(orm_execute_state):
+    # INSERT/UPDATE/DELETE em massa (session.execute, Query.update()/delete()) não passam pelo flush
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    tabela = getattr(orm_execute_state.statement, "table", None)
+    nome = getattr(tabela, "name", None)
+    if nome and nome not in _TABELAS_IGNORADAS:
+        _registrar(orm_execute_state.session, {nome})
+
+
+def _after_commit(session):
+    tabelas = session.info.pop(CHAVE_TABELAS_ALTERADAS, None)
+    if not tabelas:
+        return
+    if _estado["ativo"]:
+        try:
+            _incrementar(tabelas)
+        except Exception:
+            logger.exception(f"Erro ao incrementar a versão de {', '.join(sorted(tabelas))}")
+    for funcao in _ao_confirmar:
+        try:
+            funcao(tabelas)
+        except Exception:
+            logger.exception(f"Erro ao notificar escrita em {', '.join(sorted(tabelas))}")
+
+
+def _after_rollback(session):
+    session.info.pop(CHAVE_TABELAS_ALTERADAS, None)
+
+
+def ao_confirmar(funcao):
+    """Registra funcao(tabelas), chamada após cada commit que gravou alguma tabela"""
+    if funcao not in _ao_confirmar:
+        _ao_confirmar.append(funcao)
+
+
+def init_versionamento(app):
+    """Registra os listeners; as versões só são gravadas se a tabela versoes_tabela existir no banco"""
+    with app.app_context():
+        try:
+            existe = inspect(db.engine).has_table(TABELA_VERSOES)
+        except Exception as e:
+            logger.warning(f"Não foi possível verificar {TABELA_VERSOES}: {e}")
+            existe = False
+
+    if not event.contains(Session, "after_flush", _after_flush):
+        event.listen(Session, "after_flush", _after_flush)
+        event.listen(Session, "do_orm_execute", _do_orm_execute)
+        event.listen(Session, "after_commit", _after_commit)
+        event.listen(Session, "after_rollback", _after_rollback)
+    _estado["ativo"] = existe
+    if not existe:
+        logger.warning(f"Tabela {TABELA_VERSOES} não encontrada - ETags/invalidação por versão desativados")
+
+
+def obter_versoes(tabelas):
+    """
+    Retorna {tabela: (versao, updated_at)} em uma única consulta.
+    Tabelas sem escrita registrada aparecem com versão 0.
+    """
+    tabelas = sorted(set(tabelas))
+    linhas = db.session.execute(
+        text(f"SELECT tabela, versao, updated_at FROM {TABELA_VERSOES} WHERE tabela IN :tabelas")
+        .bindparams(db.bindparam("tabelas", expanding=True))
+        .columns(tabela=db.String, versao=db.BigInteger, updated_at=db.DateTime),
+        {"tabelas": tabelas},
+    ).all()
+    versoes = {t: (0, None) for t in tabelas}
+    for linha in linhas:
+        versoes[linha.tabela] = (int(linha.versao), linha.updated_at)
+    return versoes
@@ -154,6 +154,13 @@ class LogAuditoria(db.Model):
     ip_address = db.Column(db.String(45))
     created_at = db.Column(db.TIMESTAMP, default=datetime.utcnow)
 
+class LogAuditoriaBusca(db.Model):
+    """Cópia de descricao com índice FULLTEXT (não suportado na tabela particionada)"""
+    __tablename__ = "log_auditoria_busca"
+    log_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    created_at = db.Column(db.TIMESTAMP, nullable=False)
+    descricao = db.Column(db.Text, nullable=False)
+
 class NotaAtivo(db.Model):
     __tablename__ = "notas_ativos"
     id = db.Column(db.Integer, primary_key=True)
@@ -161,4 +168,77 @@ class NotaAtivo(db.Model):
     conteudo = db.Column(db.Text, nullable=False)
     usuario = db.Column(db.String(100), nullable=False)
     created_at = db.Column(db.TIMESTAMP, default=datetime.utcnow)
-    updated_at = db.Column(db.TIMESTAMP, default=datetime.utcnow, onupdate=datetime.utcnow)
\ No newline at end of file
+    updated_at = db.Column(db.TIMESTAMP, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class InventarioAgente(db.Model):
+    """Último relatório do agente de inventário por máquina"""
+    __tablename__ = "inventario_agente"
+    ativo_id = db.Column(db.Integer, db.ForeignKey("ativos.id", ondelete="CASCADE"), primary_key=True, autoincrement=False)
+    impressao = db.Column(db.String(32), nullable=False)
+    hostname = db.Column(db.String(100))
+    dados = db.Column(db.JSON)
+    recebido_em = db.Column(db.TIMESTAMP, default=datetime.utcnow)
+
+class SnapshotInventario(db.Model):
+    """Fechamento diário do estoque por tipo, condição, unidade e setor"""
+    __tablename__ = "snapshot_inventario_diario"
+    id = db.Column(db.Integer, primary_key=True)
+    data = db.Column(db.Date, nullable=False)
+    tipo = db.Column(db.String(20), nullable=False)
+    condicao = db.Column(db.String(20))
+    unidade_negocio_id = db.Column(db.Integer)
+    setor_id = db.Column(db.Integer)
+    quantidade = db.Column(db.Integer, nullable=False, default=0)
+    alocados = db.Column(db.Integer, nullable=False, default=0)
+    valor_total = db.Column(db.Numeric(14,2), nullable=False, default=0)
+    alocacoes = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.TIMESTAMP, default=datetime.utcnow)
+
+class SnapshotInventarioDia(db.Model):
+    """Totais de cada fechamento diário (uma linha por dia)"""
+    __tablename__ = "snapshot_inventario_dia"
+    data = db.Column(db.Date, primary_key=True)
+    quantidade = db.Column(db.Integer, nullable=False, default=0)
+    alocados = db.Column(db.Integer, nullable=False, default=0)
+    valor_total = db.Column(db.Numeric(14,2), nullable=False, default=0)
+    alocacoes = db.Column(db.Integer, nullable=False, default=0)
+    grupos = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.TIMESTAMP, default=datetime.utcnow)
+
+class VersaoTabela(db.Model):
+    __tablename__ = "versoes_tabela"
+    tabela = db.Column(db.String(64), primary_key=True)
+    versao = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.TIMESTAMP, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class AtivoProjecao(db.Model):
+    """Modelo de leitura desnormalizado (ativo + subtipo + marca/operadora + usuário + unidade)"""
+    __tablename__ = "ativos_projecao"
+    ativo_id = db.Column(db.Integer, db.ForeignKey("ativos.id", ondelete="CASCADE"), primary_key=True)
+    tipo = db.Column(db.String(20), nullable=False)
+    condicao = db.Column(db.String(20))
+    valor = db.Column(db.Numeric(10,2))
+    usuario_atual_id = db.Column(db.Integer)
+    usuario_atual_nome = db.Column(db.String(150))
+    unidade_negocio_id = db.Column(db.Integer)
+    unidade_negocio_nome = db.Column(db.String(150))
+    subtipo_id = db.Column(db.Integer)
+    marca_id = db.Column(db.Integer)
+    marca_nome = db.Column(db.String(100))
+    modelo = db.Column(db.String(100))
+    imei_slot = db.Column(db.String(20))
+    tipo_computador = db.Column(db.String(20))
+    patrimonio = db.Column(db.String(50))
+    serie = db.Column(db.String(100))
+    so_versao = db.Column(db.String(100))
+    processador = db.Column(db.String(150))
+    memoria = db.Column(db.String(50))
+    hd = db.Column(db.String(100))
+    acessorios = db.Column(db.Text)
+    operadora_id = db.Column(db.Integer)
+    operadora_nome = db.Column(db.String(100))
+    numero = db.Column(db.String(20))
+    tipo_chip = db.Column(db.String(20))
+    busca = db.Column(db.Text)
+    created_at = db.Column(db.TIMESTAMP)
+    atualizado_em = db.Column(db.TIMESTAMP, default=datetime.utcnow)
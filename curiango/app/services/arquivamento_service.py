@@ -0,0 +1,241 @@
+"""
+Retenção e arquivamento de log_auditoria.
+
+Linhas mais antigas que a política de retenção são gravadas em arquivos NDJSON
+compactados (um por mês de created_at) e só depois removidas do banco. Com a
+tabela particionada por mês (MariaDB/MySQL), meses inteiros já arquivados saem
+com DROP PARTITION; o restante (ex.: LOGIN/LOGOUT com retenção menor) sai com
+DELETE por faixas de id.
+"""
+import gzip
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import delete, func, select, text
+
+from ..core.db import db
+from ..models.dominio import LogAuditoria, LogAuditoriaBusca
+from .auditoria_service import busca_textual_ativa
+
+logger = logging.getLogger("app")
+
+PARTICAO_MAX = "pmax"
+
+
+def politica_retencao():
+    """Retorna {acao: dias}, com a chave None para o padrão; 0 dias = manter sempre"""
+    config = current_app.config
+    politica = {None: config.get("AUDIT_RETENTION_DAYS", 0)}
+    for item in (config.get("AUDIT_RETENTION_BY_ACTION") or "").split(","):
+        if item.strip():
+            acao, _, dias = item.partition(":")
+            politica[acao.strip().upper()] = int(dias)
+    return politica
+
+
+def _cortes(politica, agora):
+    """Lista de (condição, data de corte): uma para o padrão e uma por ação com regra própria"""
+    c = LogAuditoria.__table__.c
+    especificas = [acao for acao in politica if acao is not None]
+    cortes = []
+    for acao, dias in politica.items():
+        if dias <= 0:
+            continue
+        corte = agora - timedelta(days=dias)
+        if acao is None:
+            condicao = c.created_at < corte
+            if especificas:
+                condicao = db.and_(condicao, c.acao.notin_(especificas))
+        else:
+            condicao = db.and_(c.acao == acao, c.created_at < corte)
+        cortes.append((condicao, corte))
+    return cortes
+
+
+def _particionamento_disponivel():
+    return db.engine.dialect.name in ("mysql", "mariadb")
+
+
+def _particoes():
+    """[(nome, limite superior em epoch ou None para MAXVALUE)] em ordem; vazio se a tabela não é particionada"""
+    if not _particionamento_disponivel():
+        return []
+    linhas = db.session.execute(text(
+        "SELECT PARTITION_NAME, PARTITION_DESCRIPTION FROM information_schema.PARTITIONS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :tabela AND PARTITION_NAME IS NOT NULL "
+        "ORDER BY PARTITION_ORDINAL_POSITION"
+    ), {"tabela": LogAuditoria.__tablename__}).all()
+    return [(nome, None if descricao == "MAXVALUE" else int(descricao)) for nome, descricao in linhas]
+
+
+def _proximo_mes(data):
+    return (data.replace(day=1) + timedelta(days=32)).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def manter_particoes(agora=None, meses_a_frente=None):
+    """Cria partições mensais até N meses à frente, dividindo pmax; retorna os nomes criados"""
+    agora = agora or datetime.utcnow()
+    if meses_a_frente is None:
+        meses_a_frente = current_app.config.get("AUDIT_PARTITION_MONTHS_AHEAD", 3)
+    particoes = _particoes()
+    if not particoes:
+        return []
+    if particoes[-1] != (PARTICAO_MAX, None):
+        logger.warning(f"{LogAuditoria.__tablename__} sem partição {PARTICAO_MAX} - partições não criadas")
+        return []
+
+    limites = [limite for _, limite in particoes if limite is not None]
+    # Limites foram gravados com UNIX_TIMESTAMP no fuso da sessão; FROM_UNIXTIME faz o caminho inverso
+    if limites:
+        inicio = db.session.execute(select(func.from_unixtime(max(limites)))).scalar()
+    else:
+        inicio = agora.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    fim = agora.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    for _ in range(meses_a_frente + 1):
+        fim = _proximo_mes(fim)
+
+    novas = []
+    mes = inicio
+    while mes < fim:
+        limite = _proximo_mes(mes)
+        novas.append((f"p{mes:%Y%m}", limite))
+        mes = limite
+    if not novas:
+        return []
+
+    definicoes = ", ".join(
+        f"PARTITION {nome} VALUES LESS THAN (UNIX_TIMESTAMP('{limite:%Y-%m-%d %H:%M:%S}'))" for nome, limite in novas
+    )
+    db.session.execute(text(
+        f"ALTER TABLE {LogAuditoria.__tablename__} REORGANIZE PARTITION {PARTICAO_MAX} INTO "
+        f"({definicoes}, PARTITION {PARTICAO_MAX} VALUES LESS THAN MAXVALUE)"
+    ))
+    db.session.commit()
+    nomes = [nome for nome, _ in novas]
+    logger.info(f"Partições criadas em {LogAuditoria.__tablename__}: {', '.join(nomes)}")
+    return nomes
+
+
+def _particoes_expiradas(politica, cortes):
+    """Partições cujas linhas estão todas fora da retenção (nenhuma ação é mantida para sempre)"""
+    if not cortes or any(dias <= 0 for dias in politica.values()):
+        return []
+    particoes = _particoes()
+    if not particoes:
+        return []
+    corte = min(data for _, data in cortes)
+    limite_corte = db.session.execute(select(func.unix_timestamp(corte))).scalar()
+    return [nome for nome, limite in particoes if limite is not None and limite <= limite_corte]
+
+
+class _ArquivoMensal:
+    """NDJSON.gz gravado em .tmp e renomeado só após fsync (arquivo final nunca fica truncado)"""
+
+    def __init__(self, diretorio, mes, sufixo):
+        self.caminho = os.path.join(diretorio, f"{LogAuditoria.__tablename__}_{mes}_{sufixo}.ndjson.gz")
+        self.temporario = self.caminho + ".tmp"
+        self._bruto = open(self.temporario, "wb")
+        self._gzip = gzip.GzipFile(fileobj=self._bruto, mode="wb")
+        self.linhas = 0
+
+    def escrever(self, registro):
+        self._gzip.write(json.dumps(registro, ensure_ascii=False, default=str).encode("utf-8") + b"\n")
+        self.linhas += 1
+
+    def concluir(self):
+        self._gzip.close()
+        self._bruto.flush()
+        os.fsync(self._bruto.fileno())
+        self._bruto.close()
+        os.replace(self.temporario, self.caminho)
+
+    def descartar(self):
+        self._gzip.close()
+        self._bruto.close()
+        os.remove(self.temporario)
+
+
+def _exportar(condicao, diretorio, sufixo, lote):
+    """Grava as linhas que atendem à condição; retorna (arquivos, faixas de id lidas)"""
+    tabela = LogAuditoria.__table__
+    arquivos = {}
+    faixas = []
+    ultimo_id = 0
+    try:
+        while True:
+            linhas = db.session.execute(
+                select(tabela).where(condicao, tabela.c.id > ultimo_id).order_by(tabela.c.id).limit(lote)
+            ).all()
+            if not linhas:
+                break
+            for linha in linhas:
+                registro = dict(linha._mapping)
+                registro["created_at"] = registro["created_at"].isoformat()
+                mes = registro["created_at"][:7]
+                if mes not in arquivos:
+                    arquivos[mes] = _ArquivoMensal(diretorio, mes, sufixo)
+                arquivos[mes].escrever(registro)
+            ultimo_id = linhas[-1].id
+            faixas.append((linhas[0].id, ultimo_id))
+        for arquivo in arquivos.values():
+            arquivo.concluir()
+    except Exception:
+        for arquivo in arquivos.values():
+            if os.path.exists(arquivo.temporario):
+                arquivo.descartar()
+        raise
+    return list(arquivos.values()), faixas
+
+
+def arquivar_logs(agora=None, simular=False):
+    """
+    Aplica a política de retenção: arquiva e remove os logs expirados.
+    Com simular=True apenas conta o que seria arquivado. Retorna um resumo.
+    """
+    agora = agora or datetime.utcnow()
+    config = current_app.config
+    politica = politica_retencao()
+    cortes = _cortes(politica, agora)
+    resumo = {"arquivados": 0, "removidos": 0, "arquivos": [], "particoes_removidas": []}
+    if not cortes:
+        return resumo
+
+    tabela = LogAuditoria.__table__
+    condicao = db.or_(*(c for c, _ in cortes))
+    if simular:
+        resumo["arquivados"] = db.session.execute(select(func.count()).select_from(tabela).where(condicao)).scalar()
+        resumo["particoes_removidas"] = _particoes_expiradas(politica, cortes)
+        return resumo
+
+    diretorio = config.get("AUDIT_ARCHIVE_DIR", "arquivo/auditoria")
+    os.makedirs(diretorio, exist_ok=True)
+    arquivos, faixas = _exportar(condicao, diretorio, f"{agora:%Y%m%dT%H%M%S}", config.get("AUDIT_ARCHIVE_BATCH", 5000))
+    db.session.rollback()
+    resumo["arquivados"] = sum(a.linhas for a in arquivos)
+    resumo["arquivos"] = [a.caminho for a in arquivos]
+
+    # Remoção só depois de todos os arquivos gravados: meses inteiros por partição, o resto por faixa de id
+    for nome in _particoes_expiradas(politica, cortes):
+        db.session.execute(text(f"ALTER TABLE {LogAuditoria.__tablename__} DROP PARTITION {nome}"))
+        db.session.commit()
+        resumo["particoes_removidas"].append(nome)
+    busca = LogAuditoriaBusca.__table__
+    for inicio, fim in faixas:
+        resultado = db.session.execute(delete(tabela).where(condicao, tabela.c.id.between(inicio, fim)))
+        if busca_textual_ativa():
+            # Cópias textuais dos logs que saíram (por DELETE ou DROP PARTITION)
+            db.session.execute(delete(busca).where(
+                busca.c.log_id.between(inicio, fim),
+                ~select(tabela.c.id).where(tabela.c.id == busca.c.log_id).exists(),
+            ))
+        db.session.commit()
+        resumo["removidos"] += resultado.rowcount
+
+    logger.info(
+        f"Arquivamento de auditoria: {resumo['arquivados']} logs em {len(arquivos)} arquivo(s), "
+        f"{resumo['removidos']} removidos por DELETE, partições removidas: {resumo['particoes_removidas'] or '-'}"
+    )
+    return resumo
@@ -0,0 +1,282 @@
+"""
+Projeção de leitura dos ativos (tabela ativos_projecao): uma linha por ativo
+com subtipo, marca/operadora, usuário atual e unidade já resolvidos.
+Mantida na mesma transação de cada escrita via listener after_flush do
+SQLAlchemy; leituras viram consultas de tabela única.
+"""
+import logging
+from functools import reduce
+from itertools import chain
+
+from flask import g, has_app_context
+from sqlalchemy import delete, event, inspect, insert, literal, select
+from sqlalchemy.orm import Session
+
+from ..core.db import db
+from ..models.dominio import (Ativo, AtivoProjecao, ChipSim, Colaborador, Computador,
+                              Marca, Operadora, Smartphone, UnidadeNegocio)
+
+logger = logging.getLogger("app")
+
+TAMANHO_LOTE = 500
+_estado = {"ativo": False, "subconsulta": None}
+
+# Entidades referenciadas pela projeção -> coluna da projeção que aponta para elas
+_REFERENCIAS = {
+    Colaborador: "usuario_atual_id",
+    UnidadeNegocio: "unidade_negocio_id",
+    Marca: "marca_id",
+    Operadora: "operadora_id",
+}
+
+
+def projecao_ativa():
+    return _estado["ativo"]
+
+
+def _select_projecao():
+    """SELECT com os mesmos nomes de coluna de ativos_projecao (equivalente a vw_ativos_completos)"""
+    a = Ativo.__table__
+    col = Colaborador.__table__
+    un = UnidadeNegocio.__table__
+    s = Smartphone.__table__
+    comp = Computador.__table__
+    ch = ChipSim.__table__
+    op = Operadora.__table__
+    m = Marca.__table__.alias("m")
+    m2 = Marca.__table__.alias("m2")
+
+    f = db.func
+    modelo = f.coalesce(s.c.modelo, comp.c.modelo)
+    marca_nome = f.coalesce(m.c.nome, m2.c.nome)
+    campos_busca = (modelo, marca_nome, s.c.imei_slot, comp.c.patrimonio, comp.c.serie,
+                    comp.c.processador, ch.c.numero, op.c.nome)
+    busca = f.lower(reduce(
+        lambda acc, campo: acc + literal(" ") + campo,
+        [f.coalesce(c, literal("")) for c in campos_busca],
+    ))
+
+    return select(
+        a.c.id.label("ativo_id"),
+        a.c.tipo,
+        a.c.condicao,
+        a.c.valor,
+        a.c.usuario_atual_id,
+        col.c.nome.label("usuario_atual_nome"),
+        a.c.unidade_negocio_id,
+        un.c.nome.label("unidade_negocio_nome"),
+        f.coalesce(s.c.id, comp.c.id, ch.c.id).label("subtipo_id"),
+        f.coalesce(s.c.marca_id, comp.c.marca_id).label("marca_id"),
+        marca_nome.label("marca_nome"),
+        modelo.label("modelo"),
+        s.c.imei_slot,
+        comp.c.tipo_computador,
+        comp.c.patrimonio,
+        comp.c.serie,
+        comp.c.so_versao,
+        comp.c.processador,
+        comp.c.memoria,
+        comp.c.hd,
+        f.coalesce(s.c.acessorios, comp.c.acessorios).label("acessorios"),
+        ch.c.operadora_id,
+        op.c.nome.label("operadora_nome"),
+        ch.c.numero,
+        ch.c.tipo.label("tipo_chip"),
+        busca.label("busca"),
+        a.c.created_at,
+        f.current_timestamp().label("atualizado_em"),
+    ).select_from(
+        a.outerjoin(col, col.c.id == a.c.usuario_atual_id)
+         .outerjoin(un, un.c.id == a.c.unidade_negocio_id)
+         .outerjoin(s, s.c.ativo_id == a.c.id)
+         .outerjoin(m, m.c.id == s.c.marca_id)
+         .outerjoin(comp, comp.c.ativo_id == a.c.id)
+         .outerjoin(m2, m2.c.id == comp.c.marca_id)
+         .outerjoin(ch, ch.c.ativo_id == a.c.id)
+         .outerjoin(op, op.c.id == ch.c.operadora_id)
+    )
+
+
+def fonte_projecao():
+    """
+    Tabela ativos_projecao se disponível; senão o SELECT equivalente como
+    subconsulta, com as mesmas colunas (leitores não precisam distinguir).
+    """
+    if projecao_ativa():
+        return AtivoProjecao.__table__
+    if _estado["subconsulta"] is None:
+        _estado["subconsulta"] = _select_projecao().subquery("ativos_projecao")
+    return _estado["subconsulta"]
+
+
+def consultar_projecao(*criterios, order_by=None, limit=None):
+    """
+    Retorna linhas da projeção (Row com atributos por coluna). Critérios são
+    expressões sobre fonte_projecao().c, ex.: consultar_projecao(p.tipo == "smartphone").
+    """
+    fonte = fonte_projecao()
+    stmt = select(fonte).where(*criterios).order_by(*(order_by or (fonte.c.ativo_id,)))
+    if limit:
+        stmt = stmt.limit(limit)
+    return db.session.execute(stmt).all()
+
+
+def _cache_requisicao():
+    """Mapa ativo_id -> linha da projeção, válido durante a requisição (None fora de contexto)"""
+    if not has_app_context():
+        return None
+    if "_projecoes_ativos" not in g:
+        g._projecoes_ativos = {}
+    return g._projecoes_ativos
+
+
+def obter_projecoes(ativo_ids):
+    """
+    Retorna {ativo_id: linha ou None}. Ids já vistos na requisição vêm do cache;
+    os demais são buscados juntos (uma consulta por lote de TAMANHO_LOTE).
+    """
+    ids = {i for i in ativo_ids if i is not None}
+    cache = _cache_requisicao()
+    faltantes = sorted(ids if cache is None else ids - cache.keys())
+
+    encontrados = {}
+    p = fonte_projecao().c
+    for inicio in range(0, len(faltantes), TAMANHO_LOTE):
+        lote = faltantes[inicio:inicio + TAMANHO_LOTE]
+        encontrados.update((linha.ativo_id, linha) for linha in consultar_projecao(p.ativo_id.in_(lote)))
+
+    if cache is None:
+        return {i: encontrados.get(i) for i in ids}
+    cache.update((i, encontrados.get(i)) for i in faltantes)
+    return {i: cache[i] for i in ids}
+
+
+def obter_projecao(ativo_id):
+    return obter_projecoes([ativo_id]).get(ativo_id)
+
+
+def _descartar_cache(ativo_ids=None):
+    """Remove ids do cache da requisição (todos quando ativo_ids é None)"""
+    if not has_app_context() or "_projecoes_ativos" not in g:
+        return
+    if ativo_ids is None:
+        g._projecoes_ativos.clear()
+    else:
+        for ativo_id in ativo_ids:
+            g._projecoes_ativos.pop(ativo_id, None)
+
+
+def atualizar_projecao(connection, ativo_ids):
+    """Recalcula as linhas dos ativos informados (ativos excluídos somem da projeção)"""
+    tabela = AtivoProjecao.__table__
+    ids = sorted({i for i in ativo_ids if i is not None})
+    consulta = _select_projecao()
+    colunas = [c.name for c in consulta.selected_columns]
+    for inicio in range(0, len(ids), TAMANHO_LOTE):
+        lote = ids[inicio:inicio + TAMANHO_LOTE]
+        connection.execute(delete(tabela).where(tabela.c.ativo_id.in_(lote)))
+        connection.execute(insert(tabela).from_select(
+            colunas, consulta.where(Ativo.__table__.c.id.in_(lote))
+        ))
+
+
+def atualizar_projecao_ativos(ativo_ids):
+    """Recalcula os ativos gravados fora do flush (UPDATE/INSERT em massa) na transação da sessão"""
+    if not projecao_ativa():
+        _descartar_cache()
+        return
+    atualizar_projecao(db.session.connection(), ativo_ids)
+    _descartar_cache(ativo_ids)
+
+
+def atualizar_projecao_referencias(coluna, ids):
+    """
+    Recalcula os ativos que apontam para registros alterados fora do flush
+    (ex.: INSERT ... ON DUPLICATE KEY UPDATE em massa). coluna é a coluna da
+    projeção, como "usuario_atual_id".
+    """
+    if not projecao_ativa():
+        _descartar_cache()
+        return
+    tabela = AtivoProjecao.__table__
+    connection = db.session.connection()
+    ids = sorted(set(ids))
+    ativo_ids = set()
+    for inicio in range(0, len(ids), TAMANHO_LOTE):
+        ativo_ids.update(connection.execute(
+            select(tabela.c.ativo_id).where(tabela.c[coluna].in_(ids[inicio:inicio + TAMANHO_LOTE]))
+        ).scalars())
+    if ativo_ids:
+        atualizar_projecao_ativos(ativo_ids)
+
+
+def reconstruir_projecao():
+    """Recria a projeção inteira a partir das tabelas de origem; retorna o total de linhas"""
+    tabela = AtivoProjecao.__table__
+    consulta = _select_projecao()
+    with db.engine.begin() as conn:
+        conn.execute(delete(tabela))
+        conn.execute(insert(tabela).from_select([c.name for c in consulta.selected_columns], consulta))
+        return conn.execute(select(db.func.count()).select_from(tabela)).scalar()
+
+
+def _ativos_afetados(session):
+    ids = set()
+    referencias = {}
+    alterados = [obj for obj in session.dirty if session.is_modified(obj, include_collections=False)]
+    for obj in chain(session.new, alterados, session.deleted):
+        if isinstance(obj, Ativo):
+            ids.add(obj.id)
+        elif isinstance(obj, (Smartphone, Computador, ChipSim)):
+            ids.add(obj.ativo_id)
+
+    # Registros novos de marca/colaborador/etc. ainda não são referenciados por nenhum ativo
+    for obj in chain(alterados, session.deleted):
+        coluna = _REFERENCIAS.get(type(obj))
+        if coluna:
+            referencias.setdefault(coluna, set()).add(obj.id)
+
+    if referencias:
+        # A própria projeção sabe quais ativos apontam para o registro alterado
+        tabela = AtivoProjecao.__table__
+        condicoes = [tabela.c[coluna].in_(sorted(valores)) for coluna, valores in referencias.items()]
+        ids.update(session.connection().execute(
+            select(tabela.c.ativo_id).where(db.or_(*condicoes))
+        ).scalars())
+    return ids
+
+
+def _after_flush(session, flush_context):
+    if not projecao_ativa():
+        # Sem a tabela não há como saber os ativos afetados; invalida o cache inteiro
+        _descartar_cache()
+        return
+    ids = _ativos_afetados(session)
+    if ids:
+        atualizar_projecao(session.connection(), ids)
+        _descartar_cache(ids)
+
+
+def _after_rollback(session):
+    # Linhas lidas após um flush desfeito podem refletir dados que não existem mais
+    _descartar_cache()
+
+
+def init_projecao_ativos(app):
+    """Registra a manutenção da projeção (se a tabela existir) e a invalidação do cache"""
+    if not event.contains(Session, "after_flush", _after_flush):
+        event.listen(Session, "after_flush", _after_flush)
+        event.listen(Session, "after_rollback", _after_rollback)
+
+    with app.app_context():
+        try:
+            existe = inspect(db.engine).has_table(AtivoProjecao.__tablename__)
+        except Exception as e:
+            logger.warning(f"Não foi possível verificar {AtivoProjecao.__tablename__}: {e}")
+            existe = False
+
+    if not existe:
+        logger.warning("Tabela ativos_projecao não encontrada - leituras de ativos usarão joins diretos")
+        return
+
+    _estado["ativo"] = True
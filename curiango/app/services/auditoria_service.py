@@ -1,53 +1,37 @@
 # -*- coding: utf-8 -*-
-from flask import request, session
+from flask import current_app, request, session
+from sqlalchemy import func, inspect, select
+from sqlalchemy.dialects.mysql import match
 from ..core.db import db
-from ..models.dominio import LogAuditoria, Ativo, Smartphone, Computador, ChipSim, Marca, Operadora
+from ..core.versionamento import obter_versoes, versionamento_ativo
+from ..models.dominio import LogAuditoria, LogAuditoriaBusca
+from .descricao_service import describe
 from ..core.timezone_utils import to_local_isoformat
-from datetime import datetime
+from ..core.serializacao import compilar_serializador
+from collections import OrderedDict
+from datetime import datetime, timedelta
 import json
 import logging
+import re
+import threading
+import time
 
 logger = logging.getLogger("app")
 
+# innodb_ft_min_token_size padrão; palavras menores não estão no índice FULLTEXT
+MIN_PALAVRA_FULLTEXT = 3
+MAX_CONTAGENS = 256
+
+_estado = {"busca": False, "fulltext": False}
+_contagens = OrderedDict()  # filtros -> (versão de log_auditoria, instante, (total, aproximado))
+_contagens_lock = threading.Lock()
+
 def obter_descricao_ativo(ativo_id: int) -> str:
     """
     Obtem uma descricao detalhada do ativo para logs
     """
     try:
-        ativo = db.session.query(Ativo).filter_by(id=ativo_id).first()
-        if not ativo:
-            return f"Ativo ID {ativo_id}"
-        
-        descricao_base = f"Ativo {ativo.tipo} (ID: {ativo_id})"
-        
-        # Buscar detalhes específicos do tipo
-        if ativo.tipo == "smartphone":
-            smartphone = db.session.query(Smartphone).filter_by(ativo_id=ativo.id).first()
-            if smartphone:
-                marca = db.session.query(Marca).filter_by(id=smartphone.marca_id).first() if smartphone.marca_id else None
-                marca_nome = marca.nome if marca else "Sem marca"
-                modelo = smartphone.modelo or "Sem modelo"
-                return f"Smartphone {marca_nome} {modelo} (ID: {ativo_id})"
-        
-        elif ativo.tipo in ["notebook", "desktop"]:
-            computador = db.session.query(Computador).filter_by(ativo_id=ativo.id).first()
-            if computador:
-                marca = db.session.query(Marca).filter_by(id=computador.marca_id).first() if computador.marca_id else None
-                marca_nome = marca.nome if marca else "Sem marca"
-                modelo = computador.modelo or "Sem modelo"
-                patrimonio = f" - Patrimônio: {computador.patrimonio}" if computador.patrimonio else ""
-                return f"{ativo.tipo.title()} {marca_nome} {modelo}{patrimonio} (ID: {ativo_id})"
-        
-        elif ativo.tipo == "chip_sim":
-            chip = db.session.query(ChipSim).filter_by(ativo_id=ativo.id).first()
-            if chip:
-                operadora = db.session.query(Operadora).filter_by(id=chip.operadora_id).first() if chip.operadora_id else None
-                operadora_nome = operadora.nome if operadora else "Sem operadora"
-                numero = chip.numero or "Sem número"
-                return f"Chip SIM {operadora_nome} - {numero} (ID: {ativo_id})"
-        
-        return descricao_base
-        
+        return describe(ativo_id, "auditoria")
     except Exception as e:
         logger.error(f"Erro ao obter descricao do ativo {ativo_id}: {e}")
         return f"Ativo ID {ativo_id}"
@@ -90,6 +74,9 @@ def log_audit(acao: str, tabela: str = None, registro_id: int = None, descricao:
         )
         
         db.session.add(log_entry)
+        if _estado["busca"]:
+            db.session.flush()
+            db.session.add(LogAuditoriaBusca(log_id=log_entry.id, created_at=log_entry.created_at, descricao=descricao))
         db.session.commit()
         
         logger.info(f"Auditoria registrada: {acao} por {usuario} - {descricao}")
@@ -102,76 +89,181 @@ def log_audit(acao: str, tabela: str = None, registro_id: int = None, descricao:
         except:
             pass
 
-def buscar_logs_auditoria(filtros: dict):
+def adicionar_logs(registros):
     """
-    Busca logs de auditoria com filtros
-    
-    Args:
-        filtros: Dicionario com filtros (usuario, acao, tabela, data_inicio, data_fim, termo_busca)
-    
-    Returns:
-        Lista de logs de auditoria
+    Adiciona vários logs (dicts com os campos de LogAuditoria) à transação
+    corrente, sem commit, para gravações em lote feitas fora de uma requisição.
     """
-    query = db.session.query(LogAuditoria)
-    
-    # Filtro por usuario
+    entradas = [LogAuditoria(**registro) for registro in registros]
+    db.session.add_all(entradas)
+    if _estado["busca"] and entradas:
+        db.session.flush()
+        db.session.add_all(
+            LogAuditoriaBusca(log_id=e.id, created_at=e.created_at, descricao=e.descricao) for e in entradas
+        )
+    return entradas
+
+def init_busca_auditoria(app):
+    """Ativa a busca FULLTEXT se log_auditoria_busca existir em MariaDB/MySQL"""
+    with app.app_context():
+        try:
+            existe = inspect(db.engine).has_table(LogAuditoriaBusca.__tablename__)
+        except Exception as e:
+            logger.warning(f"Não foi possível verificar {LogAuditoriaBusca.__tablename__}: {e}")
+            existe = False
+        _estado["busca"] = existe
+        _estado["fulltext"] = existe and db.engine.dialect.name in ("mysql", "mariadb")
+    if not existe:
+        logger.warning("Tabela log_auditoria_busca não encontrada - busca textual da auditoria usará LIKE")
+
+def busca_textual_ativa():
+    return _estado["busca"]
+
+def _escapar_like(valor):
+    return valor.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def _criterio_texto(termo):
+    """MATCH ... AGAINST na tabela de busca; termos curtos demais para o índice usam LIKE"""
+    palavras = [p for p in re.sub(r"[+\-<>()~*\"@]", " ", termo).split() if p]
+    indexaveis = [p for p in palavras if len(p) >= MIN_PALAVRA_FULLTEXT]
+    curtas = [p for p in palavras if len(p) < MIN_PALAVRA_FULLTEXT]
+    if not _estado["fulltext"] or not indexaveis:
+        return LogAuditoria.descricao.ilike(f"%{_escapar_like(termo)}%", escape="\\")
+
+    busca = LogAuditoriaBusca.__table__.c
+    consulta = " ".join(f"+{p}*" for p in indexaveis)
+    criterio = LogAuditoria.id.in_(select(busca.log_id).where(match(busca.descricao, against=consulta).in_boolean_mode()))
+    for palavra in curtas:
+        criterio = db.and_(criterio, LogAuditoria.descricao.ilike(f"%{_escapar_like(palavra)}%", escape="\\"))
+    return criterio
+
+def criterios_logs(filtros: dict):
+    criterios = []
+
+    # Usuário por prefixo (usa o índice usuario, created_at)
     if filtros.get("usuario"):
-        query = query.filter(LogAuditoria.usuario.ilike(f"%{filtros['usuario']}%"))
-    
-    # Filtro por acao
+        criterios.append(LogAuditoria.usuario.like(f"{_escapar_like(filtros['usuario'])}%", escape="\\"))
     if filtros.get("acao"):
-        query = query.filter(LogAuditoria.acao == filtros["acao"])
-    
-    # Filtro por tabela
+        criterios.append(LogAuditoria.acao == filtros["acao"])
     if filtros.get("tabela"):
-        query = query.filter(LogAuditoria.tabela == filtros["tabela"])
-    
-    # Filtro por data inicio
+        criterios.append(LogAuditoria.tabela == filtros["tabela"])
+    if filtros.get("registro_id"):
+        criterios.append(LogAuditoria.registro_id == filtros["registro_id"])
+
+    # Intervalo de datas (dias inteiros); datas inválidas são ignoradas
     if filtros.get("data_inicio"):
         try:
-            data_inicio = datetime.strptime(filtros["data_inicio"], "%Y-%m-%d")
-            query = query.filter(LogAuditoria.created_at >= data_inicio)
+            criterios.append(LogAuditoria.created_at >= datetime.strptime(filtros["data_inicio"], "%Y-%m-%d"))
         except ValueError:
             pass
-    
-    # Filtro por data fim
     if filtros.get("data_fim"):
         try:
-            data_fim = datetime.strptime(filtros["data_fim"], "%Y-%m-%d")
-            # Adiciona 23:59:59 para incluir todo o dia
-            data_fim = data_fim.replace(hour=23, minute=59, second=59)
-            query = query.filter(LogAuditoria.created_at <= data_fim)
+            data_fim = datetime.strptime(filtros["data_fim"], "%Y-%m-%d") + timedelta(days=1)
+            criterios.append(LogAuditoria.created_at < data_fim)
         except ValueError:
             pass
-    
-    # Filtro por termo de busca (busca na descricao)
+
     if filtros.get("termo_busca"):
-        termo = filtros["termo_busca"]
-        query = query.filter(LogAuditoria.descricao.ilike(f"%{termo}%"))
+        criterios.append(_criterio_texto(filtros["termo_busca"]))
+    return criterios
+
+def codificar_cursor(log: LogAuditoria):
+    """Posição após o log informado na ordenação (created_at desc, id desc)"""
+    if log.created_at is None:
+        return None
+    return f"{log.created_at.isoformat()}_{log.id}"
+
+def decodificar_cursor(cursor: str):
+    """Retorna (created_at, id); ValueError se o cursor for inválido"""
+    data, _, log_id = cursor.rpartition("_")
+    return datetime.fromisoformat(data), int(log_id)
+
+def buscar_logs_auditoria(filtros: dict):
+    """
+    Busca logs de auditoria com filtros
+    
+    Args:
+        filtros: Dicionario com filtros (usuario, acao, tabela, registro_id, data_inicio,
+                 data_fim, termo_busca) e paginação (limite, cursor ou offset)
+    
+    Returns:
+        Lista de logs de auditoria, do mais recente para o mais antigo
+    """
+    query = db.session.query(LogAuditoria).filter(*criterios_logs(filtros))
+
+    # Keyset: continua após o último log da página anterior, sem varrer as páginas já vistas
+    if filtros.get("cursor"):
+        created_at, log_id = decodificar_cursor(filtros["cursor"])
+        query = query.filter(db.or_(
+            LogAuditoria.created_at < created_at,
+            db.and_(LogAuditoria.created_at == created_at, LogAuditoria.id < log_id),
+        ))
     
     # Ordenar por data mais recente
-    query = query.order_by(LogAuditoria.created_at.desc())
+    query = query.order_by(LogAuditoria.created_at.desc(), LogAuditoria.id.desc())
     
     # Paginacao
     limite = min(filtros.get("limite", 100), 500)  # Maximo 500 registros
-    offset = filtros.get("offset", 0)
+    if not filtros.get("cursor") and filtros.get("offset"):
+        query = query.offset(filtros["offset"])
     
-    return query.offset(offset).limit(limite).all()
+    return query.limit(limite).all()
+
+def _versao_logs():
+    if not versionamento_ativo():
+        return None
+    try:
+        return obter_versoes([LogAuditoria.__tablename__])[LogAuditoria.__tablename__][0]
+    except Exception as e:
+        logger.warning(f"Falha ao obter versão de {LogAuditoria.__tablename__}: {e}")
+        return None
+
+def contar_logs_auditoria(filtros: dict):
+    """
+    Retorna (total, aproximado). Conta exatamente até AUDIT_COUNT_LIMIT linhas;
+    acima disso devolve o limite com aproximado=True. O resultado fica em cache
+    por conjunto de filtros enquanto log_auditoria não muda, ou por até
+    AUDIT_COUNT_CACHE_TTL segundos quando muda.
+    """
+    config = current_app.config
+    chave = tuple(sorted((k, v) for k, v in filtros.items() if k not in ("limite", "offset", "cursor")))
+    versao = _versao_logs()
+    agora = time.monotonic()
+    with _contagens_lock:
+        entrada = _contagens.get(chave)
+    if entrada:
+        versao_cache, instante, resultado = entrada
+        if (versao is not None and versao_cache == versao) or agora - instante < config.get("AUDIT_COUNT_CACHE_TTL", 30):
+            return resultado
+
+    teto = config.get("AUDIT_COUNT_LIMIT", 100000)
+    ids = select(LogAuditoria.id).where(*criterios_logs(filtros)).limit(teto + 1).subquery()
+    total = db.session.execute(select(func.count()).select_from(ids)).scalar()
+    resultado = (min(total, teto), total > teto)
+
+    with _contagens_lock:
+        _contagens[chave] = (versao, agora, resultado)
+        _contagens.move_to_end(chave)
+        while len(_contagens) > MAX_CONTAGENS:
+            _contagens.popitem(last=False)
+    return resultado
+
+_CAMPOS_LOG = (
+    ("id", "id"),
+    ("usuario", "usuario"),
+    ("nivel", "nivel"),
+    ("acao", "acao"),
+    ("tabela", "tabela"),
+    ("registro_id", "registro_id"),
+    ("descricao", "descricao"),
+    ("dados_antigos", "dados_antigos"),
+    ("dados_novos", "dados_novos"),
+    ("ip_address", "ip_address"),
+    ("created_at", "created_at", to_local_isoformat),
+)
 
 def converter_log_para_dict(log: LogAuditoria):
     """
     Converte um LogAuditoria para dicionario para serializacao JSON
     """
-    return {
-        "id": log.id,
-        "usuario": log.usuario,
-        "nivel": log.nivel,
-        "acao": log.acao,
-        "tabela": log.tabela,
-        "registro_id": log.registro_id,
-        "descricao": log.descricao,
-        "dados_antigos": log.dados_antigos,
-        "dados_novos": log.dados_novos,
-        "ip_address": log.ip_address,
-        "created_at": to_local_isoformat(log.created_at) if log.created_at else None
-    }
\ No newline at end of file
+    return compilar_serializador(_CAMPOS_LOG)(log)
\ No newline at end of file
@@ -0,0 +1,234 @@
+"""
+Custódia em uma data: quem estava com um ativo, ou quais ativos estavam com
+um colaborador, num instante ou num dia do passado.
+
+Cada linha de historico_alocacoes é o intervalo [data_inicio, data_fim), com
+data_fim NULL enquanto a alocação está aberta. As consultas são ordenadas
+por data e agrupadas em lotes; para cada lote uma única consulta lê, pelos
+índices (ativo_id, data_inicio, data_fim) e (colaborador_id, data_inicio,
+data_fim), os intervalos dos seus ids que tocam a faixa de datas do lote.
+A sobreposição com a janela de cada consulta é resolvida em memória: busca
+binária nos inícios ordenados e o maior fim acumulado para saber onde parar.
+"""
+import bisect
+import logging
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+
+from sqlalchemy import or_, select
+
+from ..core.config import Config
+from ..core.db import db
+from ..models.dominio import Colaborador, HistoricoAlocacao
+from .ativos_service import TAMANHO_LOTE, fonte_projecao
+
+logger = logging.getLogger("app")
+
+# Um instante vira a janela [t, t + 1µs): data_inicio <= t e data_fim > t
+_INSTANTE = timedelta(microseconds=1)
+MAX_CONSULTAS = 5000  # por requisição em lote
+_ABERTO = object()  # "maior fim" de uma sequência com alocação em aberto
+# Por quem a consulta é feita -> (coluna de busca, coluna do outro lado)
+LADOS = {"ativo": ("ativo_id", "colaborador_id"), "colaborador": ("colaborador_id", "ativo_id")}
+
+
+class ErroConsulta(ValueError):
+    pass
+
+
+def janela(valor):
+    """
+    Converte "AAAA-MM-DD" (o dia inteiro) ou um datetime ISO (o instante) na
+    janela (inicio, fim) em horário local sem fuso, como historico_alocacoes.
+    """
+    if isinstance(valor, datetime):
+        instante = valor
+    elif isinstance(valor, date):
+        inicio = datetime.combine(valor, time.min)
+        return inicio, inicio + timedelta(days=1)
+    else:
+        texto = str(valor or "").strip()
+        if not texto:
+            raise ErroConsulta("data é obrigatória")
+        try:
+            if len(texto) == 10:
+                return janela(date.fromisoformat(texto))
+            instante = datetime.fromisoformat(texto.replace("Z", "+00:00"))
+        except ValueError:
+            raise ErroConsulta(f"data inválida: {texto} (use AAAA-MM-DD ou data/hora ISO)")
+    if instante.tzinfo is not None:
+        instante = instante.astimezone(Config.TIMEZONE).replace(tzinfo=None)
+    return instante, instante + _INSTANTE
+
+
+@lru_cache(maxsize=65536)
+def _fuso_local(ano, mes, dia, hora):
+    """Fuso de uma hora local, ou None se houver troca de horário nela (evita o localize do pytz a cada data)"""
+    inicio = Config.TIMEZONE.localize(datetime(ano, mes, dia, hora))
+    fim = Config.TIMEZONE.localize(datetime(ano, mes, dia, hora, 59, 59))
+    return inicio.tzinfo if inicio.utcoffset() == fim.utcoffset() else None
+
+
+def _iso_local(dt):
+    """data_inicio/data_fim já estão em horário local: só acrescenta o fuso"""
+    if dt is None:
+        return None
+    fuso = _fuso_local(dt.year, dt.month, dt.day, dt.hour)
+    return (dt.replace(tzinfo=fuso) if fuso is not None else Config.TIMEZONE.localize(dt)).isoformat()
+
+
+def _intervalos(coluna, ids, desde, ate):
+    """
+    {id: (inícios, maior fim até cada posição, linhas)} dos intervalos dos ids
+    (no máximo TAMANHO_LOTE) que começam antes de ate e não terminaram antes
+    de desde. Com uma só janela, só vêm as alocações que a cobrem.
+    """
+    h = HistoricoAlocacao.__table__.c
+    posicao = 1 if coluna == "ativo_id" else 2  # colunas: id, ativo_id, colaborador_id, data_inicio, data_fim
+    por_id = {}
+    for linha in db.session.execute(
+        select(h.id, h.ativo_id, h.colaborador_id, h.data_inicio, h.data_fim)
+        .where(h[coluna].in_(sorted(ids)), h.data_inicio < ate, or_(h.data_fim.is_(None), h.data_fim > desde))
+        .order_by(h[coluna], h.data_inicio, h.id)
+    ).all():
+        por_id.setdefault(linha[posicao], []).append(linha)
+
+    intervalos = {}
+    for chave, linhas in por_id.items():
+        maiores_fins, maior = [], None
+        for linha in linhas:
+            if maior is not _ABERTO:
+                maior = _ABERTO if linha[4] is None else max(maior or linha[4], linha[4])
+            maiores_fins.append(maior)
+        intervalos[chave] = ([linha[3] for linha in linhas], maiores_fins, linhas)
+    return intervalos
+
+
+def _sobrepostos(intervalos, inicio, fim):
+    """
+    Linhas com data_inicio < fim e (data_fim NULL ou > inicio): busca binária
+    pelo último início antes de fim e volta até onde o maior fim acumulado
+    ainda alcança inicio (alocações de um ativo não se sobrepõem: em geral,
+    uma ou duas comparações).
+    """
+    if intervalos is None:
+        return []
+    inicios, maiores_fins, linhas = intervalos
+    encontradas = []
+    posicao = bisect.bisect_left(inicios, fim) - 1
+    while posicao >= 0 and (maiores_fins[posicao] is _ABERTO or maiores_fins[posicao] > inicio):
+        linha = linhas[posicao]
+        if linha[4] is None or linha[4] > inicio:
+            encontradas.append(linha)
+        posicao -= 1
+    encontradas.reverse()
+    return encontradas
+
+
+def _colaboradores(ids):
+    c = Colaborador.__table__.c
+    ids = sorted(ids)
+    encontrados = {}
+    for inicio in range(0, len(ids), TAMANHO_LOTE):
+        for linha in db.session.execute(
+            select(c.id, c.nome, c.matricula, c.setor_id).where(c.id.in_(ids[inicio:inicio + TAMANHO_LOTE]))
+        ).all():
+            encontrados[linha.id] = {"nome": linha.nome, "matricula": linha.matricula, "setor_id": linha.setor_id}
+    return encontrados
+
+
+def _ativos(ids):
+    p = fonte_projecao().c
+    ids = sorted(ids)
+    encontrados = {}
+    for inicio in range(0, len(ids), TAMANHO_LOTE):
+        for linha in db.session.execute(
+            select(p.ativo_id, p.tipo, p.modelo, p.patrimonio, p.imei_slot, p.numero)
+            .where(p.ativo_id.in_(ids[inicio:inicio + TAMANHO_LOTE]))
+        ).all():
+            encontrados[linha.ativo_id] = {
+                "tipo": linha.tipo,
+                "modelo": linha.modelo,
+                "identificacao": linha.patrimonio or linha.imei_slot or linha.numero,
+            }
+    return encontrados
+
+
+def custodia(lado, consultas):
+    """
+    Resolve consultas [(id, (inicio, fim))] do lado "ativo" (quem estava com
+    o ativo) ou "colaborador" (quais ativos estavam com ele). Retorna, na ordem
+    das consultas, [{<lado>_id, "inicio", "fim", "alocacoes": [...]}].
+    """
+    coluna, outra = LADOS[lado]
+    if not consultas:
+        return []
+    # Lotes de consultas próximas no tempo: cada lote lê só os intervalos da
+    # sua faixa de datas, mesmo quando as datas pedidas variam muito
+    encontrados = [None] * len(consultas)
+    ordem = sorted(range(len(consultas)), key=lambda indice: consultas[indice][1])
+    for inicio_lote in range(0, len(ordem), TAMANHO_LOTE):
+        lote = ordem[inicio_lote:inicio_lote + TAMANHO_LOTE]
+        intervalos = _intervalos(coluna, {consultas[indice][0] for indice in lote},
+                                 min(consultas[indice][1][0] for indice in lote),
+                                 max(consultas[indice][1][1] for indice in lote))
+        for indice in lote:
+            registro_id, (inicio, fim) = consultas[indice]
+            encontrados[indice] = _sobrepostos(intervalos.get(registro_id), inicio, fim)
+
+    posicao = 2 if outra == "colaborador_id" else 1
+    outros_ids = {linha[posicao] for linhas in encontrados for linha in linhas}
+    detalhes = _colaboradores(outros_ids) if outra == "colaborador_id" else _ativos(outros_ids)
+
+    resultados = []
+    for (registro_id, (inicio, fim)), linhas in zip(consultas, encontrados):
+        instante = fim - inicio == _INSTANTE
+        resultados.append({
+            coluna: registro_id,
+            "inicio": _iso_local(inicio),
+            "fim": None if instante else _iso_local(fim),
+            "alocacoes": [{
+                "historico_id": linha.id,
+                outra: linha[posicao],
+                **detalhes.get(linha[posicao], {}),
+                "data_inicio": _iso_local(linha.data_inicio),
+                "data_fim": _iso_local(linha.data_fim),
+            } for linha in linhas],
+        })
+    return resultados
+
+
+def consultas_da_requisicao(dados, lado, maximo):
+    """
+    Lê {"data", "<lado>_ids": [...]} ou {"consultas": [{"<lado>_id", "data"}]}
+    do corpo de uma consulta em lote; retorna [(id, janela)].
+    """
+    if not isinstance(dados, dict):
+        raise ErroConsulta("corpo JSON inválido")
+    chave_id = LADOS[lado][0]
+    if "consultas" in dados:
+        itens = dados["consultas"]
+        if not isinstance(itens, list):
+            raise ErroConsulta("consultas deve ser uma lista")
+        pares = [(item.get(chave_id) if isinstance(item, dict) else None, item.get("data") if isinstance(item, dict) else None)
+                 for item in itens]
+    else:
+        ids = dados.get(f"{chave_id}s")
+        if not isinstance(ids, list):
+            raise ErroConsulta(f"informe {chave_id}s e data, ou a lista consultas")
+        pares = [(registro_id, dados.get("data")) for registro_id in ids]
+    if not pares:
+        raise ErroConsulta("nenhuma consulta informada")
+    if len(pares) > maximo:
+        raise ErroConsulta(f"máximo de {maximo} consultas por requisição")
+
+    consultas = []
+    janelas = {}
+    for indice, (registro_id, data) in enumerate(pares):
+        if isinstance(registro_id, bool) or not isinstance(registro_id, int):
+            raise ErroConsulta(f"consulta {indice}: {chave_id} deve ser inteiro")
+        chave_data = str(data)
+        if chave_data not in janelas:
+            janelas[chave_data] = janela(data)
+        consultas.append((registro_id, janelas[chave_data]))
+    return consultas
@@ -0,0 +1,250 @@
+"""
+Dashboard em tempo real (Server-Sent Events).
+
+Uma thread por worker, que só roda enquanto há clientes conectados, consulta
+versoes_tabela a cada DASHBOARD_SSE_INTERVAL segundos (uma consulta leve).
+Quando ativos, colaboradores, alocações, manutenções ou a auditoria mudam,
+os contadores são recalculados uma única vez e cada cliente recebe só os
+valores alterados ("delta") e as novas atividades ("atividade"). Cada evento
+é serializado uma vez e colocado na fila de todos os clientes; quem conecta
+recebe o último estado já calculado ("estado"), sem nova consulta.
+Sem versoes_tabela, a mudança é detectada pelo último id da auditoria.
+"""
+import logging
+import queue
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import case, func, select
+
+from ..core.db import db
+from ..core.timezone_utils import to_local_isoformat
+from ..core.versionamento import obter_versoes, versionamento_ativo
+from ..models.dominio import Ativo, Colaborador, LogAuditoria
+
+logger = logging.getLogger("app")
+
+# Tabelas cujas escritas mudam os contadores ou as atividades
+TABELAS = ("ativos", "colaboradores", "historico_alocacoes", "manutencoes", "log_auditoria")
+TIPOS = ("smartphone", "notebook", "desktop", "chip_sim")
+MAX_ATIVIDADES = 10
+_FIM = None  # na fila: encerra a conexão (cliente lento; o navegador reconecta e recebe o estado)
+
+
+def calcular_contadores():
+    """Cards, tabela por categoria e resumo de usuários do dashboard em três consultas"""
+    a = Ativo.__table__.c
+    alocado = case((a.usuario_atual_id.isnot(None), 1), else_=0)
+    linhas = db.session.execute(
+        select(a.tipo, a.condicao, alocado, func.count(), func.coalesce(func.sum(a.valor), 0))
+        .group_by(a.tipo, a.condicao, alocado)
+    ).all()
+
+    resumo = {"total": 0, "em_uso": 0, "em_estoque": 0, "em_manutencao": 0, "inativos": 0, "por_categoria": {}}
+    categorias = {tipo: {"total": 0, "em_uso": 0, "disponiveis": 0, "em_manutencao": 0, "danificados": 0, "inativos": 0}
+                  for tipo in TIPOS}
+    valor_total = 0.0
+    for tipo, condicao, esta_alocado, quantidade, valor in linhas:
+        quantidade = int(quantidade)
+        valor_total += float(valor or 0)
+        resumo["total"] += quantidade
+        resumo["em_uso" if esta_alocado else "em_estoque"] += quantidade
+        resumo["por_categoria"][tipo] = resumo["por_categoria"].get(tipo, 0) + quantidade
+        if condicao == "em_manutencao":
+            resumo["em_manutencao"] += quantidade
+        elif condicao == "inativo":
+            resumo["inativos"] += quantidade
+        categoria = categorias.get(tipo)
+        if categoria is None:
+            continue
+        categoria["total"] += quantidade
+        if esta_alocado:
+            categoria["em_uso"] += quantidade
+        elif condicao in ("novo", "usado"):
+            categoria["disponiveis"] += quantidade
+        chave = {"em_manutencao": "em_manutencao", "danificado": "danificados", "inativo": "inativos"}.get(condicao)
+        if chave:
+            categoria[chave] += quantidade
+
+    c = Colaborador.__table__.c
+    usuarios = {"total": 0, "ativos": 0, "inativos": 0}
+    for status, quantidade in db.session.execute(select(c.status, func.count()).group_by(c.status)).all():
+        usuarios["total"] += int(quantidade)
+        if status in ("ativo", "inativo"):
+            usuarios[f"{status}s"] += int(quantidade)
+
+    usuarios_ativos = db.session.execute(
+        select(func.count(func.distinct(a.usuario_atual_id))).where(a.usuario_atual_id.isnot(None))
+    ).scalar() or 0
+    return {
+        "resumo": resumo,
+        "categorias": categorias,
+        "usuarios": usuarios,
+        "estatisticas": {
+            "usuarios_ativos": int(usuarios_ativos),
+            "manutencoes_abertas": resumo["em_manutencao"],
+            "valor_total_patrimonio": round(valor_total, 2),
+        },
+    }
+
+
+def atividades(depois_de=None):
+    """Últimas atividades da auditoria (as mais recentes primeiro), opcionalmente só as posteriores a um id"""
+    consulta = db.session.query(LogAuditoria)
+    if depois_de is not None:
+        consulta = consulta.filter(LogAuditoria.id > depois_de)
+    return [{
+        "id": log.id,
+        "acao": log.acao,
+        "tabela": log.tabela,
+        "descricao": log.descricao,
+        "data_hora": to_local_isoformat(log.created_at),
+        "usuario": log.usuario or "Sistema",
+    } for log in consulta.order_by(LogAuditoria.id.desc()).limit(MAX_ATIVIDADES).all()]
+
+
+def diferenca(anterior, atual):
+    """Só as folhas que mudaram entre dois dicts aninhados (chaves removidas vêm como None)"""
+    mudancas = {}
+    for chave, valor in atual.items():
+        antes = anterior.get(chave)
+        if isinstance(valor, dict):
+            interna = diferenca(antes if isinstance(antes, dict) else {}, valor)
+            if interna:
+                mudancas[chave] = interna
+        elif chave not in anterior or antes != valor:
+            mudancas[chave] = valor
+    for chave in anterior.keys() - atual.keys():
+        mudancas[chave] = None
+    return mudancas
+
+
+class TransmissorDashboard:
+    """Estado do dashboard e filas dos clientes SSE deste worker"""
+
+    def __init__(self, app, intervalo=2, max_clientes=100, tamanho_fila=100):
+        self._app = app
+        self._intervalo = intervalo
+        self._max_clientes = max_clientes
+        self._tamanho_fila = tamanho_fila
+        self._lock = threading.Lock()
+        self._lock_verificacao = threading.Lock()
+        self._clientes = set()
+        self._thread = None
+        self._marca = None  # versões das TABELAS (ou último id da auditoria) do estado atual
+        self._verificado_em = 0.0
+        self._contadores = None
+        self._atividades = []
+        self._evento_estado = None
+        self.estatisticas = {"conexoes": 0, "recusadas": 0, "descartadas": 0, "verificacoes": 0,
+                             "recalculos": 0, "eventos": 0}
+
+    def _evento(self, nome, dados):
+        return f"event: {nome}\ndata: {self._app.json.dumps(dados)}\n\n"
+
+    def _marca_atual(self):
+        if versionamento_ativo():
+            return tuple(versao for _, (versao, _) in sorted(obter_versoes(TABELAS).items()))
+        return db.session.execute(select(func.max(LogAuditoria.id))).scalar()
+
+    def verificar(self):
+        """
+        Recalcula e publica se alguma tabela mudou. Chamadas concorrentes
+        esperam a que está em andamento e reaproveitam o resultado.
+        """
+        with self._lock_verificacao:
+            if self._contadores is not None and time.monotonic() - self._verificado_em < self._intervalo / 2:
+                return
+            self.estatisticas["verificacoes"] += 1
+            marca = self._marca_atual()
+            self._verificado_em = time.monotonic()
+            if self._contadores is not None and marca == self._marca:
+                return
+
+            contadores = calcular_contadores()
+            ultimo_id = self._atividades[0]["id"] if self._atividades else None
+            novas = atividades(ultimo_id if self._contadores is not None else None)
+            self.estatisticas["recalculos"] += 1
+
+            eventos = []
+            if self._contadores is not None:
+                mudancas = diferenca(self._contadores, contadores)
+                if mudancas:
+                    eventos.append(self._evento("delta", mudancas))
+                if novas:
+                    eventos.append(self._evento("atividade", novas))
+            lista = (novas + self._atividades)[:MAX_ATIVIDADES]
+            estado = self._evento("estado", {**contadores, "atividades": lista})
+
+            with self._lock:
+                self._marca, self._contadores, self._atividades = marca, contadores, lista
+                self._evento_estado = estado
+                for evento in eventos:
+                    self._publicar(evento)
+
+    def _publicar(self, evento):
+        """Coloca o evento na fila de cada cliente (com self._lock); clientes com a fila cheia são desconectados"""
+        self.estatisticas["eventos"] += 1
+        for fila in list(self._clientes):
+            try:
+                fila.put_nowait(evento)
+            except queue.Full:
+                self._clientes.discard(fila)
+                self.estatisticas["descartadas"] += 1
+                with fila.mutex:
+                    fila.queue.clear()
+                fila.put_nowait(_FIM)
+
+    def conectar(self):
+        """Registra um cliente: (fila, evento com o estado atual), ou None acima de DASHBOARD_SSE_MAX_CLIENTS"""
+        with self._lock:
+            if len(self._clientes) >= self._max_clientes:
+                self.estatisticas["recusadas"] += 1
+                return None
+        if self._thread is None:
+            # Sem clientes a thread está parada e o estado pode estar desatualizado
+            self.verificar()
+        with self._lock:
+            fila = queue.Queue(self._tamanho_fila)
+            self._clientes.add(fila)
+            self.estatisticas["conexoes"] += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._executar, name="dashboard-sse", daemon=True)
+                self._thread.start()
+            return fila, self._evento_estado
+
+    def desconectar(self, fila):
+        with self._lock:
+            self._clientes.discard(fila)
+
+    def _executar(self):
+        while True:
+            time.sleep(self._intervalo)
+            with self._lock:
+                if not self._clientes:
+                    self._thread = None
+                    return
+            with self._app.app_context():
+                try:
+                    self.verificar()
+                except Exception:
+                    logger.exception("Erro ao atualizar o dashboard em tempo real")
+                finally:
+                    db.session.remove()
+
+    def situacao(self):
+        with self._lock:
+            return {**self.estatisticas, "clientes": len(self._clientes), "ativo": self._thread is not None}
+
+
+def init_dashboard_tempo_real(app):
+    app.extensions["dashboard_tempo_real"] = TransmissorDashboard(
+        app,
+        intervalo=app.config.get("DASHBOARD_SSE_INTERVAL", 2),
+        max_clientes=app.config.get("DASHBOARD_SSE_MAX_CLIENTS", 100),
+    )
+
+
+def obter_transmissor():
+    return current_app.extensions.get("dashboard_tempo_real")
@@ -0,0 +1,266 @@
+"""
+Valor contábil dos ativos por depreciação linear ou por saldo decrescente.
+
+Valor e data de aquisição de todos os ativos vêm numa única consulta, lidos
+como colunas, e a depreciação é calculada de uma vez para a carteira inteira
+com NumPy (quando instalado; senão em Python puro, com as mesmas fórmulas).
+Não há data de aquisição própria no cadastro: vale o created_at do ativo.
+O resultado fica em cache por dia, política e versão de ativos/colaboradores.
+"""
+import logging
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import Float, cast, extract, func, select
+
+from ..core.config import Config
+from ..core.db import db
+from ..core.versionamento import obter_versoes, versionamento_ativo
+from ..models.dominio import Ativo, Colaborador
+from .parametros_service import obter_parametros
+from .referencias_service import registros_referencia
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:  # pragma: no cover - depende do ambiente
+    np = None
+    NUMPY_AVAILABLE = False
+
+logger = logging.getLogger("app")
+
+METODOS = ("linear", "saldo_decrescente")
+PARAMETROS = {
+    "depreciacao_vida_util_anos": "smartphone:3,notebook:5,desktop:5,chip_sim:2",
+    "depreciacao_valor_residual_pct": "10",
+    "depreciacao_fator_saldo_decrescente": "2",
+}
+VIDA_UTIL_PADRAO_MESES = 60  # tipos sem vida útil configurada
+TTL_SEM_VERSIONAMENTO = 300  # sem versoes_tabela não há como saber se ativos mudaram
+# Agrupamento -> tabela de referência com os nomes (None = a própria chave)
+AGRUPAMENTOS = {"tipo": None, "unidade": "unidades_negocio", "setor": "setores"}
+
+_cache = {}
+_lock = threading.Lock()
+
+
+def _numero(texto):
+    return float(str(texto).replace(",", ".").strip())
+
+
+def politica_depreciacao():
+    """{"vida_util": {tipo: meses}, "residual": fração do custo, "fator": fator do saldo decrescente}"""
+    valores = obter_parametros(PARAMETROS)
+    try:
+        vida_util = {}
+        for item in valores["depreciacao_vida_util_anos"].split(","):
+            tipo, _, anos = item.partition(":")
+            if tipo.strip() and anos.strip():
+                vida_util[tipo.strip()] = max(1, round(_numero(anos) * 12))
+        residual = min(max(_numero(valores["depreciacao_valor_residual_pct"]) / 100, 0.0), 1.0)
+        fator = max(_numero(valores["depreciacao_fator_saldo_decrescente"]), 0.0)
+    except ValueError as e:
+        logger.warning(f"Parâmetros de depreciação inválidos ({e}); usando os padrões")
+        return _politica_padrao()
+    return {"vida_util": vida_util, "residual": residual, "fator": fator}
+
+
+def _politica_padrao():
+    vida_util = {}
+    for item in PARAMETROS["depreciacao_vida_util_anos"].split(","):
+        tipo, _, anos = item.partition(":")
+        vida_util[tipo] = int(anos) * 12
+    return {"vida_util": vida_util, "residual": 0.10, "fator": 2.0}
+
+
+def _carregar_carteira():
+    """
+    Colunas (tuplas) de todos os ativos: id, tipo, custo, mês de aquisição
+    (ano * 12 + mês), dia de aquisição, unidade e setor do usuário. A data vem
+    decomposta em inteiros pelo banco, sem criar um datetime por linha.
+    """
+    a = Ativo.__table__
+    col = Colaborador.__table__
+    linhas = db.session.execute(
+        select(a.c.id, a.c.tipo, func.coalesce(cast(a.c.valor, Float), 0.0),
+               extract("year", a.c.created_at) * 12 + extract("month", a.c.created_at),
+               extract("day", a.c.created_at),
+               a.c.unidade_negocio_id, col.c.setor_id)
+        .select_from(a.outerjoin(col, col.c.id == a.c.usuario_atual_id))
+        .order_by(a.c.id)
+    ).all()
+    if not linhas:
+        return ((),) * 7
+    return tuple(zip(*linhas))
+
+
+def _idades_python(meses, dias, referencia):
+    """Meses completos entre a aquisição e a data de referência (aquisição desconhecida = 0)"""
+    mes_ref = referencia.year * 12 + referencia.month
+    return [0 if mes is None else max(mes_ref - mes - (referencia.day < dia), 0) for mes, dia in zip(meses, dias)]
+
+
+def _calcular_python(custos, idades, vidas, politica, metodo):
+    residual, fator = politica["residual"], politica["fator"]
+    contabeis = []
+    for custo, idade, vida in zip(custos, idades, vidas):
+        valor_residual = custo * residual
+        if idade >= vida:
+            contabeis.append(valor_residual)
+        elif metodo == "linear":
+            contabeis.append(custo - (custo - valor_residual) * idade / vida)
+        else:
+            taxa = min(fator / vida, 1.0)
+            contabeis.append(max(custo * (1 - taxa) ** idade, valor_residual))
+    return contabeis
+
+
+def _calcular_numpy(custos, meses, dias, referencia, vidas, politica, metodo):
+    custos = np.asarray(custos, dtype=np.float64)
+    vidas = np.asarray(vidas, dtype=np.int64)
+    mes_ref = referencia.year * 12 + referencia.month
+    # Aquisição desconhecida conta como a própria data de referência
+    meses = np.array([mes_ref if m is None else m for m in meses], dtype=np.int64)
+    dias = np.array([referencia.day if d is None else d for d in dias], dtype=np.int64)
+    idades = np.maximum(mes_ref - meses - (referencia.day < dias), 0)
+
+    residuais = custos * politica["residual"]
+    if metodo == "linear":
+        contabeis = custos - (custos - residuais) * (idades / vidas)
+    else:
+        taxas = np.minimum(politica["fator"] / vidas, 1.0)
+        contabeis = np.maximum(custos * (1 - taxas) ** idades, residuais)
+    contabeis = np.where(idades >= vidas, residuais, contabeis)
+    return idades, contabeis
+
+
+def _grupos(chaves, custos, contabeis, tabela_nomes):
+    """Totais por chave: [{"chave", "nome", "quantidade", "valor_aquisicao", "valor_contabil", "depreciacao_acumulada"}]"""
+    totais = {}
+    if NUMPY_AVAILABLE and len(chaves):
+        codigos = {}
+        inverso = np.fromiter((codigos.setdefault(c, len(codigos)) for c in chaves), dtype=np.int64, count=len(chaves))
+        quantidades = np.bincount(inverso)
+        somas_custo = np.bincount(inverso, weights=custos)
+        somas_contabil = np.bincount(inverso, weights=contabeis)
+        for chave, i in codigos.items():
+            totais[chave] = [int(quantidades[i]), float(somas_custo[i]), float(somas_contabil[i])]
+    else:
+        for chave, custo, contabil in zip(chaves, custos, contabeis):
+            total = totais.setdefault(chave, [0, 0.0, 0.0])
+            total[0] += 1
+            total[1] += custo
+            total[2] += contabil
+
+    nomes = registros_referencia(tabela_nomes, totais) if tabela_nomes else {}
+    grupos = []
+    for chave, (quantidade, custo, contabil) in totais.items():
+        if tabela_nomes:
+            registro = nomes.get(chave)
+            nome = registro["nome"] if registro else ("Não informado" if chave is None else f"ID {chave}")
+        else:
+            nome = chave
+        grupos.append({
+            "chave": chave,
+            "nome": nome,
+            "quantidade": quantidade,
+            "valor_aquisicao": round(custo, 2),
+            "valor_contabil": round(contabil, 2),
+            "depreciacao_acumulada": round(custo - contabil, 2),
+        })
+    grupos.sort(key=lambda g: -g["valor_contabil"])
+    return grupos
+
+
+def _calcular(metodo, politica, referencia):
+    inicio = time.perf_counter()
+    ids, tipos, custos, meses, dias, unidades, setores = _carregar_carteira()
+    carregado = time.perf_counter()
+
+    vida_util = politica["vida_util"]
+    vidas = [vida_util.get(tipo, VIDA_UTIL_PADRAO_MESES) for tipo in tipos]
+    if NUMPY_AVAILABLE:
+        idades, contabeis = _calcular_numpy(custos, meses, dias, referencia, vidas, politica, metodo)
+        custos = np.asarray(custos, dtype=np.float64)
+        total_custo, total_contabil = float(custos.sum()), float(contabeis.sum())
+    else:
+        idades = _idades_python(meses, dias, referencia)
+        contabeis = _calcular_python(custos, idades, vidas, politica, metodo)
+        total_custo, total_contabil = float(sum(custos)), float(sum(contabeis))
+
+    resultado = {
+        "data_referencia": referencia.isoformat(),
+        "metodo": metodo,
+        "politica": {
+            "vida_util_meses": vida_util,
+            "valor_residual_pct": round(politica["residual"] * 100, 4),
+            "fator_saldo_decrescente": politica["fator"],
+        },
+        "total": {
+            "quantidade": len(ids),
+            "valor_aquisicao": round(total_custo, 2),
+            "valor_contabil": round(total_contabil, 2),
+            "depreciacao_acumulada": round(total_custo - total_contabil, 2),
+        },
+        "por_tipo": _grupos(tipos, custos, contabeis, AGRUPAMENTOS["tipo"]),
+        "por_unidade": _grupos(unidades, custos, contabeis, AGRUPAMENTOS["unidade"]),
+        "por_setor": _grupos(setores, custos, contabeis, AGRUPAMENTOS["setor"]),
+        "motor": "numpy" if NUMPY_AVAILABLE else "python",
+        "tempo_ms": {
+            "consulta": round((carregado - inicio) * 1000, 1),
+            "calculo": round((time.perf_counter() - carregado) * 1000, 1),
+        },
+    }
+    detalhes = (ids, tipos, custos, contabeis, idades, vidas)
+    return resultado, detalhes
+
+
+def _detalhar(detalhes):
+    ids, tipos, custos, contabeis, idades, vidas = detalhes
+    if NUMPY_AVAILABLE and len(ids):
+        custos = np.round(custos, 2).tolist()
+        contabeis = np.round(contabeis, 2).tolist()
+        idades = np.asarray(idades).tolist()
+    return [{
+        "ativo_id": ativo_id,
+        "tipo": tipo,
+        "valor_aquisicao": round(custo, 2),
+        "valor_contabil": round(contabil, 2),
+        "depreciacao_acumulada": round(custo - contabil, 2),
+        "idade_meses": idade,
+        "vida_util_meses": vida,
+    } for ativo_id, tipo, custo, contabil, idade, vida in zip(ids, tipos, custos, contabeis, idades, vidas)]
+
+
+def valor_contabil(metodo="linear", detalhar=False):
+    """
+    Relatório de valor contábil da carteira (totais e por tipo, unidade e
+    setor). Com detalhar=True inclui "ativos", uma linha por ativo.
+    """
+    if metodo not in METODOS:
+        raise ValueError(f"Método inválido: {metodo}")
+    politica = politica_depreciacao()
+    referencia = datetime.now(Config.TIMEZONE).date()
+    if versionamento_ativo():
+        validade = tuple(versao for versao, _ in obter_versoes(["ativos", "colaboradores"]).values())
+    else:
+        validade = int(time.time() // TTL_SEM_VERSIONAMENTO)
+    chave = (referencia, repr(sorted(politica["vida_util"].items())), politica["residual"], politica["fator"], validade)
+
+    with _lock:
+        em_cache = _cache.get(metodo)
+    if em_cache is None or em_cache[0] != chave:
+        resultado, detalhes = _calcular(metodo, politica, referencia)
+        em_cache = (chave, resultado, detalhes)
+        with _lock:
+            _cache[metodo] = em_cache
+        logger.info(
+            f"Depreciação ({metodo}) recalculada: {resultado['total']['quantidade']} ativos em "
+            f"{resultado['tempo_ms']['consulta'] + resultado['tempo_ms']['calculo']:.0f} ms ({resultado['motor']})"
+        )
+
+    _, resultado, detalhes = em_cache
+    if detalhar:
+        return {**resultado, "ativos": _detalhar(detalhes)}
+    return resultado
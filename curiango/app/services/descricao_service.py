@@ -0,0 +1,88 @@
+"""
+Descrições legíveis de ativos para auditoria, e-mails, termos e listagens.
+Todas partem da projeção de ativos; describe_many resolve um lote inteiro com
+uma consulta e reaproveita, dentro da requisição, ativos já descritos.
+"""
+import logging
+
+from .ativos_service import obter_projecoes
+
+logger = logging.getLogger("app")
+
+
+def _auditoria(p, ativo_id):
+    if not p:
+        return f"Ativo ID {ativo_id}"
+    if p.subtipo_id:
+        if p.tipo == "smartphone":
+            return f"Smartphone {p.marca_nome or 'Sem marca'} {p.modelo or 'Sem modelo'} (ID: {ativo_id})"
+        if p.tipo in ("notebook", "desktop"):
+            patrimonio = f" - Patrimônio: {p.patrimonio}" if p.patrimonio else ""
+            return f"{p.tipo.title()} {p.marca_nome or 'Sem marca'} {p.modelo or 'Sem modelo'}{patrimonio} (ID: {ativo_id})"
+        if p.tipo == "chip_sim":
+            return f"Chip SIM {p.operadora_nome or 'Sem operadora'} - {p.numero or 'Sem número'} (ID: {ativo_id})"
+    return f"Ativo {p.tipo} (ID: {ativo_id})"
+
+
+def _email(p, ativo_id):
+    if not p:
+        return f"Ativo ID {ativo_id}"
+    if p.tipo == "smartphone":
+        return p.modelo if p.subtipo_id and p.modelo else f"Smartphone ID {ativo_id}"
+    if p.tipo in ("notebook", "desktop"):
+        return p.modelo if p.subtipo_id and p.modelo else f"Computador ID {ativo_id}"
+    if p.tipo == "chip_sim":
+        return p.numero if p.subtipo_id and p.numero else f"Chip SIM ID {ativo_id}"
+    return f"Ativo ID {ativo_id}"
+
+
+def _termo(p, ativo_id):
+    if not p:
+        return "Ativo"
+    if p.tipo == "smartphone":
+        return f"Smartphone {p.marca_nome or '-'} {p.modelo or '-'} - IMEI {p.imei_slot or '-'}"
+    if p.tipo in ("notebook", "desktop"):
+        return f"{(p.tipo_computador or p.tipo).title()} {p.marca_nome or '-'} {p.modelo} - Patrimônio {p.patrimonio}"
+    if p.tipo == "chip_sim":
+        if not p.subtipo_id:
+            return "Chip SIM - dados não encontrados"
+        tipo_chip = "Dados" if p.tipo_chip == "dados" else "Voz/Dados"
+        return f"Chip {p.operadora_nome or '-'} - Número {p.numero} - Tipo: {tipo_chip}"
+    return "Ativo"
+
+
+def _curta(p, ativo_id):
+    """Usada na lista de ativos alocados ao colaborador"""
+    if not p or not p.subtipo_id:
+        return f"Ativo #{ativo_id}"
+    if p.tipo == "smartphone":
+        return f"Smartphone {p.marca_nome or ''} {p.modelo or ''}"
+    if p.tipo in ("notebook", "desktop"):
+        return f"{p.tipo.title()} {p.marca_nome or ''} {p.modelo or ''}"
+    if p.tipo == "chip_sim":
+        return f"Chip {p.operadora_nome or ''} - {p.numero or ''}"
+    return f"Ativo #{ativo_id}"
+
+
+FORMATOS = {
+    "auditoria": _auditoria,
+    "email": _email,
+    "termo": _termo,
+    "curta": _curta,
+}
+
+
+def formatar_descricao(projecao, ativo_id, formato="auditoria"):
+    """Formata uma linha da projeção já carregada (sem consulta)"""
+    return FORMATOS[formato](projecao, ativo_id)
+
+
+def describe_many(ativo_ids, formato="auditoria"):
+    """Retorna {ativo_id: descrição} com no máximo uma consulta por lote de ids ainda não vistos"""
+    formatador = FORMATOS[formato]
+    projecoes = obter_projecoes(ativo_ids)
+    return {ativo_id: formatador(p, ativo_id) for ativo_id, p in projecoes.items()}
+
+
+def describe(ativo_id, formato="auditoria"):
+    return describe_many([ativo_id], formato)[ativo_id]
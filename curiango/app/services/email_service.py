@@ -1,8 +1,10 @@
 from flask_mail import Message
 from ..core.mail import mail
 from ..core.db import db
-from ..models.dominio import Colaborador, Ativo, Smartphone, Computador, ChipSim, Setor
+from ..models.dominio import Colaborador
 from .parametros_service import obter_parametro
+from .descricao_service import describe
+from .referencias_service import registro_referencia
 from flask import current_app
 from datetime import date
 
@@ -15,22 +17,7 @@ def _obter_email_colaborador(colaborador_id: int) -> str:
 
 def _obter_descricao_ativo(ativo_id: int) -> str:
     """Busca a descrição/modelo do ativo"""
-    ativo = db.session.query(Ativo).filter_by(id=ativo_id).first()
-    if not ativo:
-        return f"Ativo ID {ativo_id}"
-    
-    # Buscar detalhes específicos do tipo
-    if ativo.tipo == "smartphone":
-        smartphone = db.session.query(Smartphone).filter_by(ativo_id=ativo.id).first()
-        return smartphone.modelo if smartphone and smartphone.modelo else f"Smartphone ID {ativo_id}"
-    elif ativo.tipo in ["notebook", "desktop"]:
-        computador = db.session.query(Computador).filter_by(ativo_id=ativo.id).first()
-        return computador.modelo if computador and computador.modelo else f"Computador ID {ativo_id}"
-    elif ativo.tipo == "chip_sim":
-        chip = db.session.query(ChipSim).filter_by(ativo_id=ativo.id).first()
-        return chip.numero if chip and chip.numero else f"Chip SIM ID {ativo_id}"
-    
-    return f"Ativo ID {ativo_id}"
+    return describe(ativo_id, "email")
 
 def _processar_template(template: str, variaveis: dict) -> str:
     """Processa um template substituindo as variáveis"""
@@ -83,9 +70,9 @@ Sistema de Controle de Ativos""")
         
         # Adicionar email do responsável do setor se existir
         if colaborador.setor_id:
-            setor = db.session.query(Setor).filter_by(id=colaborador.setor_id, ativo=True).first()
-            if setor and setor.email_responsavel and setor.email_responsavel not in recipients:
-                recipients.append(setor.email_responsavel)
+            setor = registro_referencia("setores", colaborador.setor_id)
+            if setor and setor["ativo"] and setor["email_responsavel"] and setor["email_responsavel"] not in recipients:
+                recipients.append(setor["email_responsavel"])
         
         msg = Message(
             subject=assunto,
@@ -145,9 +132,9 @@ Sistema de Controle de Ativos""")
         
         # Adicionar email do responsável do setor se existir
         if colaborador.setor_id:
-            setor = db.session.query(Setor).filter_by(id=colaborador.setor_id, ativo=True).first()
-            if setor and setor.email_responsavel and setor.email_responsavel not in recipients:
-                recipients.append(setor.email_responsavel)
+            setor = registro_referencia("setores", colaborador.setor_id)
+            if setor and setor["ativo"] and setor["email_responsavel"] and setor["email_responsavel"] not in recipients:
+                recipients.append(setor["email_responsavel"])
         
         msg = Message(
             subject=assunto,
@@ -0,0 +1,265 @@
+"""
+Exportação completa da auditoria em CSV ou NDJSON, opcionalmente com gzip.
+
+As linhas vêm de um cursor no servidor (stream_results + yield_per), então a
+memória não cresce com o intervalo. Exportações pequenas saem em streaming na
+própria resposta; as grandes viram um job em thread que grava o arquivo em
+AUDIT_EXPORT_DIR, com o estado (progresso) num JSON ao lado do arquivo,
+visível para todos os workers do host. Diretório e arquivos só são legíveis
+pelo usuário do serviço (0o700/0o600). Enquanto roda, o job regrava o estado
+a cada INTERVALO_PROGRESSO segundos (em thread própria, mesmo com o banco
+ainda sem devolver linhas); um job pendente/executando cujo estado não é
+gravado há JOB_PARADO_APOS segundos (worker reiniciado ou morto) é lido como
+"erro", para o cliente poder pedir de novo.
+"""
+import csv
+import io
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+import zlib
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import func, select
+
+from ..core.db import db
+from ..core.timezone_utils import to_local_isoformat
+from ..models.dominio import LogAuditoria
+from .auditoria_service import criterios_logs
+
+logger = logging.getLogger("app")
+
+COLUNAS = ("id", "created_at", "usuario", "nivel", "acao", "tabela", "registro_id",
+           "descricao", "dados_antigos", "dados_novos", "ip_address")
+FORMATOS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+TAMANHO_BLOCO = 64 * 1024
+INTERVALO_PROGRESSO = 1.0  # segundos entre gravações do estado do job
+JOB_PARADO_APOS = 30 * INTERVALO_PROGRESSO  # sem gravar o estado por este tempo: o worker morreu
+STATUS_EM_ANDAMENTO = ("pendente", "executando")
+_JOB_ID = re.compile(r"^[0-9a-f]{32}$")
+
+
+def nome_arquivo(formato, compactar):
+    return f"auditoria_{datetime.now():%Y%m%d_%H%M%S}.{formato}" + (".gz" if compactar else "")
+
+
+def mimetype(formato, compactar):
+    return "application/gzip" if compactar else FORMATOS[formato]
+
+
+def iterar_logs(filtros, lote=None):
+    """Linhas de log_auditoria em ordem cronológica, lidas por cursor no servidor"""
+    tabela = LogAuditoria.__table__
+    consulta = (
+        select(*(tabela.c[coluna] for coluna in COLUNAS))
+        .where(*criterios_logs(filtros))
+        .order_by(tabela.c.created_at, tabela.c.id)
+        .execution_options(stream_results=True, yield_per=lote or current_app.config.get("AUDIT_EXPORT_BATCH", 2000))
+    )
+    return db.session.execute(consulta)
+
+
+def contar_exportacao(filtros):
+    return db.session.execute(select(func.count()).select_from(LogAuditoria).where(*criterios_logs(filtros))).scalar()
+
+
+def _json(valor):
+    return json.dumps(valor, ensure_ascii=False, default=str) if valor is not None else ""
+
+
+def _texto_csv(linhas):
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(COLUNAS)
+    for linha in linhas:
+        escritor.writerow((
+            linha.id, to_local_isoformat(linha.created_at), linha.usuario, linha.nivel, linha.acao,
+            linha.tabela or "", linha.registro_id or "", linha.descricao,
+            _json(linha.dados_antigos), _json(linha.dados_novos), linha.ip_address or "",
+        ))
+        yield buffer
+
+
+def _texto_ndjson(linhas):
+    buffer = io.StringIO()
+    for linha in linhas:
+        registro = dict(linha._mapping)
+        registro["created_at"] = to_local_isoformat(linha.created_at)
+        buffer.write(json.dumps(registro, ensure_ascii=False, default=str))
+        buffer.write("\n")
+        yield buffer
+
+
+def gerar_exportacao(linhas, formato, compactar=False, ao_avancar=None):
+    """
+    Gera a exportação em blocos de bytes (~64 KB). ao_avancar(processados) é
+    chamado a cada bloco emitido.
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compactar else None
+    gerador = _texto_csv(linhas) if formato == "csv" else _texto_ndjson(linhas)
+    processados = 0
+    buffer = None
+
+    def bloco(texto):
+        dados = texto.encode("utf-8")
+        return compressor.compress(dados) if compressor else dados
+
+    for buffer in gerador:
+        processados += 1
+        if buffer.tell() >= TAMANHO_BLOCO:
+            dados = bloco(buffer.getvalue())
+            buffer.seek(0)
+            buffer.truncate()
+            if ao_avancar:
+                ao_avancar(processados)
+            if dados:
+                yield dados
+
+    # Restante do buffer (ou só o cabeçalho do CSV, quando não há linhas)
+    restante = buffer.getvalue() if buffer is not None else (",".join(COLUNAS) + "\r\n" if formato == "csv" else "")
+    dados = bloco(restante)
+    if compressor:
+        dados += compressor.flush()
+    if ao_avancar:
+        ao_avancar(processados)
+    if dados:
+        yield dados
+
+
+# --- Jobs assíncronos ---
+
+def _diretorio():
+    diretorio = current_app.config.get("AUDIT_EXPORT_DIR", "/tmp/curiango_exports")
+    os.makedirs(diretorio, mode=0o700, exist_ok=True)
+    os.chmod(diretorio, 0o700)
+    return diretorio
+
+
+def _caminho_estado(job_id):
+    return os.path.join(_diretorio(), f"{job_id}.json")
+
+
+def _salvar_estado(estado):
+    # mkstemp cria o arquivo com 0o600
+    fd, tmp = tempfile.mkstemp(dir=_diretorio(), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(estado, f, ensure_ascii=False)
+        os.replace(tmp, _caminho_estado(estado["id"]))
+    except OSError:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def obter_job(job_id):
+    """Estado do job, só leitura: sem sinal de vida há JOB_PARADO_APOS segundos, vem como erro"""
+    if not _JOB_ID.match(job_id or ""):
+        return None
+    try:
+        with open(_caminho_estado(job_id), "r", encoding="utf-8") as f:
+            estado = json.load(f)
+            salvo_em = os.fstat(f.fileno()).st_mtime
+    except (FileNotFoundError, ValueError):
+        return None
+    if estado["status"] in STATUS_EM_ANDAMENTO and time.time() - salvo_em > JOB_PARADO_APOS:
+        estado["status"] = "erro"
+        estado["erro"] = "Exportação interrompida (worker encerrado); inicie uma nova"
+    return estado
+
+
+def caminho_arquivo(estado):
+    return os.path.join(_diretorio(), estado["arquivo"])
+
+
+def _limpar_expirados():
+    """Remove jobs (estado + arquivo) mais antigos que AUDIT_EXPORT_TTL_HOURS"""
+    limite = time.time() - current_app.config.get("AUDIT_EXPORT_TTL_HOURS", 24) * 3600
+    with os.scandir(_diretorio()) as entradas:
+        for entrada in entradas:
+            try:
+                if entrada.is_file() and entrada.stat().st_mtime < limite:
+                    os.remove(entrada.path)
+            except FileNotFoundError:
+                continue
+
+
+def iniciar_job(filtros, formato, compactar, usuario):
+    """Registra o job e inicia a thread de geração; retorna o estado inicial"""
+    _limpar_expirados()
+    job_id = uuid.uuid4().hex
+    estado = {
+        "id": job_id,
+        "status": "pendente",
+        "formato": formato,
+        "gzip": compactar,
+        "filtros": filtros,
+        "usuario": usuario,
+        "total": None,
+        "processados": 0,
+        "arquivo": f"{job_id}.{formato}" + (".gz" if compactar else ""),
+        "nome_download": nome_arquivo(formato, compactar),
+        "erro": None,
+        "criado_em": datetime.utcnow().isoformat(),
+        "concluido_em": None,
+    }
+    _salvar_estado(estado)
+    app = current_app._get_current_object()
+    threading.Thread(target=_executar_job, args=(app, estado), name=f"export-auditoria-{job_id[:8]}", daemon=True).start()
+    logger.info(f"Exportação de auditoria {job_id} iniciada por {usuario} ({formato}, filtros: {filtros})")
+    return estado
+
+
+def _executar_job(app, estado):
+    with app.app_context():
+        destino = caminho_arquivo(estado)
+        temporario = destino + ".tmp"
+        trava = threading.Lock()
+        parar = threading.Event()
+
+        def ao_avancar(processados):
+            estado["processados"] = processados
+
+        def sinal_de_vida():
+            with app.app_context():
+                while not parar.wait(INTERVALO_PROGRESSO):
+                    with trava:
+                        if parar.is_set():
+                            return
+                        try:
+                            _salvar_estado(estado)
+                        except OSError:
+                            logger.warning(f"Não foi possível gravar o progresso da exportação {estado['id']}", exc_info=True)
+
+        estado["status"] = "executando"
+        _salvar_estado(estado)
+        batimento = threading.Thread(target=sinal_de_vida, name=f"{threading.current_thread().name}-progresso", daemon=True)
+        batimento.start()
+        try:
+            estado["total"] = contar_exportacao(estado["filtros"])
+            with os.fdopen(os.open(temporario, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "wb") as arquivo:
+                for dados in gerar_exportacao(iterar_logs(estado["filtros"]), estado["formato"], estado["gzip"], ao_avancar):
+                    arquivo.write(dados)
+            os.replace(temporario, destino)
+            estado["status"] = "concluido"
+            logger.info(f"Exportação de auditoria {estado['id']} concluída: {estado['processados']} logs")
+        except Exception as e:
+            logger.exception(f"Erro na exportação de auditoria {estado['id']}")
+            estado["status"] = "erro"
+            estado["erro"] = str(e)
+            if os.path.exists(temporario):
+                os.remove(temporario)
+        finally:
+            # O estado final é a última gravação: o sinal de vida para antes
+            with trava:
+                parar.set()
+            batimento.join()
+            estado["concluido_em"] = datetime.utcnow().isoformat()
+            _salvar_estado(estado)
+            db.session.remove()
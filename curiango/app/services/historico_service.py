@@ -0,0 +1,159 @@
+"""
+Histórico de um ativo: alocações, devoluções e manutenções numa única linha do tempo.
+
+Colaboradores e registros de auditoria são carregados em lote (uma consulta IN
+cada); os três fluxos de eventos, cada um já ordenado, são combinados com um
+merge k-way sobre (datetime, tipo, id) (mais recente primeiro). O tipo e o
+id do registro desempatam eventos no mesmo instante, e cada evento traz um
+"cursor" com os três para paginar sem perder nem repetir empates.
+"""
+import heapq
+import logging
+from datetime import datetime, timezone
+
+from ..core.db import db
+from ..core.timezone_utils import to_local_isoformat
+from ..models.dominio import Colaborador, HistoricoAlocacao, LogAuditoria, Manutencao
+
+logger = logging.getLogger("app")
+
+
+def _primeiro_log_com(logs, trecho):
+    """Log mais recente cuja descrição contém o trecho (logs em ordem decrescente)"""
+    return next((log for log in logs if trecho in log.descricao), None)
+
+
+def _eventos_alocacao(ativo_id):
+    """Retorna (alocações, devoluções): listas de (datetime, id, evento) em ordem decrescente"""
+    historicos = db.session.query(HistoricoAlocacao).filter_by(ativo_id=ativo_id).all()
+    if not historicos:
+        return [], []
+
+    ids = {hist.colaborador_id for hist in historicos}
+    nomes = dict(db.session.query(Colaborador.id, Colaborador.nome).filter(Colaborador.id.in_(ids)).all())
+
+    # Todas as transferências/devoluções do ativo de uma vez; o horário real vem da auditoria
+    logs = db.session.query(LogAuditoria.acao, LogAuditoria.descricao, LogAuditoria.created_at).filter(
+        LogAuditoria.tabela == "ativos",
+        LogAuditoria.registro_id == ativo_id,
+        LogAuditoria.acao.in_(("TRANSFER", "REMOVE_ALLOCATION")),
+    ).order_by(LogAuditoria.created_at.desc()).all()
+    transferencias = [log for log in logs if log.acao == "TRANSFER"]
+    devolucoes_log = [log for log in logs if log.acao == "REMOVE_ALLOCATION"]
+
+    alocacoes, devolucoes = [], []
+    for hist in historicos:
+        colaborador_nome = nomes.get(hist.colaborador_id, "Usuário não encontrado")
+        if hist.data_inicio:
+            log = _primeiro_log_com(transferencias, f"alocado para {colaborador_nome}")
+            alocacoes.append((log.created_at if log else hist.created_at, hist.id, {
+                "tipo": "alocacao",
+                "descricao": f"Ativo alocado para {colaborador_nome}",
+                "usuario_nome": colaborador_nome,
+                "observacao": hist.motivo_transferencia or ""
+            }))
+        if hist.data_fim:
+            log = _primeiro_log_com(devolucoes_log, f"devolvido por {colaborador_nome}")
+            devolucoes.append((log.created_at if log else hist.created_at, hist.id, {
+                "tipo": "devolucao",
+                "descricao": f"Ativo devolvido por {colaborador_nome}",
+                "usuario_nome": colaborador_nome,
+                "observacao": hist.motivo_transferencia or ""
+            }))
+
+    alocacoes.sort(key=_data_evento, reverse=True)
+    devolucoes.sort(key=_data_evento, reverse=True)
+    return alocacoes, devolucoes
+
+
+def _eventos_manutencao(ativo_id, antes=None, limite=None):
+    """Manutenções como (datetime, id, evento) em ordem decrescente, já filtradas/limitadas no banco"""
+    consulta = db.session.query(Manutencao).filter(Manutencao.ativo_id == ativo_id)
+    if antes is not None:
+        data, tipo, registro_id = antes
+        if tipo is None or tipo < "manutencao":
+            consulta = consulta.filter(Manutencao.created_at < data)
+        elif tipo > "manutencao":
+            consulta = consulta.filter(Manutencao.created_at <= data)
+        else:
+            consulta = consulta.filter(db.or_(
+                Manutencao.created_at < data,
+                db.and_(Manutencao.created_at == data, Manutencao.id < registro_id),
+            ))
+    consulta = consulta.order_by(Manutencao.created_at.desc(), Manutencao.id.desc())
+    if limite:
+        consulta = consulta.limit(limite)
+    manutencoes = consulta.all()
+    if not manutencoes:
+        return []
+
+    # Quem criou cada manutenção: uma consulta para todas
+    criadores = {}
+    for registro_id, usuario in db.session.query(LogAuditoria.registro_id, LogAuditoria.usuario).filter(
+        LogAuditoria.tabela == "manutencoes",
+        LogAuditoria.registro_id.in_([m.id for m in manutencoes]),
+        LogAuditoria.acao == "CREATE",
+    ).order_by(LogAuditoria.id):
+        criadores.setdefault(registro_id, usuario)
+
+    return [(manut.created_at, manut.id, {
+        "tipo": "manutencao",
+        "descricao": f"Manutenção {manut.tipo}: {manut.descricao}",
+        "usuario_nome": criadores.get(manut.id, "Sistema"),
+        "observacao": manut.observacoes
+    }) for manut in manutencoes]
+
+
+def _data_evento(item):
+    # Eventos sem data vão para o fim da linha do tempo; no mesmo instante, desempata por tipo e id
+    return item[0] is not None, item[0] or 0, item[2]["tipo"], item[1]
+
+
+def para_utc_naive(dt):
+    """Datetimes com fuso (ex.: 'data' de um evento) viram UTC naive, como no banco"""
+    if dt is not None and dt.tzinfo is not None:
+        return dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+
+def ler_cursor(texto):
+    """
+    "data|tipo|id" (o "cursor" de um evento) -> (datetime UTC naive, tipo, id).
+    Só a data ISO também é aceita: eventos estritamente anteriores a ela.
+    ValueError se inválido.
+    """
+    data, separador, resto = texto.partition("|")
+    tipo, registro_id = None, None
+    if separador:
+        tipo, _, registro_id = resto.partition("|")
+        registro_id = int(registro_id)
+    return para_utc_naive(datetime.fromisoformat(data)), tipo, registro_id
+
+
+def _cursor(data, registro_id, evento):
+    return f"{to_local_isoformat(data)}|{evento['tipo']}|{registro_id}" if data is not None else None
+
+
+def historico_ativo(ativo_id, limite=None, antes=None):
+    """
+    Eventos do ativo, do mais recente para o mais antigo. antes (ler_cursor)
+    retorna só eventos posteriores a ele na linha do tempo; para paginar,
+    passe o "cursor" do último evento da página anterior.
+    """
+    if isinstance(antes, datetime):
+        antes = (para_utc_naive(antes), None, None)
+    alocacoes, devolucoes = _eventos_alocacao(ativo_id)
+    fluxos = [alocacoes, devolucoes, _eventos_manutencao(ativo_id, antes, limite)]
+
+    historico = []
+    for item in heapq.merge(*fluxos, key=_data_evento, reverse=True):
+        data, registro_id, evento = item
+        if antes is not None:
+            if data is None:
+                break
+            if data > antes[0] or (data == antes[0] and (antes[1] is None or _data_evento(item)[2:] >= antes[1:])):
+                continue
+        historico.append({"data": to_local_isoformat(data), **evento, "cursor": _cursor(data, registro_id, evento)})
+        if limite and len(historico) >= limite:
+            break
+    return historico
@@ -0,0 +1,245 @@
+"""
+Importação em massa de colaboradores a partir de CSV.
+
+Todas as linhas são normalizadas e validadas antes de qualquer escrita. Os
+colaboradores já existentes são resolvidos por matrícula, CPF e email em
+poucas consultas IN (em lotes) e os setores numa única busca no cache de
+referências. As gravações saem em INSERT multi-linha com ON DUPLICATE KEY
+UPDATE (ON CONFLICT no SQLite): linhas novas vão com id NULL, linhas que
+atualizam um colaborador levam o id dele e caem no UPDATE.
+"""
+import csv
+import io
+import logging
+import time
+from datetime import datetime
+
+from sqlalchemy import insert, select, update
+
+from ..core.db import db, instrucao_upsert
+from ..models.dominio import Colaborador
+from .ativos_service import atualizar_projecao_referencias
+from .referencias_service import registros_referencia
+
+logger = logging.getLogger("app")
+
+TAMANHO_LOTE = 1000
+MODOS = ("atualizar", "inserir")
+CAMPOS = ("nome", "matricula", "cpf", "email", "cargo", "setor_id", "status")
+# Chaves naturais na ordem de prioridade para localizar um colaborador existente
+CHAVES = ("matricula", "cpf", "email")
+ROTULOS = {"matricula": "Matrícula", "cpf": "CPF", "email": "Email"}
+
+# Valores tratados como "não informado" (viram NULL e não contam como duplicados)
+CPF_NAO_INFORMADO = "000.000.000.00"
+MATRICULAS_GENERICAS = ("0", "1")
+
+# Zero width space/joiner, word joiner e BOM somem; espaços não separáveis viram espaço
+_INVISIVEIS = str.maketrans({
+    "\u200b": None, "\u200c": None, "\u200d": None, "\u2060": None, "\ufeff": None,
+    "\u00a0": " ", "\u202f": " ",
+})
+
+
+class ErroLinha(ValueError):
+    pass
+
+
+def _limpar(valor):
+    return (valor or "").translate(_INVISIVEIS).strip()
+
+
+def _texto(linha, campo, limite, rotulo, obrigatorio=False):
+    valor = _limpar(linha.get(campo))
+    if len(valor) > limite:
+        raise ErroLinha(f"{rotulo} muito longo (máximo {limite} caracteres)")
+    if obrigatorio and not valor:
+        raise ErroLinha(f"{rotulo} é obrigatório")
+    return valor or None
+
+
+def normalizar_linha(linha):
+    """
+    Valida uma linha do CSV e devolve o dict de campos. Campos opcionais em
+    branco ficam None (na atualização, mantêm o valor atual). setor_id sai
+    como int, ainda sem checar se o setor existe.
+    """
+    registro = {
+        "nome": _texto(linha, "nome", 150, "Nome", obrigatorio=True),
+        "email": _texto(linha, "email", 150, "Email", obrigatorio=True),
+        "cpf": _texto(linha, "cpf", 14, "CPF"),
+        "matricula": _texto(linha, "matricula", 50, "Matrícula"),
+        "cargo": _texto(linha, "cargo", 100, "Cargo"),
+    }
+    if registro["cpf"] == CPF_NAO_INFORMADO:
+        registro["cpf"] = None
+    if registro["matricula"] in MATRICULAS_GENERICAS:
+        registro["matricula"] = None
+
+    setor_id = _limpar(linha.get("setor_id"))
+    try:
+        registro["setor_id"] = int(setor_id) if setor_id else None
+    except ValueError:
+        raise ErroLinha("Setor ID deve ser numérico")
+
+    status = _limpar(linha.get("status")).lower()
+    registro["status"] = status if status in ("ativo", "desligado") else None
+    return registro
+
+
+def _buscar_existentes(registros):
+    """{chave: {valor: [linhas de colaboradores]}} para as chaves naturais presentes no arquivo"""
+    tabela = Colaborador.__table__
+    existentes = {chave: {} for chave in CHAVES}
+    for chave in CHAVES:
+        valores = sorted({r[chave] for r in registros if r[chave]})
+        for inicio in range(0, len(valores), TAMANHO_LOTE):
+            lote = valores[inicio:inicio + TAMANHO_LOTE]
+            for linha in db.session.execute(
+                select(tabela.c.id, *(tabela.c[c] for c in CAMPOS)).where(tabela.c[chave].in_(lote))
+            ):
+                existentes[chave].setdefault(linha._mapping[chave], []).append(linha)
+    return existentes
+
+
+def _localizar(registro, existentes):
+    """Colaborador existente correspondente à linha (ou None); ErroLinha se as chaves apontam para pessoas diferentes"""
+    encontrados = {}
+    for chave in CHAVES:
+        valor = registro[chave]
+        linhas = existentes[chave].get(valor, []) if valor else []
+        if len(linhas) > 1:
+            raise ErroLinha(f"{ROTULOS[chave]} {valor} pertence a mais de um colaborador")
+        if linhas:
+            encontrados[chave] = linhas[0]
+    ids = {linha.id for linha in encontrados.values()}
+    if len(ids) > 1:
+        descricao = ", ".join(f"{ROTULOS[c]} {registro[c]} (ID {linha.id})" for c, linha in encontrados.items())
+        raise ErroLinha(f"Dados pertencem a colaboradores diferentes: {descricao}")
+    return next(iter(encontrados.values()), None)
+
+
+def _gravar(linhas):
+    """Grava as linhas (com id None para novas) em lotes; retorna o número de instruções executadas"""
+    # Atualiza quando o id (ou matrícula/CPF) já existe
+    instrucao = instrucao_upsert(Colaborador.__table__, "id", CAMPOS + ("updated_at",))
+    instrucoes = 0
+    for inicio in range(0, len(linhas), TAMANHO_LOTE):
+        lote = linhas[inicio:inicio + TAMANHO_LOTE]
+        if instrucao is not None:
+            db.session.execute(instrucao.values(lote))
+            instrucoes += 1
+            continue
+        novas = [linha for linha in lote if linha["id"] is None]
+        alteradas = [linha for linha in lote if linha["id"] is not None]
+        if novas:
+            db.session.execute(insert(Colaborador.__table__).values([{k: v for k, v in n.items() if k != "id"} for n in novas]))
+            instrucoes += 1
+        if alteradas:
+            # created_at só vale para as linhas novas
+            db.session.execute(update(Colaborador), [{k: v for k, v in a.items() if k != "created_at"} for a in alteradas])
+            instrucoes += 1
+    return instrucoes
+
+
+def importar_colaboradores_csv(conteudo, modo="atualizar"):
+    """
+    Importa o CSV (texto) e faz o commit. Em modo "atualizar" linhas de
+    colaboradores já cadastrados (mesma matrícula, CPF ou email) os atualizam;
+    em modo "inserir" são rejeitadas. Retorna o relatório por linha e as
+    estatísticas de vazão.
+    """
+    inicio = time.perf_counter()
+    relatorio = []
+    validos = []  # (item do relatório, registro)
+    for numero, linha in enumerate(csv.DictReader(io.StringIO(conteudo)), start=2):  # linha 1 é o cabeçalho
+        item = {"linha": numero, "status": "erro", "mensagem": None}
+        relatorio.append(item)
+        try:
+            validos.append((item, normalizar_linha(linha)))
+        except ErroLinha as e:
+            item["mensagem"] = str(e)
+        except Exception as e:
+            item["mensagem"] = f"Erro ao processar - {e}"
+
+    setores = registros_referencia("setores", {r["setor_id"] for _, r in validos})
+    existentes = _buscar_existentes([r for _, r in validos])
+    vistos = {chave: {} for chave in CHAVES}
+    vistos_ids = {}  # colaborador existente -> linha que já o atualiza
+    agora = datetime.utcnow()
+    gravar = []
+    atualizados = []
+
+    for item, registro in validos:
+        try:
+            setor = setores.get(registro["setor_id"]) if registro["setor_id"] is not None else None
+            if registro["setor_id"] is not None and (not setor or not setor["ativo"]):
+                raise ErroLinha(f"Setor ID {registro['setor_id']} inválido ou inativo")
+
+            for chave in CHAVES:
+                anterior = vistos[chave].get(registro[chave]) if registro[chave] else None
+                if anterior:
+                    raise ErroLinha(f"{ROTULOS[chave]} {registro[chave]} repetido no arquivo (linha {anterior})")
+
+            existente = _localizar(registro, existentes)
+            if existente and existente.id in vistos_ids:
+                raise ErroLinha(f"Colaborador ID {existente.id} já consta no arquivo (linha {vistos_ids[existente.id]})")
+            if existente and modo == "inserir":
+                chave = next(c for c in CHAVES if registro[c] and registro[c] == existente._mapping[c])
+                raise ErroLinha(f"{ROTULOS[chave]} {registro[chave]} já existe")
+        except ErroLinha as e:
+            item["mensagem"] = str(e)
+            continue
+
+        for chave in CHAVES:
+            if registro[chave]:
+                vistos[chave][registro[chave]] = item["linha"]
+        if existente:
+            vistos_ids[existente.id] = item["linha"]
+
+        if existente is None:
+            item["status"] = "criado"
+            gravar.append({"id": None, **registro, "status": registro["status"] or "ativo",
+                           "created_at": agora, "updated_at": agora})
+            continue
+
+        atual = {campo: existente._mapping[campo] for campo in CAMPOS}
+        novo = {campo: atual[campo] if registro[campo] is None else registro[campo] for campo in CAMPOS}
+        item["id"] = existente.id
+        if novo == atual:
+            item["status"] = "inalterado"
+            continue
+        item["status"] = "atualizado"
+        item["campos"] = sorted(c for c in CAMPOS if novo[c] != atual[c])
+        gravar.append({"id": existente.id, **novo, "created_at": agora, "updated_at": agora})
+        atualizados.append(existente.id)
+
+    instrucoes = 0
+    if gravar:
+        try:
+            instrucoes = _gravar(gravar)
+            if atualizados:
+                atualizar_projecao_referencias("usuario_atual_id", atualizados)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+    segundos = time.perf_counter() - inicio
+    contagem = {status: 0 for status in ("criado", "atualizado", "inalterado", "erro")}
+    for item in relatorio:
+        contagem[item["status"]] += 1
+    logger.info(
+        f"Importação de colaboradores: {len(relatorio)} linhas em {segundos:.2f}s - {contagem['criado']} criados, "
+        f"{contagem['atualizado']} atualizados, {contagem['inalterado']} inalterados, {contagem['erro']} erros"
+    )
+    return {
+        "linhas": relatorio,
+        "contagem": contagem,
+        "estatisticas": {
+            "total_linhas": len(relatorio),
+            "segundos": round(segundos, 3),
+            "linhas_por_segundo": round(len(relatorio) / segundos) if segundos > 0 else None,
+            "instrucoes_gravacao": instrucoes,
+        },
+    }
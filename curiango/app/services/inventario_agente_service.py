@@ -0,0 +1,272 @@
+"""
+Ingestão dos relatórios de hardware dos agentes de inventário.
+
+Cada worker guarda em memória (LRU) a impressão do último relatório aplicado
+por máquina: check-ins sem mudança são respondidos sem tocar no banco. Os
+demais entram numa fila (o relatório mais recente de cada máquina vence),
+gravada em lote por uma thread a cada AGENT_BATCH_INTERVAL segundos ou ao
+atingir AGENT_BATCH_SIZE. No lote, máquinas, impressões guardadas e valores
+atuais são lidos com consultas IN; só os campos alterados de computadores
+são gravados e cada máquina alterada gera um único log de auditoria.
+"""
+import atexit
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import inspect, select, update
+
+from ..core.db import db, instrucao_upsert
+from ..models.dominio import Computador, InventarioAgente
+from .ativos_service import TAMANHO_LOTE, atualizar_projecao_ativos
+from .auditoria_service import adicionar_logs
+
+logger = logging.getLogger("app")
+
+# Fatos que o agente mantém em computadores
+CAMPOS = ("so_versao", "processador", "memoria", "hd")
+TAMANHOS = {"patrimonio": 50, "serie": 100, "hostname": 100, "so_versao": 100, "processador": 150, "memoria": 50, "hd": 100}
+USUARIO_AUDITORIA = "Agente de inventário"
+TTL_DESCONHECIDO = 600  # segundos até tentar de novo uma máquina não cadastrada
+
+
+class ErroRelatorio(ValueError):
+    pass
+
+
+def normalizar_relatorio(dados, ip_address=None):
+    """Valida o JSON do agente; retorna o relatório com chave de identificação e impressão"""
+    if not isinstance(dados, dict):
+        raise ErroRelatorio("relatório deve ser um objeto")
+    relatorio = {}
+    for campo, limite in TAMANHOS.items():
+        valor = dados.get(campo)
+        valor = str(valor).strip() if valor is not None else ""
+        if len(valor) > limite:
+            raise ErroRelatorio(f"{campo} muito longo (máximo {limite} caracteres)")
+        relatorio[campo] = valor or None
+    if relatorio["patrimonio"]:
+        relatorio["chave"] = ("patrimonio", relatorio["patrimonio"])
+    elif relatorio["serie"]:
+        relatorio["chave"] = ("serie", relatorio["serie"])
+    else:
+        raise ErroRelatorio("patrimonio ou serie é obrigatório")
+    relatorio["impressao"] = impressao(relatorio)
+    relatorio["ip_address"] = ip_address
+    return relatorio
+
+
+def impressao(relatorio):
+    fatos = "\x1f".join(relatorio[campo] or "" for campo in ("hostname",) + CAMPOS)
+    return hashlib.blake2b(fatos.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _maquinas(chaves):
+    """{chave: linha de computadores}; números de série repetidos em mais de uma máquina ficam de fora"""
+    c = Computador.__table__.c
+    encontradas = {}
+    for coluna in ("patrimonio", "serie"):
+        valores = sorted({valor for tipo, valor in chaves if tipo == coluna})
+        for inicio in range(0, len(valores), TAMANHO_LOTE):
+            linhas = db.session.execute(
+                select(c.id, c.ativo_id, c.patrimonio, c.serie, *(c[campo] for campo in CAMPOS))
+                .where(c[coluna].in_(valores[inicio:inicio + TAMANHO_LOTE]))
+            ).all()
+            for linha in linhas:
+                chave = (coluna, linha._mapping[coluna])
+                encontradas[chave] = None if chave in encontradas else linha
+    return {chave: linha for chave, linha in encontradas.items() if linha is not None}
+
+
+def _impressoes(ativo_ids):
+    tabela = InventarioAgente.__table__
+    ids = sorted(ativo_ids)
+    impressoes = {}
+    for inicio in range(0, len(ids), TAMANHO_LOTE):
+        impressoes.update(db.session.execute(
+            select(tabela.c.ativo_id, tabela.c.impressao).where(tabela.c.ativo_id.in_(ids[inicio:inicio + TAMANHO_LOTE]))
+        ).all())
+    return impressoes
+
+
+def _evento_auditoria(linha, relatorio, mudancas):
+    identificacao = linha.patrimonio or relatorio["hostname"] or linha.serie
+    resumo = "; ".join(f"{campo}: {linha._mapping[campo] or '-'} → {valor}" for campo, valor in mudancas.items())
+    return {
+        "usuario": USUARIO_AUDITORIA,
+        "nivel": "INFO",
+        "acao": "UPDATE",
+        "tabela": "ativos",
+        "registro_id": linha.ativo_id,
+        "descricao": f"Hardware atualizado pelo agente ({identificacao}): {resumo}",
+        "dados_antigos": {campo: linha._mapping[campo] for campo in mudancas},
+        "dados_novos": mudancas,
+        "ip_address": relatorio["ip_address"],
+    }
+
+
+def processar_lote(relatorios):
+    """
+    Aplica um lote de relatórios e faz o commit. Retorna {chave: ativo_id ou
+    None (máquina não cadastrada)} e o resumo do lote.
+    """
+    maquinas = _maquinas({r["chave"] for r in relatorios})
+    por_ativo = {}
+    for relatorio in relatorios:
+        linha = maquinas.get(relatorio["chave"])
+        if linha is not None:
+            por_ativo[linha.ativo_id] = (linha, relatorio)  # o mais recente da máquina vence
+    guardadas = _impressoes(por_ativo)
+
+    agora = datetime.utcnow()
+    estados, atualizacoes, eventos = [], [], []
+    for ativo_id, (linha, relatorio) in por_ativo.items():
+        if guardadas.get(ativo_id) == relatorio["impressao"]:
+            continue
+        estados.append({
+            "ativo_id": ativo_id,
+            "impressao": relatorio["impressao"],
+            "hostname": relatorio["hostname"],
+            "dados": {campo: relatorio[campo] for campo in ("hostname", "serie") + CAMPOS},
+            "recebido_em": agora,
+        })
+        # Campo não reportado (None) não apaga o valor cadastrado
+        mudancas = {campo: relatorio[campo] for campo in CAMPOS
+                    if relatorio[campo] is not None and relatorio[campo] != linha._mapping[campo]}
+        if mudancas:
+            atualizacoes.append({"id": linha.id, **mudancas})
+            eventos.append(_evento_auditoria(linha, relatorio, mudancas))
+
+    if estados:
+        try:
+            tabela = InventarioAgente.__table__
+            instrucao = instrucao_upsert(tabela, "ativo_id", ("impressao", "hostname", "dados", "recebido_em"))
+            for inicio in range(0, len(estados), TAMANHO_LOTE):
+                lote = estados[inicio:inicio + TAMANHO_LOTE]
+                if instrucao is not None:
+                    db.session.execute(instrucao.values(lote))
+                else:
+                    db.session.execute(tabela.delete().where(tabela.c.ativo_id.in_([e["ativo_id"] for e in lote])))
+                    db.session.execute(tabela.insert().values(lote))
+            for inicio in range(0, len(atualizacoes), TAMANHO_LOTE):
+                db.session.execute(update(Computador), atualizacoes[inicio:inicio + TAMANHO_LOTE])
+            if eventos:
+                adicionar_logs(eventos)
+                atualizar_projecao_ativos([e["registro_id"] for e in eventos])
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+    resolvidos = {r["chave"]: (maquinas[r["chave"]].ativo_id if r["chave"] in maquinas else None) for r in relatorios}
+    resumo = {"relatorios": len(relatorios), "maquinas": len(por_ativo), "gravados": len(estados), "alterados": len(eventos)}
+    return resolvidos, resumo
+
+
+class IngestaoAgentes:
+    """Fila de relatórios e cache de impressões deste worker"""
+
+    def __init__(self, app, intervalo=5, tamanho_lote=500, max_itens=50000):
+        self._app = app
+        self._intervalo = intervalo
+        self._tamanho_lote = tamanho_lote
+        self._max_itens = max_itens
+        self._lock = threading.Lock()
+        self._pendentes = {}  # chave -> relatório
+        self._conhecidas = OrderedDict()  # chave -> (impressão, expira_em ou None)
+        self._acordar = threading.Event()
+        self._thread = None
+        self.estatisticas = {"recebidos": 0, "inalterados": 0, "lotes": 0, "gravados": 0, "alterados": 0, "falhas": 0}
+
+    def receber(self, relatorio):
+        """Retorna "inalterado" (nada a gravar) ou "pendente" (entrou na fila)"""
+        chave = relatorio["chave"]
+        with self._lock:
+            self.estatisticas["recebidos"] += 1
+            conhecida = self._conhecidas.get(chave)
+            if conhecida and conhecida[0] == relatorio["impressao"] and (conhecida[1] is None or conhecida[1] > time.time()):
+                self._conhecidas.move_to_end(chave)
+                self.estatisticas["inalterados"] += 1
+                return "inalterado"
+            self._pendentes[chave] = relatorio
+            cheia = len(self._pendentes) >= self._tamanho_lote
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._executar, name="ingestao-agentes", daemon=True)
+                self._thread.start()
+        if cheia:
+            self._acordar.set()
+        return "pendente"
+
+    def _executar(self):
+        while True:
+            self._acordar.wait(self._intervalo)
+            self._acordar.clear()
+            self.descarregar()
+
+    def descarregar(self):
+        """Grava os relatórios pendentes (chamado pela thread; também usado ao encerrar o processo)"""
+        with self._lock:
+            lote, self._pendentes = self._pendentes, {}
+        if not lote:
+            return None
+        with self._app.app_context():
+            try:
+                resolvidos, resumo = processar_lote(list(lote.values()))
+            except Exception:
+                # Os relatórios se perdem; o agente reenvia no próximo check-in
+                logger.exception(f"Erro ao gravar lote de {len(lote)} relatórios de agentes")
+                with self._lock:
+                    self.estatisticas["falhas"] += 1
+                return None
+            finally:
+                db.session.remove()
+
+        expira_desconhecida = time.time() + TTL_DESCONHECIDO
+        with self._lock:
+            # Só entra no cache o que já está no banco
+            for chave, relatorio in lote.items():
+                self._conhecidas[chave] = (relatorio["impressao"], None if resolvidos.get(chave) else expira_desconhecida)
+                self._conhecidas.move_to_end(chave)
+            while len(self._conhecidas) > self._max_itens:
+                self._conhecidas.popitem(last=False)
+            self.estatisticas["lotes"] += 1
+            self.estatisticas["gravados"] += resumo["gravados"]
+            self.estatisticas["alterados"] += resumo["alterados"]
+        desconhecidas = [chave[1] for chave in lote if not resolvidos.get(chave)]
+        if desconhecidas:
+            logger.warning(f"Relatórios de agentes sem máquina cadastrada: {', '.join(desconhecidas[:20])}")
+        logger.info(f"Lote de agentes: {resumo}")
+        return resumo
+
+    def situacao(self):
+        with self._lock:
+            return {**self.estatisticas, "pendentes": len(self._pendentes), "em_cache": len(self._conhecidas)}
+
+
+def init_ingestao_agentes(app):
+    """Cria a fila de ingestão se a tabela inventario_agente existir"""
+    with app.app_context():
+        try:
+            existe = inspect(db.engine).has_table(InventarioAgente.__tablename__)
+        except Exception as e:
+            logger.warning(f"Não foi possível verificar {InventarioAgente.__tablename__}: {e}")
+            existe = False
+    if not existe:
+        logger.warning(f"Tabela {InventarioAgente.__tablename__} não encontrada - ingestão de agentes desativada")
+        return
+    ingestao = IngestaoAgentes(
+        app,
+        intervalo=app.config.get("AGENT_BATCH_INTERVAL", 5),
+        tamanho_lote=app.config.get("AGENT_BATCH_SIZE", 500),
+        max_itens=app.config.get("AGENT_CACHE_MAX_ITEMS", 50000),
+    )
+    app.extensions["ingestao_agentes"] = ingestao
+    atexit.register(ingestao.descarregar)
+
+
+def obter_ingestao():
+    return current_app.extensions.get("ingestao_agentes")
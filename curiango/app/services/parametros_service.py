@@ -10,6 +10,13 @@ def obter_parametro(chave: str, valor_padrao: str = ""):
     param = db.session.query(ParametroSistema).filter_by(chave=chave, ativo=True).first()
     return param.valor if param else valor_padrao
 
+def obter_parametros(padroes: dict):
+    """Obtém vários parâmetros em uma consulta; {chave: valor}, com o padrão para os ausentes"""
+    encontrados = dict(db.session.query(ParametroSistema.chave, ParametroSistema.valor).filter(
+        ParametroSistema.chave.in_(list(padroes)), ParametroSistema.ativo == True
+    ).all())
+    return {chave: encontrados.get(chave, padrao) for chave, padrao in padroes.items()}
+
 def atualizar_parametro(chave: str, valor: str, tipo: str = "texto", descricao: str = ""):
     """Atualiza ou cria um parâmetro do sistema"""
     param = db.session.query(ParametroSistema).filter_by(chave=chave).first()
@@ -347,6 +354,24 @@ Sistema de Controle de Ativos""",
 </html>""",
             "tipo": "html",
             "descricao": "Template HTML do termo de responsabilidade para chips SIM"
+        },
+        {
+            "chave": "depreciacao_vida_util_anos",
+            "valor": "smartphone:3,notebook:5,desktop:5,chip_sim:2",
+            "tipo": "texto",
+            "descricao": "Vida útil (anos) por tipo de ativo, usada no cálculo do valor contábil"
+        },
+        {
+            "chave": "depreciacao_valor_residual_pct",
+            "valor": "10",
+            "tipo": "texto",
+            "descricao": "Valor residual ao fim da vida útil, em % do valor de aquisição"
+        },
+        {
+            "chave": "depreciacao_fator_saldo_decrescente",
+            "valor": "2",
+            "tipo": "texto",
+            "descricao": "Fator do método de saldo decrescente (2 = saldo duplamente decrescente)"
         }
     ]
     
@@ -0,0 +1,167 @@
+"""
+Cache em memória (por processo) das tabelas de referência: marcas, operadoras,
+unidades_negocio e setores, por id. A invalidação entre workers usa a tabela
+versoes_tabela: cada worker compara as versões no máximo uma vez por
+intervalo e descarta as tabelas que mudaram. Cada tabela guarda no máximo
+LOOKUP_CACHE_MAX_ITEMS registros (LRU).
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, has_app_context
+
+from ..core.db import db
+from ..core.versionamento import obter_versoes, versionamento_ativo
+from ..models.dominio import Marca, Operadora, Setor, UnidadeNegocio
+
+logger = logging.getLogger("app")
+
+# tabela -> (modelo, campos guardados além do id)
+TABELAS = {
+    "marcas": (Marca, ("nome",)),
+    "operadoras": (Operadora, ("nome",)),
+    "unidades_negocio": (UnidadeNegocio, ("nome",)),
+    "setores": (Setor, ("nome", "email_responsavel", "ativo")),
+}
+
+
+class _CacheTabela:
+    def __init__(self, modelo, campos, max_itens):
+        self.modelo = modelo
+        self.campos = campos
+        self.max_itens = max_itens
+        self.itens = OrderedDict()  # id -> dict ou None (id inexistente)
+        self.versao = None
+        self.geracao = 0
+
+    def limpar(self):
+        self.itens.clear()
+        self.geracao += 1
+
+    def guardar(self, registro_id, registro):
+        self.itens[registro_id] = registro
+        self.itens.move_to_end(registro_id)
+        while len(self.itens) > self.max_itens:
+            self.itens.popitem(last=False)
+
+
+def _ids_inteiros(ids):
+    """Ids como int: formulários enviam "1", e o cache e a consulta usam 1"""
+    inteiros = set()
+    for registro_id in ids:
+        if registro_id is None or isinstance(registro_id, bool):
+            continue
+        try:
+            inteiros.add(int(registro_id))
+        except (TypeError, ValueError):
+            continue
+    return inteiros
+
+
+class CacheReferencias:
+    """Cache id -> registro das tabelas de referência, compartilhado pelas threads do worker"""
+
+    def __init__(self, max_itens=2000, intervalo_verificacao=5):
+        self.intervalo_verificacao = intervalo_verificacao
+        self._tabelas = {nome: _CacheTabela(modelo, campos, max_itens) for nome, (modelo, campos) in TABELAS.items()}
+        self._proxima_verificacao = 0
+        self._lock = threading.RLock()
+
+    def _sincronizar(self):
+        """Descarta tabelas cuja versão mudou (em qualquer worker) desde a última verificação"""
+        agora = time.monotonic()
+        if agora < self._proxima_verificacao:
+            return
+        with self._lock:
+            if agora < self._proxima_verificacao:
+                return
+            self._proxima_verificacao = agora + self.intervalo_verificacao
+            if not versionamento_ativo():
+                # Sem versões no banco, o intervalo vira um TTL
+                for cache in self._tabelas.values():
+                    cache.limpar()
+                return
+            try:
+                versoes = obter_versoes(self._tabelas.keys())
+            except Exception as e:
+                logger.warning(f"Falha ao verificar versões das tabelas de referência: {e}")
+                for cache in self._tabelas.values():
+                    cache.limpar()
+                return
+            for nome, cache in self._tabelas.items():
+                versao = versoes[nome][0]
+                if cache.versao != versao:
+                    cache.limpar()
+                    cache.versao = versao
+
+    def registros(self, tabela, ids):
+        """
+        Retorna {id: dict ou None} com os ids convertidos para int (ids não
+        numéricos são ignorados); ids ausentes do cache são buscados em uma consulta.
+        """
+        self._sincronizar()
+        cache = self._tabelas[tabela]
+        ids = _ids_inteiros(ids)
+        with self._lock:
+            resultado = {i: cache.itens[i] for i in ids if i in cache.itens}
+            geracao = cache.geracao
+        faltantes = ids - resultado.keys()
+        if not faltantes:
+            return resultado
+
+        colunas = [getattr(cache.modelo, campo) for campo in cache.campos]
+        linhas = db.session.query(cache.modelo.id, *colunas).filter(cache.modelo.id.in_(sorted(faltantes))).all()
+        encontrados = {linha[0]: dict(zip(("id",) + cache.campos, linha)) for linha in linhas}
+        with self._lock:
+            # Se a tabela foi invalidada durante a consulta, não guarda o resultado possivelmente antigo
+            guardar = cache.geracao == geracao
+            for registro_id in faltantes:
+                registro = encontrados.get(registro_id)
+                if guardar:
+                    cache.guardar(registro_id, registro)
+                resultado[registro_id] = registro
+        return resultado
+
+    def invalidar(self, tabela=None):
+        """Descarta uma tabela (ou todas) neste worker e força nova checagem de versões"""
+        with self._lock:
+            for nome, cache in self._tabelas.items():
+                if tabela is None or nome == tabela:
+                    cache.limpar()
+                    cache.versao = None
+            self._proxima_verificacao = 0
+
+
+def init_cache_referencias(app):
+    app.extensions["cache_referencias"] = CacheReferencias(
+        max_itens=app.config.get("LOOKUP_CACHE_MAX_ITEMS", 2000),
+        intervalo_verificacao=app.config.get("LOOKUP_CACHE_CHECK_INTERVAL", 5),
+    )
+
+
+def get_cache_referencias():
+    return current_app.extensions["cache_referencias"]
+
+
+def registros_referencia(tabela, ids):
+    return get_cache_referencias().registros(tabela, ids)
+
+
+def registro_referencia(tabela, registro_id):
+    ids = _ids_inteiros([registro_id])
+    if not ids:
+        return None
+    return registros_referencia(tabela, ids).get(ids.pop())
+
+
+def nome_referencia(tabela, registro_id):
+    registro = registro_referencia(tabela, registro_id)
+    return registro["nome"] if registro else None
+
+
+def invalidar_referencia(tabela=None):
+    """Chamado após CRUD das tabelas de referência (após o commit)"""
+    if has_app_context() and "cache_referencias" in current_app.extensions:
+        get_cache_referencias().invalidar(tabela)
@@ -0,0 +1,297 @@
+"""
+Sincronização idempotente de ativos vindos de sistemas externos (MDM, compras).
+
+Cada item é identificado pela sua chave natural: patrimônio (notebook/desktop),
+IMEI (smartphone) ou número (chip SIM). Os ativos existentes são lidos da
+projeção em poucas consultas IN, e cada item é comparado pela impressão
+digital (hash) dos campos enviados contra a do registro atual. Só o que mudou
+é gravado, em instruções agrupadas por tabela. Reenviar a mesma carga não
+grava nada.
+"""
+import hashlib
+import logging
+import time
+from decimal import Decimal, InvalidOperation
+
+from sqlalchemy import insert, update
+
+from ..core.db import db
+from ..models.dominio import Ativo, ChipSim, Computador, Smartphone
+from .ativos_service import TAMANHO_LOTE, atualizar_projecao_ativos, consultar_projecao, fonte_projecao
+from .referencias_service import registros_referencia
+
+logger = logging.getLogger("app")
+
+CONDICOES = ("novo", "usado", "danificado", "em_manutencao", "inativo")
+COMPUTADORES = ("notebook", "desktop")
+
+# Família -> (modelo do subtipo, chave natural, campos sincronizáveis além dos comuns)
+FAMILIAS = {
+    "computador": (Computador, "patrimonio",
+                   ("tipo", "marca_id", "modelo", "serie", "so_versao", "processador", "memoria", "hd", "acessorios")),
+    "smartphone": (Smartphone, "imei_slot", ("marca_id", "modelo", "acessorios")),
+    "chip_sim": (ChipSim, "numero", ("operadora_id", "tipo_chip")),
+}
+CAMPOS_COMUNS = ("condicao", "valor", "unidade_negocio_id")
+# Nomes aceitos na entrada (os mesmos de POST /api/ativos) -> campo da projeção
+ALIASES = {"fabricante_id": "marca_id", "cpu": "processador", "disco": "hd", "imei": "imei_slot"}
+# Campo da projeção -> coluna no subtipo, quando o nome difere
+COLUNAS_SUBTIPO = {"tipo_chip": "tipo", "tipo": "tipo_computador"}
+REFERENCIAS = {"marca_id": "marcas", "operadora_id": "operadoras", "unidade_negocio_id": "unidades_negocio"}
+# Limites de tamanho dos campos texto (mesmos das colunas)
+TAMANHOS = {
+    "patrimonio": 50, "imei_slot": 20, "numero": 20, "modelo": 100, "serie": 100, "so_versao": 100,
+    "processador": 150, "memoria": 50, "hd": 100, "tipo_chip": 20,
+}
+VALOR_LIMITE = Decimal("100000000")  # ativos.valor é DECIMAL(10,2)
+
+
+class ErroItem(ValueError):
+    pass
+
+
+def _familia(tipo):
+    if tipo in COMPUTADORES:
+        return "computador"
+    if tipo in ("smartphone", "chip_sim"):
+        return tipo
+    raise ErroItem(f"tipo inválido: {tipo}")
+
+
+def _normalizar(campo, valor):
+    """Forma canônica de um campo, usada tanto na entrada quanto no registro atual"""
+    if isinstance(valor, str):
+        valor = valor.strip()
+    if valor is None or valor == "":
+        return None
+    if campo == "valor":
+        try:
+            numero = Decimal(str(valor).replace(",", "."))
+            # NaN/Infinity não gravam em DECIMAL (e NaN nunca é igual a si mesmo na comparação)
+            if not numero.is_finite():
+                raise InvalidOperation
+            numero = numero.quantize(Decimal("0.01"))
+            if not 0 <= numero < VALOR_LIMITE:
+                raise InvalidOperation
+            return numero
+        except InvalidOperation:
+            raise ErroItem(f"valor inválido: {valor}")
+    if campo in REFERENCIAS:
+        try:
+            return int(valor)
+        except (TypeError, ValueError):
+            raise ErroItem(f"{campo} deve ser numérico")
+    valor = str(valor)
+    if campo == "condicao" and valor.lower() not in CONDICOES:
+        raise ErroItem(f"condicao inválida: {valor}")
+    if campo in TAMANHOS and len(valor) > TAMANHOS[campo]:
+        raise ErroItem(f"{campo} muito longo (máximo {TAMANHOS[campo]} caracteres)")
+    return valor.lower() if campo == "condicao" else valor
+
+
+def _normalizar_atual(campo, valor):
+    """Como _normalizar, para o valor já gravado: fora das regras de entrada (legado) fica como está"""
+    try:
+        return _normalizar(campo, valor)
+    except ErroItem:
+        return valor
+
+
+def normalizar_item(item):
+    """Retorna (família, chave, {campo: valor}) com só os campos enviados no item"""
+    if not isinstance(item, dict):
+        raise ErroItem("item deve ser um objeto")
+    tipo = item.get("tipo")
+    familia = _familia(tipo)
+    _, chave, campos = FAMILIAS[familia]
+    entrada = {ALIASES.get(campo, campo): valor for campo, valor in item.items()}
+    valor_chave = _normalizar(chave, entrada.get(chave))
+    if not valor_chave:
+        raise ErroItem(f"{chave} é obrigatório para {tipo}")
+
+    permitidos = CAMPOS_COMUNS + campos
+    if familia == "chip_sim":
+        # Chips SIM não têm unidade de negócio
+        permitidos = tuple(c for c in permitidos if c != "unidade_negocio_id")
+    valores = {campo: _normalizar(campo, entrada[campo]) for campo in permitidos if campo in entrada}
+    if familia == "computador":
+        valores["tipo"] = tipo
+    return familia, valor_chave, valores
+
+
+def impressao(valores):
+    """Hash estável dos campos (ordem das chaves irrelevante)"""
+    texto = repr(sorted((campo, str(valor)) for campo, valor in valores.items()))
+    return hashlib.blake2b(texto.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _existentes(chaves_por_familia):
+    """{(família, chave): linha da projeção} em consultas IN por lote"""
+    p = fonte_projecao().c
+    encontrados = {}
+    for familia, chaves in chaves_por_familia.items():
+        coluna = FAMILIAS[familia][1]
+        chaves = sorted(chaves)
+        for inicio in range(0, len(chaves), TAMANHO_LOTE):
+            for linha in consultar_projecao(p[coluna].in_(chaves[inicio:inicio + TAMANHO_LOTE])):
+                encontrados[(familia, linha._mapping[coluna])] = linha
+    return encontrados
+
+
+def _validar_referencias(validos):
+    """Marca como erro os itens que apontam para marca/operadora/unidade inexistente"""
+    ids = {tabela: set() for tabela in REFERENCIAS.values()}
+    for _, _, _, valores in validos:
+        for campo, tabela in REFERENCIAS.items():
+            if valores.get(campo) is not None:
+                ids[tabela].add(valores[campo])
+    registros = {tabela: registros_referencia(tabela, valores) for tabela, valores in ids.items() if valores}
+    for resultado, _, _, valores in validos:
+        for campo, tabela in REFERENCIAS.items():
+            if valores.get(campo) is not None and not registros[tabela].get(valores[campo]):
+                resultado["status"] = "erro"
+                resultado["mensagem"] = f"{campo} {valores[campo]} não encontrado"
+                break
+
+
+def _colunas_ativo(valores):
+    colunas = {campo: valores[campo] for campo in CAMPOS_COMUNS if campo in valores}
+    if "tipo" in valores:
+        colunas["tipo"] = valores["tipo"]
+    return colunas
+
+
+def _colunas_subtipo(valores, familia):
+    campos = FAMILIAS[familia][2]
+    return {COLUNAS_SUBTIPO.get(campo, campo): valores[campo] for campo in campos if campo in valores}
+
+
+def _em_lotes(linhas):
+    for inicio in range(0, len(linhas), TAMANHO_LOTE):
+        yield linhas[inicio:inicio + TAMANHO_LOTE]
+
+
+def _criar(novos):
+    """Insere ativos e subtipos; retorna os ids criados (na ordem de novos)"""
+    ativos = []
+    for familia, chave, valores in novos:
+        colunas = _colunas_ativo(valores)
+        colunas.setdefault("condicao", "novo")
+        colunas.setdefault("tipo", familia)
+        ativos.append(Ativo(**colunas))
+    ids = []
+    for lote in _em_lotes(ativos):
+        db.session.add_all(lote)
+        db.session.flush()  # INSERTs agrupados (RETURNING/insertmanyvalues quando o banco suporta)
+        ids.extend(a.id for a in lote)
+
+    por_modelo = {}
+    for ativo_id, (familia, chave, valores) in zip(ids, novos):
+        modelo, coluna_chave, campos = FAMILIAS[familia]
+        linha = {COLUNAS_SUBTIPO.get(campo, campo): None for campo in campos}
+        subtipo = _colunas_subtipo(valores, familia)
+        if modelo is ChipSim:
+            subtipo.setdefault("tipo", "voz")  # mesmo padrão de POST /api/ativos
+        linha.update(subtipo)
+        linha.update(ativo_id=ativo_id, **{coluna_chave: chave})
+        por_modelo.setdefault(modelo, []).append(linha)
+    for modelo, linhas in por_modelo.items():
+        for lote in _em_lotes(linhas):
+            db.session.execute(insert(modelo), lote)
+    return ids
+
+
+def _atualizar(alteracoes):
+    """Aplica só as colunas alteradas: UPDATE por chave primária, agrupado por tabela"""
+    ativos, subtipos = [], {}
+    for linha, familia, mudancas in alteracoes:
+        colunas = _colunas_ativo(mudancas)
+        if colunas:
+            ativos.append({"id": linha.ativo_id, **colunas})
+        colunas = _colunas_subtipo(mudancas, familia)
+        if colunas:
+            subtipos.setdefault(FAMILIAS[familia][0], []).append({"id": linha.subtipo_id, **colunas})
+    for modelo, linhas in [(Ativo, ativos), *subtipos.items()]:
+        for lote in _em_lotes(linhas):
+            db.session.execute(update(modelo), lote)
+
+
+def sincronizar_ativos(itens, simular=False):
+    """
+    Cria/atualiza os ativos da carga e faz o commit (nada é gravado com
+    simular=True). Campos ausentes num item não são alterados. Retorna o
+    relatório por item, os totais e as estatísticas.
+    """
+    inicio = time.perf_counter()
+    relatorio = []
+    validos = []  # (resultado, família, chave, valores)
+    vistos = {}
+    for indice, item in enumerate(itens):
+        resultado = {"indice": indice, "status": "erro"}
+        relatorio.append(resultado)
+        try:
+            familia, chave, valores = normalizar_item(item)
+        except ErroItem as e:
+            resultado["mensagem"] = str(e)
+            continue
+        resultado["chave"] = chave
+        if (familia, chave) in vistos:
+            resultado["mensagem"] = f"{FAMILIAS[familia][1]} {chave} repetido na carga (item {vistos[(familia, chave)]})"
+            continue
+        vistos[(familia, chave)] = indice
+        resultado["status"] = None
+        validos.append((resultado, familia, chave, valores))
+
+    _validar_referencias(validos)
+    validos = [v for v in validos if v[0]["status"] is None]
+    chaves = {}
+    for _, familia, chave, _ in validos:
+        chaves.setdefault(familia, set()).add(chave)
+    existentes = _existentes(chaves)
+
+    novos, resultados_novos, alteracoes = [], [], []
+    for resultado, familia, chave, valores in validos:
+        linha = existentes.get((familia, chave))
+        resultado["impressao"] = impressao(valores)
+        if linha is None:
+            resultado["status"] = "criado"
+            novos.append((familia, chave, valores))
+            resultados_novos.append(resultado)
+            continue
+        resultado["ativo_id"] = linha.ativo_id
+        atuais = {campo: _normalizar_atual(campo, linha._mapping[campo]) for campo in valores}
+        if impressao(atuais) == resultado["impressao"]:
+            resultado["status"] = "inalterado"
+            continue
+        mudancas = {campo: valor for campo, valor in valores.items() if atuais[campo] != valor}
+        resultado["status"] = "atualizado"
+        resultado["campos"] = sorted(mudancas)
+        alteracoes.append((linha, familia, mudancas))
+
+    if not simular and (novos or alteracoes):
+        try:
+            criados = _criar(novos) if novos else []
+            for resultado, ativo_id in zip(resultados_novos, criados):
+                resultado["ativo_id"] = ativo_id
+            if alteracoes:
+                _atualizar(alteracoes)
+            atualizar_projecao_ativos(criados + [linha.ativo_id for linha, _, _ in alteracoes])
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+    segundos = time.perf_counter() - inicio
+    contagem = {status: 0 for status in ("criado", "atualizado", "inalterado", "erro")}
+    for resultado in relatorio:
+        contagem[resultado["status"]] += 1
+    return {
+        "itens": relatorio,
+        "contagem": contagem,
+        "simulado": simular,
+        "estatisticas": {
+            "total_itens": len(relatorio),
+            "segundos": round(segundos, 3),
+            "itens_por_segundo": round(len(relatorio) / segundos) if segundos > 0 else None,
+        },
+    }
@@ -0,0 +1,262 @@
+"""
+Fechamento diário do estoque.
+
+Uma vez por dia (comando "flask snapshot-inventario", logo após a meia-noite)
+os totais do estoque são gravados por tipo, condição, unidade e setor do
+usuário (snapshot_inventario_diario), junto com as alocações iniciadas no
+dia, e os totais do dia numa única linha (snapshot_inventario_dia).
+Reexecutar o mesmo dia substitui as linhas. Tendências e alocações mensais
+leem esses totais (uma linha por dia, ou as linhas detalhadas só dos dias de
+fechamento de cada período) em vez de percorrer o histórico.
+
+Níveis (quantidade, alocados, valor) só podem ser fotografados no presente:
+o fechamento aceita apenas o dia anterior, já encerrado. O dia corrente
+nunca é fechado: as leituras o buscam sempre no histórico.
+"""
+import logging
+from datetime import datetime, time, timedelta
+
+from sqlalchemy import delete, extract, func, insert, inspect, select
+
+from ..core.db import db
+from ..core.timezone_utils import now_local
+from ..models.dominio import Ativo, Colaborador, HistoricoAlocacao, SnapshotInventario, SnapshotInventarioDia
+from .referencias_service import registros_referencia
+
+logger = logging.getLogger("app")
+
+DIMENSOES = ("tipo", "condicao", "unidade_negocio_id", "setor_id")
+# Nome aceito na API -> (coluna do snapshot, tabela de referência com os nomes)
+AGRUPAMENTOS = {
+    "tipo": ("tipo", None),
+    "condicao": ("condicao", None),
+    "unidade": ("unidade_negocio_id", "unidades_negocio"),
+    "setor": ("setor_id", "setores"),
+}
+GRANULARIDADES = ("dia", "semana", "mes")
+MEDIDAS = ("quantidade", "alocados", "valor_total", "alocacoes")
+
+_estado = {"ativo": False}
+
+
+def snapshot_ativo():
+    return _estado["ativo"]
+
+
+def _limites_dia(dia):
+    """data_inicio é gravada em horário local sem fuso: o dia vai de 00:00 a 00:00"""
+    inicio = datetime.combine(dia, time.min)
+    return inicio, inicio + timedelta(days=1)
+
+
+def _totais_estoque():
+    """{(tipo, condicao, unidade, setor): [quantidade, alocados, valor]} do estoque atual"""
+    a = Ativo.__table__
+    col = Colaborador.__table__
+    dimensoes = (a.c.tipo, a.c.condicao, a.c.unidade_negocio_id, col.c.setor_id)
+    linhas = db.session.execute(
+        select(*dimensoes, func.count(a.c.id), func.count(a.c.usuario_atual_id), func.coalesce(func.sum(a.c.valor), 0))
+        .select_from(a.outerjoin(col, col.c.id == a.c.usuario_atual_id))
+        .group_by(*dimensoes)
+    ).all()
+    return {tuple(linha[:4]): [linha[4], linha[5], linha[6]] for linha in linhas}
+
+
+def _alocacoes_do_dia(dia):
+    """{(tipo, condicao, unidade, setor do colaborador alocado): alocações iniciadas no dia}"""
+    a = Ativo.__table__
+    h = HistoricoAlocacao.__table__
+    col = Colaborador.__table__
+    inicio, fim = _limites_dia(dia)
+    dimensoes = (a.c.tipo, a.c.condicao, a.c.unidade_negocio_id, col.c.setor_id)
+    linhas = db.session.execute(
+        select(*dimensoes, func.count(h.c.id))
+        .select_from(h.join(a, a.c.id == h.c.ativo_id).outerjoin(col, col.c.id == h.c.colaborador_id))
+        .where(h.c.data_inicio >= inicio, h.c.data_inicio < fim)
+        .group_by(*dimensoes)
+    ).all()
+    return {tuple(linha[:4]): linha[4] for linha in linhas}
+
+
+def gravar_fechamento(dia, grupos):
+    """Substitui o fechamento do dia pelos grupos {(tipo, condicao, unidade, setor): [medidas]} (sem commit)"""
+    linhas = [
+        {"data": dia, **dict(zip(DIMENSOES, chave)), **dict(zip(MEDIDAS, valores))}
+        for chave, valores in grupos.items()
+    ]
+    totais = [sum(valores[i] for valores in grupos.values()) for i in range(len(MEDIDAS))]
+    substituidas = db.session.execute(delete(SnapshotInventario).where(SnapshotInventario.data == dia)).rowcount
+    db.session.execute(delete(SnapshotInventarioDia).where(SnapshotInventarioDia.data == dia))
+    if linhas:
+        db.session.execute(insert(SnapshotInventario), linhas)
+    db.session.execute(insert(SnapshotInventarioDia), [{"data": dia, **dict(zip(MEDIDAS, totais)), "grupos": len(linhas)}])
+    return {"data": dia.isoformat(), "grupos": len(linhas), "substituidas": substituidas,
+            **dict(zip(MEDIDAS, totais))}
+
+
+def gerar_snapshot(dia=None):
+    """
+    Grava (ou regrava) o fechamento do dia anterior, no fuso local, e faz o
+    commit. Retorna o resumo do fechamento.
+    """
+    ontem = now_local().date() - timedelta(days=1)
+    dia = dia or ontem
+    if dia != ontem:
+        raise ValueError("Só é possível fechar o dia anterior (o dia corrente ainda não terminou e o estoque "
+                         "não tem histórico de níveis)")
+
+    grupos = {chave: valores + [0] for chave, valores in _totais_estoque().items()}
+    for chave, alocacoes in _alocacoes_do_dia(dia).items():
+        grupos.setdefault(chave, [0, 0, 0, 0])[3] = alocacoes
+    try:
+        resumo = gravar_fechamento(dia, grupos)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    resumo["valor_total"] = float(resumo["valor_total"])
+    logger.info(f"Fechamento do estoque gravado: {resumo}")
+    return resumo
+
+
+def _periodo(dia, granularidade):
+    if granularidade == "mes":
+        return f"{dia.year:04d}-{dia.month:02d}"
+    if granularidade == "semana":
+        return (dia - timedelta(days=dia.weekday())).isoformat()
+    return dia.isoformat()
+
+
+def _dias_fechados(inicio, fim):
+    """Linhas de snapshot_inventario_dia entre duas datas, em ordem (uma por dia fechado)"""
+    d = SnapshotInventarioDia.__table__.c
+    return db.session.execute(
+        select(d.data, d.quantidade, d.alocados, d.valor_total, d.alocacoes)
+        .where(d.data >= inicio, d.data <= fim)
+        .order_by(d.data)
+    ).all()
+
+
+def _series_por_grupo(coluna, fechamentos, indice, granularidade, inicio, fim):
+    """{valor da dimensão: {medida: [valor por período]}} lidos das linhas detalhadas"""
+    s = SnapshotInventario.__table__.c
+    series = {}
+    vazia = lambda: {medida: [0] * len(indice) for medida in MEDIDAS}
+    # Níveis: só as linhas dos dias de fechamento de cada período
+    for dia, chave, quantidade, alocados, valor in db.session.execute(
+        select(s.data, s[coluna], func.sum(s.quantidade), func.sum(s.alocados), func.sum(s.valor_total))
+        .where(s.data.in_(fechamentos))
+        .group_by(s.data, s[coluna])
+    ).all():
+        serie = series.setdefault(chave, vazia())
+        i = indice[_periodo(dia, granularidade)]
+        serie["quantidade"][i], serie["alocados"][i], serie["valor_total"][i] = int(quantidade), int(alocados), float(valor)
+    # Fluxo: alocações de todos os dias, só dos grupos que tiveram alguma
+    for dia, chave, alocacoes in db.session.execute(
+        select(s.data, s[coluna], func.sum(s.alocacoes))
+        .where(s.data >= inicio, s.data <= fim, s.alocacoes > 0)
+        .group_by(s.data, s[coluna])
+    ).all():
+        series.setdefault(chave, vazia())["alocacoes"][indice[_periodo(dia, granularidade)]] += int(alocacoes)
+    return series
+
+
+def tendencia(inicio, fim, agrupamento=None, granularidade="mes"):
+    """
+    Séries do estoque entre duas datas, por período. Níveis (quantidade,
+    alocados, valor_total) são os do último dia fechado de cada período;
+    alocacoes é a soma dos dias. Formato: {"periodos", "datas_referencia",
+    "series": [{"chave", "nome", <medida>: [valor por período]}]}.
+    """
+    dias = _dias_fechados(inicio, fim)
+    fechamentos = {}
+    for linha in dias:
+        fechamentos[_periodo(linha.data, granularidade)] = linha.data  # o último dia de cada período vence
+    periodos = list(fechamentos)
+    indice = {periodo: i for i, periodo in enumerate(periodos)}
+
+    if agrupamento is None:
+        # Totais do dia bastam: nenhuma linha detalhada é lida
+        total = {medida: [0] * len(periodos) for medida in MEDIDAS}
+        for linha in dias:
+            i = indice[_periodo(linha.data, granularidade)]
+            total["quantidade"][i], total["alocados"][i] = linha.quantidade, linha.alocados
+            total["valor_total"][i] = float(linha.valor_total)
+            total["alocacoes"][i] += linha.alocacoes
+        series = [{"chave": None, "nome": "Total", **total}] if periodos else []
+    else:
+        coluna, tabela_nomes = AGRUPAMENTOS[agrupamento]
+        por_grupo = _series_por_grupo(coluna, list(fechamentos.values()), indice, granularidade, inicio, fim) if periodos else {}
+        nomes = registros_referencia(tabela_nomes, por_grupo) if tabela_nomes else {}
+        series = []
+        for chave, medidas in por_grupo.items():
+            if tabela_nomes:
+                registro = nomes.get(chave)
+                nome = registro["nome"] if registro else ("Não informado" if chave is None else f"ID {chave}")
+            else:
+                nome = chave
+            series.append({"chave": chave, "nome": nome, **medidas})
+        series.sort(key=lambda serie: -serie["quantidade"][-1])
+    return {
+        "inicio": inicio.isoformat(),
+        "fim": fim.isoformat(),
+        "agrupamento": agrupamento,
+        "granularidade": granularidade,
+        "periodos": periodos,
+        "datas_referencia": [dia.isoformat() for dia in fechamentos.values()],
+        "series": series,
+    }
+
+
+def _alocacoes_brutas(meses, inicio, fim=None):
+    """Soma em meses ({"AAAA-MM": total}) as alocações de historico_alocacoes em [inicio, fim)"""
+    if fim is not None and fim <= inicio:
+        return
+    h = HistoricoAlocacao.__table__.c
+    ano, mes = extract("year", h.data_inicio), extract("month", h.data_inicio)
+    consulta = select(ano, mes, func.count(h.id)).where(h.data_inicio >= inicio)
+    if fim is not None:
+        consulta = consulta.where(h.data_inicio < fim)
+    for ano_linha, mes_linha, total in db.session.execute(consulta.group_by(ano, mes)).all():
+        chave = f"{int(ano_linha):04d}-{int(mes_linha):02d}"
+        meses[chave] = meses.get(chave, 0) + total
+
+
+def alocacoes_por_mes(inicio):
+    """
+    [{"mes": "AAAA-MM", "total"}] das alocações iniciadas desde inicio (datetime
+    local). Dias fechados em sequência vêm de snapshot_inventario_dia; o que
+    fica antes e depois deles vem de historico_alocacoes.
+    """
+    meses = {}
+    # O dia de inicio está só em parte na janela: começa no seguinte. O dia
+    # corrente ainda recebe alocações: vem sempre do histórico
+    ontem = now_local().date() - timedelta(days=1)
+    dias = _dias_fechados(inicio.date() + timedelta(days=1), ontem) if snapshot_ativo() else []
+    if dias and (dias[-1].data - dias[0].data).days + 1 != len(dias):
+        logger.debug("Fechamentos do estoque com dias faltando; alocações mensais lidas do histórico")
+        dias = []
+
+    if not dias:
+        _alocacoes_brutas(meses, inicio)
+    else:
+        _alocacoes_brutas(meses, inicio, _limites_dia(dias[0].data)[0])
+        for linha in dias:
+            chave = _periodo(linha.data, "mes")
+            meses[chave] = meses.get(chave, 0) + linha.alocacoes
+        _alocacoes_brutas(meses, _limites_dia(dias[-1].data)[1])
+    return [{"mes": mes, "total": total} for mes, total in sorted(meses.items()) if total]
+
+
+def init_snapshot_inventario(app):
+    """Ativa a leitura dos fechamentos se as tabelas de snapshot existirem"""
+    tabelas = (SnapshotInventario.__tablename__, SnapshotInventarioDia.__tablename__)
+    with app.app_context():
+        try:
+            inspetor = inspect(db.engine)
+            _estado["ativo"] = all(inspetor.has_table(tabela) for tabela in tabelas)
+        except Exception as e:
+            logger.warning(f"Não foi possível verificar {', '.join(tabelas)}: {e}")
+            _estado["ativo"] = False
+    if not _estado["ativo"]:
+        logger.warning(f"Tabelas {', '.join(tabelas)} não encontradas - tendências do estoque desativadas")
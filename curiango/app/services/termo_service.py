@@ -1,30 +1,12 @@
 from flask import render_template_string
 from ..core.pdf import render_pdf_from_html
-from ..models.dominio import Ativo, Colaborador, Smartphone, Computador, ChipSim, Marca, Operadora
+from ..models.dominio import Ativo, Colaborador
 from .parametros_service import obter_parametro
+from .ativos_service import obter_projecao
+from .descricao_service import describe
 
 def detalhes_equipamento(ativo: Ativo) -> str:
-    if ativo.tipo == "smartphone":
-        s = Smartphone.query.filter_by(ativo_id=ativo.id).first()
-        marca = Marca.query.get(s.marca_id).nome if s and s.marca_id else "-"
-        return f"Smartphone {marca} {s.modelo or '-'} - IMEI {getattr(s, 'imei_slot', '-')}"
-    if ativo.tipo in ["notebook", "desktop"]:
-        c = Computador.query.filter_by(ativo_id=ativo.id).first()
-        marca = Marca.query.get(c.marca_id).nome if c and c.marca_id else "-"
-        return f"{c.tipo_computador.title()} {marca} {c.modelo} - Patrimônio {c.patrimonio}"
-    if ativo.tipo == "chip_sim":
-        ch = ChipSim.query.filter_by(ativo_id=ativo.id).first()
-        if ch:
-            op = Operadora.query.get(ch.operadora_id).nome if ch.operadora_id else "-"
-            # Formatação dos tipos conforme solicitado
-            if ch.tipo == "dados":
-                tipo_chip = "Dados"
-            else:
-                tipo_chip = "Voz/Dados"
-            return f"Chip {op} - Número {getattr(ch, 'numero', '-')} - Tipo: {tipo_chip}"
-        else:
-            return "Chip SIM - dados não encontrados"
-    return "Ativo"
+    return describe(ativo.id, "termo")
 
 def formatar_status(status: str) -> str:
     """Formatar status do ativo para exibição nos termos."""
@@ -41,6 +23,7 @@ def gerar_termo_pdf(ativo_id: int, colaborador_id: int) -> bytes:
     ativo = Ativo.query.get_or_404(ativo_id)
     col = Colaborador.query.get_or_404(colaborador_id)
     equipamento = detalhes_equipamento(ativo)
+    projecao = obter_projecao(ativo.id)  # já em cache na requisição após a descrição
     
     # Formatar valor do equipamento
     valor_equipamento = "R$ {:.2f}".format(float(ativo.valor)) if ativo.valor else "Não informado"
@@ -50,14 +33,8 @@ def gerar_termo_pdf(ativo_id: int, colaborador_id: int) -> bytes:
     
     # Obter acessórios do ativo
     acessorios = "Não disponível"
-    if ativo.tipo == "smartphone":
-        s = Smartphone.query.filter_by(ativo_id=ativo.id).first()
-        if s and s.acessorios:
-            acessorios = s.acessorios
-    elif ativo.tipo in ["notebook", "desktop"]:
-        c = Computador.query.filter_by(ativo_id=ativo.id).first()
-        if c and c.acessorios:
-            acessorios = c.acessorios
+    if ativo.tipo in ["smartphone", "notebook", "desktop"] and projecao and projecao.acessorios:
+        acessorios = projecao.acessorios
     
     # Determinar qual template usar baseado no tipo do ativo
     template_key = None
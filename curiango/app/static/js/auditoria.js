@@ -1,6 +1,7 @@
 // Variáveis globais
 let paginaAtual = 0;
 const limitePorPagina = 50;
+let cursoresPaginas = [null]; // cursor de início de cada página já visitada (keyset)
 let filtrosAtuais = {};
 
 // Elementos DOM
@@ -8,6 +9,7 @@ const tblAuditoria = document.getElementById('tblAuditoria');
 const btnBuscar = document.getElementById('btnBuscar');
 const btnLimparFiltros = document.getElementById('btnLimparFiltros');
 const btnExportar = document.getElementById('btnExportar');
+const conteudoBtnExportar = btnExportar.innerHTML;
 const btnAnterior = document.getElementById('btnAnterior');
 const btnProximo = document.getElementById('btnProximo');
 const modalDetalhes = document.getElementById('modalDetalhes');
@@ -62,9 +64,11 @@ async function carregarLogs() {
         // Montar parâmetros da URL
         const params = new URLSearchParams({
             limite: limitePorPagina,
-            offset: paginaAtual * limitePorPagina,
             ...filtrosAtuais
         });
+        if (cursoresPaginas[paginaAtual]) {
+            params.set('cursor', cursoresPaginas[paginaAtual]);
+        }
         
         const response = await fetch(`/api/auditoria?${params}`);
         if (!response.ok) {
@@ -75,7 +79,8 @@ async function carregarLogs() {
         
         exibirLogs(data.logs);
         atualizarEstatisticas(data);
-        atualizarPaginacao(data.logs.length);
+        cursoresPaginas[paginaAtual + 1] = data.proximo_cursor;
+        atualizarPaginacao(data.logs.length, data);
         
     } catch (error) {
         console.error('Erro ao carregar logs:', error);
@@ -167,6 +172,7 @@ function aplicarFiltros() {
     });
     
     paginaAtual = 0; // Reset para primeira página
+    cursoresPaginas = [null];
     carregarLogs();
 }
 
@@ -180,6 +186,7 @@ function limparFiltros() {
     
     filtrosAtuais = {};
     paginaAtual = 0;
+    cursoresPaginas = [null];
     carregarLogs();
 }
 
@@ -195,15 +202,16 @@ function proximaPagina() {
     carregarLogs();
 }
 
-function atualizarPaginacao(totalLogs) {
+function atualizarPaginacao(totalLogs, data) {
     const inicio = paginaAtual * limitePorPagina + 1;
     const fim = inicio + totalLogs - 1;
+    const total = data.total_aproximado ? `mais de ${data.total}` : data.total;
     
     document.getElementById('paginaInfo').textContent = 
-        totalLogs > 0 ? `${inicio}-${fim}` : '0';
+        totalLogs > 0 ? `${inicio}-${fim} de ${total}` : '0';
     
     btnAnterior.disabled = paginaAtual === 0;
-    btnProximo.disabled = totalLogs < limitePorPagina;
+    btnProximo.disabled = !data.proximo_cursor;
 }
 
 async function verDetalhes(logId) {
@@ -364,20 +372,19 @@ function fecharModal() {
 
 async function exportarLogs() {
     try {
-        const params = new URLSearchParams({
-            limite: 10000, // Limite maior para exportação
-            ...filtrosAtuais
-        });
-        
-        const response = await fetch(`/api/auditoria?${params}`);
+        const params = new URLSearchParams({ formato: 'csv', ...filtrosAtuais });
+        const response = await fetch(`/api/auditoria/export?${params}`);
         if (!response.ok) throw new Error(`HTTP ${response.status}`);
         
-        const data = await response.json();
-        
-        // Converter para CSV
-        const csv = converterParaCSV(data.logs);
-        downloadCSV(csv, 'auditoria_logs.csv');
+        if (response.status === 202) {
+            // Exportação grande: gerada em segundo plano, baixada ao concluir
+            const job = await response.json();
+            mostrarSucesso('Exportação grande iniciada - o download começará ao concluir');
+            acompanharExportacao(job.status_url);
+            return;
+        }
         
+        baixarArquivo(await response.blob(), nomeDoArquivo(response, 'auditoria_logs.csv'));
         mostrarSucesso('Logs exportados com sucesso!');
         
     } catch (error) {
@@ -386,29 +393,36 @@ async function exportarLogs() {
     }
 }
 
-function converterParaCSV(logs) {
-    const headers = ['ID', 'Data/Hora', 'Usuário', 'Ação', 'Tabela', 'Registro ID', 'Descrição', 'IP', 'Nível'];
-    const rows = logs.map(log => [
-        log.id,
-        formatarDataHoraCompleta(log.created_at),
-        log.usuario,
-        log.acao,
-        log.tabela || '',
-        log.registro_id || '',
-        log.descricao.replace(/"/g, '""'), // Escape aspas duplas
-        log.ip_address || '',
-        log.nivel
-    ]);
-    
-    const csvContent = [headers, ...rows]
-        .map(row => row.map(field => `"${field}"`).join(','))
-        .join('\n');
-    
-    return csvContent;
+async function acompanharExportacao(statusUrl) {
+    try {
+        const response = await fetch(statusUrl);
+        if (!response.ok) throw new Error(`HTTP ${response.status}`);
+        const job = await response.json();
+        
+        if (job.status === 'concluido') {
+            window.location.href = job.download_url;
+            mostrarSucesso('Logs exportados com sucesso!');
+        } else if (job.status === 'erro') {
+            mostrarErro('Erro ao exportar logs: ' + job.erro);
+        } else {
+            btnExportar.textContent = job.progresso !== null ? `Exportando... ${job.progresso}%` : 'Exportando...';
+            setTimeout(() => acompanharExportacao(statusUrl), 2000);
+            return;
+        }
+    } catch (error) {
+        console.error('Erro ao acompanhar exportação:', error);
+        mostrarErro('Erro ao exportar logs');
+    }
+    btnExportar.innerHTML = conteudoBtnExportar;
+}
+
+function nomeDoArquivo(response, padrao) {
+    const disposicao = response.headers.get('Content-Disposition') || '';
+    const match = disposicao.match(/filename="([^"]+)"/);
+    return match ? match[1] : padrao;
 }
 
-function downloadCSV(csvContent, filename) {
-    const blob = new Blob([csvContent], { type: 'text/csv;charset=utf-8;' });
+function baixarArquivo(blob, filename) {
     const link = document.createElement('a');
     
     if (link.download !== undefined) {
@@ -419,6 +433,7 @@ function downloadCSV(csvContent, filename) {
         document.body.appendChild(link);
         link.click();
         document.body.removeChild(link);
+        URL.revokeObjectURL(url);
     }
 }
 
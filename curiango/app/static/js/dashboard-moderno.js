@@ -57,13 +57,8 @@ async function carregarResumo() {
     
     const data = await response.json();
     dashboardData.resumo = data;
-    
-    // Atualizar cards principais
-    document.getElementById('cardTotal').textContent = formatNumber(data.total || 0);
-    document.getElementById('cardEmUso').textContent = formatNumber(data.em_uso || 0);
-    document.getElementById('cardEstoque').textContent = formatNumber(data.em_estoque || 0);
-    document.getElementById('cardInativos').textContent = formatNumber(data.inativos || 0);
-    
+    renderizarCards(data);
+
     return data;
   } catch (error) {
     console.error('Erro ao carregar resumo:', error);
@@ -71,6 +66,14 @@ async function carregarResumo() {
   }
 }
 
+// Atualizar cards principais
+function renderizarCards(data) {
+  document.getElementById('cardTotal').textContent = formatNumber(data.total || 0);
+  document.getElementById('cardEmUso').textContent = formatNumber(data.em_uso || 0);
+  document.getElementById('cardEstoque').textContent = formatNumber(data.em_estoque || 0);
+  document.getElementById('cardInativos').textContent = formatNumber(data.inativos || 0);
+}
+
 // Carregar estatísticas avançadas
 async function carregarEstatisticas() {
   try {
@@ -108,7 +111,8 @@ async function carregarGraficos() {
 // Renderizar atividades recentes
 function renderizarAtividades(atividades) {
   const container = document.getElementById('ultimasAtividades');
-  
+  if (!container) return;
+
   if (!atividades || atividades.length === 0) {
     container.innerHTML = `
       <div class="flex items-center justify-center h-full text-slate-400">
@@ -162,80 +166,110 @@ function renderizarAtividades(atividades) {
 }
 
 
+// Gráficos pizza já desenhados, por canvas
+const graficosPorTipo = {};
+
+// Canvas do gráfico de cada tipo de ativo
+const canvasPorTipo = {
+  smartphone: 'graficoSmartphones',
+  notebook: 'graficoNotebooks',
+  desktop: 'graficoDesktops',
+  chip_sim: 'graficoChips'
+};
+
 // Criar gráfico pizza para um tipo específico de ativo
 async function criarGraficoPorTipo(tipo, canvasId) {
-  const ctx = document.getElementById(canvasId);
-  if (!ctx) return;
-  
   try {
     const response = await fetch(`/api/dashboard/status-por-tipo/${tipo}`);
     if (!response.ok) throw new Error(`Erro ao carregar dados do tipo ${tipo}`);
     
-    const data = await response.json();
-    
-    if (!data || data.length === 0) {
-      ctx.getContext('2d').clearRect(0, 0, ctx.width, ctx.height);
-      const context = ctx.getContext('2d');
-      context.fillStyle = '#94A3B8';
-      context.font = '14px Arial';
-      context.textAlign = 'center';
-      context.fillText('Nenhum dado disponível', ctx.width/2, ctx.height/2);
-      return;
-    }
-    
-    const labels = data.map(item => item.status);
-    const valores = data.map(item => item.quantidade);
-    
-    // Cores por status
-    const coresPorStatus = {
-      'Em Uso': '#22C55E',
-      'Disponíveis': '#F97316', 
-      'Em Manutenção': '#EF4444',
-      'Danificados': '#DC2626',
-      'Inativos': '#64748B'
-    };
-    
-    const cores = labels.map(label => coresPorStatus[label] || '#94A3B8');
-    
-    new Chart(ctx, {
-      type: 'doughnut',
-      data: {
-        labels: labels,
-        datasets: [{
-          data: valores,
-          backgroundColor: cores,
-          borderColor: '#ffffff',
-          borderWidth: 2,
-          hoverBorderWidth: 3
-        }]
-      },
-      options: {
-        responsive: true,
-        maintainAspectRatio: false,
-        plugins: {
-          legend: {
-            position: 'bottom',
-            labels: {
-              padding: 20,
-              usePointStyle: true,
-              font: { size: 11 }
-            }
-          },
-          tooltip: {
-            callbacks: {
-              label: function(context) {
-                const total = context.dataset.data.reduce((a, b) => a + b, 0);
-                const percentage = total > 0 ? ((context.parsed * 100) / total).toFixed(1) : '0';
-                return `${context.label}: ${context.parsed} (${percentage}%)`;
-              }
+    renderizarGraficoPorTipo(canvasId, await response.json());
+  } catch (error) {
+    console.error(`Erro ao criar gráfico para ${tipo}:`, error);
+  }
+}
+
+// Desenhar (ou redesenhar) o gráfico pizza de um tipo
+function renderizarGraficoPorTipo(canvasId, data) {
+  const ctx = document.getElementById(canvasId);
+  if (!ctx) return;
+  
+  if (graficosPorTipo[canvasId]) {
+    graficosPorTipo[canvasId].destroy();
+    delete graficosPorTipo[canvasId];
+  }
+  
+  if (!data || data.length === 0) {
+    ctx.getContext('2d').clearRect(0, 0, ctx.width, ctx.height);
+    const context = ctx.getContext('2d');
+    context.fillStyle = '#94A3B8';
+    context.font = '14px Arial';
+    context.textAlign = 'center';
+    context.fillText('Nenhum dado disponível', ctx.width/2, ctx.height/2);
+    return;
+  }
+  
+  const labels = data.map(item => item.status);
+  const valores = data.map(item => item.quantidade);
+  
+  // Cores por status
+  const coresPorStatus = {
+    'Em Uso': '#22C55E',
+    'Disponíveis': '#F97316', 
+    'Em Manutenção': '#EF4444',
+    'Danificados': '#DC2626',
+    'Inativos': '#64748B'
+  };
+  
+  const cores = labels.map(label => coresPorStatus[label] || '#94A3B8');
+  
+  graficosPorTipo[canvasId] = new Chart(ctx, {
+    type: 'doughnut',
+    data: {
+      labels: labels,
+      datasets: [{
+        data: valores,
+        backgroundColor: cores,
+        borderColor: '#ffffff',
+        borderWidth: 2,
+        hoverBorderWidth: 3
+      }]
+    },
+    options: {
+      responsive: true,
+      maintainAspectRatio: false,
+      plugins: {
+        legend: {
+          position: 'bottom',
+          labels: {
+            padding: 20,
+            usePointStyle: true,
+            font: { size: 11 }
+          }
+        },
+        tooltip: {
+          callbacks: {
+            label: function(context) {
+              const total = context.dataset.data.reduce((a, b) => a + b, 0);
+              const percentage = total > 0 ? ((context.parsed * 100) / total).toFixed(1) : '0';
+              return `${context.label}: ${context.parsed} (${percentage}%)`;
             }
           }
         }
       }
-    });
-  } catch (error) {
-    console.error(`Erro ao criar gráfico para ${tipo}:`, error);
-  }
+    }
+  });
+}
+
+// Mesmo formato de /api/dashboard/status-por-tipo, a partir de uma linha de categorias-detalhadas
+function statusDaCategoria(dados) {
+  return [
+    { status: 'Em Uso', quantidade: dados.em_uso },
+    { status: 'Disponíveis', quantidade: dados.disponiveis },
+    { status: 'Em Manutenção', quantidade: dados.em_manutencao },
+    { status: 'Danificados', quantidade: dados.danificados },
+    { status: 'Inativos', quantidade: dados.inativos }
+  ].filter(item => item.quantidade > 0);
 }
 
 // Criar todos os gráficos por tipo de ativo
@@ -279,11 +313,13 @@ async function carregarUsuariosResumo() {
 
 // Criar resumo de usuários
 async function criarResumoUsuarios() {
+  renderizarResumoUsuarios(await carregarUsuariosResumo());
+}
+
+function renderizarResumoUsuarios(usuariosData) {
   const container = document.getElementById('resumoUsuarios');
   if (!container) return;
   
-  const usuariosData = await carregarUsuariosResumo();
-  
   const html = `
     <div class="grid grid-cols-1 md:grid-cols-3 gap-6">
       <!-- Total de Usuários -->
@@ -332,11 +368,13 @@ async function criarResumoUsuarios() {
 
 // Criar tabela de detalhes por categoria
 async function criarTabelaCategorias() {
+  renderizarTabelaCategorias(await carregarCategoriasDetalhadas());
+}
+
+function renderizarTabelaCategorias(categoriasData) {
   const container = document.getElementById('tabelaCategorias');
   if (!container) return;
   
-  const categoriasData = await carregarCategoriasDetalhadas();
-  
   // Atualizar cards por categoria
   atualizarCardsCategorias(categoriasData);
   
@@ -454,8 +492,80 @@ async function inicializarDashboard() {
   }
 }
 
-// Inicializar quando a página carregar
-document.addEventListener('DOMContentLoaded', inicializarDashboard);
+// Aplicar um "delta" do stream: só as chaves alteradas (null = removida)
+function mesclar(destino, mudancas) {
+  Object.keys(mudancas).forEach(chave => {
+    const valor = mudancas[chave];
+    if (valor === null) {
+      delete destino[chave];
+    } else if (typeof valor === 'object' && !Array.isArray(valor)) {
+      destino[chave] = mesclar(destino[chave] || {}, valor);
+    } else {
+      destino[chave] = valor;
+    }
+  });
+  return destino;
+}
+
+// Redesenhar cards, tabela, usuários e gráficos a partir dos contadores do stream
+function renderizarContadores(dados) {
+  dashboardData.resumo = dados.resumo;
+  dashboardData.estatisticas = { ...dashboardData.estatisticas, ...dados.estatisticas };
+  renderizarCards(dados.resumo);
+  renderizarTabelaCategorias(dados.categorias);
+  renderizarResumoUsuarios(dados.usuarios);
+  Object.keys(canvasPorTipo).forEach(tipo => {
+    renderizarGraficoPorTipo(canvasPorTipo[tipo], statusDaCategoria(dados.categorias[tipo] || {}));
+  });
+}
+
+// Dashboard em tempo real (Server-Sent Events): o estado chega uma vez ao conectar
+// e depois só o que mudou. Sem suporte, ou se o servidor recusar, volta às consultas periódicas.
+function conectarTempoReal() {
+  if (!window.EventSource) return false;
+  
+  let contadores = null;
+  let atividades = [];
+  const fonte = new EventSource('/api/dashboard/stream');
+  
+  fonte.addEventListener('estado', (evento) => {
+    const estado = JSON.parse(evento.data);
+    atividades = estado.atividades || [];
+    delete estado.atividades;
+    contadores = estado;
+    renderizarContadores(contadores);
+    renderizarAtividades(atividades);
+    ocultarLoading();
+  });
+  
+  fonte.addEventListener('delta', (evento) => {
+    if (!contadores) return;
+    mesclar(contadores, JSON.parse(evento.data));
+    renderizarContadores(contadores);
+  });
+  
+  fonte.addEventListener('atividade', (evento) => {
+    atividades = JSON.parse(evento.data).concat(atividades).slice(0, 10);
+    renderizarAtividades(atividades);
+  });
+  
+  fonte.onerror = () => {
+    // Erros de rede são reconectados pelo navegador; resposta recusada (503) fecha o stream
+    if (fonte.readyState === EventSource.CLOSED) {
+      console.warn('Dashboard em tempo real indisponível - usando atualização periódica');
+      iniciarAtualizacaoPeriodica();
+    }
+  };
+  return true;
+}
 
 // Atualizar dados a cada 5 minutos
-setInterval(inicializarDashboard, 5 * 60 * 1000);
\ No newline at end of file
+function iniciarAtualizacaoPeriodica() {
+  inicializarDashboard();
+  setInterval(inicializarDashboard, 5 * 60 * 1000);
+}
+
+// Inicializar quando a página carregar
+document.addEventListener('DOMContentLoaded', () => {
+  if (!conectarTempoReal()) iniciarAtualizacaoPeriodica();
+});
@@ -130,6 +130,9 @@ async function importarAtivos() {
         }
         
         let mensagem = `Importação concluída: ${result.sucessos} sucessos`;
+        if (result.criados !== undefined) {
+            mensagem += ` (${result.criados} novos, ${result.atualizados} atualizados), ${result.inalterados} sem alteração`;
+        }
         if (result.erros > 0) {
             mensagem += `, ${result.erros} erros`;
         }
@@ -195,6 +198,9 @@ async function importarColaboradores() {
         }
         
         let mensagem = `Importação concluída: ${result.sucessos} sucessos`;
+        if (result.criados !== undefined) {
+            mensagem += ` (${result.criados} novos, ${result.atualizados} atualizados), ${result.inalterados} sem alteração`;
+        }
         if (result.erros > 0) {
             mensagem += `, ${result.erros} erros`;
         }
@@ -0,0 +1,139 @@
+"""
+Benchmark do cache de respostas do dashboard.
+
+Cadastra N ativos e simula a abertura do dashboard por C usuários ao mesmo
+tempo (threads com test_client, cada uma pedindo os endpoints do dashboard),
+com o cache desativado e ativado: execuções das views, latência p50/p99.
+Depois grava uma transferência e mede a latência das requisições enquanto a
+resposta vencida é recalculada em segundo plano, conferindo que o valor novo
+aparece sem que ninguém espere pelo recálculo.
+Uso (a partir de curiango/):  python -m benchmarks.bench_cache_dashboard [n_ativos] [usuarios]
+"""
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+from sqlalchemy import insert, text
+
+from app import create_app
+from app.core.config import Config
+from app.core.db import db
+from app.models.dominio import Ativo, Colaborador
+
+ENDPOINTS = ("resumo", "categorias-detalhadas", "usuarios-resumo", "estatisticas",
+             "status-por-tipo/smartphone", "status-por-tipo/notebook")
+
+
+def _config(diretorio, ttl):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(diretorio, 'bench.db')}"
+        SESSION_BACKEND = "memory"
+        LOG_LEVEL = "ERROR"
+        LOG_FILE = os.path.join(diretorio, "bench.log")
+        DASHBOARD_CACHE_TTL = ttl
+    return BenchConfig
+
+
+def _popular(n_ativos):
+    db.session.execute(insert(Colaborador), [
+        {"id": i, "nome": f"Colaborador {i}", "status": "ativo" if i % 10 else "desligado"} for i in range(1, 5001)
+    ])
+    tipos = ("smartphone", "notebook", "desktop", "chip_sim")
+    condicoes = ("novo", "usado", "danificado", "em_manutencao", "inativo")
+    db.session.execute(insert(Ativo), [
+        {"id": i, "tipo": tipos[i % 4], "condicao": condicoes[i % 5], "valor": 100 + i % 900,
+         "usuario_atual_id": i % 5000 + 1 if i % 3 else None}
+        for i in range(1, n_ativos + 1)
+    ])
+    # View de db/sql/db.sql usada por /api/dashboard/resumo, que o create_all não cria
+    db.session.execute(text("""
+        CREATE VIEW vw_dashboard_contadores AS
+        SELECT tipo, COUNT(*) AS total,
+               SUM(CASE WHEN usuario_atual_id IS NOT NULL THEN 1 ELSE 0 END) AS em_uso,
+               SUM(CASE WHEN usuario_atual_id IS NULL THEN 1 ELSE 0 END) AS em_estoque,
+               SUM(CASE WHEN condicao='inativo' THEN 1 ELSE 0 END) AS inativos,
+               SUM(CASE WHEN condicao='em_manutencao' THEN 1 ELSE 0 END) AS em_manutencao
+        FROM ativos GROUP BY tipo
+    """))
+    db.session.commit()
+
+
+def _abrir_dashboards(app, usuarios):
+    """Todos os usuários abrem o dashboard juntos; retorna as latências (ms) de cada requisição"""
+    latencias = []
+    lock = threading.Lock()
+    largada = threading.Barrier(usuarios)
+
+    def usuario():
+        cliente = app.test_client()
+        largada.wait()
+        for endpoint in ENDPOINTS:
+            inicio = time.perf_counter()
+            resposta = cliente.get(f"/api/dashboard/{endpoint}")
+            ms = (time.perf_counter() - inicio) * 1000
+            assert resposta.status_code == 200, (endpoint, resposta.status_code)
+            with lock:
+                latencias.append(ms)
+
+    threads = [threading.Thread(target=usuario) for _ in range(usuarios)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencias
+
+
+def _percentis(latencias):
+    ordenadas = sorted(latencias)
+    return statistics.median(ordenadas), ordenadas[int(len(ordenadas) * 0.99) - 1]
+
+
+def main():
+    n_ativos = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    usuarios = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    with tempfile.TemporaryDirectory() as diretorio:
+        app = create_app(_config(diretorio, 0))
+        with app.app_context():
+            db.create_all()
+            _popular(n_ativos)
+
+        for ttl in (0, 2):
+            app = create_app(_config(diretorio, ttl))
+            inicio = time.perf_counter()
+            latencias = _abrir_dashboards(app, usuarios)
+            total = time.perf_counter() - inicio
+            p50, p99 = _percentis(latencias)
+            cache = app.extensions.get("cache_respostas")
+            execucoes = sum(m["recalculos"] for m in cache.situacao()["chaves"].values()) if cache else len(latencias)
+            print(f"{'com' if ttl else 'sem'} cache: {usuarios} usuários x {len(ENDPOINTS)} endpoints em {total:5.2f} s  "
+                  f"p50 {p50:7.1f} ms  p99 {p99:7.1f} ms  views executadas: {execucoes}")
+
+        cliente = app.test_client()
+        antes = cliente.get("/api/dashboard/resumo").get_json()["em_uso"]
+        with app.app_context():
+            ativo = db.session.get(Ativo, 3)  # sem usuário (id múltiplo de 3)
+            ativo.usuario_atual_id = 1
+            db.session.commit()
+        latencias, inicio = [], time.perf_counter()
+        while True:
+            t = time.perf_counter()
+            em_uso = cliente.get("/api/dashboard/resumo").get_json()["em_uso"]
+            latencias.append((time.perf_counter() - t) * 1000)
+            if em_uso == antes + 1 or time.perf_counter() - inicio > 10:
+                break
+        print(f"após uma escrita: valor novo em {(time.perf_counter() - inicio) * 1000:.0f} ms, "
+              f"{len(latencias)} requisições, a mais lenta {max(latencias):.1f} ms")
+        metricas = cache.situacao()["chaves"]
+        print("por chave:", {chave.split("|")[0].split(".")[-1] + chave[len(chave.split("|")[0]):]:
+                             {k: v for k, v in m.items() if k in ("hits", "stale", "coalescidas", "recalculos")}
+                             for chave, m in metricas.items()})
+        if em_uso != antes + 1:
+            print("DIVERGÊNCIA: a escrita não apareceu no dashboard")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
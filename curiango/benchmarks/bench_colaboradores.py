@@ -0,0 +1,109 @@
+"""
+Contagem de consultas SQL da listagem de colaboradores.
+
+A listagem deve executar um número fixo de consultas, independente de quantos
+colaboradores/ativos a página contém. Falha (exit 1) se a contagem crescer com N.
+Uso (a partir de curiango/):  python -m benchmarks.bench_colaboradores [n_colaboradores]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from sqlalchemy import event
+
+from app import create_app
+from app.core.config import Config
+from app.core.db import db
+from app.models.dominio import (Ativo, ChipSim, Colaborador, Computador, Marca,
+                                Operadora, Setor, Smartphone)
+from app.services.referencias_service import invalidar_referencia
+
+
+def _config(diretorio):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = "sqlite://"
+        SESSION_BACKEND = "memory"
+        LOG_LEVEL = "ERROR"
+        LOG_FILE = os.path.join(diretorio, "bench.log")
+    return BenchConfig
+
+
+def _popular(n_colaboradores):
+    """Cada colaborador recebe um smartphone, um notebook e um chip"""
+    marca = Marca(nome="Dell")
+    operadora = Operadora(nome="Vivo")
+    setores = [Setor(nome=f"Setor {i}", email_responsavel=f"setor{i}@empresa.local") for i in range(5)]
+    db.session.add_all([marca, operadora, *setores])
+    db.session.flush()
+
+    for i in range(n_colaboradores):
+        c = Colaborador(nome=f"Colaborador {i:04d}", matricula=str(i), setor_id=setores[i % 5].id)
+        db.session.add(c)
+        db.session.flush()
+        for tipo in ("smartphone", "notebook", "chip_sim"):
+            ativo = Ativo(tipo=tipo, usuario_atual_id=c.id)
+            db.session.add(ativo)
+            db.session.flush()
+            if tipo == "smartphone":
+                db.session.add(Smartphone(ativo_id=ativo.id, marca_id=marca.id, modelo="A1", imei_slot=f"imei{ativo.id}"))
+            elif tipo == "notebook":
+                db.session.add(Computador(ativo_id=ativo.id, tipo_computador="notebook", marca_id=marca.id,
+                                          modelo="Latitude", patrimonio=f"PAT{ativo.id}"))
+            else:
+                db.session.add(ChipSim(ativo_id=ativo.id, operadora_id=operadora.id, numero=f"119{ativo.id:08d}"))
+    db.session.commit()
+
+
+def medir(app, client, limit):
+    consultas = []
+
+    def contar(conn, cursor, statement, parameters, context, executemany):
+        consultas.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+        # Mesmo ponto de partida em toda medição: sem o cache de setores, que a página anterior aqueceu
+        invalidar_referencia()
+    event.listen(engine, "before_cursor_execute", contar)
+    try:
+        inicio = time.perf_counter()
+        resposta = client.get(f"/api/colaboradores?limit={limit}")
+        duracao = time.perf_counter() - inicio
+    finally:
+        event.remove(engine, "before_cursor_execute", contar)
+
+    assert resposta.status_code == 200, resposta.status_code
+    itens = resposta.get_json()
+    assert len(itens) == limit and all(c["total_ativos"] == 3 for c in itens)
+    return len(consultas), duracao * 1000
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    with tempfile.TemporaryDirectory() as diretorio:
+        app = create_app(_config(diretorio))
+        with app.app_context():
+            db.create_all()
+            _popular(n)
+
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess["user"] = {"username": "bench", "full_name": "Usuario Bench", "groups": [], "roles": ["usuario"]}
+            sess["last_activity_ts"] = time.time()
+
+        print(f"{'colaboradores':>14}{'consultas':>11}{'ms':>10}")
+        contagens = set()
+        for limit in (1, 10, min(100, n), n):
+            total, ms = medir(app, client, limit)
+            contagens.add(total)
+            print(f"{limit:>14}{total:>11}{ms:>10.1f}")
+
+    if len(contagens) != 1:
+        print("FALHA: número de consultas varia com o tamanho da página")
+        sys.exit(1)
+    print("OK: número de consultas constante")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Benchmark da compressão das respostas nos endpoints grandes.
+
+Cadastra N ativos (com detalhes, alocados a colaboradores) e L logs de
+auditoria com diffs JSON e pede cada endpoint sem compressão, com gzip e com
+brotli (se instalado): bytes transferidos, tempo no servidor e tempo total
+estimado em links de 10 e 100 Mbit/s. Confere que o corpo descomprimido é
+idêntico ao original e que as exportações em streaming continuam chegando
+em vários blocos, cada um decodificável ao chegar.
+Uso (a partir de curiango/):  python -m benchmarks.bench_compressao [n_ativos] [n_logs]
+"""
+import os
+import sys
+import tempfile
+import time
+import zlib
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+from app import create_app
+from app.core.compressao import BROTLI_AVAILABLE
+from app.core.config import Config
+from app.core.db import db
+from app.models.dominio import (Ativo, ChipSim, Colaborador, Computador, LogAuditoria, Marca,
+                                Operadora, Smartphone)
+
+if BROTLI_AVAILABLE:
+    import brotli
+
+ENDPOINTS = (
+    "/api/ativos/export",
+    "/api/colaboradores?limit=500",
+    "/api/auditoria?limite=500",
+    "/api/auditoria/export?formato=csv",
+    "/api/auditoria/export?formato=ndjson",
+)
+LINKS_MBIT = (10, 100)
+
+
+def _config(diretorio):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(diretorio, 'bench.db')}"
+        SESSION_BACKEND = "memory"
+        LOG_LEVEL = "ERROR"
+        LOG_FILE = os.path.join(diretorio, "bench.log")
+        DASHBOARD_CACHE_TTL = 0
+    return BenchConfig
+
+
+def _popular(n_ativos, n_logs):
+    marca = Marca(nome="Dell")
+    operadora = Operadora(nome="Vivo")
+    db.session.add_all([marca, operadora])
+    db.session.flush()
+
+    n_colaboradores = max(n_ativos // 3, 1)
+    db.session.execute(insert(Colaborador), [
+        {"id": i, "nome": f"Colaborador {i:05d}", "matricula": str(i), "email": f"colaborador{i}@empresa.local",
+         "status": "ativo"}
+        for i in range(1, n_colaboradores + 1)
+    ])
+    tipos = ("smartphone", "notebook", "desktop", "chip_sim")
+    agora = datetime.utcnow()
+    db.session.execute(insert(Ativo), [
+        {"id": i, "tipo": tipos[i % 4], "condicao": "usado", "valor": 1234.5 + i,
+         "usuario_atual_id": i % n_colaboradores + 1, "created_at": agora - timedelta(hours=i)}
+        for i in range(1, n_ativos + 1)
+    ])
+    db.session.execute(insert(Smartphone), [
+        {"ativo_id": i, "marca_id": marca.id, "modelo": "Galaxy A54", "imei_slot": f"35{i:013d}", "acessorios": "Capa"}
+        for i in range(1, n_ativos + 1) if i % 4 == 0
+    ])
+    db.session.execute(insert(Computador), [
+        {"ativo_id": i, "tipo_computador": tipos[i % 4], "marca_id": marca.id, "modelo": "Latitude 5440",
+         "patrimonio": f"PAT{i:06d}", "processador": "Intel Core i5-1345U", "memoria": "16GB", "hd": "512GB SSD"}
+        for i in range(1, n_ativos + 1) if i % 4 in (1, 2)
+    ])
+    db.session.execute(insert(ChipSim), [
+        {"ativo_id": i, "operadora_id": operadora.id, "numero": f"119{i:08d}", "tipo": "dados"}
+        for i in range(1, n_ativos + 1) if i % 4 == 3
+    ])
+    db.session.execute(insert(LogAuditoria), [
+        {"usuario": f"usuario{i % 20}", "nivel": "INFO", "acao": "UPDATE", "tabela": "ativos", "registro_id": i,
+         "descricao": f"Ativo {i} transferido", "ip_address": f"10.0.{i % 250}.{i % 200}",
+         "dados_antigos": {"usuario_atual_id": i, "condicao": "novo", "observacao": "Entregue na admissão"},
+         "dados_novos": {"usuario_atual_id": i + 1, "condicao": "usado", "observacao": f"Transferência {i}"},
+         "created_at": agora - timedelta(minutes=i)}
+        for i in range(1, n_logs + 1)
+    ])
+    db.session.commit()
+
+
+def _descomprimir(corpo, encoding):
+    if encoding == "gzip":
+        return zlib.decompress(corpo, 31)
+    if encoding == "br":
+        return brotli.decompress(corpo)
+    return corpo
+
+
+def _pedir(client, url, encoding, repeticoes=3):
+    """(corpo recebido, melhor tempo em ms, blocos recebidos)"""
+    melhor = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resposta = client.get(url, headers={"Accept-Encoding": encoding}, buffered=False)
+        blocos = list(resposta.response)
+        duracao = (time.perf_counter() - inicio) * 1000
+        resposta.close()
+        melhor = duracao if melhor is None else min(melhor, duracao)
+    assert resposta.status_code == 200, (url, resposta.status_code)
+    assert resposta.headers.get("Content-Encoding", "identity") == encoding, (url, resposta.headers.get("Content-Encoding"))
+    return b"".join(blocos), melhor, blocos
+
+
+def _blocos_decodificaveis(blocos, encoding):
+    """Cada bloco comprimido rende dados ao chegar (flush por bloco)"""
+    if encoding == "gzip":
+        descompressor = zlib.decompressobj(31)
+        return all(descompressor.decompress(bloco) for bloco in blocos[:-1])
+    descompressor = brotli.Decompressor()
+    return all(descompressor.process(bloco) for bloco in blocos[:-1])
+
+
+def main():
+    n_ativos = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    n_logs = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    encodings = ("identity", "gzip") + (("br",) if BROTLI_AVAILABLE else ())
+    with tempfile.TemporaryDirectory() as diretorio:
+        app = create_app(_config(diretorio))
+        with app.app_context():
+            db.create_all()
+            _popular(n_ativos, n_logs)
+
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess["user"] = {"username": "bench", "full_name": "Usuario Bench", "groups": [], "roles": ["usuario"]}
+            sess["last_activity_ts"] = time.time()
+
+        if not BROTLI_AVAILABLE:
+            print("brotli não instalado - medindo só gzip")
+        cabecalho = "".join(f"{f'total @{mbit} Mbit/s':>20}" for mbit in LINKS_MBIT)
+        print(f"{'endpoint':<38}{'encoding':>9}{'KiB':>9}{'razão':>7}{'servidor ms':>13}{cabecalho}")
+        falhas = 0
+        for url in ENDPOINTS:
+            original = None
+            for encoding in encodings:
+                corpo, ms, blocos = _pedir(client, url, encoding)
+                if original is None:
+                    original = corpo
+                elif _descomprimir(corpo, encoding) != original:
+                    print(f"FALHA: {url} com {encoding} não descomprime para o corpo original")
+                    falhas += 1
+                streaming = ""
+                if encoding != "identity" and len(blocos) > 2:
+                    ok = _blocos_decodificaveis(blocos, encoding)
+                    falhas += not ok
+                    streaming = f"  ({len(blocos)} blocos{'' if ok else ', FALHA: bloco não decodificável'})"
+                totais = "".join(f"{ms + len(corpo) * 8 / (mbit * 1000):>20.0f}" for mbit in LINKS_MBIT)
+                print(f"{url:<38}{encoding:>9}{len(corpo) / 1024:>9.0f}{len(original) / len(corpo):>6.1f}x"
+                      f"{ms:>13.0f}{totais}{streaming}")
+        if falhas:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
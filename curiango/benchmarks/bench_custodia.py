@@ -0,0 +1,127 @@
+"""
+Benchmark das consultas de custódia em uma data.
+
+Cadastra N ativos, cada um com uma sequência de alocações contíguas em 5 anos
+(a última pode estar em aberto), e mede: consultas individuais por ativo e
+por colaborador (média por consulta) e consultas em lote de 5000 ativos numa
+data e em datas variadas. Os resultados são conferidos contra uma varredura
+em memória de todas as alocações.
+Uso (a partir de curiango/):  python -m benchmarks.bench_custodia [n_ativos] [alocacoes_por_ativo]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, text
+
+from app import create_app
+from app.core.config import Config
+from app.core.db import db
+from app.models.dominio import Ativo, Colaborador, HistoricoAlocacao
+from app.services.custodia_service import custodia, janela
+
+N_COLABORADORES = 5000
+INICIO = datetime(2021, 1, 1)
+
+
+def _config(diretorio):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(diretorio, 'bench.db')}"
+        SESSION_BACKEND = "memory"
+        LOG_LEVEL = "ERROR"
+        LOG_FILE = os.path.join(diretorio, "bench.log")
+    return BenchConfig
+
+
+def _popular(n_ativos, por_ativo):
+    aleatorio = random.Random(42)
+    db.session.execute(insert(Colaborador), [
+        {"id": i, "nome": f"Colaborador {i}", "matricula": f"M{i}", "status": "ativo"} for i in range(1, N_COLABORADORES + 1)
+    ])
+    db.session.execute(insert(Ativo), [{"id": i, "tipo": "notebook", "condicao": "usado"} for i in range(1, n_ativos + 1)])
+    intervalos = []
+    for ativo_id in range(1, n_ativos + 1):
+        inicio = INICIO + timedelta(minutes=aleatorio.randint(0, 60 * 24 * 30))
+        for k in range(por_ativo):
+            fim = inicio + timedelta(minutes=aleatorio.randint(60 * 24, 60 * 24 * 120))
+            aberto = k == por_ativo - 1 and ativo_id % 2
+            intervalos.append({"ativo_id": ativo_id, "colaborador_id": aleatorio.randint(1, N_COLABORADORES),
+                               "data_inicio": inicio, "data_fim": None if aberto else fim})
+            # Devolvido e realocado depois de algumas horas ou dias
+            inicio = fim + timedelta(minutes=aleatorio.randint(0, 60 * 24 * 10))
+    for lote in range(0, len(intervalos), 20000):
+        db.session.execute(insert(HistoricoAlocacao), intervalos[lote:lote + 20000])
+    # Índices de db/sql/db.sql (PARTE 15), que o create_all não cria
+    db.session.execute(text("CREATE INDEX idx_historico_ativo_periodo ON historico_alocacoes(ativo_id, data_inicio, data_fim)"))
+    db.session.execute(text("CREATE INDEX idx_historico_colaborador_periodo ON historico_alocacoes(colaborador_id, data_inicio, data_fim)"))
+    db.session.commit()
+    return intervalos
+
+
+def _esperado(intervalos, campo, registro_id, inicio, fim):
+    return sorted(
+        (i["colaborador_id"] if campo == "ativo_id" else i["ativo_id"])
+        for i in intervalos
+        if i[campo] == registro_id and i["data_inicio"] < fim and (i["data_fim"] is None or i["data_fim"] > inicio)
+    )
+
+
+def main():
+    n_ativos = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    por_ativo = int(sys.argv[2]) if len(sys.argv) > 2 else 25
+    aleatorio = random.Random(7)
+    with tempfile.TemporaryDirectory() as diretorio:
+        config = _config(diretorio)
+        app = create_app(config)
+        with app.app_context():
+            db.create_all()
+        app = create_app(config)
+        with app.app_context():
+            intervalos = _popular(n_ativos, por_ativo)
+            print(f"{len(intervalos)} alocações de {n_ativos} ativos")
+            por_ativo_id, por_colaborador_id = {}, {}
+            for intervalo in intervalos:
+                por_ativo_id.setdefault(intervalo["ativo_id"], []).append(intervalo)
+                por_colaborador_id.setdefault(intervalo["colaborador_id"], []).append(intervalo)
+
+            def data_aleatoria():
+                momento = INICIO + timedelta(seconds=aleatorio.randint(0, 5 * 365 * 86400))
+                return momento.date().isoformat() if aleatorio.random() < 0.3 else momento.isoformat()
+
+            divergencias = 0
+            for lado, campo, indice in (("ativo", "ativo_id", por_ativo_id), ("colaborador", "colaborador_id", por_colaborador_id)):
+                ids = sorted(indice)
+                consultas = [(aleatorio.choice(ids), janela(data_aleatoria())) for _ in range(500)]
+                inicio = time.perf_counter()
+                resultados = [custodia(lado, [consulta])[0] for consulta in consultas]
+                ms = (time.perf_counter() - inicio) * 1000 / len(consultas)
+                outra = "colaborador_id" if lado == "ativo" else "ativo_id"
+                for (registro_id, (ini, fim)), resultado in zip(consultas, resultados):
+                    obtido = sorted(a[outra] for a in resultado["alocacoes"])
+                    divergencias += obtido != _esperado(indice[registro_id], campo, registro_id, ini, fim)
+                print(f"individual por {lado:<12} {ms:6.2f} ms por consulta")
+
+            ids = sorted(por_ativo_id)
+            data = janela("2024-06-15T10:00:00")
+            for nome, consultas in (
+                ("lote de 5000 ativos, 1 data", [(aleatorio.choice(ids), data) for _ in range(5000)]),
+                ("lote de 5000 ativos, datas variadas", [(aleatorio.choice(ids), janela(data_aleatoria())) for _ in range(5000)]),
+            ):
+                inicio = time.perf_counter()
+                resultados = custodia("ativo", consultas)
+                ms = (time.perf_counter() - inicio) * 1000
+                for (registro_id, (ini, fim)), resultado in zip(consultas, resultados):
+                    obtido = sorted(a["colaborador_id"] for a in resultado["alocacoes"])
+                    divergencias += obtido != _esperado(por_ativo_id[registro_id], "ativo_id", registro_id, ini, fim)
+                print(f"{nome:<38} {ms:7.1f} ms")
+
+            print(f"divergências: {divergencias}")
+            if divergencias:
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
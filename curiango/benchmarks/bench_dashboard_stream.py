@@ -0,0 +1,171 @@
+"""
+Benchmark da carga no banco com dashboards abertos.
+
+Cadastra N ativos e conecta C clientes ao dashboard em tempo real (direto no
+transmissor, sem HTTP). Mede as consultas feitas em uma janela de S segundos
+sem escritas e com uma escrita por segundo, e compara com o que os mesmos
+clientes fariam consultando os endpoints do dashboard a cada 5 minutos e a
+cada 30 segundos. Confere que o estado final recebido é o recalculado do zero.
+Uso (a partir de curiango/):  python -m benchmarks.bench_dashboard_stream [n_ativos] [clientes] [segundos]
+"""
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from sqlalchemy import event, insert, text
+
+from app import create_app
+from app.core.config import Config
+from app.core.db import db
+from app.models.dominio import Ativo, Colaborador, LogAuditoria
+from app.services.dashboard_tempo_real_service import calcular_contadores, obter_transmissor
+
+ENDPOINTS = ("resumo", "graficos", "estatisticas", "categorias-detalhadas", "usuarios-resumo",
+             "status-por-tipo/smartphone", "status-por-tipo/notebook", "status-por-tipo/desktop", "status-por-tipo/chip_sim")
+
+
+def _config(diretorio):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(diretorio, 'bench.db')}"
+        SESSION_BACKEND = "memory"
+        LOG_LEVEL = "ERROR"
+        LOG_FILE = os.path.join(diretorio, "bench.log")
+        DASHBOARD_SSE_INTERVAL = 1
+        DASHBOARD_SSE_MAX_CLIENTS = 10000
+    return BenchConfig
+
+
+def _popular(n_ativos):
+    db.session.execute(insert(Colaborador), [
+        {"id": i, "nome": f"Colaborador {i}", "status": "ativo" if i % 10 else "desligado"} for i in range(1, 2001)
+    ])
+    tipos = ("smartphone", "notebook", "desktop", "chip_sim")
+    condicoes = ("novo", "usado", "danificado", "em_manutencao", "inativo")
+    db.session.execute(insert(Ativo), [
+        {"id": i, "tipo": tipos[i % 4], "condicao": condicoes[i % 5], "valor": 100 + i % 900,
+         "usuario_atual_id": i % 2000 + 1 if i % 3 else None}
+        for i in range(1, n_ativos + 1)
+    ])
+    # View de db/sql/db.sql usada por /api/dashboard/resumo, que o create_all não cria
+    db.session.execute(text("""
+        CREATE VIEW vw_dashboard_contadores AS
+        SELECT tipo, COUNT(*) AS total,
+               SUM(CASE WHEN usuario_atual_id IS NOT NULL THEN 1 ELSE 0 END) AS em_uso,
+               SUM(CASE WHEN usuario_atual_id IS NULL THEN 1 ELSE 0 END) AS em_estoque,
+               SUM(CASE WHEN condicao='inativo' THEN 1 ELSE 0 END) AS inativos,
+               SUM(CASE WHEN condicao='em_manutencao' THEN 1 ELSE 0 END) AS em_manutencao
+        FROM ativos GROUP BY tipo
+    """))
+    db.session.commit()
+
+
+class _Contador:
+    """Consultas feitas pela thread do dashboard em tempo real (total: todas)"""
+
+    def __init__(self, engine):
+        self.total = 0
+        self.transmissor = 0
+        self._lock = threading.Lock()
+        event.listen(engine, "before_cursor_execute", self._contar)
+
+    def _contar(self, *args, **kwargs):
+        with self._lock:
+            self.total += 1
+            self.transmissor += threading.current_thread().name == "dashboard-sse"
+
+
+def _ler(fila, recebidos):
+    while True:
+        evento = fila.get()
+        if evento is None:
+            return
+        recebidos.append(evento)
+
+
+def main():
+    n_ativos = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    n_clientes = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    segundos = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+    with tempfile.TemporaryDirectory() as diretorio:
+        config = _config(diretorio)
+        app = create_app(config)
+        with app.app_context():
+            db.create_all()
+        app = create_app(config)
+        with app.app_context():
+            _popular(n_ativos)
+            contador = _Contador(db.engine)
+
+            cliente = app.test_client()
+            antes = contador.total
+            for endpoint in ENDPOINTS:
+                cliente.get(f"/api/dashboard/{endpoint}")
+            por_atualizacao = contador.total - antes
+
+            transmissor = obter_transmissor()
+            antes = contador.total
+            inicio = time.perf_counter()
+            conexoes = [transmissor.conectar() for _ in range(n_clientes)]
+            ms_conectar = (time.perf_counter() - inicio) * 1000
+            consultas_conexao = contador.total - antes
+            recebidos = [[] for _ in conexoes]
+            leitores = [threading.Thread(target=_ler, args=(fila, lista), daemon=True)
+                        for (fila, _), lista in zip(conexoes, recebidos)]
+            for leitor in leitores:
+                leitor.start()
+
+            antes = contador.transmissor
+            time.sleep(segundos)
+            ociosas = contador.transmissor - antes
+
+            antes = contador.transmissor
+            for i in range(segundos):
+                ativo = db.session.get(Ativo, i + 1)
+                ativo.usuario_atual_id = None if ativo.usuario_atual_id else 1
+                db.session.add(LogAuditoria(usuario="bench", nivel="INFO", acao="TRANSFER", tabela="ativos",
+                                            registro_id=ativo.id, descricao=f"Transferência {i}"))
+                db.session.commit()
+                time.sleep(1)
+            time.sleep(2)
+            escritas = contador.transmissor - antes
+
+            print(f"{n_clientes} clientes conectados em {ms_conectar:.0f} ms ({consultas_conexao} consultas)")
+            print(f"{segundos} s sem escritas: {ociosas} consultas; com 1 escrita/s: {escritas} consultas")
+            for intervalo in (300, 30):
+                print(f"consultas periódicas a cada {intervalo:>3} s: ~{por_atualizacao * n_clientes * segundos // intervalo} "
+                      f"consultas em {segundos} s ({por_atualizacao} por atualização)")
+
+            # Estado inicial + deltas de cada cliente = contadores recalculados do zero
+            esperado = calcular_contadores()
+            divergencias = 0
+            for (_, estado), lista in zip(conexoes, recebidos):
+                atual = json.loads(estado.split("data: ", 1)[1])
+                for evento in lista:
+                    nome, dados = evento.split("\n", 1)
+                    if nome == "event: delta":
+                        _mesclar(atual, json.loads(dados.split("data: ", 1)[1]))
+                atual.pop("atividades")
+                divergencias += atual != esperado
+            for fila, _ in conexoes:
+                transmissor.desconectar(fila)
+                fila.put(None)
+            print(f"eventos por cliente: {len(recebidos[0])}  divergências: {divergencias}")
+            if divergencias:
+                sys.exit(1)
+
+
+def _mesclar(destino, mudancas):
+    for chave, valor in mudancas.items():
+        if valor is None:
+            destino.pop(chave, None)
+        elif isinstance(valor, dict):
+            _mesclar(destino.setdefault(chave, {}), valor)
+        else:
+            destino[chave] = valor
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Benchmark do cálculo de valor contábil (depreciação) da carteira.
+
+Cadastra N ativos com valores e datas de aquisição variadas, distribuídos em
+unidades de negócio e setores, e mede o relatório nos dois métodos: primeiro
+cálculo (consulta + cálculo), chamada em cache e, para comparação, o mesmo
+cálculo em Python puro. Confere que os dois motores chegam aos mesmos totais.
+Uso (a partir de curiango/):  python -m benchmarks.bench_depreciacao [n_ativos]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+from app import create_app
+from app.core.config import Config
+from app.core.db import db
+from app.models.dominio import Ativo, Colaborador, Setor, UnidadeNegocio
+from app.services import depreciacao_service
+
+
+def _config(diretorio):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(diretorio, 'bench.db')}"
+        SESSION_BACKEND = "memory"
+        LOG_LEVEL = "ERROR"
+        LOG_FILE = os.path.join(diretorio, "bench.log")
+    return BenchConfig
+
+
+def _popular(n_ativos):
+    aleatorio = random.Random(42)
+    db.session.add_all([UnidadeNegocio(nome=f"Unidade {i}") for i in range(1, 21)])
+    db.session.add_all([Setor(nome=f"Setor {i}", email_responsavel=f"setor{i}@empresa.com") for i in range(1, 51)])
+    db.session.flush()
+    db.session.execute(insert(Colaborador), [
+        {"id": i, "nome": f"Colaborador {i}", "matricula": f"M{i}", "email": f"c{i}@empresa.com",
+         "setor_id": i % 50 + 1, "status": "ativo"}
+        for i in range(1, 5001)
+    ])
+    agora = datetime.utcnow()
+    tipos = ("smartphone", "notebook", "desktop", "chip_sim")
+    db.session.execute(insert(Ativo), [
+        {"id": i, "tipo": tipos[i % 4], "condicao": "usado",
+         "valor": round(aleatorio.uniform(50, 9000), 2) if i % 25 else None,
+         "unidade_negocio_id": i % 20 + 1 if i % 10 else None,
+         "usuario_atual_id": i % 5000 + 1 if i % 3 else None,
+         "created_at": agora - timedelta(days=aleatorio.randint(0, 8 * 365))}
+        for i in range(1, n_ativos + 1)
+    ])
+    db.session.commit()
+
+
+def _cronometrar(funcao):
+    inicio = time.perf_counter()
+    resultado = funcao()
+    return resultado, (time.perf_counter() - inicio) * 1000
+
+
+def main():
+    n_ativos = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    with tempfile.TemporaryDirectory() as diretorio:
+        config = _config(diretorio)
+        app = create_app(config)
+        with app.app_context():
+            db.create_all()
+        app = create_app(config)
+        with app.app_context():
+            _popular(n_ativos)
+            falhou = False
+            for metodo in depreciacao_service.METODOS:
+                depreciacao_service._cache.clear()
+                resultado, ms_primeiro = _cronometrar(lambda: depreciacao_service.valor_contabil(metodo))
+                _, ms_cache = _cronometrar(lambda: depreciacao_service.valor_contabil(metodo))
+
+                motor_original = depreciacao_service.NUMPY_AVAILABLE
+                depreciacao_service.NUMPY_AVAILABLE = False
+                depreciacao_service._cache.clear()
+                try:
+                    python, ms_python = _cronometrar(lambda: depreciacao_service.valor_contabil(metodo))
+                finally:
+                    depreciacao_service.NUMPY_AVAILABLE = motor_original
+                    depreciacao_service._cache.clear()
+
+                total = resultado["total"]
+                print(f"{metodo:<18} {resultado['motor']}: {ms_primeiro:7.1f} ms "
+                      f"(consulta {resultado['tempo_ms']['consulta']:.0f} ms, cálculo {resultado['tempo_ms']['calculo']:.0f} ms)  "
+                      f"em cache: {ms_cache:5.2f} ms  python: {ms_python:7.1f} ms "
+                      f"(cálculo {python['tempo_ms']['calculo']:.0f} ms)")
+                print(f"{'':<18} aquisição {total['valor_aquisicao']:,.2f}  contábil {total['valor_contabil']:,.2f}  "
+                      f"tipos {len(resultado['por_tipo'])}  unidades {len(resultado['por_unidade'])}  "
+                      f"setores {len(resultado['por_setor'])}")
+                if abs(total["valor_contabil"] - python["total"]["valor_contabil"]) > 0.05 or \
+                        total["quantidade"] != n_ativos:
+                    print(f"{'':<18} DIVERGÊNCIA: python {python['total']}")
+                    falhou = True
+            if falhou:
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
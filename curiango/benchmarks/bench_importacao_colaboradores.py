@@ -0,0 +1,108 @@
+"""
+Benchmark da importação de colaboradores via CSV.
+
+Gera um arquivo de RH com N linhas (1/3 atualizando colaboradores existentes,
+o resto novos, mais algumas linhas inválidas) e mede tempo e número de
+instruções SQL da importação. Uma segunda carga do mesmo arquivo deve sair
+toda como "inalterado", sem nenhuma gravação.
+Uso (a partir de curiango/):  python -m benchmarks.bench_importacao_colaboradores [n_linhas]
+"""
+import csv
+import io
+import os
+import sys
+import tempfile
+import time
+
+from sqlalchemy import event, insert
+
+from app import create_app
+from app.core.config import Config
+from app.core.db import db
+from app.models.dominio import Colaborador, Setor
+from app.services.importacao_colaboradores_service import importar_colaboradores_csv
+
+CAMPOS_CSV = ("nome", "matricula", "cpf", "email", "cargo", "setor_id", "status")
+
+
+def _config(diretorio):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(diretorio, 'bench.db')}"
+        SESSION_BACKEND = "memory"
+        LOG_LEVEL = "ERROR"
+        LOG_FILE = os.path.join(diretorio, "bench.log")
+    return BenchConfig
+
+
+def _popular(n_existentes):
+    db.session.add_all([
+        Setor(nome=f"Setor {i}", email_responsavel=f"setor{i}@empresa.com", ativo=i != 5) for i in range(1, 11)
+    ])
+    db.session.flush()
+    db.session.execute(insert(Colaborador), [
+        {"nome": f"Colaborador {i}", "matricula": f"M{i:06d}", "cpf": f"{i:011d}", "email": f"c{i}@empresa.com",
+         "cargo": "Analista", "setor_id": 1, "status": "ativo"}
+        for i in range(1, n_existentes + 1)
+    ])
+    db.session.commit()
+
+
+def _csv(n_linhas, n_existentes):
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(CAMPOS_CSV)
+    for i in range(1, n_linhas + 1):
+        if i % 500 == 0:
+            escritor.writerow(("", f"M{i:06d}", "", f"c{i}@empresa.com", "", "abc", ""))  # inválida
+            continue
+        cargo = "Coordenador" if i <= n_existentes and i % 2 else "Analista"
+        escritor.writerow((f"Colaborador {i}\u200b", f"M{i:06d}", f"{i:011d}", f" c{i}@empresa.com ",
+                           cargo, str(i % 10 + 1), "ativo"))
+    return buffer.getvalue()
+
+
+def _importar(conteudo):
+    instrucoes = []
+    contar = lambda *args, **kwargs: instrucoes.append(1)
+    event.listen(db.engine, "before_cursor_execute", contar)
+    try:
+        inicio = time.perf_counter()
+        relatorio = importar_colaboradores_csv(conteudo)
+        return relatorio, (time.perf_counter() - inicio) * 1000, len(instrucoes)
+    finally:
+        event.remove(db.engine, "before_cursor_execute", contar)
+
+
+def main():
+    n_linhas = int(sys.argv[1]) if len(sys.argv) > 1 else 15000
+    n_existentes = n_linhas // 3
+    with tempfile.TemporaryDirectory() as diretorio:
+        config = _config(diretorio)
+        app = create_app(config)
+        with app.app_context():
+            db.create_all()
+        app = create_app(config)
+        with app.app_context():
+            _popular(n_existentes)
+            conteudo = _csv(n_linhas, n_existentes)
+
+            criados = 0
+            for carga in ("primeira carga", "recarga"):
+                relatorio, ms, instrucoes = _importar(conteudo)
+                contagem = relatorio["contagem"]
+                criados += contagem["criado"]
+                print(f"{carga:<16}{ms:>9.0f} ms {relatorio['estatisticas']['linhas_por_segundo']:>8} linhas/s "
+                      f"{instrucoes:>5} instruções SQL  {contagem}")
+            if contagem["criado"] or contagem["atualizado"]:
+                print("FALHA: a recarga do mesmo arquivo gravou alterações")
+                sys.exit(1)
+
+            total = db.session.query(Colaborador).count()
+            esperado = n_existentes + criados
+            if total != esperado:
+                print(f"FALHA: {total} colaboradores no banco, esperado {esperado}")
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark da ingestão de relatórios dos agentes de inventário.
+
+Cadastra N computadores e simula rodadas de check-in (uma requisição por
+máquina): a primeira só grava as impressões (fatos iguais ao cadastro), a
+segunda repete os mesmos fatos (nenhuma escrita esperada) e a terceira altera
+a memória de 10% das máquinas (um log de auditoria por máquina alterada).
+Mostra requisições/s e as instruções SQL de cada rodada, incluindo a gravação
+em lote. No SQLite os logs de auditoria saem um INSERT por linha (o ORM
+precisa dos ids); no MariaDB 10.5+ saem agrupados com RETURNING.
+Uso (a partir de curiango/):  python -m benchmarks.bench_ingestao_agentes [n_maquinas]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from sqlalchemy import event, insert
+
+from app import create_app
+from app.core.config import Config
+from app.core.db import db
+from app.models.dominio import Ativo, Computador, LogAuditoria
+from app.services.inventario_agente_service import obter_ingestao
+
+TOKEN = "bench"
+
+
+def _config(diretorio):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(diretorio, 'bench.db')}"
+        SESSION_BACKEND = "memory"
+        LOG_LEVEL = "ERROR"
+        LOG_FILE = os.path.join(diretorio, "bench.log")
+        AGENT_TOKEN = TOKEN
+        AGENT_BATCH_INTERVAL = 3600  # lotes disparados manualmente
+        AGENT_BATCH_SIZE = 10 ** 9
+    return BenchConfig
+
+
+def _popular(n_maquinas):
+    db.session.execute(insert(Ativo), [{"id": i, "tipo": "notebook", "condicao": "usado"} for i in range(1, n_maquinas + 1)])
+    db.session.execute(insert(Computador), [
+        {"ativo_id": i, "tipo_computador": "notebook", "patrimonio": f"PAT{i}", "serie": f"SN{i}",
+         "so_versao": "Windows 11 23H2", "processador": "i5", "memoria": "8GB", "hd": "SSD 256GB"}
+        for i in range(1, n_maquinas + 1)
+    ])
+    db.session.commit()
+
+
+def _relatorio(i, memoria):
+    # Metade dos agentes só conhece o número de série
+    identificacao = {"patrimonio": f"PAT{i}"} if i % 2 else {"serie": f"SN{i}"}
+    return {**identificacao, "hostname": f"NB-{i:05d}", "so_versao": "Windows 11 23H2",
+            "processador": "i5", "memoria": memoria, "hd": "SSD 256GB"}
+
+
+def main():
+    n_maquinas = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    with tempfile.TemporaryDirectory() as diretorio:
+        config = _config(diretorio)
+        app = create_app(config)
+        with app.app_context():
+            db.create_all()
+        app = create_app(config)
+        with app.app_context():
+            _popular(n_maquinas)
+            engine = db.engine
+        client = app.test_client()
+        cabecalhos = {"X-Agent-Token": TOKEN}
+
+        instrucoes = []
+        event.listen(engine, "before_cursor_execute", lambda *args, **kwargs: instrucoes.append(1))
+        rodadas = (
+            ("primeiro check-in", lambda i: "8GB"),
+            ("sem mudança", lambda i: "8GB"),
+            ("10% alteradas", lambda i: "16GB" if i % 10 == 0 else "8GB"),
+        )
+        for nome, memoria in rodadas:
+            instrucoes.clear()
+            inicio = time.perf_counter()
+            for i in range(1, n_maquinas + 1):
+                resposta = client.post("/api/agentes/inventario", json=_relatorio(i, memoria(i)), headers=cabecalhos)
+                assert resposta.status_code in (200, 202), resposta.get_json()
+            segundos = time.perf_counter() - inicio
+            consultas_requisicoes = len(instrucoes)
+            with app.app_context():
+                resumo = obter_ingestao().descarregar()
+            print(f"{nome:<20}{n_maquinas / segundos:>8.0f} req/s  SQL nas requisições: {consultas_requisicoes:>4}  "
+                  f"SQL no lote: {len(instrucoes) - consultas_requisicoes:>4}  lote: {resumo}")
+
+        with app.app_context():
+            logs = db.session.query(LogAuditoria).filter(LogAuditoria.usuario == "Agente de inventário").count()
+            print(f"logs de auditoria do agente: {logs} (esperado {n_maquinas // 10})")
+            if logs != n_maquinas // 10:
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Roteamento de leituras para a réplica, com dois arquivos SQLite.
+
+O primário é populado e copiado para a réplica (uma cópia parada: toda
+escrita posterior fica "atrasada" nela). Confere e mede:
+- carga: consultas de dashboard, listagens, busca e exportações executadas em
+  cada banco, com e sem réplica, e que as respostas são as mesmas;
+- leitura das próprias escritas: quem criou um setor o vê na listagem logo
+  em seguida (primário), outro usuário lê da réplica até REPLICA_STICKY_SECONDS;
+- fallback: com a réplica inacessível os mesmos endpoints respondem 200 pelo primário.
+Com MariaDB, o mesmo vale apontando SQLALCHEMY_DATABASE_URI e
+SQLALCHEMY_REPLICA_URI para dois containers (ver README_API).
+Uso (a partir de curiango/):  python -m benchmarks.bench_replica [n_ativos]
+"""
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+from sqlalchemy import event, text
+
+from app import create_app
+from app.core.db import BIND_REPLICA, db
+from app.services.ativos_service import reconstruir_projecao
+from benchmarks.bench_compressao import _config as _config_base, _popular
+
+ENDPOINTS = (
+    "/api/dashboard/resumo", "/api/dashboard/graficos", "/api/dashboard/estatisticas",
+    "/api/dashboard/categorias-detalhadas", "/api/dashboard/usuarios-resumo", "/api/dashboard/depreciacao",
+    "/api/ativos?limit=500", "/api/colaboradores?limit=500", "/api/setores", "/api/auditoria?limite=500",
+    "/api/ativos/export", "/api/colaboradores/export", "/api/auditoria/export?formato=ndjson",
+)
+STICKY = 2
+
+
+def _config(diretorio, replica_uri):
+    class ReplicaConfig(_config_base(diretorio)):
+        SQLALCHEMY_REPLICA_URI = replica_uri
+        REPLICA_STICKY_SECONDS = STICKY
+        REPLICA_CHECK_INTERVAL = 1
+    return ReplicaConfig
+
+
+class _Contador:
+    def __init__(self, engines):
+        self.por_banco = dict.fromkeys(engines, 0)
+        self._lock = threading.Lock()
+        for nome, engine in engines.items():
+            event.listen(engine, "before_cursor_execute", self._contar(nome))
+
+    def _contar(self, nome):
+        def contar(*args, **kwargs):
+            with self._lock:
+                self.por_banco[nome] += 1
+        return contar
+
+    def zerar(self):
+        with self._lock:
+            self.por_banco = dict.fromkeys(self.por_banco, 0)
+
+
+def _cliente(app, usuario):
+    cliente = app.test_client()
+    with cliente.session_transaction() as sess:
+        sess["user"] = {"username": usuario, "full_name": usuario, "groups": [], "roles": ["admin"]}
+        sess["last_activity_ts"] = time.time()
+    return cliente
+
+
+def _ler_tudo(cliente):
+    respostas = {}
+    inicio = time.perf_counter()
+    for url in ENDPOINTS:
+        resposta = cliente.get(url)
+        assert resposta.status_code == 200, (url, resposta.status_code, resposta.data[:200])
+        dados = resposta.get_json() if resposta.is_json else resposta.data
+        if isinstance(dados, dict):
+            dados.pop("tempo_ms", None)
+        respostas[url] = dados
+    return respostas, (time.perf_counter() - inicio) * 1000
+
+
+def _setores(cliente):
+    return {s["nome"] for s in cliente.get("/api/setores").get_json()}
+
+
+def main():
+    n_ativos = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    falhas = []
+    with tempfile.TemporaryDirectory() as diretorio:
+        app = create_app(_config(diretorio, ""))
+        with app.app_context():
+            db.create_all()
+            _popular(n_ativos, n_ativos)
+            # View de db/sql/db.sql usada por /api/dashboard/resumo, que o create_all não cria
+            db.session.execute(text("""
+                CREATE VIEW vw_dashboard_contadores AS
+                SELECT tipo, COUNT(*) AS total,
+                       SUM(CASE WHEN usuario_atual_id IS NOT NULL THEN 1 ELSE 0 END) AS em_uso,
+                       SUM(CASE WHEN usuario_atual_id IS NULL THEN 1 ELSE 0 END) AS em_estoque,
+                       SUM(CASE WHEN condicao='inativo' THEN 1 ELSE 0 END) AS inativos,
+                       SUM(CASE WHEN condicao='em_manutencao' THEN 1 ELSE 0 END) AS em_manutencao
+                FROM ativos GROUP BY tipo
+            """))
+            db.session.commit()
+            reconstruir_projecao()
+            db.engine.dispose()
+        caminho_replica = os.path.join(diretorio, "replica.db")
+        shutil.copy(os.path.join(diretorio, "bench.db"), caminho_replica)
+
+        # Carga por banco: sem réplica x com réplica
+        sem_replica, _ = _ler_tudo(_cliente(app, "leitor"))
+        app = create_app(_config(diretorio, f"sqlite:///{caminho_replica}"))
+        with app.app_context():
+            contador = _Contador({"primário": db.engine, "réplica": db.engines[BIND_REPLICA]})
+        leitor = _cliente(app, "leitor")
+        _ler_tudo(leitor)  # aquece caches de referência e a checagem da réplica
+        contador.zerar()
+        com_replica, ms = _ler_tudo(leitor)
+        print(f"{len(ENDPOINTS)} endpoints de leitura em {ms:.0f} ms - consultas por banco: {contador.por_banco}")
+        if contador.por_banco["primário"]:
+            falhas.append("leituras roteadas ainda consultaram o primário")
+        diferentes = [url for url in ENDPOINTS if com_replica[url] != sem_replica[url]]
+        if diferentes:
+            falhas.append(f"respostas diferentes com réplica: {diferentes}")
+
+        # Leitura das próprias escritas
+        escritor = _cliente(app, "escritor")
+        resposta = escritor.post("/api/setores", json={"nome": "Setor novo", "email_responsavel": "novo@empresa.local"})
+        assert resposta.status_code in (200, 201), resposta.data
+        contador.zerar()
+        viu_escritor = "Setor novo" in _setores(escritor)
+        viu_outro = "Setor novo" in _setores(leitor)
+        print(f"após criar um setor: escritor vê o setor: {viu_escritor} (primário); "
+              f"outro usuário vê: {viu_outro} (réplica parada) - consultas {contador.por_banco}")
+        time.sleep(STICKY + 0.1)
+        viu_depois = "Setor novo" in _setores(escritor)
+        print(f"após {STICKY} s o escritor volta a ler da réplica (parada): vê o setor: {viu_depois}")
+        if not viu_escritor or viu_outro or viu_depois:
+            falhas.append("roteamento após escrita incorreto")
+
+        # Réplica fora do ar: troca o arquivo por um banco vazio (sem tabelas) e espera a próxima checagem
+        with sqlite3.connect(caminho_replica) as conn:
+            for tipo, nome in conn.execute("SELECT type, name FROM sqlite_master WHERE type IN ('table', 'view')").fetchall():
+                conn.execute(f'DROP {tipo.upper()} "{nome}"')
+        with app.app_context():
+            db.engines[BIND_REPLICA].dispose()
+        time.sleep(1.1)
+        contador.zerar()
+        com_falha, ms = _ler_tudo(leitor)
+        with app.test_request_context():
+            situacao = app.extensions["replica"].situacao()
+        print(f"réplica sem tabelas: {len(ENDPOINTS)} endpoints 200 em {ms:.0f} ms - consultas {contador.por_banco}; "
+              f"fallbacks {situacao['fallbacks']}, falhas {situacao['falhas']}")
+        if contador.por_banco["primário"] == 0:
+            falhas.append("sem fallback para o primário")
+
+    for falha in falhas:
+        print(f"FALHA: {falha}")
+    if falhas:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
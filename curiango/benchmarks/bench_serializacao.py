@@ -0,0 +1,193 @@
+"""
+Benchmark da serialização de respostas grandes: exportação de ativos e páginas de auditoria.
+
+Compara a montagem anterior (dict por linha com ifs, pytz localize a cada data,
+json padrão) com os serializadores pré-compilados, o fuso em cache e o provider
+orjson (se instalado). Também confere que as duas saídas são equivalentes.
+Uso (a partir de curiango/):  python -m benchmarks.bench_serializacao [n_ativos] [n_logs]
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import pytz
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import insert
+
+from app import create_app
+from app.api.ativos import _CAMPOS_EXPORTACAO
+from app.core.config import Config
+from app.core.db import db
+from app.core.serializacao import ORJSON_AVAILABLE, compilar_serializador
+from app.models.dominio import (Ativo, ChipSim, Computador, LogAuditoria, Marca,
+                                Operadora, Smartphone)
+from app.services.ativos_service import consultar_projecao, fonte_projecao
+from app.services.auditoria_service import converter_log_para_dict
+
+TAMANHO_PAGINA_AUDITORIA = 500
+
+
+def _config(diretorio):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = "sqlite://"
+        SESSION_BACKEND = "memory"
+        LOG_LEVEL = "ERROR"
+        LOG_FILE = os.path.join(diretorio, "bench.log")
+    return BenchConfig
+
+
+def _popular(n_ativos, n_logs):
+    marca = Marca(nome="Dell")
+    operadora = Operadora(nome="Vivo")
+    db.session.add_all([marca, operadora])
+    db.session.flush()
+
+    tipos = ("smartphone", "notebook", "desktop", "chip_sim")
+    agora = datetime.utcnow()
+    db.session.execute(insert(Ativo), [
+        {"id": i, "tipo": tipos[i % 4], "condicao": "novo", "valor": 1234.5 + i, "created_at": agora - timedelta(hours=i)}
+        for i in range(1, n_ativos + 1)
+    ])
+    db.session.execute(insert(Smartphone), [
+        {"ativo_id": i, "marca_id": marca.id, "modelo": "A1", "imei_slot": f"imei{i}", "acessorios": "Capa"}
+        for i in range(1, n_ativos + 1) if i % 4 == 0
+    ])
+    db.session.execute(insert(Computador), [
+        {"ativo_id": i, "tipo_computador": tipos[i % 4], "marca_id": marca.id, "modelo": "Latitude",
+         "patrimonio": f"PAT{i}", "processador": "i5", "memoria": "16GB", "hd": "512GB"}
+        for i in range(1, n_ativos + 1) if i % 4 in (1, 2)
+    ])
+    db.session.execute(insert(ChipSim), [
+        {"ativo_id": i, "operadora_id": operadora.id, "numero": f"119{i:08d}", "tipo": "dados"}
+        for i in range(1, n_ativos + 1) if i % 4 == 3
+    ])
+    db.session.execute(insert(LogAuditoria), [
+        {"usuario": "bench", "nivel": "INFO", "acao": "UPDATE", "tabela": "ativos", "registro_id": i,
+         "descricao": f"Ativo {i} atualizado", "dados_antigos": {"condicao": "novo"},
+         "dados_novos": {"condicao": "em_uso"}, "ip_address": "10.0.0.1", "created_at": agora - timedelta(minutes=i)}
+        for i in range(1, n_logs + 1)
+    ])
+    db.session.commit()
+
+
+# Implementação anterior, mantida aqui como referência de comparação
+def _isoformat_anterior(dt):
+    return pytz.UTC.localize(dt).astimezone(Config.TIMEZONE).isoformat() if dt else None
+
+
+def _exportacao_anterior(p):
+    return {
+        "id": p.ativo_id,
+        "tipo": p.tipo,
+        "condicao": p.condicao or "",
+        "valor": f"{float(p.valor or 0):.2f}".replace('.', ','),
+        "usuario_atual": p.usuario_atual_nome or "",
+        "unidade_negocio_id": p.unidade_negocio_id or "",
+        "unidade_negocio_nome": p.unidade_negocio_nome or "",
+        "created_at": p.created_at.strftime('%d/%m/%Y %H:%M:%S') if p.created_at else "",
+        "marca_id": p.marca_id or "",
+        "marca_nome": p.marca_nome or "",
+        "modelo": p.modelo or "",
+        "patrimonio": p.patrimonio or "",
+        "serie": p.serie or "",
+        "so_versao": p.so_versao or "",
+        "processador": p.processador or "",
+        "memoria": p.memoria or "",
+        "hd": p.hd or "",
+        "acessorios": p.acessorios or "",
+        "imei_slot": p.imei_slot or "",
+        "operadora_id": p.operadora_id or "",
+        "operadora_nome": p.operadora_nome or "",
+        "numero": p.numero or "",
+        "tipo_chip": p.tipo_chip or ""
+    }
+
+
+def _log_anterior(log):
+    return {
+        "id": log.id,
+        "usuario": log.usuario,
+        "nivel": log.nivel,
+        "acao": log.acao,
+        "tabela": log.tabela,
+        "registro_id": log.registro_id,
+        "descricao": log.descricao,
+        "dados_antigos": log.dados_antigos,
+        "dados_novos": log.dados_novos,
+        "ip_address": log.ip_address,
+        "created_at": _isoformat_anterior(log.created_at)
+    }
+
+
+def _cronometrar(f, repeticoes):
+    melhor = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = f()
+        duracao = time.perf_counter() - inicio
+        melhor = duracao if melhor is None else min(melhor, duracao)
+    return resultado, melhor * 1000
+
+
+def _comparar(nome, anterior, atual, provider_padrao, provider_app, repeticoes=5):
+    dados_antes, ms_dict_antes = _cronometrar(anterior, repeticoes)
+    dados_depois, ms_dict_depois = _cronometrar(atual, repeticoes)
+    if dados_antes != dados_depois:
+        print(f"FALHA: saída de {nome} difere da implementação anterior")
+        sys.exit(1)
+    _, ms_json_antes = _cronometrar(lambda: provider_padrao.dumps(dados_antes), repeticoes)
+    _, ms_json_depois = _cronometrar(lambda: provider_app.dumps(dados_depois), repeticoes)
+    total_antes = ms_dict_antes + ms_json_antes
+    total_depois = ms_dict_depois + ms_json_depois
+    print(f"{nome:<24}{ms_dict_antes:>10.1f}{ms_json_antes:>10.1f}{ms_dict_depois:>10.1f}"
+          f"{ms_json_depois:>10.1f}{total_antes / total_depois:>9.1f}x")
+
+
+def main():
+    n_ativos = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    n_logs = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+    with tempfile.TemporaryDirectory() as diretorio:
+        app = create_app(_config(diretorio))
+        with app.app_context():
+            db.create_all()
+            _popular(n_ativos, n_logs)
+
+            provider_padrao = DefaultJSONProvider(app)
+            print(f"encoder: {type(app.json).__name__} (orjson {'disponível' if ORJSON_AVAILABLE else 'ausente'})")
+            print(f"{'':<24}{'antes':>20}{'depois':>20}")
+            print(f"{'':<24}{'dicts ms':>10}{'json ms':>10}{'dicts ms':>10}{'json ms':>10}{'ganho':>10}")
+
+            linhas = consultar_projecao()
+            colunas = tuple(fonte_projecao().c.keys())
+            _comparar(
+                f"exportação ({len(linhas)})",
+                lambda: [_exportacao_anterior(p) for p in linhas],
+                lambda: [compilar_serializador(_CAMPOS_EXPORTACAO, colunas)(p) for p in linhas],
+                provider_padrao, app.json,
+            )
+
+            logs = LogAuditoria.query.order_by(LogAuditoria.created_at.desc()).all()
+            for inicio in (0, n_logs - TAMANHO_PAGINA_AUDITORIA):
+                pagina = logs[inicio:inicio + TAMANHO_PAGINA_AUDITORIA]
+                _comparar(
+                    f"auditoria pág. {inicio // TAMANHO_PAGINA_AUDITORIA + 1} ({len(pagina)})",
+                    lambda: [_log_anterior(log) for log in pagina],
+                    lambda: [converter_log_para_dict(log) for log in pagina],
+                    provider_padrao, app.json, repeticoes=20,
+                )
+
+        # Requisição completa (consulta + serialização + resposta)
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess["user"] = {"username": "bench", "full_name": "Usuario Bench", "groups": [], "roles": ["usuario"]}
+            sess["last_activity_ts"] = time.time()
+        for url in ("/api/ativos/export", f"/api/auditoria?limite={TAMANHO_PAGINA_AUDITORIA}"):
+            resposta, ms = _cronometrar(lambda: client.get(url), 3)
+            assert resposta.status_code == 200, resposta.status_code
+            print(f"GET {url}: {ms:.1f} ms, {len(resposta.data) / 1024:.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Benchmark do overhead de sessão por request com listas grandes de grupos LDAP.
+
+Compara o cookie assinado (padrão do Flask) com os stores no servidor.
+Uso (a partir de curiango/):  python -m benchmarks.bench_sessao [n_grupos] [n_requests]
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from app import create_app
+from app.core.config import Config
+
+
+def _config(backend, diretorio):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = "sqlite://"
+        SESSION_BACKEND = backend
+        SESSION_FILE_DIR = diretorio
+        LOG_LEVEL = "ERROR"
+        LOG_FILE = os.path.join(diretorio, "bench.log")
+    return BenchConfig
+
+
+def medir(backend, n_grupos, n_requests):
+    with tempfile.TemporaryDirectory() as diretorio:
+        app = create_app(_config(backend, diretorio))
+        client = app.test_client()
+        grupos = [f"CN=Grupo_{i:03d},OU=Grupos,OU=Empresa,DC=empresa,DC=local" for i in range(n_grupos)]
+        with client.session_transaction() as sess:
+            sess.permanent = True
+            sess["user"] = {"username": "bench", "full_name": "Usuario Bench", "groups": grupos, "roles": ["usuario"]}
+            sess["last_activity"] = datetime.now().isoformat()
+            sess["last_activity_ts"] = time.time()
+
+        cookie = client.get_cookie(app.config["SESSION_COOKIE_NAME"])
+        tamanho_cookie = len(cookie.value) if cookie else 0
+
+        # Aquecimento
+        for _ in range(20):
+            client.get("/auth/session-status")
+
+        inicio = time.perf_counter()
+        for _ in range(n_requests):
+            client.get("/auth/session-status")
+        total = time.perf_counter() - inicio
+        return tamanho_cookie, total / n_requests * 1_000_000
+
+
+def main():
+    n_grupos = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+    n_requests = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    print(f"Grupos por usuário: {n_grupos} | requests: {n_requests}")
+    print(f"{'backend':<10}{'cookie (bytes)':>16}{'us/request':>14}")
+    for backend in ("cookie", "file", "memory"):
+        tamanho, us = medir(backend, n_grupos, n_requests)
+        print(f"{backend:<10}{tamanho:>16}{us:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
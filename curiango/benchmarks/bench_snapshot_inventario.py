@@ -0,0 +1,133 @@
+"""
+Benchmark dos fechamentos diários do estoque.
+
+Cadastra N ativos e M alocações espalhadas em 3 anos, grava um fechamento
+por dia no período e compara: alocações mensais dos últimos 12 meses direto
+de historico_alocacoes x a partir dos fechamentos, e a tendência de 3 anos
+por tipo e por setor (linhas lidas e tempo). Confere que as duas fontes das
+alocações mensais dão o mesmo resultado.
+Uso (a partir de curiango/):  python -m benchmarks.bench_snapshot_inventario [n_ativos] [n_alocacoes]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, insert, text
+
+from app import create_app
+from app.core.config import Config
+from app.core.db import db
+from app.core.timezone_utils import now_local
+from app.models.dominio import Ativo, Colaborador, HistoricoAlocacao, Setor, SnapshotInventario, UnidadeNegocio
+from app.services import snapshot_inventario_service as snapshot
+
+DIAS = 3 * 365
+
+
+def _config(diretorio):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(diretorio, 'bench.db')}"
+        SESSION_BACKEND = "memory"
+        LOG_LEVEL = "ERROR"
+        LOG_FILE = os.path.join(diretorio, "bench.log")
+    return BenchConfig
+
+
+def _popular(n_ativos, n_alocacoes):
+    aleatorio = random.Random(42)
+    db.session.add_all([UnidadeNegocio(nome=f"Unidade {i}") for i in range(1, 6)])
+    db.session.add_all([Setor(nome=f"Setor {i}", email_responsavel=f"setor{i}@empresa.com") for i in range(1, 11)])
+    db.session.flush()
+    db.session.execute(insert(Colaborador), [
+        {"id": i, "nome": f"Colaborador {i}", "email": f"c{i}@empresa.com", "setor_id": i % 10 + 1, "status": "ativo"}
+        for i in range(1, 2001)
+    ])
+    tipos = ("smartphone", "notebook", "desktop", "chip_sim")
+    condicoes = ("novo", "usado", "danificado", "em_manutencao", "inativo")
+    db.session.execute(insert(Ativo), [
+        {"id": i, "tipo": tipos[i % 4], "condicao": condicoes[i % 5], "valor": round(aleatorio.uniform(50, 9000), 2),
+         "unidade_negocio_id": i % 5 + 1, "usuario_atual_id": i % 2000 + 1 if i % 3 else None}
+        for i in range(1, n_ativos + 1)
+    ])
+    agora = datetime.now()
+    db.session.execute(insert(HistoricoAlocacao), [
+        {"ativo_id": aleatorio.randint(1, n_ativos), "colaborador_id": aleatorio.randint(1, 2000),
+         "data_inicio": agora - timedelta(minutes=aleatorio.randint(0, DIAS * 24 * 60))}
+        for _ in range(n_alocacoes)
+    ])
+    # Índices de db/sql/db.sql (PARTE 14), que o create_all não cria
+    db.session.execute(text("CREATE INDEX idx_snapshot_inventario_data ON snapshot_inventario_diario(data, tipo)"))
+    db.session.execute(text("CREATE INDEX idx_historico_alocacoes_inicio ON historico_alocacoes(data_inicio)"))
+    db.session.commit()
+
+
+def _fechar_periodo():
+    """Um fechamento por dia nos últimos 3 anos (os níveis de hoje repetidos: não há histórico deles)"""
+    hoje = now_local().date()
+    estoque = snapshot._totais_estoque()
+    for atras in range(DIAS, 1, -1):
+        dia = hoje - timedelta(days=atras)
+        grupos = {chave: valores + [0] for chave, valores in estoque.items()}
+        for chave, alocacoes in snapshot._alocacoes_do_dia(dia).items():
+            grupos.setdefault(chave, [0, 0, 0, 0])[3] = alocacoes
+        snapshot.gravar_fechamento(dia, grupos)
+    db.session.commit()
+    return snapshot.gerar_snapshot()
+
+
+def _medir(engine, funcao):
+    consultas = []
+    ouvinte = lambda *args, **kwargs: consultas.append(1)
+    event.listen(engine, "before_cursor_execute", ouvinte)
+    try:
+        inicio = time.perf_counter()
+        resultado = funcao()
+        return resultado, (time.perf_counter() - inicio) * 1000, len(consultas)
+    finally:
+        event.remove(engine, "before_cursor_execute", ouvinte)
+
+
+def main():
+    n_ativos = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    n_alocacoes = int(sys.argv[2]) if len(sys.argv) > 2 else 300000
+    with tempfile.TemporaryDirectory() as diretorio:
+        config = _config(diretorio)
+        app = create_app(config)
+        with app.app_context():
+            db.create_all()
+        app = create_app(config)
+        with app.app_context():
+            _popular(n_ativos, n_alocacoes)
+            inicio = time.perf_counter()
+            resumo = _fechar_periodo()
+            print(f"{DIAS} fechamentos gravados em {time.perf_counter() - inicio:.1f} s "
+                  f"({resumo['grupos']} grupos por dia, {db.session.query(SnapshotInventario).count()} linhas detalhadas)")
+
+            janela = datetime.now() - timedelta(days=365)
+            estado = snapshot._estado["ativo"]
+            snapshot._estado["ativo"] = False
+            try:
+                bruto, ms_bruto, consultas_bruto = _medir(db.engine, lambda: snapshot.alocacoes_por_mes(janela))
+            finally:
+                snapshot._estado["ativo"] = estado
+            fechado, ms_fechado, consultas_fechado = _medir(db.engine, lambda: snapshot.alocacoes_por_mes(janela))
+            print(f"alocações mensais (12 meses): histórico {ms_bruto:7.1f} ms ({consultas_bruto} consultas)  "
+                  f"fechamentos {ms_fechado:7.1f} ms ({consultas_fechado} consultas)")
+
+            hoje = now_local().date()
+            for agrupamento in (None, "tipo", "setor"):
+                resultado, ms, consultas = _medir(
+                    db.engine, lambda: snapshot.tendencia(hoje - timedelta(days=DIAS), hoje, agrupamento, "mes"))
+                print(f"tendência 3 anos por {agrupamento or 'total':<6} {ms:7.1f} ms ({consultas} consultas, "
+                      f"{len(resultado['periodos'])} períodos x {len(resultado['series'])} séries)")
+
+            if bruto != fechado:
+                print(f"DIVERGÊNCIA: histórico {bruto} x fechamentos {fechado}")
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -215,7 +215,7 @@ CREATE TABLE IF NOT EXISTS historico_alocacoes (
 -- Tabela: log_auditoria
 -- Descrição: Auditoria detalhada de ações (CRUD, transferências, login/logout).
 CREATE TABLE IF NOT EXISTS log_auditoria (
-  id INT AUTO_INCREMENT PRIMARY KEY,                                -- Identificador único
+  id INT AUTO_INCREMENT,                                            -- Identificador único
   usuario VARCHAR(100) NOT NULL,                                    -- Usuário responsável
   nivel VARCHAR(10) NOT NULL,                                       -- Nível do log: INFO/DEBUG/WARN/ERROR
   acao ENUM('CREATE','UPDATE','DELETE','TRANSFER','REMOVE_ALLOCATION','LOGIN','LOGOUT','READ') NOT NULL, -- Ação
@@ -225,8 +225,15 @@ CREATE TABLE IF NOT EXISTS log_auditoria (
   dados_antigos JSON,                                               -- Snapshot anterior (quando aplicável)
   dados_novos JSON,                                                 -- Snapshot novo (quando aplicável)
   ip_address VARCHAR(45),                                           -- IP do cliente
-  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP                    -- Data/hora do evento
-) COMMENT='Log detalhado de auditoria';
+  created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,          -- Data/hora do evento
+  PRIMARY KEY (id, created_at)                                      -- created_at na PK: exigido pelo particionamento
+) COMMENT='Log detalhado de auditoria'
+-- Partições mensais; a aplicação cria as próximas e descarta as já arquivadas
+-- (flask --app manage arquivar-auditoria)
+PARTITION BY RANGE (UNIX_TIMESTAMP(created_at)) (
+  PARTITION p202610 VALUES LESS THAN (UNIX_TIMESTAMP('2026-11-01 00:00:00')),
+  PARTITION pmax VALUES LESS THAN MAXVALUE
+);
 
 -- =========================
 -- PARTE 5: Views para Relatórios/Dashboard
@@ -280,6 +287,9 @@ CREATE INDEX IF NOT EXISTS idx_ativos_usuario ON ativos(usuario_atual_id);
 CREATE INDEX IF NOT EXISTS idx_ativos_unidade ON ativos(unidade_negocio_id);
 CREATE INDEX IF NOT EXISTS idx_colaboradores_status ON colaboradores(status);
 CREATE INDEX IF NOT EXISTS idx_log_created ON log_auditoria(created_at);
+CREATE INDEX IF NOT EXISTS idx_log_usuario ON log_auditoria(usuario, created_at);
+CREATE INDEX IF NOT EXISTS idx_log_acao ON log_auditoria(acao, created_at);
+CREATE INDEX IF NOT EXISTS idx_log_tabela_registro ON log_auditoria(tabela, registro_id, created_at);
 
 -- =========================
 -- PARTE 7: Seeds (dados iniciais)
@@ -411,4 +421,147 @@ ALTER TABLE manutencoes DROP COLUMN IF EXISTS previsao_conclusao;
 ALTER TABLE manutencoes DROP COLUMN IF EXISTS data_conclusao;
 ALTER TABLE manutencoes DROP COLUMN IF EXISTS data_manutencao;
 ALTER TABLE manutencoes DROP COLUMN IF EXISTS descricao_servico;
-ALTER TABLE manutencoes DROP COLUMN IF EXISTS valor;
\ No newline at end of file
+ALTER TABLE manutencoes DROP COLUMN IF EXISTS valor;
+-- =========================
+-- PARTE 10: Versionamento de Tabelas
+-- =========================
+
+-- Tabela: versoes_tabela
+-- Descrição: Contador de versão por tabela, incrementado pela aplicação a cada escrita.
+-- Usado para ETags (GET condicional) e invalidação de caches entre workers.
+CREATE TABLE IF NOT EXISTS versoes_tabela (
+  tabela VARCHAR(64) PRIMARY KEY,                                   -- Nome da tabela versionada
+  versao BIGINT NOT NULL DEFAULT 0,                                 -- Incrementado a cada escrita
+  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP  -- Última alteração
+) COMMENT='Versão por tabela para cache HTTP e invalidação';
+
+-- =========================
+-- PARTE 11: Projeção de Leitura de Ativos
+-- =========================
+
+-- Tabela: ativos_projecao
+-- Descrição: Uma linha por ativo com subtipo, marca/operadora, usuário e unidade já resolvidos.
+-- Mantida pela aplicação na mesma transação de cada escrita; reconstrução completa com
+-- `flask --app manage rebuild-projecao-ativos`.
+CREATE TABLE IF NOT EXISTS ativos_projecao (
+  ativo_id INT PRIMARY KEY,                                         -- Ativo de origem
+  tipo VARCHAR(20) NOT NULL,                                        -- Tipo do ativo
+  condicao VARCHAR(20),                                             -- Condição do ativo
+  valor DECIMAL(10,2),                                              -- Valor do ativo
+  usuario_atual_id INT NULL,                                        -- Colaborador atual
+  usuario_atual_nome VARCHAR(150),                                  -- Nome do colaborador atual
+  unidade_negocio_id INT NULL,                                      -- Unidade de negócio
+  unidade_negocio_nome VARCHAR(150),                                -- Nome da unidade
+  subtipo_id INT NULL,                                              -- Id em smartphones/computadores/chips_sim
+  marca_id INT NULL,                                                -- Marca (smartphone/computador)
+  marca_nome VARCHAR(100),                                          -- Nome da marca
+  modelo VARCHAR(100),                                              -- Modelo (smartphone/computador)
+  imei_slot VARCHAR(20),                                            -- IMEI (smartphone)
+  tipo_computador VARCHAR(20),                                      -- notebook/desktop
+  patrimonio VARCHAR(50),                                           -- Patrimônio (computador)
+  serie VARCHAR(100),                                               -- Série (computador)
+  so_versao VARCHAR(100),                                           -- Sistema operacional
+  processador VARCHAR(150),                                         -- Processador
+  memoria VARCHAR(50),                                              -- Memória
+  hd VARCHAR(100),                                                  -- Disco
+  acessorios TEXT,                                                  -- Acessórios
+  operadora_id INT NULL,                                            -- Operadora (chip)
+  operadora_nome VARCHAR(100),                                      -- Nome da operadora
+  numero VARCHAR(20),                                               -- Número (chip)
+  tipo_chip VARCHAR(20),                                            -- voz/dados
+  busca TEXT,                                                       -- Texto normalizado para busca
+  created_at TIMESTAMP NULL,                                        -- Criação do ativo
+  atualizado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP,                -- Última atualização da linha
+  FOREIGN KEY (ativo_id) REFERENCES ativos(id) ON DELETE CASCADE    -- Some junto com o ativo
+) COMMENT='Projeção desnormalizada de ativos para leitura';
+
+CREATE INDEX IF NOT EXISTS idx_ativos_projecao_tipo ON ativos_projecao(tipo, condicao);
+CREATE INDEX IF NOT EXISTS idx_ativos_projecao_usuario ON ativos_projecao(usuario_atual_id);
+CREATE INDEX IF NOT EXISTS idx_ativos_projecao_marca ON ativos_projecao(marca_id);
+CREATE INDEX IF NOT EXISTS idx_ativos_projecao_operadora ON ativos_projecao(operadora_id);
+CREATE INDEX IF NOT EXISTS idx_ativos_projecao_unidade ON ativos_projecao(unidade_negocio_id);
+
+-- =========================
+-- PARTE 12: Busca Textual na Auditoria
+-- =========================
+
+-- Tabela: log_auditoria_busca
+-- Descrição: Cópia de log_auditoria.descricao com índice FULLTEXT (tabelas particionadas
+-- não suportam FULLTEXT). Gravada junto com cada log e limpa pelo arquivamento.
+CREATE TABLE IF NOT EXISTS log_auditoria_busca (
+  log_id INT PRIMARY KEY,                                           -- log_auditoria.id
+  created_at TIMESTAMP NOT NULL,                                    -- Mesmo created_at do log
+  descricao TEXT NOT NULL,                                          -- Mesma descrição do log
+  FULLTEXT KEY idx_log_busca_descricao (descricao)
+) COMMENT='Índice textual das descrições de auditoria';
+
+CREATE INDEX IF NOT EXISTS idx_log_busca_created ON log_auditoria_busca(created_at);
+
+-- =========================
+-- PARTE 13: Inventário por Agente
+-- =========================
+
+-- Tabela: inventario_agente
+-- Descrição: Último relatório de hardware enviado pelo agente de cada máquina e a
+-- impressão (hash) dos fatos reportados; relatórios com a mesma impressão não geram escrita.
+CREATE TABLE IF NOT EXISTS inventario_agente (
+  ativo_id INT PRIMARY KEY,                                         -- Máquina (ativo do tipo notebook/desktop)
+  impressao CHAR(32) NOT NULL,                                      -- Hash dos fatos do último relatório
+  hostname VARCHAR(100),                                            -- Nome da máquina reportado pelo agente
+  dados JSON,                                                       -- Fatos do último relatório
+  recebido_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP,                  -- Último relatório com mudança
+  FOREIGN KEY (ativo_id) REFERENCES ativos(id) ON DELETE CASCADE
+) COMMENT='Estado do inventário automático por máquina';
+
+-- Agentes sem patrimônio configurado se identificam pelo número de série
+CREATE INDEX IF NOT EXISTS idx_computadores_serie ON computadores(serie);
+
+-- =========================
+-- PARTE 14: Fechamento Diário do Estoque
+-- =========================
+
+-- Tabela: snapshot_inventario_diario
+-- Descrição: Totais do estoque ao fim de cada dia por tipo, condição, unidade e setor,
+-- gravados pelo comando "flask snapshot-inventario" (reexecutar o mesmo dia substitui as linhas).
+-- Gráficos de tendência leem estes totais em vez de percorrer ativos e historico_alocacoes.
+CREATE TABLE IF NOT EXISTS snapshot_inventario_diario (
+  id INT AUTO_INCREMENT PRIMARY KEY,                                -- Identificador único
+  data DATE NOT NULL,                                               -- Dia fechado (horário local)
+  tipo VARCHAR(20) NOT NULL,                                        -- Tipo do ativo
+  condicao VARCHAR(20),                                             -- Condição do ativo
+  unidade_negocio_id INT,                                           -- Unidade do ativo (NULL = sem unidade)
+  setor_id INT,                                                     -- Setor do usuário atual (NULL = sem usuário/setor)
+  quantidade INT NOT NULL DEFAULT 0,                                -- Ativos no grupo
+  alocados INT NOT NULL DEFAULT 0,                                  -- Ativos do grupo com usuário
+  valor_total DECIMAL(14,2) NOT NULL DEFAULT 0,                     -- Soma de ativos.valor
+  alocacoes INT NOT NULL DEFAULT 0,                                 -- Alocações iniciadas no dia
+  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP                    -- Quando o fechamento foi gravado
+) COMMENT='Fechamento diário do estoque para gráficos de tendência';
+
+CREATE INDEX IF NOT EXISTS idx_snapshot_inventario_data ON snapshot_inventario_diario(data, tipo);
+
+-- Tabela: snapshot_inventario_dia
+-- Descrição: Totais de cada fechamento (uma linha por dia), lidos pelas alocações mensais
+-- do dashboard e pela tendência sem agrupamento.
+CREATE TABLE IF NOT EXISTS snapshot_inventario_dia (
+  data DATE PRIMARY KEY,                                            -- Dia fechado (horário local)
+  quantidade INT NOT NULL DEFAULT 0,                                -- Ativos no estoque
+  alocados INT NOT NULL DEFAULT 0,                                  -- Ativos com usuário
+  valor_total DECIMAL(14,2) NOT NULL DEFAULT 0,                     -- Soma de ativos.valor
+  alocacoes INT NOT NULL DEFAULT 0,                                 -- Alocações iniciadas no dia
+  grupos INT NOT NULL DEFAULT 0,                                    -- Linhas do dia em snapshot_inventario_diario
+  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP                    -- Quando o fechamento foi gravado
+) COMMENT='Totais diários do estoque';
+
+-- Faixas de data_inicio (dias ainda não fechados no snapshot)
+CREATE INDEX IF NOT EXISTS idx_historico_alocacoes_inicio ON historico_alocacoes(data_inicio);
+
+-- =========================
+-- PARTE 15: Custódia por Data
+-- =========================
+
+-- Intervalos de alocação por ativo e por colaborador: "quem estava com o ativo X na
+-- data D" lê só as alocações do ativo iniciadas antes de D, e o teste de data_fim
+-- (NULL = em aberto) é resolvido no próprio índice.
+CREATE INDEX IF NOT EXISTS idx_historico_ativo_periodo ON historico_alocacoes(ativo_id, data_inicio, data_fim);
+CREATE INDEX IF NOT EXISTS idx_historico_colaborador_periodo ON historico_alocacoes(colaborador_id, data_inicio, data_fim);
@@ -0,0 +1,15 @@
+-- Migração: Versionamento por tabela para cache HTTP (ETag/Last-Modified)
+-- Data: 2026-10-19
+-- Descrição: Cria a tabela versoes_tabela, incrementada pela aplicação a cada
+-- escrita. Sem ela a aplicação funciona normalmente, apenas sem ETags.
+
+CREATE TABLE IF NOT EXISTS versoes_tabela (
+  tabela VARCHAR(64) PRIMARY KEY,
+  versao BIGINT NOT NULL DEFAULT 0,
+  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) COMMENT='Versão por tabela para cache HTTP e invalidação';
+
+INSERT INTO versoes_tabela (tabela, versao) VALUES
+  ('marcas', 0), ('operadoras', 0), ('unidades_negocio', 0), ('setores', 0),
+  ('colaboradores', 0), ('ativos', 0), ('smartphones', 0), ('computadores', 0), ('chips_sim', 0)
+ON DUPLICATE KEY UPDATE tabela=VALUES(tabela);
@@ -0,0 +1,71 @@
+-- Migração: Projeção de leitura de ativos (ativos_projecao)
+-- Data: 2026-10-19
+-- Descrição: Cria a tabela desnormalizada usada pelas leituras de ativos
+-- (listagem, detalhe, exportação, descrições). A aplicação mantém as linhas a
+-- cada escrita; após aplicar, popule com:
+--   flask --app manage rebuild-projecao-ativos
+-- (equivalente ao INSERT ... SELECT abaixo).
+
+CREATE TABLE IF NOT EXISTS ativos_projecao (
+  ativo_id INT PRIMARY KEY,
+  tipo VARCHAR(20) NOT NULL,
+  condicao VARCHAR(20),
+  valor DECIMAL(10,2),
+  usuario_atual_id INT NULL,
+  usuario_atual_nome VARCHAR(150),
+  unidade_negocio_id INT NULL,
+  unidade_negocio_nome VARCHAR(150),
+  subtipo_id INT NULL,
+  marca_id INT NULL,
+  marca_nome VARCHAR(100),
+  modelo VARCHAR(100),
+  imei_slot VARCHAR(20),
+  tipo_computador VARCHAR(20),
+  patrimonio VARCHAR(50),
+  serie VARCHAR(100),
+  so_versao VARCHAR(100),
+  processador VARCHAR(150),
+  memoria VARCHAR(50),
+  hd VARCHAR(100),
+  acessorios TEXT,
+  operadora_id INT NULL,
+  operadora_nome VARCHAR(100),
+  numero VARCHAR(20),
+  tipo_chip VARCHAR(20),
+  busca TEXT,
+  created_at TIMESTAMP NULL,
+  atualizado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  FOREIGN KEY (ativo_id) REFERENCES ativos(id) ON DELETE CASCADE
+) COMMENT='Projeção desnormalizada de ativos para leitura';
+
+CREATE INDEX IF NOT EXISTS idx_ativos_projecao_tipo ON ativos_projecao(tipo, condicao);
+CREATE INDEX IF NOT EXISTS idx_ativos_projecao_usuario ON ativos_projecao(usuario_atual_id);
+CREATE INDEX IF NOT EXISTS idx_ativos_projecao_marca ON ativos_projecao(marca_id);
+CREATE INDEX IF NOT EXISTS idx_ativos_projecao_operadora ON ativos_projecao(operadora_id);
+CREATE INDEX IF NOT EXISTS idx_ativos_projecao_unidade ON ativos_projecao(unidade_negocio_id);
+
+DELETE FROM ativos_projecao;
+INSERT INTO ativos_projecao
+SELECT
+  a.id, a.tipo, a.condicao, a.valor,
+  a.usuario_atual_id, c.nome,
+  a.unidade_negocio_id, un.nome,
+  COALESCE(s.id, comp.id, ch.id),
+  COALESCE(s.marca_id, comp.marca_id), COALESCE(m.nome, m2.nome),
+  COALESCE(s.modelo, comp.modelo), s.imei_slot,
+  comp.tipo_computador, comp.patrimonio, comp.serie, comp.so_versao,
+  comp.processador, comp.memoria, comp.hd,
+  COALESCE(s.acessorios, comp.acessorios),
+  ch.operadora_id, op.nome, ch.numero, ch.tipo,
+  LOWER(CONCAT_WS(' ', COALESCE(s.modelo, comp.modelo), COALESCE(m.nome, m2.nome), s.imei_slot,
+                  comp.patrimonio, comp.serie, comp.processador, ch.numero, op.nome)),
+  a.created_at, CURRENT_TIMESTAMP
+FROM ativos a
+LEFT JOIN colaboradores c ON c.id = a.usuario_atual_id
+LEFT JOIN unidades_negocio un ON un.id = a.unidade_negocio_id
+LEFT JOIN smartphones s ON s.ativo_id = a.id
+LEFT JOIN marcas m ON m.id = s.marca_id
+LEFT JOIN computadores comp ON comp.ativo_id = a.id
+LEFT JOIN marcas m2 ON m2.id = comp.marca_id
+LEFT JOIN chips_sim ch ON ch.ativo_id = a.id
+LEFT JOIN operadoras op ON op.id = ch.operadora_id;
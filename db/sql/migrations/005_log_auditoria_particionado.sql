@@ -0,0 +1,23 @@
+-- Migração: Particionamento mensal de log_auditoria
+-- Data: 2026-10-19
+-- Descrição: Particiona log_auditoria por mês de created_at para que a retenção
+-- descarte meses inteiros (DROP PARTITION) em vez de DELETEs longos, e consultas
+-- por período leiam apenas as partições do intervalo. O particionamento exige
+-- created_at na chave primária. Todo o histórico existente fica na primeira
+-- partição; as seguintes são criadas pela aplicação:
+--   flask --app manage arquivar-auditoria
+-- ATENÇÃO: o ALTER ... PARTITION BY reescreve a tabela; em bases grandes,
+-- execute em janela de manutenção (ou arquive antes com o comando acima).
+
+UPDATE log_auditoria SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL;
+
+ALTER TABLE log_auditoria
+  MODIFY created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  DROP PRIMARY KEY,
+  ADD PRIMARY KEY (id, created_at);
+
+ALTER TABLE log_auditoria
+PARTITION BY RANGE (UNIX_TIMESTAMP(created_at)) (
+  PARTITION p202610 VALUES LESS THAN (UNIX_TIMESTAMP('2026-11-01 00:00:00')),
+  PARTITION pmax VALUES LESS THAN MAXVALUE
+);
@@ -0,0 +1,22 @@
+-- Migração: Índices de busca da auditoria
+-- Data: 2026-10-19
+-- Descrição: Índices compostos (filtro + created_at) para os filtros exatos da
+-- tela de auditoria e tabela log_auditoria_busca com FULLTEXT na descrição
+-- (a tabela particionada não aceita FULLTEXT). Sem a tabela, a busca por
+-- texto usa LIKE. O INSERT abaixo copia as descrições existentes.
+
+CREATE INDEX IF NOT EXISTS idx_log_usuario ON log_auditoria(usuario, created_at);
+CREATE INDEX IF NOT EXISTS idx_log_acao ON log_auditoria(acao, created_at);
+CREATE INDEX IF NOT EXISTS idx_log_tabela_registro ON log_auditoria(tabela, registro_id, created_at);
+
+CREATE TABLE IF NOT EXISTS log_auditoria_busca (
+  log_id INT PRIMARY KEY,
+  created_at TIMESTAMP NOT NULL,
+  descricao TEXT NOT NULL,
+  FULLTEXT KEY idx_log_busca_descricao (descricao)
+) COMMENT='Índice textual das descrições de auditoria';
+
+CREATE INDEX IF NOT EXISTS idx_log_busca_created ON log_auditoria_busca(created_at);
+
+INSERT IGNORE INTO log_auditoria_busca (log_id, created_at, descricao)
+SELECT id, created_at, descricao FROM log_auditoria;
@@ -0,0 +1,17 @@
+-- Migração: Inventário de hardware por agente
+-- Data: 2026-10-19
+-- Descrição: Tabela inventario_agente com a impressão (hash) do último relatório
+-- de cada máquina, usada por POST /api/agentes/inventario para descartar
+-- relatórios sem mudança, e índice em computadores.serie para identificar
+-- máquinas sem patrimônio configurado no agente.
+
+CREATE TABLE IF NOT EXISTS inventario_agente (
+  ativo_id INT PRIMARY KEY,
+  impressao CHAR(32) NOT NULL,
+  hostname VARCHAR(100),
+  dados JSON,
+  recebido_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  FOREIGN KEY (ativo_id) REFERENCES ativos(id) ON DELETE CASCADE
+) COMMENT='Estado do inventário automático por máquina';
+
+CREATE INDEX IF NOT EXISTS idx_computadores_serie ON computadores(serie);
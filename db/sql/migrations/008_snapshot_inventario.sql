@@ -0,0 +1,35 @@
+-- Migração: Fechamento diário do estoque
+-- Data: 2026-10-19
+-- Descrição: Tabelas snapshot_inventario_diario (totais do estoque por dia, tipo,
+-- condição, unidade e setor) e snapshot_inventario_dia (totais de cada dia),
+-- gravadas pelo comando "flask snapshot-inventario" (agendar para logo após a
+-- meia-noite), e índice em historico_alocacoes.data_inicio para as contagens de
+-- alocações dos dias ainda não fechados.
+
+CREATE TABLE IF NOT EXISTS snapshot_inventario_diario (
+  id INT AUTO_INCREMENT PRIMARY KEY,
+  data DATE NOT NULL,
+  tipo VARCHAR(20) NOT NULL,
+  condicao VARCHAR(20),
+  unidade_negocio_id INT,
+  setor_id INT,
+  quantidade INT NOT NULL DEFAULT 0,
+  alocados INT NOT NULL DEFAULT 0,
+  valor_total DECIMAL(14,2) NOT NULL DEFAULT 0,
+  alocacoes INT NOT NULL DEFAULT 0,
+  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+) COMMENT='Fechamento diário do estoque para gráficos de tendência';
+
+CREATE INDEX IF NOT EXISTS idx_snapshot_inventario_data ON snapshot_inventario_diario(data, tipo);
+
+CREATE TABLE IF NOT EXISTS snapshot_inventario_dia (
+  data DATE PRIMARY KEY,
+  quantidade INT NOT NULL DEFAULT 0,
+  alocados INT NOT NULL DEFAULT 0,
+  valor_total DECIMAL(14,2) NOT NULL DEFAULT 0,
+  alocacoes INT NOT NULL DEFAULT 0,
+  grupos INT NOT NULL DEFAULT 0,
+  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+) COMMENT='Totais diários do estoque';
+
+CREATE INDEX IF NOT EXISTS idx_historico_alocacoes_inicio ON historico_alocacoes(data_inicio);
@@ -0,0 +1,9 @@
+-- Migração: Custódia por data
+-- Data: 2026-10-19
+-- Descrição: Índices de intervalo em historico_alocacoes para as consultas de
+-- custódia em uma data (GET /api/ativos/<id>/custodia, GET /api/colaboradores/<id>/custodia
+-- e as versões em lote): cada consulta lê só as alocações do ativo/colaborador
+-- iniciadas antes da data, com data_fim disponível no próprio índice.
+
+CREATE INDEX IF NOT EXISTS idx_historico_ativo_periodo ON historico_alocacoes(ativo_id, data_inicio, data_fim);
+CREATE INDEX IF NOT EXISTS idx_historico_colaborador_periodo ON historico_alocacoes(colaborador_id, data_inicio, data_fim);